@@ -2,9 +2,14 @@ import json
 import logging
 import asyncio
 import datetime
-from typing import Optional, Dict, Any, List
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
 
 from backend.infrastructure.market.akshare_tool import AkShareTool
+from backend.infrastructure.market.quote_cache import QuoteCache, is_cacheable
 
 logger = logging.getLogger(__name__)
 
@@ -231,188 +236,261 @@ def render_market_context_markdown(context: Dict[str, Any]) -> str:
     return "\n".join(sections) if sections else ""
 
 
-# Function: get_market_context
-# Complexity: O(N) - Multiple API calls to gather market context
-async def get_market_context(include_history: bool = False, as_markdown: bool = False) -> Dict[str, Any]:
-    """
-    Get market context information including:
-    - Current timestamp
-    - Major indices (A-share, HK, US)
-    - Sector/Concept fund flow (Top 5)
-    - Macro summary (GDP, CPI, PMI)
+# Per-namespace TTLs (seconds) of the cached context sections
+SECTION_TTLS: Dict[str, float] = {
+    "indices": 60.0,
+    "turnover": 300.0,
+    "fund_flow": 300.0,
+    "boards": 300.0,
+    "news": 600.0,
+    "indices_history": 1800.0,
+    "calendar": 1800.0,
+    "macro": 6 * 3600.0,
+}
+# Per-namespace upstream timeouts (seconds); a slow section is reported in
+# "errors" instead of holding up the whole context
+SECTION_TIMEOUTS: Dict[str, float] = {
+    "indices_history": 25.0,
+    "macro": 20.0,
+}
+DEFAULT_SECTION_TIMEOUT = 15.0
+# Dedicated, bounded pool for section loaders (one build runs 18 sections), so they
+# don't queue behind other asyncio.to_thread users on the default executor
+SECTION_WORKERS = 24
+_section_pool = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="market-context")
+# How long a section may wait for a free pool thread (e.g. while timed-out loaders of an
+# earlier build still hold them) before it is reported as failed
+SECTION_QUEUE_TIMEOUT = 30.0
+# The assembled context is rebuilt at most this often; stale sections are
+# refetched then, fresh ones come from the section cache
+SNAPSHOT_TTL = min(SECTION_TTLS.values())
+
+CN_INDICES = ["000001", "399001", "399006", "000300"]
+HK_INDICES = ["HSI", "HSTECH"]
+US_INDICES = [".IXIC", ".DJI", ".INX"]
+MACRO_INDICATORS = ["GDP", "CPI", "LPR", "PPI"]
+
+
+class MarketContextService:
     """
-    logger.info("Gathering Market Context...")
+    Builds the market context shared by personal-finance runs.
 
-    loop = asyncio.get_running_loop()
-
-    def _fetch_data():
-        ak_tool = AkShareTool()
-        context = {
-            "timestamp": datetime.datetime.now().isoformat(),
-            "indices": {
-                "A_Share": [],
-                "HK": [],
-                "US": []
-            },
-            "market_turnover": {},
-            "fund_flow": {
-                "north": [],
-                "south": []
-            },
-            "sectors": [],
-            "concepts": [],
-            "macro": {},
-            "errors": []
-        }
+    Independent sections (turnover, fund flow, indices, boards, macro, calendar,
+    news) are fetched concurrently, each with its own timeout, and cached with
+    section-specific TTLs. The assembled context and its rendered markdown are
+    kept as one snapshot, so concurrent users share a single build.
+    """
 
-        # 0. Market Turnover & Fund Flow
-        try:
-            # Turnover: fetch last 5 days
-            turnover_hist = ak_tool.get_market_turnover(market="CN", 
-                start_date=(datetime.datetime.now() - datetime.timedelta(days=7)).strftime("%Y%m%d"))
-            if isinstance(turnover_hist, list):
-                context["market_turnover"] = turnover_hist
-        except Exception as e:
-            context["errors"].append(f"Market Turnover error: {str(e)}")
+    def __init__(
+        self,
+        tool: Optional[AkShareTool] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        snapshot_ttl: float = SNAPSHOT_TTL,
+    ):
+        self._tool = tool
+        self._tool_lock = threading.Lock()
+        self.timeouts = {**SECTION_TIMEOUTS, **(timeouts or {})}
+        self.snapshot_ttl = snapshot_ttl
+        self._cache = QuoteCache(ttls={**SECTION_TTLS, **(ttls or {})})
+        self._snapshot: Optional[Dict[str, Any]] = None
+        # loop -> in-progress build task that concurrent callers await
+        self._building: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = (
+            weakref.WeakKeyDictionary()
+        )
 
-        try:
-            # Fund Flow
-            north_flow = ak_tool.get_fund_flow(target="", flow_type="north")
-            south_flow = ak_tool.get_fund_flow(target="", flow_type="south")
-            # Usually returns history list.
-            context["fund_flow"]["north"] = north_flow[:5] if isinstance(north_flow, list) else []
-            context["fund_flow"]["south"] = south_flow[:5] if isinstance(south_flow, list) else []
-        except Exception as e:
-            context["errors"].append(f"Fund Flow error: {str(e)}")
+    @property
+    def tool(self) -> AkShareTool:
+        if self._tool is None:
+            with self._tool_lock:
+                if self._tool is None:
+                    self._tool = AkShareTool()
+        return self._tool
+
+    async def get_context(self, as_markdown: bool = False) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot["expires"] <= time.monotonic():
+            snapshot = await self._refresh()
+
+        context = dict(snapshot["context"])
+        if as_markdown:
+            if snapshot["markdown"] is None:
+                snapshot["markdown"] = render_market_context_markdown(snapshot["context"])
+            context["markdown"] = snapshot["markdown"]
+        return context
 
-        # 1. A-Share Indices
-        try:
-            # Use unified get_indices_quote for key indices
-            # get_indices_quote(market="CN") returns:
-            # [{ "symbol": "000001", "name": "上证指数", "price": ..., "change_percent": ... }, ...]
-            cn_indices = ak_tool.get_indices_quote(market="CN")
-            
-            # Filter for specific indices we want to display
-            target_cn_indices = ["000001", "399001", "399006", "000300"]
-            a_indices = []
-            
-            for item in cn_indices:
-                if item.get("symbol") in target_cn_indices:
-                    a_indices.append(item)
-            
-            # Sort by target list order
-            a_indices.sort(key=lambda x: target_cn_indices.index(x.get("symbol")) if x.get("symbol") in target_cn_indices else 999)
-            
-            context["indices"]["A_Share"] = a_indices
-        except Exception as e:
-            context["errors"].append(f"A-Share Indices error: {str(e)}")
+    async def _refresh(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        task = self._building.get(loop)
+        if task is None:
+            task = loop.create_task(self._build())
+            self._building[loop] = task
+            task.add_done_callback(lambda _: self._building.pop(loop, None))
+        # Shielded: one caller giving up must not cancel the build for the others
+        return await asyncio.shield(task)
+
+    def invalidate(self) -> None:
+        """Drop the snapshot and every cached section."""
+        self._snapshot = None
+        self._cache.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        """Section cache hit / miss / coalesced counters."""
+        return self._cache.stats()
+
+    async def _section(self, namespace: str, key: Any, label: Optional[str], loader) -> Tuple[Any, Optional[str]]:
+        """Fetch one section through the cache; returns (value, error message)."""
+        timeout = self.timeouts.get(namespace, DEFAULT_SECTION_TIMEOUT)
+        loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+
+        def load():
+            try:
+                loop.call_soon_threadsafe(started.set)
+            except RuntimeError:
+                pass  # caller's loop already closed; still fill the cache
+            return self._cache.get_or_load(namespace, key, loader, None, is_cacheable)
 
-        # 2. HK Indices
+        future = loop.run_in_executor(_section_pool, load)
         try:
-            hk_indices = ak_tool.get_indices_quote(market="HK")
-            target_hk_indices = ["HSI", "HSTECH"] # symbol returned by get_indices_quote for HK is usually the index code
-            # Note: get_indices_quote for HK might return symbols like "HSI", "HSCEI", "HSTECH"
-            
-            hk_data = []
-            for item in hk_indices:
-                 if item.get("symbol") in target_hk_indices:
-                    hk_data.append(item)
-                    
-            context["indices"]["HK"] = hk_data
+            # The timeout measures the upstream call: it starts once a pool thread picks
+            # the section up, not when the section is queued
+            try:
+                await asyncio.wait_for(started.wait(), timeout=SECTION_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                future.cancel()
+                error = f"no free worker after {SECTION_QUEUE_TIMEOUT:g}s"
+            else:
+                value = await asyncio.wait_for(future, timeout=timeout)
+                return value, None
+        except asyncio.TimeoutError:
+            # The worker thread keeps running and still fills the cache for the next build
+            error = f"timed out after {timeout:g}s"
         except Exception as e:
-             context["errors"].append(f"HK Indices error: {str(e)}")
+            error = str(e)
+        logger.warning(f"Market context section {namespace}:{key} failed: {error}")
+        return None, f"{label} error: {error}" if label else None
+
+    async def _build(self) -> Dict[str, Any]:
+        logger.info("Gathering Market Context...")
+        tool = self.tool
+        now = datetime.datetime.now()
+        today = now.strftime("%Y%m%d")
+        tomorrow = (now + datetime.timedelta(days=1)).strftime("%Y%m%d")
+        turnover_start = (now - datetime.timedelta(days=7)).strftime("%Y%m%d")
+
+        # (result name, cache namespace, cache key, error label, loader)
+        jobs = [
+            ("turnover", "turnover", turnover_start, "Market Turnover",
+             lambda: tool.get_market_turnover(market="CN", start_date=turnover_start)),
+            ("north", "fund_flow", "north", "Fund Flow",
+             lambda: tool.get_fund_flow(target="", flow_type="north")),
+            ("south", "fund_flow", "south", "Fund Flow",
+             lambda: tool.get_fund_flow(target="", flow_type="south")),
+            ("A_Share", "indices", "CN", "A-Share Indices",
+             lambda: _pick_indices(tool.get_indices_quote(market="CN"), CN_INDICES)),
+            ("HK", "indices", "HK", "HK Indices",
+             lambda: _pick_indices(tool.get_indices_quote(market="HK"), HK_INDICES)),
+            ("US", "indices", "US", "US Indices",
+             lambda: _pick_indices(tool.get_indices_quote(market="US"), US_INDICES)),
+            *[
+                (f"history_{market}", "indices_history", (market, today), "Indices History",
+                 lambda market=market: tool.get_indices_history(market, days=7))
+                for market in ("CN", "HK", "US")
+            ],
+            ("sectors", "boards", "industry", "Sector Flow",
+             lambda: tool.get_board_info(board_type="industry", info_type="rank")),
+            ("concepts", "boards", "concept", "Concept Flow",
+             lambda: tool.get_board_info(board_type="concept", info_type="rank")),
+            # Macro failures are not reported, a missing indicator is simply omitted
+            *[
+                (f"macro_{ind}", "macro", ind, None, lambda ind=ind: tool.get_macro(ind))
+                for ind in MACRO_INDICATORS
+            ],
+            ("calendar_today", "calendar", today, "Calendar",
+             lambda: tool.get_economic_calendar(today)),
+            ("calendar_tomorrow", "calendar", tomorrow, "Calendar",
+             lambda: tool.get_economic_calendar(tomorrow)),
+            ("news", "news", 5, "News", lambda: tool.get_headline_news(limit=5)),
+        ]
+
+        outcomes = await asyncio.gather(
+            *(self._section(namespace, key, label, loader) for _, namespace, key, label, loader in jobs)
+        )
+        results = {name: value for (name, *_), (value, _) in zip(jobs, outcomes)}
+        # Report each failing section once, in section order
+        errors = list(dict.fromkeys(error for _, error in outcomes if error))
 
-        # 3. US Indices
-        try:
-            us_indices = ak_tool.get_indices_quote(market="US")
-            target_us_indices = [".IXIC", ".DJI", ".INX"]
-            
-            us_data = []
-            for item in us_indices:
-                if item.get("symbol") in target_us_indices:
-                    us_data.append(item)
-                    
-            context["indices"]["US"] = us_data
-        except Exception as e:
-             context["errors"].append(f"US Indices error: {str(e)}")
+        def as_list(value) -> List[Any]:
+            return value if isinstance(value, list) else []
 
-        # 4. Indices History (Optional/Default)
-        # Using a timeout or separate try block to avoid blocking main context if history is slow
-        try:
-            # We enable history by default for now as requested, limiting to 7 days
-            # indices_history structure: { "CN": { "000001": [...] }, "HK": ..., "US": ... }
-            context["indices_history"] = {
-                "CN": ak_tool.get_indices_history("CN", days=7),
-                "HK": ak_tool.get_indices_history("HK", days=7),
-                "US": ak_tool.get_indices_history("US", days=7)
-            }
-        except Exception as e:
-            context["errors"].append(f"Indices History error: {str(e)}")
-            context["indices_history"] = {}
+        context = {
+            "timestamp": now.isoformat(),
+            "indices": {
+                "A_Share": as_list(results["A_Share"]),
+                "HK": as_list(results["HK"]),
+                "US": as_list(results["US"]),
+            },
+            "market_turnover": as_list(results["turnover"]),
+            "fund_flow": {
+                "north": as_list(results["north"])[:5],
+                "south": as_list(results["south"])[:5],
+            },
+            "indices_history": {
+                market: results[f"history_{market}"]
+                for market in ("CN", "HK", "US")
+                if results[f"history_{market}"] is not None
+            },
+            "sectors": as_list(results["sectors"])[:5],
+            "concepts": as_list(results["concepts"])[:5],
+            "macro": {
+                ind: results[f"macro_{ind}"]
+                for ind in MACRO_INDICATORS
+                if isinstance(results[f"macro_{ind}"], dict) and "error" not in results[f"macro_{ind}"]
+            },
+            "calendar": _top_events(results["calendar_today"]) + _top_events(results["calendar_tomorrow"]),
+            "news": as_list(results["news"]),
+            "errors": errors,
+        }
 
-        # 5. Sectors (Top 5 Flow)
-        try:
-            sectors = ak_tool.get_board_info(board_type="industry", info_type="rank")
+        snapshot = {
+            "context": context,
+            "markdown": None,
+            "expires": time.monotonic() + self.snapshot_ttl,
+        }
+        self._snapshot = snapshot
+        return snapshot
 
-            context["sectors"] = sectors[:5] if sectors else []
-        except Exception as e:
-            context["errors"].append(f"Sector Flow error: {str(e)}")
 
-        # 5. Concepts (Top 5 Flow)
-        try:
-            concepts = ak_tool.get_board_info(board_type="concept", info_type="rank")
-            context["concepts"] = concepts[:5] if concepts else []
-        except Exception as e:
-            context["errors"].append(f"Concept Flow error: {str(e)}")
+def _pick_indices(items: List[Dict[str, Any]], targets: List[str]) -> List[Dict[str, Any]]:
+    """Keep the target indices, in target order."""
+    picked = [item for item in items or [] if item.get("symbol") in targets]
+    picked.sort(key=lambda x: targets.index(x.get("symbol")))
+    return picked
 
-        # 6. Macro Summary
-        macro_indicators = ["GDP", "CPI", "LPR","PPI"]
-        for ind in macro_indicators:
-            try:
-                data = ak_tool.get_macro(ind)
-                if "error" not in data:
-                    context["macro"][ind] = data
-            except Exception as e:
-                pass
 
-        # 7. Economic Calendar (Today + Tomorrow)
-        try:
-            today = datetime.datetime.now()
-            tomorrow = today + datetime.timedelta(days=1)
-            
-            events_today = ak_tool.get_economic_calendar(today.strftime("%Y%m%d"))
-            events_tomorrow = ak_tool.get_economic_calendar(tomorrow.strftime("%Y%m%d"))
-            
-            context["calendar"] = []
-            sorted_events_today = sorted(events_today, key=lambda x: x.get("importance", 0), reverse=True)
-            sorted_events_tomorrow = sorted(events_tomorrow, key=lambda x: x.get("importance", 0), reverse=True)
-
-            for i,event in enumerate(sorted_events_today):
-                if i>5:
-                    break
-                context["calendar"].append(event)
-            for i,event in enumerate(sorted_events_tomorrow):
-                if i>5:
-                    break
-                context["calendar"].append(event)
-        except Exception as e:
-            context["errors"].append(f"Calendar error: {str(e)}")
+def _top_events(events: Optional[List[Dict[str, Any]]], limit: int = 6) -> List[Dict[str, Any]]:
+    """Most important calendar events first."""
+    return sorted(events or [], key=lambda x: x.get("importance", 0), reverse=True)[:limit]
 
-        # 8. Headline News (Top 5)
-        try:
-            news_list = ak_tool.get_headline_news(limit=5)
-            context["news"] = news_list
-        except Exception as e:
-            context["errors"].append(f"News error: {str(e)}")
 
-        return context
+market_context_service = MarketContextService()
 
-    context = await loop.run_in_executor(None, _fetch_data)
 
-    if as_markdown:
-        context["markdown"] = render_market_context_markdown(context)
+# Function: get_market_context
+async def get_market_context(include_history: bool = False, as_markdown: bool = False) -> Dict[str, Any]:
+    """
+    Get market context information including:
+    - Current timestamp
+    - Major indices (A-share, HK, US) and their 7-day history
+    - Turnover, north/south fund flow
+    - Sector/Concept fund flow (Top 5)
+    - Macro summary (GDP, CPI, LPR, PPI), economic calendar, headline news
 
-    return context
+    Served from the shared MarketContextService snapshot. Index history is
+    always included; ``include_history`` is kept for compatibility.
+    """
+    return await market_context_service.get_context(as_markdown=as_markdown)
 
 if __name__ == "__main__":
     # export PYTHONPATH=$PYTHONPATH:. && python3 backend/app/agents/personal_finance/market_context.py
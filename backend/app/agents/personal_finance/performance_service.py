@@ -8,9 +8,13 @@ from backend.app.agents.personal_finance.db_models import (
 )
 from backend.infrastructure.market.akshare_tool import AkShareTool
 import akshare as ak
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Benchmark index symbol -> AkShare stock_zh_index_daily_em symbol
+INDEX_SYMBOLS = {"000001.SS": "sh000001", "399001.SZ": "sz399001"}
+
 async def fetch_market_history_batch(dates: List[str], symbols: List[str]) -> Dict[str, Dict[str, float]]:
     """
     Fetches historical close prices for a batch of dates and symbols.
@@ -35,45 +39,36 @@ async def fetch_market_history_batch(dates: List[str], symbols: List[str]) -> Di
     start_str = start_date_obj.strftime("%Y%m%d")
     end_str = end_date_obj.strftime("%Y%m%d")
     
+    def collect(sym: str, dates_col, closes_col):
+        # Keep only requested dates, then write the surviving (date, close) pairs
+        hist = pd.DataFrame({"date": dates_col, "close": closes_col})
+        hist = hist[hist["date"].isin(list(result))]
+        for d_str, close in zip(hist["date"].tolist(), hist["close"].astype(float).tolist()):
+            result[d_str][sym] = close
+
     # 2. Fetch function
     async def fetch_one(sym: str):
         try:
             # A. Indices Handling
-            if sym == "000001.SS":
-                # SH Index
+            if sym in INDEX_SYMBOLS:
                 # Run in executor to avoid blocking
-                df = await loop.run_in_executor(None, lambda: ak.stock_zh_index_daily_em(symbol="sh000001"))
+                df = await loop.run_in_executor(None, lambda: ak.stock_zh_index_daily_em(symbol=INDEX_SYMBOLS[sym]))
                 if df is not None and not df.empty:
                     # Filter by date range in memory
                     # df['date'] is YYYY-MM-DD string
-                    for _, row in df.iterrows():
-                        d_str = str(row['date'])
-                        if d_str in result:
-                            result[d_str][sym] = float(row['close'])
-                return
-
-            if sym == "399001.SZ":
-                # SZ Index
-                df = await loop.run_in_executor(None, lambda: ak.stock_zh_index_daily_em(symbol="sz399001"))
-                if df is not None and not df.empty:
-                    for _, row in df.iterrows():
-                        d_str = str(row['date'])
-                        if d_str in result:
-                            result[d_str][sym] = float(row['close'])
+                    collect(sym, df['date'].map(str), df['close'])
                 return
 
             # B. Regular Stocks / ETFs
-            # Use AkShareTool.get_history which handles A/HK/US/ETF
-            # Note: get_history returns List[Dict] with 'date' as 'YYYY-MM-DD'
+            # Use AkShareTool.get_stored_history which handles A/HK/US/ETF and reads the
+            # local K-line store, so repeated backfills only download missing bars.
+            # Note: dates are 'YYYY-MM-DD'; column payload avoids per-row dicts
             hist = await loop.run_in_executor(
                 None, 
-                lambda: tool.get_history(sym, period="daily", start_date=start_str, end_date=end_str, adjust="qfq")
+                lambda: tool.get_stored_history(sym, period="daily", start_date=start_str, end_date=end_str,
+                                                adjust="qfq", orient="columns")
             )
-            
-            for item in hist:
-                d_str = item['date']
-                if d_str in result:
-                    result[d_str][sym] = float(item['close'])
+            collect(sym, hist['date'], hist['close'])
                     
         except Exception as e:
             logger.error(f"Failed to fetch market history for {sym}: {e}")
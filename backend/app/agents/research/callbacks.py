@@ -143,7 +143,7 @@ class ResearchAgentCallback(AsyncCallbackHandler):
 
         # 执行记忆同步 (STM)
         try:
-            self.memory_client.add_memory(
+            await self.memory_client.aadd_memory(
                 str(output_content), role="agent", metadata={"job_id": self.job_id}
             )
             logger.info(
@@ -176,7 +176,7 @@ class ResearchAgentCallback(AsyncCallbackHandler):
 
         # 触发记忆结算 (STM -> MTM/LTM)
         try:
-            task_id = self.memory_client.finalize()
+            task_id = await self.memory_client.afinalize()
             if task_id:
                 logger.info(
                     f"Memory Finalize Task started for job {self.job_id}. Task ID: {task_id}")
@@ -152,7 +152,7 @@ async def run_agent(job_id: str, query: str):
         messages = []
 
         # 1.5 Load Memory Context
-        memory_context = memory_client.get_context(query)
+        memory_context = await memory_client.aget_context(query)
         if memory_context:
             # 使用格式化工具将结构化数据转为文本
             context_str = _format_memory_context(memory_context)
@@ -225,7 +225,7 @@ async def run_agent(job_id: str, query: str):
 
         # Sync current query/remark to Memory STM
         if query:
-            memory_client.add_memory(query, role="user", metadata={"job_id": job_id})
+            await memory_client.aadd_memory(query, role="user", metadata={"job_id": job_id})
 
         # Log constructed messages
         for i, m in enumerate(messages):
@@ -179,17 +179,20 @@ async def get_sector_fund_flow(limit: int = 10, sort_by: str = "hot", sector_typ
 
 
 @tool
-async def get_sector_top_stocks(sector_name: str, limit: int = 5, sector_type: str = "industry") -> str:
+async def get_sector_top_stocks(sector_name: str, limit: int = 5, sector_type: str = "industry", sort_by: str = "amount") -> str:
     """
     Get top component stocks (leaders) of a specific A-share sector.
     Args:
         sector_name: Exact name of the sector (e.g. '软件开发', 'Sora概念').
         limit: Number of stocks to return (default 5).
         sector_type: 'industry' (default) or 'concept'. Must match the type of sector_name.
+        sort_by: 'amount' (default, turnover), 'percent' (daily change) or 'technical'
+            (take the 30 most traded constituents, or `limit` if larger, and rank them by
+            trend/momentum score, with MA/MACD/RSI/BOLL/KDJ attached).
     """
     from backend.app.services.market_service import market_service
     try:
-        data = await asyncio.to_thread(market_service.get_sector_details, sector_name, sort_by="amount", limit=limit, sector_type=sector_type)
+        data = await asyncio.to_thread(market_service.get_sector_details, sector_name, sort_by=sort_by, limit=limit, sector_type=sector_type)
         return json.dumps(data, ensure_ascii=False)
     except Exception as e:
         return f"Error getting sector stocks: {str(e)}"
@@ -32,7 +32,7 @@ async def get_review_data(symbol: str) -> Dict[str, Any]:
         if not history or "error" in history:
             return {"error": "Could not fetch historical data"}
 
-        context = ta_tool.calculate_advanced_indicators(history)
+        context = ta_tool.calculate_advanced_indicators(history, symbol=symbol)
         
         # Add basic info
         price_info = await asyncio.to_thread(_registry.get_stock_price, symbol=symbol)
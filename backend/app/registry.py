@@ -1,7 +1,10 @@
+import asyncio
 import logging
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Tuple, Union
 from backend.infrastructure.config.loader import config
 
 # Market Tools
@@ -10,7 +13,9 @@ from backend.infrastructure.market.fred import FredTool
 from backend.infrastructure.market.sina import SinaFinanceTool
 from backend.infrastructure.market.yahoo import YahooFinanceTool
 from backend.infrastructure.market.xueqiu import XueqiuTool
+from backend.infrastructure.market.spot_snapshot import spot_snapshot_engine
 from backend.domain.services.technical_analysis import TechnicalAnalysisTool
+from backend.domain.services import batch_indicators
 
 # Search & Analysis
 from backend.infrastructure.search.tavily import TavilyTool
@@ -30,12 +35,51 @@ from edgar import Company
 logger = logging.getLogger(__name__)
 
 
+class _LazyTool:
+    """
+    Sub-tool built on first attribute access and then stored on the instance,
+    so later lookups are plain attribute reads.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        with instance._build_lock:
+            if self.name not in instance.__dict__:
+                logger.debug(f"Initializing sub-tool: {self.name}")
+                instance.__dict__[self.name] = self.factory(instance)
+        return instance.__dict__[self.name]
+
+
 class Tools:
     """
     Unified entry point for all financial tools.
     Handles routing, fallbacks, and parameter normalization.
+
+    ``Tools()`` returns one process-wide registry, so every router, agent and
+    service shares the same sub-tools (HTTP sessions, caches, models). Each
+    sub-tool is constructed on first use; API keys are read from config at that
+    point, so configure the environment before the first call, not the import.
+    Passing explicit keys creates a separate, unshared instance.
     """
 
+    _shared: Optional["Tools"] = None
+    _shared_lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        if args or any(v is not None for v in kwargs.values()):
+            return super().__new__(cls)
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = super().__new__(cls)
+            return cls._shared
+
     def __init__(
         self,
         tavily_api_key: Optional[str] = None,
@@ -43,38 +87,44 @@ class Tools:
         llama_cloud_api_key: Optional[str] = None,
         fred_api_key: Optional[str] = None,
     ):
+        if getattr(self, "_initialized", False):
+            return
+        self._build_lock = threading.RLock()
+        self._keys = {
+            "tavily": tavily_api_key,
+            "serpapi": serp_api_key,
+            "llama_cloud": llama_cloud_api_key,
+            "fred_api_key": fred_api_key,
+        }
+        self._initialized = True
+
+    def _api_key(self, name: str) -> Optional[str]:
         # Load config automatically if keys not provided
-        if not tavily_api_key:
-            tavily_api_key = config.get_api_key("tavily")
-
-        if not serp_api_key:
-            serp_api_key = config.get_api_key("serpapi")
-
-        if not llama_cloud_api_key:
-            llama_cloud_api_key = config.get_api_key("llama_cloud")
-
-        if not fred_api_key:
-            fred_api_key = config.get_api_key("fred_api_key")
-
-        # Initialize sub-tools
-        self.sina = SinaFinanceTool()
-        self.akshare = AkShareTool()
-        self.yahoo = YahooFinanceTool()
-        self.xueqiu = XueqiuTool()
-        self.fred = FredTool(fred_api_key)
-        self.technical = TechnicalAnalysisTool()
-        self.finbert = FinBERTTool()
-        self.report_finder = ReportFinderTool()
-        self.report_content = ReportContentTool()
-        self.report_analyst = ReportAnalysisTool()
-
-        # Pass key explicitly to PDF tool
-        self.pdf = PDFParseTool(api_key=llama_cloud_api_key)
-
-        # Search Tools
-        self.tavily = TavilyTool(tavily_api_key) if tavily_api_key else None
-        self.serp = SerpAppTool(serp_api_key) if serp_api_key else None
-        self.ddg = DuckDuckGoTool()
+        return self._keys.get(name) or config.get_api_key(name)
+
+    # Sub-tools (built lazily, see _LazyTool)
+    sina = _LazyTool(lambda self: SinaFinanceTool())
+    akshare = _LazyTool(lambda self: AkShareTool())
+    yahoo = _LazyTool(lambda self: YahooFinanceTool())
+    xueqiu = _LazyTool(lambda self: XueqiuTool())
+    fred = _LazyTool(lambda self: FredTool(self._api_key("fred_api_key")))
+    technical = _LazyTool(lambda self: TechnicalAnalysisTool())
+    finbert = _LazyTool(lambda self: FinBERTTool())
+    report_finder = _LazyTool(lambda self: ReportFinderTool())
+    report_content = _LazyTool(lambda self: ReportContentTool())
+    report_analyst = _LazyTool(lambda self: ReportAnalysisTool())
+
+    # Pass key explicitly to PDF tool
+    pdf = _LazyTool(lambda self: PDFParseTool(api_key=self._api_key("llama_cloud")))
+
+    # Search Tools
+    tavily = _LazyTool(
+        lambda self: TavilyTool(key) if (key := self._api_key("tavily")) else None
+    )
+    serp = _LazyTool(
+        lambda self: SerpAppTool(key) if (key := self._api_key("serpapi")) else None
+    )
+    ddg = _LazyTool(lambda self: DuckDuckGoTool())
 
     def get_stock_price(
         self, symbol: str, market: Optional[str] = None
@@ -84,43 +134,81 @@ class Tools:
         If market is provided ('A-share', 'US', 'HK'), auto-detection is skipped.
         """
         market = market or self._detect_market(symbol)
-        market_map = {"A-share": "A", "HK": "HK", "US": "US"}
-        ak_market = market_map.get(market, None)
 
         # 1. Try Unified AkShareTool First (It handles ETF/A/HK/US)
+        res = self._akshare_quote(symbol, market)
+        if res is not None:
+            return res
+
+        # 2. Fallback Strategies (Legacy)
+        # Strategy: A-share (Sina->AkShare->Yahoo), US/HK (Yahoo->Sina)
+        for source in self._quote_fallbacks(market):
+            res = source.get_stock_quote(symbol, market=market)
+            if not self._is_error(res):
+                return res
+
+        return {"error": f"Could not fetch price for {symbol} in {market}"}
+
+    async def aget_stock_price(
+        self, symbol: str, market: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of get_stock_price. AkShare is synchronous and runs in a
+        worker thread; the Sina/Yahoo fallbacks use the shared async client.
+        """
+        market = market or self._detect_market(symbol)
+
+        res = await asyncio.to_thread(self._akshare_quote, symbol, market)
+        if res is not None:
+            return res
+
+        for source in self._quote_fallbacks(market):
+            res = await source.aget_stock_quote(symbol, market=market)
+            if not self._is_error(res):
+                return res
+
+        return {"error": f"Could not fetch price for {symbol} in {market}"}
+
+    def _akshare_quote(self, symbol: str, market: str) -> Optional[Dict[str, Any]]:
+        """AkShare quote, or None if it failed."""
+        market_map = {"A-share": "A", "HK": "HK", "US": "US"}
+        ak_market = market_map.get(market, None)
         try:
             res = self.akshare.get_quote(symbol, market=ak_market)
             if not self._is_error(res):
-                # Standardize output if needed? AkShare get_quote returns standard fields.
-                # Just return it.
-                # But we might want to ensure 'market' field matches registry's convention 'A-share' vs 'A'
                 # Registry uses 'A-share', AkShare uses 'A'.
                 if res.get("market") == "A": res["market"] = "A-share"
                 return res
         except Exception as e:
             logger.warning(f"AkShare get_quote failed for {symbol}: {e}")
+        return None
 
-        # 2. Fallback Strategies (Legacy)
-        # Strategy: A-share (Sina->AkShare->Yahoo), US/HK (Yahoo->Sina)
+    def _quote_fallbacks(self, market: str) -> list:
         if market == "A-share":
-            # Fallback to Sina
-            res = self.sina.get_stock_quote(symbol, market="A-share")
-            if not self._is_error(res):
-                return res
-            # Fallback to Yahoo
-            res = self.yahoo.get_stock_quote(symbol, market="A-share")
-            if not self._is_error(res):
-                return res
+            return [self.sina, self.yahoo]
+        if market in ["US", "HK"]:
+            return [self.yahoo, self.sina]
+        return []
 
-        elif market in ["US", "HK"]:
-            res = self.yahoo.get_stock_quote(symbol, market=market)
-            if not self._is_error(res):
-                return res
-            res = self.sina.get_stock_quote(symbol, market=market)
-            if not self._is_error(res):
-                return res
+    def get_stock_prices(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Batch real-time prices, keyed by symbol.
+        A-share stocks/ETFs are looked up in the shared full-market spot snapshot (one upstream
+        pull for all callers); symbols missing from it fall back to get_stock_price one by one.
+        Failed symbols map to an error dict.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        a_share = [s for s in symbols if s.isdigit() and self._detect_market(s) == "A-share"]
+        if a_share:
+            try:
+                results.update(spot_snapshot_engine.get_quotes(a_share))
+            except Exception as e:
+                logger.warning(f"Spot snapshot lookup failed: {e}")
 
-        return {"error": f"Could not fetch price for {symbol} in {market}"}
+        for symbol in symbols:
+            if symbol not in results:
+                results[symbol] = self.get_stock_price(symbol)
+        return results
 
     def get_financial_metrics(self, symbol: str) -> Dict[str, Any]:
         """
@@ -287,6 +375,11 @@ class Tools:
         market = self._detect_market(symbol)
         return self.report_finder.get_latest_report(symbol, market=market)
 
+    async def aget_company_report(self, symbol: str) -> Dict[str, Any]:
+        """Async variant of get_company_report."""
+        market = self._detect_market(symbol)
+        return await self.report_finder.aget_latest_report(symbol, market=market)
+
     def get_report_content(self, symbol: str) -> Dict[str, Any]:
         """
         Fetches the content of the latest financial report.
@@ -508,39 +601,14 @@ class Tools:
     ) -> List[Dict[str, Any]]:
         """Get historical data with market routing."""
         market = self._detect_market(symbol)
-        
+
         # 1. Try AkShare Unified Interface (Supports A/HK/ETF, US is weak)
-        try:
-            # AkShare uses 'daily', 'weekly', 'monthly' for period mostly.
-            # Map '30d' -> 'daily' and filter later? 
-            # Or get_history(period='daily', start_date=...) 
-            # Current AkShare get_history handles period mapping (daily/weekly/monthly).
-            # But registry receives '30d'.
-            # If period is 'daily'/'weekly'/'monthly' pass it.
-            # If period is '30d', pass 'daily' and we might get more data, need to slice?
-            # AkShareTool.get_history by default uses start_date=1 year ago if not provided.
-            # Let's use 'daily' as default period if it's '30d'.
-            
-            ak_period = "daily"
-            if "week" in period: ak_period = "weekly"
-            if "month" in period: ak_period = "monthly"
-            
-            res = self.akshare.get_history(symbol, period=ak_period)
-            if res:
-                # Filter by count if needed? '30d' usually implies last 30 days.
-                # get_history returns full range (1 year default).
-                # We can slice it.
-                if period.endswith('d'):
-                    days = int(period[:-1])
-                    return res[-days:]
-                return res
-        except Exception as e:
-            logger.warning(f"AkShare get_history failed for {symbol}: {e}")
+        res = self._stored_history(symbol, period)
+        if res:
+            return res
 
         # 2. Fallbacks
         if market == "A-share":
-            # Sina is preferred for A-share kline? Or AkShare?
-            # Source api_server used MarketDataSkill which used Sina or AkShare.
             # SinaFinanceTool.get_historical_data works well for A-share.
             res = self.sina.get_historical_data(
                 symbol, market="A-share", period=period, interval=interval
@@ -557,17 +625,69 @@ class Tools:
 
         return []
 
+    async def aget_historical_data(
+        self, symbol: str, period: str = "30d", interval: str = "1d"
+    ) -> List[Dict[str, Any]]:
+        """Async variant of get_historical_data."""
+        market = self._detect_market(symbol)
+
+        res = await asyncio.to_thread(self._stored_history, symbol, period)
+        if res:
+            return res
+
+        if market == "A-share":
+            res = await self.sina.aget_historical_data(
+                symbol, market="A-share", period=period, interval=interval
+            )
+            if res:
+                return res
+            return await asyncio.to_thread(self.akshare.get_stock_history, symbol, period=period)
+
+        elif market in ["US", "HK"]:
+            return await self.yahoo.aget_historical_data(
+                symbol, market=market, period=period, interval=interval
+            )
+
+        return []
+
+    def _stored_history(self, symbol: str, period: str) -> List[Dict[str, Any]]:
+        """History from the local K-line store (AkShare); empty on failure."""
+        try:
+            # AkShare uses 'daily', 'weekly', 'monthly'; '30d' maps to 'daily'
+            # and is sliced to the last 30 bars below.
+            ak_period = "daily"
+            if "week" in period: ak_period = "weekly"
+            if "month" in period: ak_period = "monthly"
+
+            # Served from the local K-line store; only the missing tail is downloaded.
+            # For 'Nd' only look back far enough to cover N trading days.
+            start_date = None
+            if period.endswith('d') and period[:-1].isdigit():
+                lookback = max(int(period[:-1]) * 3 // 2 + 20, 30)
+                start_date = (datetime.now() - timedelta(days=lookback)).strftime("%Y%m%d")
+
+            res = self.akshare.get_stored_history(symbol, period=ak_period, start_date=start_date)
+            if res:
+                # '30d' implies the last 30 bars
+                if period.endswith('d'):
+                    days = int(period[:-1])
+                    return res[-days:]
+                return res
+        except Exception as e:
+            logger.warning(f"AkShare get_history failed for {symbol}: {e}")
+        return []
+
     def get_technical_indicators(
         self, symbol: str, period: str = "60d"
     ) -> Dict[str, Any]:
         """Get summarized technical indicators (snapshot)."""
         history = self.get_historical_data(symbol, period=period)
-        return self.technical.calculate_indicators(history)
+        return self.technical.calculate_indicators(history, symbol=symbol)
 
     def get_technical_context(self, symbol: str, period: str = "1y") -> Dict[str, Any]:
         """Get advanced technical context for AI Agent."""
         history = self.get_historical_data(symbol, period=period)
-        context = self.technical.calculate_advanced_indicators(history)
+        context = self.technical.calculate_advanced_indicators(history, symbol=symbol)
         if "error" in context:
             return context
 
@@ -576,6 +696,33 @@ class Tools:
         context["period"] = period
         return context
 
+    def get_batch_technical_context(
+        self, symbols: List[str], bars: int = 120, max_workers: int = 8
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest technical snapshot for many A-share symbols in one vectorized pass.
+        Histories come from the local K-line store; symbols without data are omitted.
+        """
+        if not symbols:
+            return {}
+        # ~bars trading days back, plus slack for holidays
+        start_date = (datetime.now() - timedelta(days=bars * 3 // 2 + 20)).strftime("%Y%m%d")
+
+        def load(sym: str):
+            return sym, self.akshare.get_stored_history(sym, start_date=start_date, orient="columns")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            histories = dict(pool.map(load, symbols))
+
+        names, arrays = batch_indicators.stack_bars(histories, bars=bars)
+        if not names:
+            return {}
+        frame = self.technical.calculate_batch_indicators(
+            arrays["close"], arrays["high"], arrays["low"], arrays["volume"], symbols=names
+        )
+        frame = frame.astype(object).where(frame.notna(), None)
+        return frame.to_dict(orient="index")
+
     def get_technical_history(
         self, symbol: str, period: str = "1y"
     ) -> List[Dict[str, Any]]:
@@ -592,7 +739,7 @@ class Tools:
         history = self.get_historical_data(symbol, period=fetch_period)
         
         # Calculate indicators on the full history
-        full_data = self.technical.calculate_indicators_history(history)
+        full_data = self.technical.calculate_indicators_history(history, symbol=symbol)
         
         # If we fetched more data than requested, slice it back to requested period
         if fetch_period != period:
@@ -640,66 +787,106 @@ class Tools:
 
     def get_macro_history(self, query: str, period: str = "1y") -> Dict[str, Any]:
         """Get historical macro data."""
+        route = self._route_macro_history(query)
+        if route is None:
+            return {"error": "Unknown macro indicator requested"}
+        source, indicator = route
+        if source == "akshare":
+            return self.akshare.get_macro(indicator, history=True)
+        return getattr(self, source).get_macro_history(indicator, period)
+
+    async def aget_macro_history(self, query: str, period: str = "1y") -> Dict[str, Any]:
+        """Async variant of get_macro_history."""
+        route = self._route_macro_history(query)
+        if route is None:
+            return {"error": "Unknown macro indicator requested"}
+        source, indicator = route
+        if source == "akshare":
+            return await asyncio.to_thread(self.akshare.get_macro, indicator, history=True)
+        return await getattr(self, source).aget_macro_history(indicator, period)
+
+    def get_macro_data(self, query: str) -> Dict[str, Any]:
+        """Get macro economic data based on query."""
+        route = self._route_macro_data(query)
+        if route is None:
+            return {"error": "Unknown macro indicator requested"}
+        source, indicator = route
+        if source == "akshare":
+            return self.akshare.get_macro(indicator, history=False)
+        if source == "yahoo":
+            return self.yahoo.get_macro_data(indicator)
+        return self.fred.get_macro_history(indicator, "1y")
+
+    async def aget_macro_data(self, query: str) -> Dict[str, Any]:
+        """Async variant of get_macro_data."""
+        route = self._route_macro_data(query)
+        if route is None:
+            return {"error": "Unknown macro indicator requested"}
+        source, indicator = route
+        if source == "akshare":
+            return await asyncio.to_thread(self.akshare.get_macro, indicator, history=False)
+        if source == "yahoo":
+            return await self.yahoo.aget_macro_data(indicator)
+        return await self.fred.aget_macro_history(indicator, "1y")
+
+    @staticmethod
+    def _route_macro_history(query: str) -> Optional[Tuple[str, str]]:
+        """Map a macro history query to (source, indicator)."""
         query = query.lower()
-        
+
         # 1. China Data via AkShare Unified
         if "china" in query or "cn" in query:
             indicators = ["gdp", "cpi", "pmi", "ppi", "m2", "lpr"]
             for ind in indicators:
                 if ind in query:
-                    return self.akshare.get_macro(ind, history=True)
+                    return "akshare", ind
 
         # FRED macro Data
         if "unemployment" in query:
-            return self.fred.get_macro_history("UNEMPLOYMENT", period)
+            return "fred", "UNEMPLOYMENT"
         if "nonfarm" in query:
-            return self.fred.get_macro_history("NONFARM_PAYROLLS", period)
+            return "fred", "NONFARM_PAYROLLS"
         if "us cpi" in query or "cpi us" in query or "us_cpi" in query:
-            return self.fred.get_macro_history("CPI", period)
+            return "fred", "CPI"
         if "fed funds" in query or "fed_funds" in query:
-            return self.fred.get_macro_history("FED_FUNDS", period)
+            return "fred", "FED_FUNDS"
         if "m2" in query and "us" in query:
-            return self.fred.get_macro_history("M2", period)
+            return "fred", "M2"
         if "dxy" in query:
-            return self.fred.get_macro_history(
-                "DTWEXM", period
-            )  # FRED Major Currencies
+            return "fred", "DTWEXM"  # FRED Major Currencies
         if "dfedtaru" in query:
-            return self.fred.get_macro_history("DFEDTARU", period)
+            return "fred", "DFEDTARU"
 
         # Yahoo macro
-        indicator = None
         if "vix" in query:
-            indicator = "VIX"
+            return "yahoo", "VIX"
         # elif "dxy" in query: indicator = "DXY"
-        elif "yield" in query or "us10y" in query:
-            indicator = "US10Y"
-        elif "fed" in query and "future" in query:
-            indicator = "FED_FUNDS_FUTURES"
-
-        if indicator:
-            return self.yahoo.get_macro_history(indicator, period)
+        if "yield" in query or "us10y" in query:
+            return "yahoo", "US10Y"
+        if "fed" in query and "future" in query:
+            return "yahoo", "FED_FUNDS_FUTURES"
 
-        return {"error": "Unknown macro indicator requested"}
+        return None
 
-    def get_macro_data(self, query: str) -> Dict[str, Any]:
-        """Get macro economic data based on query."""
+    @staticmethod
+    def _route_macro_data(query: str) -> Optional[Tuple[str, str]]:
+        """Map a macro snapshot query to (source, indicator); FRED serves 1y history."""
         query = query.lower()
-        
+
         # 1. China Data via AkShare Unified
         if "china" in query or "cn" in query:
             indicators = ["gdp", "cpi", "pmi", "ppi", "m2", "lpr", "social"]
             for ind in indicators:
                 if ind in query:
-                    return self.akshare.get_macro(ind, history=False)
+                    return "akshare", ind
 
         if "vix" in query:
-            return self.yahoo.get_macro_data("VIX")
+            return "yahoo", "VIX"
         # if "dxy" in query: return self.yahoo.get_macro_data("DXY") # Yahoo DXY Unreliable, used FRED below
         if "yield" in query or "us10y" in query:
-            return self.yahoo.get_macro_data("US10Y")
+            return "yahoo", "US10Y"
         if "fed" in query and "future" in query:
-            return self.yahoo.get_macro_data("FED_FUNDS_FUTURES")
+            return "yahoo", "FED_FUNDS_FUTURES"
 
         # FRED Macro Data (Fallbacks for US Economy)
         if (
@@ -710,21 +897,21 @@ class Tools:
             or "dxy" in query
         ):
             if "unemployment" in query:
-                return self.fred.get_macro_history("UNEMPLOYMENT", "1y")
+                return "fred", "UNEMPLOYMENT"
             if "nonfarm" in query:
-                return self.fred.get_macro_history("NONFARM_PAYROLLS", "1y")
+                return "fred", "NONFARM_PAYROLLS"
             if "cpi" in query:
-                return self.fred.get_macro_history("CPI", "1y")
+                return "fred", "CPI"
             if "fed" in query and "funds" in query:
-                return self.fred.get_macro_history("FED_FUNDS", "1y")
+                return "fred", "FED_FUNDS"
             if "m2" in query:
-                return self.fred.get_macro_history("M2", "1y")
+                return "fred", "M2"
             if "dxy" in query:
-                return self.fred.get_macro_history("DTWEXM", "1y")
+                return "fred", "DTWEXM"
             if "dfedtaru" in query:
-                return self.fred.get_macro_history("DFEDTARU", "1y")
+                return "fred", "DFEDTARU"
 
-        return {"error": "Unknown macro indicator requested"}
+        return None
 
     def get_fund_flow(self, target: str, flow_type: str = "stock") -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """Get fund flow data (stock, north, south, sector)."""
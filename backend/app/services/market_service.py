@@ -1,10 +1,15 @@
 import logging
 from typing import Dict, Any, List, Optional
 from backend.app.registry import Tools
+from backend.infrastructure.market.spot_snapshot import spot_snapshot_engine
+from backend.infrastructure.market.kline_store import kline_store
 
 logger = logging.getLogger(__name__)
 
 class MarketService:
+    # sort_by="technical" scores at most this many constituents (top by turnover)
+    TECHNICAL_SORT_CANDIDATES = 30
+
     def __init__(self):
         self.tools = Tools()
 
@@ -12,6 +17,10 @@ class MarketService:
         """Get real-time stock price."""
         return self.tools.get_stock_price(symbol, market)
 
+    async def aget_stock_price(self, symbol: str, market: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of get_stock_price."""
+        return await self.tools.aget_stock_price(symbol, market)
+
     def get_financial_metrics(self, symbol: str) -> Dict[str, Any]:
         """Get financial metrics (revenue, income, etc.)."""
         return self.tools.get_financial_metrics(symbol)
@@ -24,6 +33,10 @@ class MarketService:
         """Get historical k-line data."""
         return self.tools.get_historical_data(symbol, period, interval)
 
+    async def aget_historical_data(self, symbol: str, period: str = "30d", interval: str = "1d") -> List[Dict[str, Any]]:
+        """Async variant of get_historical_data."""
+        return await self.tools.aget_historical_data(symbol, period, interval)
+
     def get_technical_indicators(self, symbol: str, period: str = "60d") -> Dict[str, Any]:
         """Get calculated technical indicators (snapshot)."""
         return self.tools.get_technical_indicators(symbol, period)
@@ -38,6 +51,10 @@ class MarketService:
         """Get macro economic data."""
         return self.tools.get_macro_data(query)
 
+    async def aget_macro_data(self, query: str) -> Dict[str, Any]:
+        """Async variant of get_macro_data."""
+        return await self.tools.aget_macro_data(query)
+
     def get_macro_history(self, indicator: str, period: str = "1y") -> Dict[str, Any]:
         """Get macro history data."""
         # Use tools.get_macro_history which was present in registry.py
@@ -47,18 +64,33 @@ class MarketService:
         # Fallback if registry helper missing (though it was seen in view_file)
         return {"error": "Macro history tool not available"}
 
+    async def aget_macro_history(self, indicator: str, period: str = "1y") -> Dict[str, Any]:
+        """Async variant of get_macro_history."""
+        return await self.tools.aget_macro_history(indicator, period)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get quote cache hit/miss/coalesced counters, spot snapshot and K-line store stats."""
+        return {
+            **self.tools.akshare.get_cache_stats(),
+            "spot_snapshot": spot_snapshot_engine.stats(),
+            "kline_store": kline_store.stats(),
+        }
+
     def get_hot_stocks(self) -> List[Dict[str, Any]]:
         """Get hot stocks data."""
         hot_stocks = ['000001', '600036', 'AAPL', 'TSLA', '00700', '000002']
+        try:
+            quotes = self.tools.get_stock_prices(hot_stocks)
+        except Exception as e:
+            logger.warning(f"Failed to fetch hot stocks: {e}")
+            return []
         results = []
         for symbol in hot_stocks:
-            try:
-                result = self.tools.get_stock_price(symbol)
-                if result and "error" not in result:
-                    results.append(result)
-            except Exception as e:
-                logger.warning(f"Failed to fetch hot stock {symbol}: {e}")
-                continue
+            result = quotes.get(symbol)
+            if result and "error" not in result:
+                results.append(result)
+            else:
+                logger.warning(f"Failed to fetch hot stock {symbol}: {(result or {}).get('error')}")
         return results
 
     def get_fed_probability(self) -> Dict[str, Any]:
@@ -66,13 +98,39 @@ class MarketService:
         Calculate Fed Implied Probability based on ZQ=F futures.
         Ported from api_server.py.
         """
-        import math
-        from datetime import datetime
         import yfinance as yf
 
         # 1. Fetch Current Fed Target Upper Limit (DFEDTARU)
         fed_data = self.get_macro_history("DFEDTARU", "1y")
+
+        # 2. Fetch ZQ=F
+        ticker = yf.Ticker("ZQ=F")
+        hist = ticker.history(period="5d")
         
+        if hist.empty:
+            raise Exception("Failed to fetch ZQ=F futures data")
+            
+        return self._fed_probability(fed_data, hist["Close"].iloc[-1])
+
+    async def aget_fed_probability(self) -> Dict[str, Any]:
+        """Async variant of get_fed_probability; both inputs are fetched concurrently."""
+        import asyncio
+
+        fed_data, zq = await asyncio.gather(
+            self.aget_macro_history("DFEDTARU", "1y"),
+            self.tools.yahoo.aget_macro_history("ZQ=F", "5d"),
+        )
+        if not zq.get("data"):
+            raise Exception("Failed to fetch ZQ=F futures data")
+
+        return self._fed_probability(fed_data, zq["data"][-1]["value"])
+
+    @staticmethod
+    def _fed_probability(fed_data: Dict[str, Any], zq_price: float) -> Dict[str, Any]:
+        """Bin the ZQ=F implied rate around the current target range."""
+        import math
+        from datetime import datetime
+
         current_target_upper = 5.50
         
         if fed_data and "data" in fed_data and len(fed_data["data"]) > 0:
@@ -82,14 +140,6 @@ class MarketService:
         
         current_target_mid = current_target_upper - 0.125
         
-        # 2. Fetch ZQ=F
-        ticker = yf.Ticker("ZQ=F")
-        hist = ticker.history(period="5d")
-        
-        if hist.empty:
-            raise Exception("Failed to fetch ZQ=F futures data")
-            
-        zq_price = hist["Close"].iloc[-1]
         implied_rate = 100 - zq_price
         
         # 3. Calculate Bin Distribution
@@ -181,6 +231,19 @@ class MarketService:
             components.sort(key=lambda x: x.get("amount", 0), reverse=True)
         elif sort_by == "percent":
             components.sort(key=lambda x: x.get("change_percent", 0), reverse=True)
+        elif sort_by == "technical":
+            # Only the most traded constituents are scored: on a cold K-line store each
+            # one costs an upstream history fetch
+            components.sort(key=lambda x: x.get("amount", 0), reverse=True)
+            components = components[:max(limit, self.TECHNICAL_SORT_CANDIDATES)]
+            # Rank the candidates on one vectorized indicator pass
+            technicals = self.tools.get_batch_technical_context([c["symbol"] for c in components])
+            for c in components:
+                c["technical"] = technicals.get(c["symbol"])
+            def score(c):
+                value = (c["technical"] or {}).get("tech_score")
+                return -1 if value is None else value
+            components.sort(key=score, reverse=True)
             
         return {
             "sector_name": sector_name,
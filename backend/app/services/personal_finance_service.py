@@ -1,5 +1,6 @@
 from typing import List, Dict
 import asyncio
+import logging
 from functools import partial
 from datetime import datetime
 from sqlmodel import Session, select
@@ -8,6 +9,9 @@ from backend.app.agents.personal_finance.db import engine, init_db
 from backend.app.agents.personal_finance.db_models import Portfolio, Asset as DBAsset, ShadowPortfolio, ShadowAsset, PerformanceHistory
 from backend.infrastructure.market.sina import SinaFinanceTool
 from backend.infrastructure.market.akshare_tool import AkShareTool
+from backend.infrastructure.market.spot_snapshot import spot_snapshot_engine
+
+logger = logging.getLogger(__name__)
 
 # Initialize DB tables
 init_db()
@@ -150,25 +154,53 @@ async def save_portfolio(user_id: str, snapshot: PortfolioSnapshot) -> Portfolio
 
 async def update_prices(assets: List[AssetItem]) -> PriceUpdateMap:
     """
-    Batch update asset prices using Sina (Stock) and AkShare (Fund).
+    Batch update asset prices.
+    CN stocks/ETFs come from the shared spot snapshot; the rest (and snapshot misses)
+    use Sina (Stock) and AkShare (Fund) per symbol.
     """
     price_map: Dict[str, PriceUpdate] = {}
     loop = asyncio.get_running_loop()
-    
+
+    # CN stocks / ETFs: one lookup in the shared full-market spot snapshot.
+    # Open-end fund codes collide with stock codes (000001 is both 华夏成长 and 平安银行),
+    # so Funds are only answered from ETF rows; other funds go to the NAV path below.
+    def cn_symbols(asset_type: str) -> List[str]:
+        return [
+            a.symbol for a in assets
+            if a.symbol and a.type == asset_type and a.market in (None, 'CN', 'A-share')
+            and a.symbol.isdigit() and len(a.symbol) == 6
+        ]
+
+    def snapshot_lookup(stock_symbols: List[str], fund_symbols: List[str]):
+        return (
+            spot_snapshot_engine.get_quotes(stock_symbols),
+            spot_snapshot_engine.get_quotes(fund_symbols, market="CN-ETF"),
+        )
+
+    snapshot_quotes = {'Stock': {}, 'Fund': {}}
+    stock_symbols, fund_symbols = cn_symbols('Stock'), cn_symbols('Fund')
+    if stock_symbols or fund_symbols:
+        try:
+            snapshot_quotes['Stock'], snapshot_quotes['Fund'] = await loop.run_in_executor(
+                None, snapshot_lookup, stock_symbols, fund_symbols
+            )
+        except Exception as e:
+            logger.warning(f"Spot snapshot lookup failed: {e}")
+
     for asset in assets:
         if not asset.symbol:
             continue
             
         try:
-            quote = None
-            if asset.type == 'Stock':
+            quote = snapshot_quotes.get(asset.type, {}).get(asset.symbol)
+            if quote is None and asset.type == 'Stock':
                 # Map market code if needed.
                 market = asset.market or "A-share"
                 quote = await loop.run_in_executor(
                     None, 
                     partial(sina_tool.get_stock_quote, symbol=asset.symbol, market=market)
                 )
-            elif asset.type == 'Fund':
+            elif quote is None and asset.type == 'Fund':
                 # AkShare for funds
                 # Check if get_fund_nav exists, otherwise try get_stock_quote (ETFs often work there too)
                 if hasattr(ak_tool, 'get_fund_nav'):
@@ -63,7 +63,7 @@ class JobManager:
         """异步调用记忆系统结算接口"""
         try:
             client = MemoryClient(user_id=user_id, agent_id="research_agent")
-            success = client.finalize()
+            success = await client.afinalize()
             if success:
                 logger.info(f"Memory finalized for user {user_id}")
             else:
@@ -0,0 +1,217 @@
+"""
+Vectorized indicator kernels over a (symbols x bars) panel.
+
+Every kernel works on 2-D float arrays, one row per symbol, bars in time order and
+right-aligned (the latest bar in the last column). Shorter histories are left-padded
+with NaN. Window statistics are evaluated only at the bars needed for a snapshot;
+recursive indicators (EMA / MACD / KDJ) run one vectorized step per bar across all
+symbols. Formulas follow TechnicalAnalysisTool's batch (pandas) code.
+"""
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+SNAPSHOT_COLUMNS = [
+    "bars", "close", "change_pct",
+    "ma5", "ma10", "ma20", "ma60", "ema12", "ema26",
+    "macd_dif", "macd_dea", "macd_hist", "rsi14",
+    "boll_upper", "boll_lower", "boll_width", "atr14",
+    "kdj_k", "kdj_d", "kdj_j", "vol_ratio",
+    "ma_status", "macd_signal", "boll_position", "obv_slope", "tech_score",
+]
+
+
+def stack_bars(
+    histories: Mapping[str, Mapping[str, Sequence[float]]],
+    bars: Optional[int] = None,
+    fields: Sequence[str] = ("close", "high", "low", "volume"),
+) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """
+    Right-align per-symbol column payloads ({"close": [...], ...}, oldest first) into
+    (symbols x bars) arrays, keeping at most the last `bars` bars.
+    """
+    symbols = [s for s, h in histories.items() if h and len(h.get("close", [])) > 0]
+    width = max((len(histories[s]["close"]) for s in symbols), default=0)
+    if bars is not None:
+        width = min(width, bars)
+    arrays = {f: np.full((len(symbols), width), np.nan) for f in fields}
+    for i, s in enumerate(symbols):
+        for f in fields:
+            col = histories[s].get(f)
+            if col is None or width == 0:
+                continue
+            tail = np.asarray(col[-width:], dtype=float)
+            arrays[f][i, width - len(tail):] = tail
+    return symbols, arrays
+
+
+def _window(x: np.ndarray, n: int, back: int = 0) -> np.ndarray:
+    """Columns of the n-bar window ending `back` bars before the last one."""
+    end = x.shape[1] - back
+    if end < n:
+        return np.full((x.shape[0], n), np.nan)
+    return x[:, end - n:end]
+
+
+def window_mean(x: np.ndarray, n: int, back: int = 0) -> np.ndarray:
+    """rolling(n).mean() at one bar; NaN unless the window is complete."""
+    return _window(x, n, back).mean(axis=1)
+
+
+def window_std(x: np.ndarray, n: int, back: int = 0) -> np.ndarray:
+    """rolling(n).std(ddof=1) at one bar."""
+    return _window(x, n, back).std(axis=1, ddof=1)
+
+
+def ewm(x: np.ndarray, alpha: float) -> np.ndarray:
+    """ewm(alpha, adjust=False).mean() per row; leading NaN stays NaN until the first value."""
+    out = np.empty_like(x)
+    acc = np.full(x.shape[0], np.nan)
+    for t in range(x.shape[1]):
+        col = x[:, t]
+        started = ~np.isnan(acc)
+        acc = np.where(started, np.where(np.isnan(col), acc, acc + alpha * (col - acc)), col)
+        out[:, t] = acc
+    return out
+
+
+def rolling_extreme(x: np.ndarray, n: int, fn) -> np.ndarray:
+    """rolling(n, min_periods=n).min()/max() over all bars."""
+    out = np.full_like(x, np.nan)
+    if x.shape[1] >= n:
+        out[:, n - 1:] = fn(sliding_window_view(x, n, axis=1), axis=2)
+    return out
+
+
+def _ffill(x: np.ndarray) -> np.ndarray:
+    """Forward-fill interior NaN per row (leading padding stays NaN)."""
+    mask = np.isnan(x)
+    if not mask.any():
+        return x
+    idx = np.where(mask, 0, np.arange(x.shape[1]))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = x[np.arange(x.shape[0])[:, None], idx]
+    return filled
+
+
+def td_setup_counts(close: np.ndarray, cap: int = 9) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    TD Sequential setup counts at every bar (last axis = time): the run length of
+    consecutive close < close[-4] (buy) / close > close[-4] (sell), capped at `cap`.
+    """
+    close = np.asarray(close, dtype=float)
+    prior = np.full_like(close, np.nan)
+    prior[..., 4:] = close[..., :-4]
+
+    def run_length(mask: np.ndarray) -> np.ndarray:
+        total = np.cumsum(mask, axis=-1)
+        # Running total at the latest bar that broke the run
+        reset = np.maximum.accumulate(np.where(mask, 0, total), axis=-1)
+        return np.minimum(total - reset, cap)
+
+    with np.errstate(invalid="ignore"):
+        return run_length(close < prior), run_length(close > prior)
+
+
+def snapshot(
+    close: np.ndarray,
+    high: Optional[np.ndarray] = None,
+    low: Optional[np.ndarray] = None,
+    volume: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """Latest-bar indicators for every row of the panel (NaN where undefined)."""
+    close = _ffill(np.asarray(close, dtype=float))
+    high = close if high is None else _ffill(np.asarray(high, dtype=float))
+    low = close if low is None else _ffill(np.asarray(low, dtype=float))
+    volume = np.zeros_like(close) if volume is None else np.nan_to_num(np.asarray(volume, dtype=float))
+    n_sym, n_bars = close.shape
+    counts = (~np.isnan(close)).sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        last = close[:, -1] if n_bars else np.full(n_sym, np.nan)
+        prev = close[:, -2] if n_bars > 1 else np.full(n_sym, np.nan)
+        prev_close = np.concatenate([np.full((n_sym, 1), np.nan), close[:, :-1]], axis=1)
+
+        ma = {n: window_mean(close, n) for n in (5, 10, 20, 60)}
+        std20 = window_std(close, 20)
+        upper, lower = ma[20] + 2 * std20, ma[20] - 2 * std20
+
+        ema12 = ewm(close, 2.0 / 13)
+        ema26 = ewm(close, 2.0 / 27)
+        dif = ema12 - ema26
+        dea = ewm(dif, 2.0 / 10)
+
+        # RSI: SMA of gains / losses; the first diff of each series counts as 0
+        delta = close - prev_close
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        rs = _window(gain, 14).mean(axis=1) / _window(loss, 14).mean(axis=1)
+        rsi = np.where(counts >= 14, 100 - 100 / (1 + rs), np.nan)
+
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        atr = np.where(counts >= 14, _window(np.nan_to_num(tr), 14).mean(axis=1), np.nan)
+
+        ll = rolling_extreme(low, 9, np.min)
+        hh = rolling_extreme(high, 9, np.max)
+        k = ewm((close - ll) / (hh - ll) * 100, 1.0 / 3)
+        d = ewm(k, 1.0 / 3)
+
+        # OBV change over the last 4 bars decides obv[-1] vs obv[-5]
+        signed = np.sign(np.nan_to_num(delta)) * volume
+        obv_delta = signed[:, -4:].sum(axis=1) if n_bars else np.zeros(n_sym)
+
+        vol_ma5 = np.where(counts >= 5, window_mean(volume, 5), np.nan)
+        vol_ratio = np.where(vol_ma5 > 0, volume[:, -1] / vol_ma5, 0.0) if n_bars else np.zeros(n_sym)
+
+    def at(series: np.ndarray, back: int = 1) -> np.ndarray:
+        return series[:, -back] if n_bars >= back else np.full(n_sym, np.nan)
+
+    dif_now, dea_now, dif_prev, dea_prev = at(dif), at(dea), at(dif, 2), at(dea, 2)
+    ma5, ma10, ma20, ma60 = (np.nan_to_num(ma[n]) for n in (5, 10, 20, 60))
+
+    ma_status = np.where((ma60 > 0) & (ma5 > ma10) & (ma10 > ma20) & (ma20 > ma60), "bullish_alignment",
+                np.where((ma60 > 0) & (ma5 > 0) & (ma5 < ma10) & (ma10 < ma20) & (ma20 < ma60),
+                         "bearish_alignment", "sideways"))
+    macd_signal = np.where(counts <= 2, "neutral",
+                  np.where((dif_now > dea_now) & (dif_prev <= dea_prev), "golden_cross",
+                  np.where((dif_now < dea_now) & (dif_prev >= dea_prev), "death_cross",
+                  np.where(np.nan_to_num(dif_now) > np.nan_to_num(dea_now), "bullish_zone", "bearish_zone"))))
+    up0, lo0 = np.nan_to_num(upper), np.nan_to_num(lower)
+    boll_position = np.where((up0 > 0) & (last > up0), "above_upper",
+                    np.where((lo0 > 0) & (last < lo0), "below_lower", "within_bands"))
+    obv_slope = np.where(counts <= 5, "flat",
+                np.where(obv_delta > 0, "rising", np.where(obv_delta < 0, "falling", "flat")))
+
+    # Simple trend/momentum composite for ranking: share of bullish conditions, 0-100
+    rsi_now = np.nan_to_num(rsi, nan=50.0)
+    conditions = np.stack([
+        last > ma20, ma5 > ma20, ma_status == "bullish_alignment",
+        np.nan_to_num(dif_now) > np.nan_to_num(dea_now), (rsi_now >= 50) & (rsi_now <= 70),
+        obv_slope == "rising",
+    ])
+    tech_score = np.where(counts >= 20, conditions.mean(axis=0) * 100, np.nan)
+
+    return {
+        "bars": counts,
+        "close": last,
+        "change_pct": np.where(prev > 0, (last - prev) / prev * 100, 0.0),
+        "ma5": ma[5], "ma10": ma[10], "ma20": ma[20], "ma60": ma[60],
+        "ema12": at(ema12), "ema26": at(ema26),
+        "macd_dif": dif_now, "macd_dea": dea_now, "macd_hist": 2 * (dif_now - dea_now),
+        "rsi14": rsi,
+        "boll_upper": upper, "boll_lower": lower,
+        "boll_width": np.where(ma[20] != 0, (upper - lower) / ma[20], np.nan),
+        "atr14": atr,
+        "kdj_k": at(k), "kdj_d": at(d), "kdj_j": 3 * at(k) - 2 * at(d),
+        "vol_ratio": vol_ratio,
+        "ma_status": ma_status, "macd_signal": macd_signal, "boll_position": boll_position,
+        "obv_slope": obv_slope, "tech_score": tech_score,
+    }
+
+
+def snapshot_frame(symbols: Sequence[str], arrays: Mapping[str, np.ndarray]) -> pd.DataFrame:
+    """snapshot() of stacked arrays as a DataFrame indexed by symbol."""
+    result = snapshot(arrays["close"], arrays.get("high"), arrays.get("low"), arrays.get("volume"))
+    return pd.DataFrame(result, index=pd.Index(list(symbols), name="symbol"), columns=SNAPSHOT_COLUMNS)
@@ -0,0 +1,368 @@
+"""
+Incremental technical-indicator engine.
+
+Keeps rolling state per (symbol, first bar) so that appending a bar updates every
+indicator in O(1) instead of rebuilding a DataFrame and recomputing whole series.
+Formulas mirror the batch (pandas) code in TechnicalAnalysisTool exactly:
+
+- MA n:       rolling(n).mean()                        -> running window sum
+- BOLL(20,2): rolling(20).mean() +/- 2 * rolling(20).std(ddof=1)
+                                                       -> running sum / sum of squares
+- EMA/MACD:   ewm(span, adjust=False)                  -> EMA accumulators
+- RSI 14:     rolling(14).mean() of gains / losses (SMA form, as in the batch code)
+- KDJ(9,3,3): rolling(9) min/max -> monotonic deques; K/D = ewm(com=2, adjust=False)
+- ATR 14:     rolling(14).mean() of true range;  OBV: running signed-volume total
+- TD setup:   run length of close < / > close[-4], capped at 9 -> last 4 closes + counters
+
+Outputs match the batch series within |engine - batch| <= 1e-8 * max(1, |batch|)
+(see backend/tests/test_indicator_engine.py). Inputs must be finite; callers fall
+back to the batch path otherwise.
+"""
+import copy
+import math
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+NAN = float("nan")
+
+# Indicator columns produced per bar
+HISTORY_COLUMNS = [
+    "ma5", "ma10", "ma20", "ma30", "ma60",
+    "boll_mid", "boll_upper", "boll_lower",
+    "macd_dif", "macd_dea", "macd_bar", "rsi14",
+    "td_buy_count", "td_sell_count",
+]
+KDJ_COLUMNS = ["kdj_k", "kdj_d", "kdj_j"]
+EXTRA_COLUMNS = ["ema12", "ema26", "atr14", "obv", "vol_ma5"]
+
+TOLERANCE = 1e-8
+
+
+def _div(a: float, b: float) -> float:
+    """a / b with NumPy semantics (x/0 -> +/-inf, 0/0 -> nan)."""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class _Window:
+    """Fixed-size rolling window with O(1) mean and sample std."""
+
+    __slots__ = ("n", "values", "shift", "s1", "s2", "pushes")
+
+    def __init__(self, n: int):
+        self.n = n
+        self.values: deque = deque()
+        # Sums are kept around a shift (the oldest value at the last re-anchor) to avoid
+        # cancellation in the variance; they are rebuilt exactly every n pushes.
+        self.shift = 0.0
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self.pushes = 0
+
+    def push(self, x: float) -> None:
+        self.values.append(x)
+        if len(self.values) > self.n:
+            old = self.values.popleft()
+            d = old - self.shift
+            self.s1 -= d
+            self.s2 -= d * d
+        d = x - self.shift
+        self.s1 += d
+        self.s2 += d * d
+        self.pushes += 1
+        if self.pushes >= self.n:
+            self._reanchor()
+
+    def _reanchor(self) -> None:
+        self.pushes = 0
+        self.shift = self.values[0]
+        devs = [v - self.shift for v in self.values]
+        self.s1 = math.fsum(devs)
+        self.s2 = math.fsum(d * d for d in devs)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.n
+
+    def mean(self) -> float:
+        if not self.full:
+            return NAN
+        return self.shift + self.s1 / self.n
+
+    def std(self) -> float:
+        if not self.full or self.n < 2:
+            return NAN
+        var = (self.s2 - self.s1 * self.s1 / self.n) / (self.n - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+class _Extreme:
+    """Rolling min or max over the last n values via a monotonic deque."""
+
+    __slots__ = ("n", "is_max", "items", "count")
+
+    def __init__(self, n: int, is_max: bool):
+        self.n = n
+        self.is_max = is_max
+        self.items: deque = deque()  # (index, value)
+        self.count = 0
+
+    def push(self, x: float) -> float:
+        i = self.count
+        self.count += 1
+        if self.is_max:
+            while self.items and self.items[-1][1] <= x:
+                self.items.pop()
+        else:
+            while self.items and self.items[-1][1] >= x:
+                self.items.pop()
+        self.items.append((i, x))
+        while self.items[0][0] <= i - self.n:
+            self.items.popleft()
+        return self.items[0][1] if self.count >= self.n else NAN
+
+
+class _Ewm:
+    """pandas ewm(adjust=False, ignore_na=False).mean(), one value at a time."""
+
+    __slots__ = ("alpha", "weighted", "old_wt")
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.weighted = NAN
+        self.old_wt = 1.0
+
+    def push(self, x: float) -> float:
+        if self.weighted != self.weighted:
+            if x == x:
+                self.weighted = x
+                self.old_wt = 1.0
+            return self.weighted
+        self.old_wt *= 1.0 - self.alpha
+        if x == x:
+            if self.weighted != x:
+                self.weighted = (self.old_wt * self.weighted + self.alpha * x) / (self.old_wt + self.alpha)
+            self.old_wt = 1.0
+        return self.weighted
+
+
+class IndicatorState:
+    """Rolling indicator state for one bar series."""
+
+    def __init__(self, with_kdj: bool = True):
+        self.with_kdj = with_kdj
+        self.ma = {n: _Window(n) for n in (5, 10, 20, 30, 60)}
+        self.ema12 = _Ewm(2.0 / 13)
+        self.ema26 = _Ewm(2.0 / 27)
+        self.dea = _Ewm(2.0 / 10)
+        self.gain = _Window(14)
+        self.loss = _Window(14)
+        self.tr = _Window(14)
+        self.vol = _Window(5)
+        self.low9 = _Extreme(9, is_max=False)
+        self.high9 = _Extreme(9, is_max=True)
+        self.k = _Ewm(1.0 / 3)
+        self.d = _Ewm(1.0 / 3)
+        self.prev_close: Optional[float] = None
+        self.obv = 0.0
+        self.closes: deque = deque(maxlen=4)
+        self.td_buy = 0
+        self.td_sell = 0
+
+    def update(self, close: float, high: float, low: float, volume: float) -> Dict[str, float]:
+        """Consume one bar and return the indicator values at that bar."""
+        for w in self.ma.values():
+            w.push(close)
+        ma20 = self.ma[20].mean()
+        std20 = self.ma[20].std()
+
+        e12 = self.ema12.push(close)
+        e26 = self.ema26.push(close)
+        dif = e12 - e26
+        dea = self.dea.push(dif)
+
+        prev = self.prev_close
+        delta = close - prev if prev is not None else NAN
+        self.gain.push(delta if delta > 0 else 0.0)
+        self.loss.push(-delta if delta < 0 else 0.0)
+        rs = _div(self.gain.mean(), self.loss.mean())
+        rsi = 100 - _div(100, 1 + rs)
+
+        ranges = [high - low]
+        if prev is not None:
+            ranges += [abs(high - prev), abs(low - prev)]
+        self.tr.push(max(ranges))
+
+        if prev is not None:
+            if close > prev:
+                self.obv += volume
+            elif close < prev:
+                self.obv -= volume
+        self.vol.push(volume)
+        self.prev_close = close
+
+        prior = self.closes[0] if len(self.closes) == 4 else None
+        self.td_buy = self.td_buy + 1 if prior is not None and close < prior else 0
+        self.td_sell = self.td_sell + 1 if prior is not None and close > prior else 0
+        self.closes.append(close)
+
+        row = {
+            "ma5": self.ma[5].mean(), "ma10": self.ma[10].mean(), "ma20": ma20,
+            "ma30": self.ma[30].mean(), "ma60": self.ma[60].mean(),
+            "boll_mid": ma20, "boll_upper": ma20 + std20 * 2, "boll_lower": ma20 - std20 * 2,
+            "macd_dif": dif, "macd_dea": dea, "macd_bar": 2 * (dif - dea),
+            "rsi14": rsi,
+            "td_buy_count": min(self.td_buy, 9), "td_sell_count": min(self.td_sell, 9),
+            "ema12": e12, "ema26": e26, "atr14": self.tr.mean(), "obv": self.obv,
+            "vol_ma5": self.vol.mean(),
+        }
+        if self.with_kdj:
+            ll = self.low9.push(low)
+            hh = self.high9.push(high)
+            rsv = _div(close - ll, hh - ll) * 100
+            k = self.k.push(rsv)
+            d = self.d.push(k)
+            row.update(kdj_k=k, kdj_d=d, kdj_j=3 * k - 2 * d)
+        return row
+
+
+def _bar_key(candle: Dict[str, Any]) -> Any:
+    for key in ("date", "timestamp", "time", "Date", "Timestamp"):
+        if key in candle:
+            return candle[key]
+    return None
+
+
+def _field(candle: Dict[str, Any], name: str, default: Optional[float] = None) -> float:
+    val = candle.get(name, candle.get(name.capitalize(), default))
+    if val is None:
+        raise ValueError(f"missing {name}")
+    val = float(val)
+    if not math.isfinite(val):
+        raise ValueError(f"non-finite {name}")
+    return val
+
+
+class _Series:
+    __slots__ = ("state", "checkpoint", "rows", "keys", "last_bar", "with_kdj")
+
+    def __init__(self, with_kdj: bool):
+        self.with_kdj = with_kdj
+        self.state = IndicatorState(with_kdj)
+        self.checkpoint: Optional[IndicatorState] = None  # state before the last bar
+        self.rows: List[Dict[str, float]] = []
+        self.keys: List[Any] = []
+        self.last_bar: Optional[Tuple[float, ...]] = None
+
+
+class IndicatorEngine:
+    """
+    Per-symbol incremental indicator cache.
+
+    Series are keyed by (symbol, first bar timestamp), since EMA-seeded indicators
+    depend on where the series starts. A request whose bars extend a cached series
+    only processes the new bars; a revised last bar (e.g. today's forming candle) is
+    replayed from a checkpoint taken before it; an identical request is a cache hit.
+    """
+
+    def __init__(self, max_series: int = 512):
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series: "OrderedDict[Tuple[str, Any], _Series]" = OrderedDict()
+        self._stats = {"hits": 0, "appended_bars": 0, "replayed_bars": 0, "rebuilds": 0}
+
+    def indicators(self, symbol: str, candles: List[Dict[str, Any]], tail: Optional[int] = None) -> List[Dict[str, float]]:
+        """
+        Indicator rows (one per candle, NaN where undefined), or only the last ``tail``
+        rows. Rows are copies taken under the lock. Raises ValueError on bad input.
+        """
+        if not candles:
+            return []
+        first = _bar_key(candles[0])
+        with_kdj = "high" in candles[0] or "High" in candles[0]
+        key = (symbol, first)
+
+        # Pure-Python updates hold the GIL anyway; one lock keeps series mutation safe.
+        # The cached rows are revised/extended by later calls, so never hand them out.
+        with self._lock:
+            rows = self._indicators(key, with_kdj, candles)
+            return [dict(row) for row in (rows[-tail:] if tail else rows)]
+
+    def _indicators(self, key, with_kdj: bool, candles: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        series = self._series.get(key)
+        if series is None or series.with_kdj != with_kdj or not self._extends(series, candles):
+            series = _Series(with_kdj)
+            self._stats["rebuilds"] += 1
+            start = 0
+        else:
+            n = len(series.rows)
+            if self._bar(candles[n - 1]) != series.last_bar:
+                # Last bar revised: rewind to the state before it
+                series.state = series.checkpoint
+                series.checkpoint = None
+                series.rows.pop()
+                series.keys.pop()
+                self._stats["replayed_bars"] += 1
+                start = n - 1
+            elif n == len(candles):
+                self._stats["hits"] += 1
+                return series.rows
+            else:
+                start = n
+            self._stats["appended_bars"] += len(candles) - start
+
+        self._advance(series, candles, start)
+        self._series[key] = series
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return series.rows
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "series": len(self._series)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    # ------------------------------------------------------------------ internals
+
+    @staticmethod
+    def _bar(candle: Dict[str, Any]) -> Tuple[float, ...]:
+        return (_field(candle, "close"), candle.get("high"), candle.get("low"), candle.get("volume"))
+
+    def _extends(self, series: _Series, candles: List[Dict[str, Any]]) -> bool:
+        n = len(series.rows)
+        if n == 0 or n > len(candles):
+            return False
+        if series.keys[-1] != _bar_key(candles[n - 1]):
+            return False
+        # Bars before the last one must be unchanged (a rebased adjusted series differs here)
+        return n < 2 or (series.keys[-2] == _bar_key(candles[n - 2])
+                         and series.rows[-2]["_close"] == _field(candles[n - 2], "close"))
+
+    def _advance(self, series: _Series, candles: List[Dict[str, Any]], start: int) -> None:
+        state = series.state
+        for i in range(start, len(candles)):
+            c = candles[i]
+            close = _field(c, "close")
+            if series.with_kdj:
+                high, low = _field(c, "high"), _field(c, "low")
+            else:
+                high = low = close
+            volume = _field(c, "volume", 0.0)
+            if i == len(candles) - 1:
+                series.checkpoint = copy.deepcopy(state)
+            row = state.update(close, high, low, volume)
+            row["_close"] = close
+            series.rows.append(row)
+            series.keys.append(_bar_key(c))
+        series.last_bar = self._bar(candles[-1])
+
+
+# Shared by every TechnicalAnalysisTool in the process
+indicator_engine = IndicatorEngine()
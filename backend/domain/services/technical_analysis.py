@@ -3,6 +3,11 @@ import numpy as np
 from typing import Dict, Any, List, Optional
 import logging
 
+from backend.domain.services import batch_indicators
+from backend.domain.services.indicator_engine import (
+    indicator_engine, HISTORY_COLUMNS, KDJ_COLUMNS,
+)
+
 logger = logging.getLogger(__name__)
 
 class TechnicalAnalysisTool:
@@ -11,12 +16,12 @@ class TechnicalAnalysisTool:
     Calculates key technical indicators: MA, EMA, RSI, MACD, Bollinger Bands, KDJ, ATR, OBV, Pivot Points.
     """
     
-    def calculate_indicators(self, candles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_indicators(self, candles: List[Dict[str, Any]], symbol: Optional[str] = None) -> Dict[str, Any]:
         """
         Calculate technical indicators from a list of candles (Basic version for legacy compatibility).
         """
         # Reuse advanced calculation but return simplified format
-        advanced = self.calculate_advanced_indicators(candles)
+        advanced = self.calculate_advanced_indicators(candles, symbol=symbol)
         if "error" in advanced:
             return advanced
             
@@ -66,54 +71,31 @@ class TechnicalAnalysisTool:
             }
         }
 
-    def calculate_td_sequential(self, candles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_td_sequential(self, candles: List[Dict[str, Any]], close: Optional[pd.Series] = None) -> Dict[str, Any]:
         """
         Calculate TD Sequential (Tom DeMark) indicators.
         Focuses on Setup phase (9 counts).
+        `close` reuses a close series the caller already built from `candles`.
         """
         if not candles or len(candles) < 15:
             return {"status": "insufficient_data"}
 
         try:
-            df = pd.DataFrame(candles)
-            if 'close' not in df.columns:
-                 # Normalize if needed
-                 col_map = {c: c.lower() for c in df.columns}
-                 df = df.rename(columns=col_map)
-            
-            close = df['close'].astype(float)
-            
+            if close is None:
+                df = pd.DataFrame(candles)
+                if 'close' not in df.columns:
+                     # Normalize if needed
+                     col_map = {c: c.lower() for c in df.columns}
+                     df = df.rename(columns=col_map)
+                close = df['close']
+
             # TD Setup: Compare Close with Close 4 periods ago
             # Buy Setup: Close < Close[i-4] for 9 consecutive bars
             # Sell Setup: Close > Close[i-4] for 9 consecutive bars
-            
-            shift_4 = close.shift(4)
-            
-            buy_setup_count = 0
-            sell_setup_count = 0
-            
-            # Iterate backwards from the latest candle
-            # We want to know the status of the *current* sequence
-            
-            # 1. Check Buy Setup (Bearish exhaustion -> Bullish reversal)
-            # Need 9 consecutive Close < Close_minus_4
-            current_idx = len(close) - 1
-            for i in range(current_idx, current_idx - 9, -1):
-                if i < 4: break
-                if close.iloc[i] < shift_4.iloc[i]:
-                    buy_setup_count += 1
-                else:
-                    break
-            
-            # 2. Check Sell Setup (Bullish exhaustion -> Bearish reversal)
-            # Need 9 consecutive Close > Close_minus_4
-            for i in range(current_idx, current_idx - 9, -1):
-                if i < 4: break
-                if close.iloc[i] > shift_4.iloc[i]:
-                    sell_setup_count += 1
-                else:
-                    break
-            
+            buy, sell = batch_indicators.td_setup_counts(close.to_numpy(dtype=float))
+            buy_setup_count = int(buy[-1])
+            sell_setup_count = int(sell[-1])
+
             # Determine status
             td_status = "neutral"
             count = 0
@@ -139,10 +121,13 @@ class TechnicalAnalysisTool:
             logger.error(f"TD Sequential calculation failed: {e}")
             return {"error": str(e)}
 
-    def calculate_advanced_indicators(self, candles: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def calculate_advanced_indicators(self, candles: List[Dict[str, Any]], symbol: Optional[str] = None) -> Dict[str, Any]:
         """
         Calculate comprehensive technical indicators for Agent Context.
         Includes: EMA, ATR, OBV, Pivot Points, Price Action.
+
+        With `symbol`, indicators come from the shared incremental engine (only bars
+        not seen before for that symbol are processed).
         """
         if not candles or len(candles) < 5:
             return {"error": "Insufficient data (minimum 5 candles required)"}
@@ -183,119 +168,67 @@ class TechnicalAnalysisTool:
                     return val
                 return 0
 
-            # --- 1. Trend Indicators ---
-            # SMA
-            ma5 = get_last(close.rolling(window=5).mean())
-            ma10 = get_last(close.rolling(window=10).mean())
-            ma20 = get_last(close.rolling(window=20).mean())
-            ma60 = get_last(close.rolling(window=60).mean())
-            
-            # EMA (Exponential) - More sensitive
-            ema12 = get_last(close.ewm(span=12, adjust=False).mean())
-            ema26 = get_last(close.ewm(span=26, adjust=False).mean())
-            
+            def nz(val):
+                return 0 if pd.isna(val) else val
+
+            # --- 1-4. Trend / Momentum / Volatility / Volume ---
+            # Raw latest values (NaN where undefined), incremental when a symbol is given
+            snap = self._incremental_snapshot(symbol, candles) if symbol else None
+            if snap is None:
+                snap = self._batch_snapshot(close, high, low, vol)
+
+            ma5 = nz(snap["ma5"])
+            ma10 = nz(snap["ma10"])
+            ma20 = nz(snap["ma20"])
+            ma60 = nz(snap["ma60"])
+            ema12 = nz(snap["ema12"])
+            ema26 = nz(snap["ema26"])
+
             # Trend Status
             ma_status = "sideways"
             if ma5 > 0 and ma10 > 0 and ma20 > 0 and ma60 > 0:
                 if ma5 > ma10 > ma20 > ma60: ma_status = "bullish_alignment"
                 elif ma5 < ma10 < ma20 < ma60: ma_status = "bearish_alignment"
 
-            # --- 2. Momentum Indicators ---
             # RSI (14)
-            rsi_val = 50
-            try:
-                delta = close.diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                rsi_val = get_last(rsi)
-                if pd.isna(rsi_val): rsi_val = 50
-            except: pass
-            
+            rsi_val = nz(snap["rsi14"])
+
             # MACD (12, 26, 9)
-            dif_val = 0
-            dea_val = 0
-            hist_val = 0
+            dif_val = nz(snap["dif"])
+            dea_val = nz(snap["dea"])
+            hist_val = nz(snap["hist"])
             cross_signal = "neutral"
-            
-            try:
-                exp1 = close.ewm(span=12, adjust=False).mean()
-                exp2 = close.ewm(span=26, adjust=False).mean()
-                macd_dif = exp1 - exp2
-                macd_dea = macd_dif.ewm(span=9, adjust=False).mean()
-                macd_hist = 2 * (macd_dif - macd_dea)
-                
-                dif_val = get_last(macd_dif)
-                dea_val = get_last(macd_dea)
-                hist_val = get_last(macd_hist)
-                
-                # MACD Signal
-                if len(macd_dif) > 2:
-                    if macd_dif.iloc[-1] > macd_dea.iloc[-1] and macd_dif.iloc[-2] <= macd_dea.iloc[-2]:
-                        cross_signal = "golden_cross"
-                    elif macd_dif.iloc[-1] < macd_dea.iloc[-1] and macd_dif.iloc[-2] >= macd_dea.iloc[-2]:
-                        cross_signal = "death_cross"
-                    elif dif_val > dea_val:
-                        cross_signal = "bullish_zone"
-                    else:
-                        cross_signal = "bearish_zone"
-            except: pass
-            
-            # --- 3. Volatility ---
+            if len(close) > 2:
+                if snap["dif"] > snap["dea"] and snap["dif_prev"] <= snap["dea_prev"]:
+                    cross_signal = "golden_cross"
+                elif snap["dif"] < snap["dea"] and snap["dif_prev"] >= snap["dea_prev"]:
+                    cross_signal = "death_cross"
+                elif dif_val > dea_val:
+                    cross_signal = "bullish_zone"
+                else:
+                    cross_signal = "bearish_zone"
+
             # Bollinger Bands
-            upper_val = 0
-            lower_val = 0
-            width_pct_val = 0
+            upper_val = nz(snap["boll_upper"])
+            lower_val = nz(snap["boll_lower"])
+            width_pct_val = nz(snap["boll_width"])
             bb_pos = "within_bands"
+            curr_price = get_last(close)
+            if upper_val > 0 and curr_price > upper_val: bb_pos = "above_upper"
+            elif lower_val > 0 and curr_price < lower_val: bb_pos = "below_lower"
 
-            try:
-                std20 = close.rolling(window=20).std()
-                ma20_series = close.rolling(window=20).mean()
-                upper = ma20_series + 2 * std20
-                lower = ma20_series - 2 * std20
-                width_pct = (upper - lower) / ma20_series
-                
-                upper_val = get_last(upper)
-                lower_val = get_last(lower)
-                width_pct_val = get_last(width_pct)
-                
-                curr_price = get_last(close)
-                if upper_val > 0 and curr_price > upper_val: bb_pos = "above_upper"
-                elif lower_val > 0 and curr_price < lower_val: bb_pos = "below_lower"
-            except: pass
-            
             # ATR (14)
-            atr = 0
-            try:
-                high_low = high - low
-                high_close = (high - close.shift()).abs()
-                low_close = (low - close.shift()).abs()
-                ranges = pd.concat([high_low, high_close, low_close], axis=1)
-                true_range = ranges.max(axis=1)
-                atr = get_last(true_range.rolling(window=14).mean())
-            except: pass
+            atr = nz(snap["atr14"])
 
-            # --- 4. Volume Analysis ---
             # OBV
             obv_slope = "flat"
-            try:
-                obv_change = pd.Series(0, index=df.index)
-                obv_change.loc[close > close.shift()] = vol
-                obv_change.loc[close < close.shift()] = -vol # Use negative for obv calculation logic
-                obv = obv_change.cumsum()
-                
-                if len(obv) > 5:
-                    if obv.iloc[-1] > obv.iloc[-5]: obv_slope = "rising"
-                    elif obv.iloc[-1] < obv.iloc[-5]: obv_slope = "falling"
-            except: pass
+            if len(close) > 5:
+                if snap["obv"] > snap["obv_prev4"]: obv_slope = "rising"
+                elif snap["obv"] < snap["obv_prev4"]: obv_slope = "falling"
 
             # Volume MA
-            vol_ratio = 0
-            try:
-                vol_ma5 = get_last(vol.rolling(window=5).mean())
-                vol_ratio = vol.iloc[-1] / vol_ma5 if vol_ma5 > 0 else 0
-            except: pass
+            vol_ma5 = nz(snap["vol_ma5"])
+            vol_ratio = vol.iloc[-1] / vol_ma5 if vol_ma5 > 0 else 0
 
             # --- 5. Support / Resistance (Pivot Points) ---
             pp = r1 = s1 = 0
@@ -343,7 +276,7 @@ class TechnicalAnalysisTool:
                 })
 
             # --- 7. Review Specific Indicators ---
-            td_seq = self.calculate_td_sequential(candles)
+            td_seq = self.calculate_td_sequential(candles, close=close)
             
             curr_price = get_last(close)
             prev_close = close.iloc[-2] if len(close) > 1 else curr_price
@@ -412,13 +345,121 @@ class TechnicalAnalysisTool:
             logger.error(f"Advanced analysis failed: {e}", exc_info=True)
             return {"error": str(e)}
 
-    def calculate_indicators_history(self, candles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _batch_snapshot(self, close: pd.Series, high: pd.Series, low: pd.Series, vol: pd.Series) -> Dict[str, float]:
+        """Latest raw indicator values computed over the whole series (reference path)."""
+        def last(series, back=1):
+            return series.iloc[-back] if len(series) >= back else np.nan
+
+        ma20_series = close.rolling(window=20).mean()
+        std20 = close.rolling(window=20).std()
+        upper = ma20_series + 2 * std20
+        lower = ma20_series - 2 * std20
+
+        exp1 = close.ewm(span=12, adjust=False).mean()
+        exp2 = close.ewm(span=26, adjust=False).mean()
+        macd_dif = exp1 - exp2
+        macd_dea = macd_dif.ewm(span=9, adjust=False).mean()
+
+        delta = close.diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        rsi = 100 - (100 / (1 + gain / loss))
+
+        ranges = pd.concat([high - low, (high - close.shift()).abs(), (low - close.shift()).abs()], axis=1)
+        atr = ranges.max(axis=1).rolling(window=14).mean()
+
+        obv_change = pd.Series(0.0, index=close.index)
+        obv_change.loc[close > close.shift()] = vol
+        obv_change.loc[close < close.shift()] = -vol
+        obv = obv_change.cumsum()
+
+        return {
+            "ma5": last(close.rolling(window=5).mean()),
+            "ma10": last(close.rolling(window=10).mean()),
+            "ma20": last(ma20_series),
+            "ma60": last(close.rolling(window=60).mean()),
+            "ema12": last(exp1), "ema26": last(exp2),
+            "rsi14": last(rsi),
+            "dif": last(macd_dif), "dea": last(macd_dea), "hist": last(2 * (macd_dif - macd_dea)),
+            "dif_prev": last(macd_dif, 2), "dea_prev": last(macd_dea, 2),
+            "boll_upper": last(upper), "boll_lower": last(lower),
+            "boll_width": last((upper - lower) / ma20_series),
+            "atr14": last(atr),
+            "obv": last(obv), "obv_prev4": last(obv, 5),
+            "vol_ma5": last(vol.rolling(window=5).mean()),
+        }
+
+    def _incremental_snapshot(self, symbol: str, candles: List[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+        """Same values as _batch_snapshot, from the incremental engine. None if unusable."""
+        try:
+            rows = indicator_engine.indicators(symbol, candles, tail=5)
+        except (ValueError, TypeError) as e:
+            logger.debug(f"Incremental indicators unavailable for {symbol}, using batch: {e}")
+            return None
+        nan = float("nan")
+        cur = rows[-1]
+        prev = rows[-2] if len(rows) >= 2 else {}
+        mid = cur["boll_mid"]
+        width = (cur["boll_upper"] - cur["boll_lower"]) / mid if mid == mid and mid != 0 else nan
+        return {
+            "ma5": cur["ma5"], "ma10": cur["ma10"], "ma20": cur["ma20"], "ma60": cur["ma60"],
+            "ema12": cur["ema12"], "ema26": cur["ema26"],
+            "rsi14": cur["rsi14"],
+            "dif": cur["macd_dif"], "dea": cur["macd_dea"], "hist": cur["macd_bar"],
+            "dif_prev": prev.get("macd_dif", nan), "dea_prev": prev.get("macd_dea", nan),
+            "boll_upper": cur["boll_upper"], "boll_lower": cur["boll_lower"], "boll_width": width,
+            "atr14": cur["atr14"],
+            "obv": cur["obv"], "obv_prev4": rows[-5]["obv"] if len(rows) >= 5 else nan,
+            "vol_ma5": cur["vol_ma5"],
+        }
+
+    def calculate_batch_indicators(
+        self,
+        close: np.ndarray,
+        high: Optional[np.ndarray] = None,
+        low: Optional[np.ndarray] = None,
+        volume: Optional[np.ndarray] = None,
+        symbols: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Latest-bar indicators for many symbols at once.
+
+        Args:
+            close/high/low/volume: (symbols x bars) arrays, oldest bar first, right-aligned
+                (shorter histories left-padded with NaN). See batch_indicators.stack_bars.
+            symbols: Row labels; defaults to 0..n-1.
+
+        Returns:
+            DataFrame indexed by symbol with batch_indicators.SNAPSHOT_COLUMNS
+            (MA/EMA/MACD/RSI/BOLL/ATR/KDJ values, signal labels and a 0-100 tech_score).
+        """
+        close = np.atleast_2d(np.asarray(close, dtype=float))
+        if symbols is None:
+            symbols = [str(i) for i in range(close.shape[0])]
+        return batch_indicators.snapshot_frame(
+            symbols, {"close": close, "high": high, "low": low, "volume": volume}
+        )
+
+    def calculate_indicators_history(self, candles: List[Dict[str, Any]], symbol: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Calculate indicators and return full history (for charts).
+        With `symbol`, rows come from the shared incremental engine.
         """
         if not candles or len(candles) < 30:
             return candles or []
-            
+
+        if symbol and 'close' in candles[0]:
+            try:
+                rows = indicator_engine.indicators(symbol, candles)
+                columns = HISTORY_COLUMNS + (KDJ_COLUMNS if 'high' in candles[0] and 'low' in candles[0] else [])
+                return [
+                    {**{k: (None if isinstance(v, float) and v != v else v) for k, v in c.items()},
+                     **{col: (None if row[col] != row[col] else row[col]) for col in columns}}
+                    for c, row in zip(candles, rows)
+                ]
+            except (ValueError, TypeError) as e:
+                logger.debug(f"Incremental indicators unavailable for {symbol}, using batch: {e}")
+
         try:
             df = pd.DataFrame(candles)
             if 'close' not in df.columns:
@@ -463,6 +504,9 @@ class TechnicalAnalysisTool:
                 df['kdj_d'] = df['kdj_k'].ewm(com=2, adjust=False).mean()
                 df['kdj_j'] = 3 * df['kdj_k'] - 2 * df['kdj_d']
 
+            # 6. TD Sequential setup counts
+            df['td_buy_count'], df['td_sell_count'] = batch_indicators.td_setup_counts(close.to_numpy())
+
             df = df.replace({np.nan: None})
             return df.to_dict(orient='records')
             
@@ -8,8 +8,7 @@ router = APIRouter(prefix="/api/macro-data", tags=["Macro Data"])
 @router.get("/historical/{indicator}")
 async def get_macro_history(indicator: str, period: str = "1y"):
     """Get historical macro data."""
-    import asyncio
-    result = await asyncio.to_thread(market_service.get_macro_history, indicator, period)
+    result = await market_service.aget_macro_history(indicator, period)
     # Clean NaNs
     result = clean_nans(result)
     
@@ -36,8 +35,7 @@ async def get_macro_history(indicator: str, period: str = "1y"):
 async def get_fed_probability():
     """Get Fed Implied Probability."""
     try:
-        import asyncio
-        result = await asyncio.to_thread(market_service.get_fed_probability)
+        result = await market_service.aget_fed_probability()
         return clean_nans(result)
     except Exception as e:
         return {
@@ -16,8 +16,7 @@ async def get_price(payload: dict):
     if not symbol:
         raise HTTPException(status_code=400, detail="Symbol is required")
     
-    import asyncio
-    return clean_nans(await asyncio.to_thread(market_service.get_stock_price, symbol, market))
+    return clean_nans(await market_service.aget_stock_price(symbol, market))
 
 @router.get("/metrics/{symbol}")
 async def get_metrics(symbol: str):
@@ -34,8 +33,7 @@ async def get_indicators(symbol: str):
 @router.get("/historical/{symbol}")
 async def get_historical(symbol: str, period: str = "30d", interval: str = "1d"):
     """Get historical data."""
-    import asyncio
-    return clean_nans(await asyncio.to_thread(market_service.get_historical_data, symbol, period, interval))
+    return clean_nans(await market_service.aget_historical_data(symbol, period, interval))
 
 @router.get("/technical/{symbol}")
 async def get_technical(symbol: str, period: str = "1y"):
@@ -50,11 +48,19 @@ async def get_technical(symbol: str, period: str = "1y"):
         "timestamp": datetime.now().isoformat()
     })
 
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Get quote cache statistics (hits / misses / coalesced per namespace)."""
+    return {
+        "status": "success",
+        "data": market_service.get_cache_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @router.get("/macro")
 async def get_macro(query: str):
     """Get macro data."""
-    import asyncio
-    return clean_nans(await asyncio.to_thread(market_service.get_macro_data, query))
+    return clean_nans(await market_service.aget_macro_data(query))
 
 # --- Batch & Hot (Legacy Compat) ---
 
@@ -91,7 +97,7 @@ async def query_market_data(payload: Dict[str, Any] = Body(...)):
     # Define async wrapper for parallel execution
     async def fetch_price(sym):
         try:
-            res = await asyncio.to_thread(tools.get_stock_price, sym)
+            res = await tools.aget_stock_price(sym)
             if res and "error" not in res:
                 return {
                  "status": "success",
@@ -176,7 +182,7 @@ async def get_sectors_flow(
 async def get_sector_stocks(
     name: str, 
     limit: int = 5,
-    sort_by: str = Query("amount", enum=["amount", "percent"]),
+    sort_by: str = Query("amount", enum=["amount", "percent", "technical"]),
     sector_type: str = Query("industry", enum=["industry", "concept"])
 ):
     """
@@ -1,22 +1,22 @@
 import os
-from backend.entrypoints.api.routers import (
-    market,
-    agent,
-    adk,
-    browser,
-    macro,
-    search,
-    report,
-    simulation,
-    agent_financial,
-    agent_technical,
-    agent_macro,
-    agent_sentiment,
-    research,
-    agent_review,
-    agent_market,  # Added
-    agent_personal_finance,  # Added
+import sys
+from backend.entrypoints.api.startup import (
+    ROUTERS,
+    LazyRouterMiddleware,
+    LazyRouters,
+    profiler,
 )
+
+# --profile-startup: time every module import and init step, print a report, exit
+PROFILE_STARTUP = __name__ == "__main__" and "--profile-startup" in sys.argv
+# Lazy mode: import each router (and the subsystems behind it) on its first request
+LAZY_ROUTERS = os.getenv("API_LAZY_ROUTERS") == "1" or (
+    __name__ == "__main__" and "--lazy-routers" in sys.argv
+)
+if PROFILE_STARTUP:
+    profiler.install()
+
+import asyncio
 import logging
 import uvicorn
 from fastapi import FastAPI
@@ -28,16 +28,17 @@ from backend.infrastructure.adk.core.llm import configure_environment
 from backend.infrastructure.database.engine import create_db_and_tables
 
 # Configure Logging (Detailed)
-setup_logging()
+with profiler.step("init", "setup_logging"):
+    setup_logging()
 logger = logging.getLogger(__name__)
 
 # Configure Environment (Critical for API Keys)
-configure_environment()
+with profiler.step("init", "configure_environment"):
+    configure_environment()
 
 # Initialize Database
-create_db_and_tables()
-
-# Routers
+with profiler.step("init", "create_db_and_tables"):
+    create_db_and_tables()
 
 app = FastAPI(title="AI Funding Backend", version="2.0")
 
@@ -57,22 +58,11 @@ app.add_middleware(
 )
 
 # Include Routers
-app.include_router(market.router)
-app.include_router(agent.router)
-app.include_router(adk.router)  # /chat
-app.include_router(browser.router)
-app.include_router(macro.router)
-app.include_router(search.router)
-app.include_router(report.router)
-app.include_router(simulation.router)  # /api/simulation
-app.include_router(agent_financial.router)
-app.include_router(agent_technical.router)
-app.include_router(agent_macro.router)
-app.include_router(agent_sentiment.router)
-app.include_router(research.router)
-app.include_router(agent_review.router)
-app.include_router(agent_market.router)
-app.include_router(agent_personal_finance.router)
+routers = LazyRouters(app, ROUTERS)
+if LAZY_ROUTERS:
+    app.add_middleware(LazyRouterMiddleware, routers=routers)
+else:
+    routers.include_all()
 
 
 @app.get("/health")
@@ -80,6 +70,37 @@ def health_check():
     return {"status": "ok", "version": "2.0"}
 
 
+def _start_spot_snapshot():
+    from backend.infrastructure.market.spot_snapshot import spot_snapshot_engine
+
+    spot_snapshot_engine.start()
+
+
+@app.on_event("startup")
+async def start_spot_snapshot():
+    """
+    Refresh the A-share/ETF spot snapshot on a schedule during trading hours, so batch
+    quote requests read a warm snapshot instead of pulling the spot tables themselves.
+    Disable with `spot_snapshot: {scheduled: false}` in .config.yaml.
+    """
+    if (config.get("spot_snapshot") or {}).get("scheduled", True):
+        # Importing akshare takes seconds; don't hold up startup for it
+        asyncio.get_running_loop().run_in_executor(None, _start_spot_snapshot)
+
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Stop the spot snapshot refresher and close the pooled async HTTP clients."""
+    from backend.infrastructure.market.async_http import async_http
+    from backend.infrastructure.adk.core.memory_client import aclose_clients
+
+    spot_snapshot = sys.modules.get("backend.infrastructure.market.spot_snapshot")
+    if spot_snapshot is not None:
+        await asyncio.to_thread(spot_snapshot.spot_snapshot_engine.stop)
+    await async_http.aclose()
+    await aclose_clients()
+
+
 def print_registered_routes(app: FastAPI):
     """Print all registered routes."""
     logger.info("Registered API Routes:")
@@ -89,8 +110,26 @@ def print_registered_routes(app: FastAPI):
             logger.info(f"  {methods} {route.path}")
 
 
+def profile_startup():
+    """Print the startup profile, including construction of each shared sub-tool."""
+    from backend.app.registry import Tools
+
+    routers.include_all()
+    tools = Tools()
+    for name in ("akshare", "sina", "yahoo", "xueqiu", "fred", "technical", "finbert",
+                 "report_finder", "report_content", "report_analyst", "pdf",
+                 "tavily", "serp", "ddg"):
+        with profiler.step("singleton", f"Tools.{name}"):
+            getattr(tools, name)
+    profiler.uninstall()
+    print(profiler.report())
+
+
 def start():
     """Entry point for programmable start."""
+    if PROFILE_STARTUP:
+        profile_startup()
+        return
     port = int(config.get("port", 8000))
     print_registered_routes(app)  # Print routes on start
     uvicorn.run(app, host="0.0.0.0", port=port)
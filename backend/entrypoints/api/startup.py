@@ -0,0 +1,182 @@
+"""
+Startup helpers for the API server: lazy router loading and startup profiling.
+
+- LazyRouters registers routers by path prefix and imports each one on the
+  first request under its prefix, so subsystems (akshare, yfinance, jieba,
+  agents, ...) that a process never serves are never imported.
+- StartupProfiler records per-module import time (via a builtins.__import__
+  hook) and the duration of named init steps, and prints a report for
+  ``python -m backend.entrypoints.api.server --profile-startup``.
+"""
+
+import asyncio
+import builtins
+import importlib
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROUTERS_PACKAGE = "backend.entrypoints.api.routers"
+
+# Routers: module under backend.entrypoints.api.routers -> path prefixes it serves
+ROUTERS = [
+    ("market", ["/api/market", "/api/market-data"]),
+    ("agent", ["/api/agent/news-sentiment"]),
+    ("adk", ["/chat"]),  # /chat
+    ("browser", ["/api/browser"]),
+    ("macro", ["/api/macro-data"]),
+    ("search", ["/api/web-search"]),
+    ("report", ["/api/financial-report", "/api/tools/financial_report_tool"]),
+    ("simulation", ["/api/simulation"]),  # /api/simulation
+    ("agent_financial", ["/api/agent/financial"]),
+    ("agent_technical", ["/api/agent/technical"]),
+    ("agent_macro", ["/api/agent/macro"]),
+    ("agent_sentiment", ["/api/agent/sentiment"]),
+    ("research", ["/api/research"]),
+    ("agent_review", ["/api/agent/review"]),
+    ("agent_market", ["/api/agent/market"]),
+    ("agent_personal_finance", ["/api/personal-finance"]),
+]
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        # module -> [cumulative_s, self_s]
+        self.imports: Dict[str, List[float]] = {}
+        self.steps: List[Tuple[str, str, float]] = []
+        self._original_import = None
+        self._stack: List[List[float]] = []
+
+    def install(self) -> None:
+        """Start timing first-time module imports."""
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        # [start, time spent in nested first-time imports]
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            if name not in self.imports:
+                self.imports[name] = [elapsed, elapsed - frame[1]]
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    @contextmanager
+    def step(self, kind: str, label: str):
+        """Time a named step (kind: "router", "init", ...); no-op when disabled."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((kind, label, time.perf_counter() - started))
+
+    def report(self, top: int = 25) -> str:
+        total = time.perf_counter() - self.started
+        lines = [f"Startup profile: {total * 1000:.0f} ms total"]
+        for kind in dict.fromkeys(kind for kind, _, _ in self.steps):
+            lines.append(f"\n{kind} (ms):")
+            for _, label, elapsed in sorted(
+                (s for s in self.steps if s[0] == kind), key=lambda s: -s[2]
+            ):
+                lines.append(f"  {elapsed * 1000:9.1f}  {label}")
+        lines.append(f"\nslowest module imports, self time (ms, top {top}):")
+        ranked = sorted(self.imports.items(), key=lambda item: -item[1][1])[:top]
+        for name, (cumulative, own) in ranked:
+            lines.append(f"  {own * 1000:9.1f}  {name}  (cumulative {cumulative * 1000:.1f})")
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler()
+
+
+class LazyRouters:
+    """
+    Include routers on demand. ``routers`` maps a module name under
+    backend.entrypoints.api.routers to the path prefixes it serves.
+    """
+
+    # Requests that need every route registered
+    LOAD_ALL_PATHS = ("/openapi.json", "/docs", "/redoc")
+
+    def __init__(self, app, routers: Sequence[Tuple[str, Sequence[str]]]):
+        self.app = app
+        self.routers = list(routers)
+        self.loaded: Dict[str, bool] = {}
+
+    @staticmethod
+    def _import(module_name: str):
+        with profiler.step("router", module_name):
+            return importlib.import_module(f"{ROUTERS_PACKAGE}.{module_name}")
+
+    def include(self, module_name: str, module=None) -> None:
+        if self.loaded.get(module_name):
+            return
+        module = module or self._import(module_name)
+        self.app.include_router(module.router)
+        # Regenerate the OpenAPI schema with the new routes
+        self.app.openapi_schema = None
+        self.loaded[module_name] = True
+        logger.info(f"Router loaded: {module_name}")
+
+    def include_all(self) -> None:
+        for module_name, _ in self.routers:
+            self.include(module_name)
+
+    def pending(self, path: str) -> List[str]:
+        """Routers not loaded yet that serve ``path``."""
+        if path in self.LOAD_ALL_PATHS:
+            return [name for name, _ in self.routers if not self.loaded.get(name)]
+        return [
+            name
+            for name, prefixes in self.routers
+            if not self.loaded.get(name)
+            and any(path == p or path.startswith(p.rstrip("/") + "/") for p in prefixes)
+        ]
+
+
+class LazyRouterMiddleware:
+    """ASGI middleware that loads the routers a request needs before it is routed."""
+
+    def __init__(self, app, routers: LazyRouters):
+        self.app = app
+        self.routers = routers
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            pending = self.routers.pending(scope["path"])
+            if pending:
+                if self._lock is None:
+                    self._lock = asyncio.Lock()
+                async with self._lock:
+                    for module_name in pending:
+                        if not self.routers.loaded.get(module_name):
+                            # Imports block; keep the event loop serving other requests meanwhile
+                            module = await asyncio.to_thread(self.routers._import, module_name)
+                            self.routers.include(module_name, module)
+        await self.app(scope, receive, send)
@@ -51,7 +51,7 @@ class MemoryAwareAgent(Agent):
             
             # Retrieve memory context
             try:
-                context = self._memory_client.get_context(user_query)
+                context = await self._memory_client.aget_context(user_query)
                 if context:
                     context_str = self._format_context(context)
                     if context_str:
@@ -88,9 +88,13 @@ class MemoryAwareAgent(Agent):
             if user_query and agent_response:
                 try:
                     print(f"🧠 [MemoryAwareAgent] Saving interaction to memory...")
-                    self._memory_client.add_memory(user_query, role="user")
-                    self._memory_client.add_memory(agent_response, role="agent")
-                    print(f"✅ [MemoryAwareAgent] Memory saved successfully")
+                    # One round trip for the whole turn
+                    saved = await self._memory_client.aadd_memories([
+                        {"content": user_query, "role": "user"},
+                        {"content": agent_response, "role": "agent"},
+                    ])
+                    if saved:
+                        print(f"✅ [MemoryAwareAgent] Memory saved successfully")
                 except Exception as e:
                     print(f"❌ [MemoryAwareAgent] Error saving to memory: {e}")
             
@@ -7,6 +7,8 @@ to the Memory System at key execution points:
 - after_model: Save agent response
 - before_tool: Save tool call inputs
 - after_tool: Save tool call outputs
+
+The callbacks are coroutines so the memory writes never block the event loop.
 """
 
 import logging
@@ -39,7 +41,7 @@ class MemoryCallbackHandler:
         )
         logger.info(f"MemoryCallbackHandler initialized for {agent_id}")
     
-    def before_model(self, *args, **kwargs) -> None:
+    async def before_model(self, *args, **kwargs) -> None:
         """
         Called before LLM is invoked. Saves user query to memory.
         """
@@ -63,7 +65,7 @@ class MemoryCallbackHandler:
                                     user_msg = part.text
                 
                 if user_msg:
-                    self.memory_client.add_memory(
+                    await self.memory_client.aadd_memory(
                         content=user_msg,
                         role="user",
                         metadata={
@@ -75,7 +77,7 @@ class MemoryCallbackHandler:
         except Exception as e:
             print(f"[{self.agent_id}] before_model failed: {e}", flush=True)
 
-    def after_model(self, *args, **kwargs) -> None:
+    async def after_model(self, *args, **kwargs) -> None:
         """
         Called after LLM generates response.
         """
@@ -95,7 +97,7 @@ class MemoryCallbackHandler:
                                     response_text += part.text
                 
                 if response_text:
-                    self.memory_client.add_memory(
+                    await self.memory_client.aadd_memory(
                         content=response_text,
                         role="agent",
                         metadata={
@@ -107,7 +109,7 @@ class MemoryCallbackHandler:
         except Exception as e:
             print(f"[{self.agent_id}] after_model failed: {e}", flush=True)
 
-    def before_tool(self, *args, **kwargs) -> None:
+    async def before_tool(self, *args, **kwargs) -> None:
         """Called before tool execution."""
         try:
             # ADK likely passes: tool, args, tool_context
@@ -121,7 +123,7 @@ class MemoryCallbackHandler:
                 # Try to extract tool info
                 tool_name = getattr(tool_obj, 'name', 'unknown') if tool_obj else 'unknown'
                 
-                self.memory_client.add_memory(
+                await self.memory_client.aadd_memory(
                     content=f"Calling tool: {tool_name} with {tool_data}",
                     role="system",
                     metadata={
@@ -134,7 +136,7 @@ class MemoryCallbackHandler:
         except Exception as e:
             print(f"[{self.agent_id}] before_tool failed: {e}", flush=True)
 
-    def after_tool(self, *args, **kwargs) -> None:
+    async def after_tool(self, *args, **kwargs) -> None:
         """Called after tool execution."""
         try:
             # ADK passes: tool, args, tool_context, tool_response
@@ -143,7 +145,7 @@ class MemoryCallbackHandler:
                 # warning: signature might be different
                 result = args[-1] 
                 
-            self.memory_client.add_memory(
+            await self.memory_client.aadd_memory(
                 content=f"Tool result: {str(result)[:200]}...",
                 role="system",
                 metadata={
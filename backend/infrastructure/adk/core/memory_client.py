@@ -1,13 +1,108 @@
-import requests
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+import httpx
 import logging
-from typing import Dict, List, Optional, Any
-from functools import lru_cache
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Keep-alive pool shared by every MemoryClient in the process
+_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30.0)
+_TIMEOUT = httpx.Timeout(10.0, connect=2.0)
+
+_client_lock = threading.Lock()
+_sync_client: Optional[httpx.Client] = None
+# httpx.AsyncClient connections are bound to the loop that opened them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    with _client_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(limits=_LIMITS, timeout=_TIMEOUT)
+        return _sync_client
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=_LIMITS, timeout=_TIMEOUT)
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_clients() -> None:
+    """Close the pooled connections (call on application shutdown)."""
+    global _sync_client
+    with _client_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+        sync_client, _sync_client = _sync_client, None
+    if client is not None:
+        await client.aclose()
+    if sync_client is not None:
+        sync_client.close()
+
+
+class ContextCache:
+    """
+    Short-lived cache of get_context results keyed by (user, agent, query hash).
+    Entries for a user/agent are dropped as soon as new memories are added for it.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(user_id: str, agent_id: str, *params: Any) -> Tuple[str, str, str]:
+        digest = hashlib.sha1(repr(params).encode("utf-8")).hexdigest()
+        return user_id, agent_id, digest
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def set(self, key: Tuple[str, str, str], value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str, agent_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id and k[1] == agent_id]:
+                del self._entries[key]
+
+
+context_cache = ContextCache()
+
 
 class MemoryClient:
-    """Client for the Data-First Memory System Service"""
+    """
+    Client for the Data-First Memory System Service.
+
+    Plain methods are synchronous; the ``a``-prefixed variants are for async
+    callers (agent callbacks, tools) and never block the event loop. Both share
+    a process-wide keep-alive connection pool.
+    """
 
     def __init__(
         self,
@@ -19,6 +114,45 @@ class MemoryClient:
         self.agent_id = agent_id
         self.user_id = user_id
 
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}/api/v1/memory/{path}"
+
+    def _add_payload(self, content: Any, role: str, metadata: Optional[Dict]) -> Dict[str, Any]:
+        return {
+            "user_id": self.user_id,
+            "agent_id": self.agent_id,
+            "content": content,
+            "metadata": {"role": role, **(metadata or {})},
+        }
+
+    def _batch_payload(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """items: [{"content": ..., "role": ..., "metadata": {...}}, ...] in order"""
+        return {
+            "user_id": self.user_id,
+            "agent_id": self.agent_id,
+            "items": [
+                {
+                    "content": item["content"],
+                    "metadata": {"role": item.get("role", "user"), **(item.get("metadata") or {})},
+                }
+                for item in items
+            ],
+        }
+
+    def _context_request(
+        self, query: str, session_id: Optional[str], limit: int, max_tokens: int
+    ) -> Tuple[Tuple[str, str, str], Dict[str, Any]]:
+        payload = {
+            "user_id": self.user_id,
+            "agent_id": self.agent_id,
+            "query": query,
+            "session_id": session_id,
+            "limit": limit,
+            "max_tokens": max_tokens,
+        }
+        key = ContextCache.key(self.user_id, self.agent_id, query, session_id, limit, max_tokens)
+        return key, payload
+
     def add_memory(
         self, content: Any, role: str = "user", metadata: Optional[Dict] = None
     ) -> bool:
@@ -26,52 +160,92 @@ class MemoryClient:
         Add memory to the system.
         """
         try:
-            payload = {
-                "user_id": self.user_id,
-                "agent_id": self.agent_id,
-                "content": content,
-                "metadata": {"role": role, **(metadata or {})},
-            }
-
-            response = requests.post(
-                f"{self.base_url}/api/v1/memory/add", json=payload, timeout=5
+            response = _get_sync_client().post(
+                self._url("add"), json=self._add_payload(content, role, metadata), timeout=5
+            )
+            response.raise_for_status()
+            context_cache.invalidate(self.user_id, self.agent_id)
+            logger.info(f"Memory added for {self.user_id}:{self.agent_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add memory: {e}")
+            return False
+
+    async def aadd_memory(
+        self, content: Any, role: str = "user", metadata: Optional[Dict] = None
+    ) -> bool:
+        """Async variant of add_memory."""
+        try:
+            response = await _get_async_client().post(
+                self._url("add"), json=self._add_payload(content, role, metadata), timeout=5
             )
             response.raise_for_status()
+            context_cache.invalidate(self.user_id, self.agent_id)
             logger.info(f"Memory added for {self.user_id}:{self.agent_id}")
             return True
         except Exception as e:
             logger.error(f"Failed to add memory: {e}")
             return False
 
+    async def aadd_memories(self, items: List[Dict[str, Any]]) -> bool:
+        """
+        Add several memories (e.g. a user query and the agent reply) in one round trip.
+        """
+        if not items:
+            return True
+        try:
+            response = await _get_async_client().post(
+                self._url("add_batch"), json=self._batch_payload(items), timeout=5
+            )
+            response.raise_for_status()
+            context_cache.invalidate(self.user_id, self.agent_id)
+            logger.info(f"{len(items)} memories added for {self.user_id}:{self.agent_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to add memories: {e}")
+            return False
+
     def get_context(
         self, query: str, session_id: Optional[str] = None, limit: int = 20, max_tokens: int = 5000
     ) -> Dict[str, Any]:
         """
         Retrieve cognitive context for a query.
         """
+        key, payload = self._context_request(query, session_id, limit, max_tokens)
+        cached = context_cache.get(key)
+        if cached is not None:
+            return cached
         try:
-            payload = {
-                "user_id": self.user_id,
-                "agent_id": self.agent_id,
-                "query": query,
-                "session_id": session_id,
-                "limit": limit,
-                "max_tokens": max_tokens,
-            }
-
-            response = requests.post(
-                f"{self.base_url}/api/v1/memory/context", json=payload, timeout=10
-            )
+            response = _get_sync_client().post(self._url("context"), json=payload, timeout=10)
             response.raise_for_status()
-            data = response.json()
-
-            if data["status"] == "success":
-                return data["context"]
+            return self._store_context(key, response.json())
+        except Exception as e:
+            logger.error(f"Failed to get context: {e}")
             return {}
+
+    async def aget_context(
+        self, query: str, session_id: Optional[str] = None, limit: int = 20, max_tokens: int = 5000
+    ) -> Dict[str, Any]:
+        """Async variant of get_context."""
+        key, payload = self._context_request(query, session_id, limit, max_tokens)
+        cached = context_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            response = await _get_async_client().post(self._url("context"), json=payload, timeout=10)
+            response.raise_for_status()
+            return self._store_context(key, response.json())
         except Exception as e:
             logger.error(f"Failed to get context: {e}")
             return {}
 
+    @staticmethod
+    def _store_context(key: Tuple[str, str, str], data: Dict[str, Any]) -> Dict[str, Any]:
+        if data["status"] != "success":
+            return {}
+        context_cache.set(key, data["context"])
+        return data["context"]
+
     def finalize(self) -> Optional[str]:
         """
         Finalize session and trigger memory archiving.
@@ -79,12 +253,22 @@ class MemoryClient:
         """
         try:
             payload = {"user_id": self.user_id, "agent_id": self.agent_id}
-            response = requests.post(
-                f"{self.base_url}/api/v1/memory/finalize", json=payload, timeout=10
-            )
+            response = _get_sync_client().post(self._url("finalize"), json=payload, timeout=10)
+            response.raise_for_status()
+            task_id = response.json().get("task_id")
+            logger.info(f"Finalize triggered. Task ID: {task_id}")
+            return task_id
+        except Exception as e:
+            logger.error(f"Failed to finalize memory: {e}")
+            return None
+
+    async def afinalize(self) -> Optional[str]:
+        """Async variant of finalize."""
+        try:
+            payload = {"user_id": self.user_id, "agent_id": self.agent_id}
+            response = await _get_async_client().post(self._url("finalize"), json=payload, timeout=10)
             response.raise_for_status()
-            data = response.json()
-            task_id = data.get("task_id")
+            task_id = response.json().get("task_id")
             logger.info(f"Finalize triggered. Task ID: {task_id}")
             return task_id
         except Exception as e:
@@ -95,9 +279,7 @@ class MemoryClient:
         """Get memory statistics."""
         try:
             params = {"user_id": self.user_id, "agent_id": self.agent_id}
-            response = requests.get(
-                f"{self.base_url}/api/v1/memory/stats", params=params, timeout=5
-            )
+            response = _get_sync_client().get(self._url("stats"), params=params, timeout=5)
             response.raise_for_status()
             return response.json().get("stats", {})
         except Exception as e:
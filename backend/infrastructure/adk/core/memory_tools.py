@@ -3,12 +3,12 @@ Memory tools for ADK agents to access the Memory System.
 Implements ReAct-style memory retrieval where agents actively decide when to query memory.
 """
 from typing import Dict, Any
-import requests
+from .memory_client import MemoryClient
 
 # Base URL for memory system
-MEMORY_BASE_URL = "http://localhost:10000/api/v1"
+MEMORY_BASE_URL = "http://localhost:10000"
 
-def search_memory(query: str, agent_id: str = "default") -> str:
+async def search_memory(query: str, agent_id: str = "default") -> str:
     """
     搜索记忆系统，查找与查询相关的历史信息、核心原则和过往对话。
     
@@ -25,16 +25,10 @@ def search_memory(query: str, agent_id: str = "default") -> str:
         相关的记忆内容，包括核心原则、历史事件和对话记录
     """
     try:
-        response = requests.post(
-            f"{MEMORY_BASE_URL}/memory/context",
-            json={"agent_id": agent_id, "query": query},
-            timeout=5
-        )
-        response.raise_for_status()
-        data = response.json()
+        # Pooled async client; repeated queries within a turn hit the context cache
+        context = await MemoryClient(base_url=MEMORY_BASE_URL, agent_id=agent_id).aget_context(query)
         
         # Format the context for the agent
-        context = data.get("context", {})
         result_parts = []
         
         if context.get("core_principles"):
@@ -64,7 +58,7 @@ def search_memory(query: str, agent_id: str = "default") -> str:
         return f"记忆检索失败：{str(e)}"
 
 
-def save_important_fact(fact: str, importance: str = "medium", agent_id: str = "default") -> str:
+async def save_important_fact(fact: str, importance: str = "medium", agent_id: str = "default") -> str:
     """
     保存重要信息到长期记忆。
     
@@ -85,20 +79,13 @@ def save_important_fact(fact: str, importance: str = "medium", agent_id: str = "
         importance_map = {"low": 0.3, "medium": 0.5, "high": 0.8}
         importance_score = importance_map.get(importance, 0.5)
         
-        response = requests.post(
-            f"{MEMORY_BASE_URL}/memory/add",
-            json={
-                "agent_id": agent_id,
-                "content": fact,
-                "metadata": {
-                    "role": "agent",
-                    "type": "important_fact",
-                    "importance": importance_score
-                }
-            },
-            timeout=5
+        saved = await MemoryClient(base_url=MEMORY_BASE_URL, agent_id=agent_id).aadd_memory(
+            fact,
+            role="agent",
+            metadata={"type": "important_fact", "importance": importance_score},
         )
-        response.raise_for_status()
+        if not saved:
+            return "保存失败：记忆服务不可用"
         return f"✅ 已保存重要信息：{fact[:50]}..."
         
     except Exception as e:
@@ -110,11 +97,11 @@ def create_memory_tools_for_agent(agent_id: str):
     Create memory tool functions bound to a specific agent_id.
     Returns a list of tool functions that can be passed to create_agent().
     """
-    def bound_search_memory(query: str) -> str:
-        return search_memory(query, agent_id=agent_id)
+    async def bound_search_memory(query: str) -> str:
+        return await search_memory(query, agent_id=agent_id)
     
-    def bound_save_important_fact(fact: str, importance: str = "medium") -> str:
-        return save_important_fact(fact, importance, agent_id=agent_id)
+    async def bound_save_important_fact(fact: str, importance: str = "medium") -> str:
+        return await save_important_fact(fact, importance, agent_id=agent_id)
     
     # Copy docstrings
     bound_search_memory.__doc__ = search_memory.__doc__
@@ -2,6 +2,8 @@
 import logging
 from typing import List, Dict, Any
 
+from backend.infrastructure.analysis.finbert_engine import finbert_engine
+
 logger = logging.getLogger(__name__)
 
 class FinBERTTool:
@@ -11,67 +13,58 @@ class FinBERTTool:
     """
 
     def __init__(self):
-        self._model = None
-        self._tokenizer = None
-        self._model_loaded = False
-        self._use_finbert = True
-
-    def _load_model(self):
-        if self._model_loaded: return
-        try:
-            logger.info("Loading FinBERT model...")
-            from transformers import AutoTokenizer, AutoModelForSequenceClassification
-            
-            model_name = "ProsusAI/finbert"
-            self._tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self._model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            self._model.eval()
-            self._model_loaded = True
-            logger.info("FinBERT model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load FinBERT model: {e}")
-            logger.warning("Falling back to heuristic sentiment analysis")
-            self._use_finbert = False
-            self._model_loaded = True
+        # Model, batching and score cache are shared process-wide
+        self._engine = finbert_engine
 
     def analyze(self, news_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze sentiment from a list of news items."""
-        if not news_items:
-            return {
-                "score": 50, "rating": "Neutral", 
-                "summary": "No news to analyze.",
-                "key_drivers": [],
-                "sentiment_breakdown": {"positive_ratio": 0, "negative_ratio": 0, "neutral_ratio": 0},
-                "method": "none"
-            }
-        
-        self._load_model()
-        
-        if self._use_finbert and self._model is not None:
-            return self._analyze_with_finbert(news_items)
-        else:
-            return self._analyze_heuristic(news_items)
+        return self.analyze_many([news_items])[0]
+
+    def analyze_many(self, groups: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Analyze several independent groups of news items (e.g. the context
+        snippets of each word-cloud keyword) with a single batched inference.
+        """
+        texts = [self._item_text(item) for items in groups for item in items]
+        use_finbert = bool(texts) and self._engine.load()
+        scores = iter(self._engine.score(texts) if use_finbert else [])
 
-    def _analyze_with_finbert(self, news_items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        results = []
+        for items in groups:
+            if not items:
+                results.append({
+                    "score": 50, "rating": "Neutral", 
+                    "summary": "No news to analyze.",
+                    "key_drivers": [],
+                    "sentiment_breakdown": {"positive_ratio": 0, "negative_ratio": 0, "neutral_ratio": 0},
+                    "method": "none"
+                })
+            elif use_finbert:
+                results.append(self._aggregate(items, [next(scores) for _ in items]))
+            else:
+                results.append(self._analyze_heuristic(items))
+        return results
+
+    @staticmethod
+    def _item_text(item: Dict[str, Any]) -> str:
+        title = item.get('title', '')
+        summary = item.get('summary', '')
+        return f"{title}. {summary}" if summary and summary != title else title
+
+    def _aggregate(self, news_items: List[Dict[str, Any]], item_scores: List[Dict[str, float]]) -> Dict[str, Any]:
         total_positive = 0
         total_negative = 0
         total_neutral = 0
         key_drivers = []
         
-        for item in news_items:
-            title = item.get('title', '')
-            summary = item.get('summary', '')
-            text = f"{title}. {summary}" if summary and summary != title else title
-            
-            scores = self._analyze_text_finbert(text)
-            
+        for item, scores in zip(news_items, item_scores):
             total_positive += scores['positive']
             total_negative += scores['negative']
             total_neutral += scores['neutral']
             
             if len(key_drivers) < 3:
                 key_drivers.append({
-                    "title": title,
+                    "title": item.get('title', ''),
                     "sentiment": max(scores, key=scores.get),
                     "confidence": max(scores.values())
                 })
@@ -106,23 +99,6 @@ class FinBERTTool:
             "method": "finbert"
         }
 
-    def _analyze_text_finbert(self, text: str) -> Dict[str, float]:
-        try:
-            import torch
-            inputs = self._tokenizer(text, return_tensors="pt", truncation=True, max_length=512, padding=True)
-            with torch.no_grad():
-                outputs = self._model(**inputs)
-                probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-            return {
-                "positive": float(probs[0][0]),
-                "negative": float(probs[0][1]),
-                "neutral": float(probs[0][2])
-            }
-        except Exception as e:
-            logger.error(f"FinBERT analysis failed: {e}")
-            return {"positive": 0.33, "negative": 0.33, "neutral": 0.34}
-
     def _analyze_heuristic(self, news_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Fallback simple heuristic (mock)"""
         # Simplified logic compared to source, focusing on fallback safety
@@ -0,0 +1,160 @@
+"""
+Shared FinBERT inference engine.
+
+Every sentiment path (FinBERTTool, the word-cloud keyword scoring and the
+sentiment skill) goes through one process-wide engine so the model is loaded
+once and texts are scored in batches:
+
+- all texts of a call are tokenized together (no padding), sorted by length
+  and cut into buckets, each padded only to its own longest sequence
+- inference runs under ``torch.inference_mode``
+- scores are cached by text hash, so repeated headlines/snippets are free
+- ``quantize=True`` (or ``FINBERT_INT8=1``) applies dynamic int8 quantization
+  to the Linear layers for CPU inference
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+NEUTRAL_SCORES = {"positive": 0.33, "negative": 0.33, "neutral": 0.34}
+
+
+class FinBERTEngine:
+    def __init__(
+        self,
+        model_name: str = "ProsusAI/finbert",
+        batch_size: int = 32,
+        max_length: int = 512,
+        cache_size: int = 10000,
+        quantize: Optional[bool] = None,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.quantize = os.getenv("FINBERT_INT8", "0") == "1" if quantize is None else quantize
+
+        self._model = None
+        self._tokenizer = None
+        self._labels: List[str] = []
+        self._loaded = False
+        self._available = False
+        self._load_lock = threading.Lock()
+        # Forward passes are serialized; torch already parallelizes within a batch
+        self._infer_lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._stats = {"texts": 0, "cache_hits": 0, "inferred": 0, "batches": 0}
+
+    def load(self) -> bool:
+        """Load the model on first use. Returns False if FinBERT is unavailable."""
+        if self._loaded:
+            return self._available
+        with self._load_lock:
+            if self._loaded:
+                return self._available
+            try:
+                logger.info("Loading FinBERT model...")
+                import torch
+                from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+                self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+                model.eval()
+                if self.quantize:
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+                    logger.info("FinBERT quantized to int8")
+                self._model = model
+                id2label = model.config.id2label
+                self._labels = [id2label[i].lower() for i in range(len(id2label))]
+                self._available = True
+                logger.info("FinBERT model loaded successfully")
+            except Exception as e:
+                logger.error(f"Failed to load FinBERT model: {e}")
+                logger.warning("Falling back to heuristic sentiment analysis")
+                self._available = False
+            self._loaded = True
+            return self._available
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def score(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Score texts, returning {"positive", "negative", "neutral"} probabilities
+        in input order. Falls back to neutral scores if the model is unavailable.
+        """
+        if not texts:
+            return []
+        if not self.load():
+            return [dict(NEUTRAL_SCORES) for _ in texts]
+
+        keys = [self._key(text) for text in texts]
+        results: Dict[str, Dict[str, float]] = {}
+        pending: Dict[str, str] = {}
+        with self._cache_lock:
+            self._stats["texts"] += len(texts)
+            for key, text in zip(keys, texts):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    results[key] = cached
+                    self._stats["cache_hits"] += 1
+                elif key not in pending:
+                    pending[key] = text
+
+        if pending:
+            try:
+                computed = self._infer(list(pending.values()))
+            except Exception as e:
+                logger.error(f"FinBERT analysis failed: {e}")
+                computed = [dict(NEUTRAL_SCORES) for _ in pending]
+            else:
+                with self._cache_lock:
+                    for key, scores in zip(pending, computed):
+                        self._cache[key] = scores
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            results.update(zip(pending, computed))
+
+        return [results[key] for key in keys]
+
+    def _infer(self, texts: List[str]) -> List[Dict[str, float]]:
+        import torch
+
+        encoded = self._tokenizer(texts, truncation=True, max_length=self.max_length)
+        input_ids = encoded["input_ids"]
+        # Length bucketing: neighbours in sorted order have similar lengths,
+        # so each batch pads to little more than its own sequences
+        order = sorted(range(len(texts)), key=lambda i: len(input_ids[i]))
+        scores: List[Optional[Dict[str, float]]] = [None] * len(texts)
+
+        with self._infer_lock, torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                bucket = order[start:start + self.batch_size]
+                batch = self._tokenizer.pad(
+                    {name: [encoded[name][i] for i in bucket] for name in encoded.keys()},
+                    padding=True,
+                    return_tensors="pt",
+                )
+                probs = torch.softmax(self._model(**batch).logits, dim=-1).tolist()
+                for i, row in zip(bucket, probs):
+                    scores[i] = dict(zip(self._labels, row))
+                self._stats["batches"] += 1
+            self._stats["inferred"] += len(texts)
+        return scores
+
+    def stats(self) -> Dict[str, int]:
+        with self._cache_lock:
+            return {**self._stats, "cached": len(self._cache)}
+
+
+# Process-wide engine; the model is loaded lazily on first score()
+finbert_engine = FinBERTEngine()
@@ -1,4 +1,5 @@
 
+import asyncio
 import logging
 import requests
 import pandas as pd
@@ -6,6 +7,8 @@ import re
 from typing import Dict, Any, Optional
 from edgar import Company, set_identity
 
+from backend.infrastructure.market.async_http import async_http
+
 logger = logging.getLogger(__name__)
 
 class ReportFinderTool:
@@ -174,6 +177,50 @@ class ReportFinderTool:
             "note": "Direct PDF link not available via simple API. Please check HKEX."
         }
 
+    CNINFO_QUERY_URL = "http://www.cninfo.com.cn/new/hisAnnouncement/query"
+    CNINFO_SEARCH_URL = "http://www.cninfo.com.cn/new/information/topSearch/query"
+    CNINFO_FILE_URL = "http://static.cninfo.com.cn/"
+    CNINFO_HEADERS = {
+        "User-Agent": "Mozilla/5.0",
+        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
+    }
+
+    @staticmethod
+    def _ashare_query_payload(clean_symbol: str, org_id: str) -> Dict[str, Any]:
+        # "latest" category
+        category = "category_ndbg_szsh;category_bndbg_szsh;category_sjdbg_szsh;category_ndbg_shmb;category_bndbg_shmb;category_sjdbg_shmb;"
+        return {
+            "pageNum": 1, "pageSize": 30, "column": "szse", "tabName": "fulltext",
+            "plate": "", "stock": f"{clean_symbol},{org_id}",
+            "category": category, "isHLtitle": "true"
+        }
+
+    def _pick_ashare_report(self, symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        if not data.get("announcements"):
+            return {"error": "No announcements found"}
+
+        for item in data["announcements"]:
+            title = item["announcementTitle"]
+            if "摘要" in title or "取消" in title: continue
+
+            if item.get("adjunctUrl"):
+                return {
+                    "status": "success",
+                    "market": "A-share",
+                    "symbol": symbol,
+                    "title": re.sub(r'<[^>]+>', '', title),
+                    "filing_date": pd.to_datetime(item['announcementTime'], unit='ms').strftime('%Y-%m-%d'),
+                    "download_url": self.CNINFO_FILE_URL + item["adjunctUrl"]
+                }
+
+        return {"error": "No PDF found in recent announcements"}
+
+    @staticmethod
+    def _pick_org_id(symbol: str, data) -> Optional[str]:
+        for item in data:
+            if item.get("code") == symbol: return item.get("orgId")
+        return data[0].get("orgId") if data else None
+
     def _get_ashare_report(self, symbol: str) -> Dict[str, Any]:
         """Get A-share stock report via cninfo API (PDF)"""
         try:
@@ -186,58 +233,66 @@ class ReportFinderTool:
                 return {"error": "Stock not found on cninfo"}
 
             # 2. Query Announcements
-            query_url = "http://www.cninfo.com.cn/new/hisAnnouncement/query"
-            base_file_url = "http://static.cninfo.com.cn/"
-            
-            # "latest" category
-            category = "category_ndbg_szsh;category_bndbg_szsh;category_sjdbg_szsh;category_ndbg_shmb;category_bndbg_shmb;category_sjdbg_shmb;"
-            
-            headers = {
-                "User-Agent": "Mozilla/5.0",
-                "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"
-            }
-            
-            payload = {
-                "pageNum": 1, "pageSize": 30, "column": "szse", "tabName": "fulltext",
-                "plate": "", "stock": f"{clean_symbol},{org_id}",
-                "category": category, "isHLtitle": "true"
-            }
+            resp = requests.post(
+                self.CNINFO_QUERY_URL, data=self._ashare_query_payload(clean_symbol, org_id),
+                headers=self.CNINFO_HEADERS, timeout=10
+            )
+            return self._pick_ashare_report(symbol, resp.json())
 
-            resp = requests.post(query_url, data=payload, headers=headers, timeout=10)
-            data = resp.json()
-            
-            if not data.get("announcements"):
-                return {"error": "No announcements found"}
+        except Exception as e:
+            logger.error(f"A-share report fetch failed: {e}")
+            return {"error": str(e)}
 
-            for item in data["announcements"]:
-                title = item["announcementTitle"]
-                if "摘要" in title or "取消" in title: continue
-                
-                if item.get("adjunctUrl"):
-                    return {
-                        "status": "success",
-                        "market": "A-share",
-                        "symbol": symbol,
-                        "title": re.sub(r'<[^>]+>', '', title),
-                        "filing_date": pd.to_datetime(item['announcementTime'], unit='ms').strftime('%Y-%m-%d'),
-                        "download_url": base_file_url + item["adjunctUrl"]
-                    }
-            
-            return {"error": "No PDF found in recent announcements"}
+    def _get_cninfo_org_id(self, symbol: str) -> Optional[str]:
+        try:
+            resp = requests.post(
+                self.CNINFO_SEARCH_URL, data={"keyWord": symbol}, headers=self.CNINFO_HEADERS, timeout=5
+            )
+            return self._pick_org_id(symbol, resp.json())
+        except Exception:
+            return None
+
+    # ========================== Async ==========================
 
+    async def aget_latest_report(self, symbol: str, market: str) -> Dict[str, Any]:
+        """
+        Async variant of get_latest_report. cninfo lookups use the shared pooled
+        client; edgartools is synchronous, so the US path runs in a worker thread.
+        """
+        try:
+            if market == 'US':
+                return await asyncio.to_thread(self._get_us_report, symbol)
+            elif market == 'HK':
+                return self._get_hk_report(symbol)
+            elif market == 'A-share':
+                return await self._aget_ashare_report(symbol)
+            else:
+                return {"error": f"Unsupported market: {market}"}
+        except Exception as e:
+            logger.error(f"Error fetching report for {symbol}: {e}")
+            return {"error": str(e)}
+
+    async def _aget_ashare_report(self, symbol: str) -> Dict[str, Any]:
+        try:
+            clean_symbol = re.sub(r"\D", "", symbol)
+            org_id = await self._aget_cninfo_org_id(clean_symbol)
+            if not org_id:
+                return {"error": "Stock not found on cninfo"}
+
+            resp = await async_http.post(
+                self.CNINFO_QUERY_URL, data=self._ashare_query_payload(clean_symbol, org_id),
+                headers=self.CNINFO_HEADERS, timeout=10
+            )
+            return self._pick_ashare_report(symbol, resp.json())
         except Exception as e:
             logger.error(f"A-share report fetch failed: {e}")
             return {"error": str(e)}
 
-    def _get_cninfo_org_id(self, symbol: str) -> Optional[str]:
+    async def _aget_cninfo_org_id(self, symbol: str) -> Optional[str]:
         try:
-            search_url = "http://www.cninfo.com.cn/new/information/topSearch/query"
-            headers = {"User-Agent": "Mozilla/5.0", "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8"}
-            payload = {"keyWord": symbol}
-            resp = requests.post(search_url, data=payload, headers=headers, timeout=5)
-            data = resp.json()
-            for item in data:
-                if item.get("code") == symbol: return item.get("orgId")
-            return data[0].get("orgId") if data else None
+            resp = await async_http.post(
+                self.CNINFO_SEARCH_URL, data={"keyWord": symbol}, headers=self.CNINFO_HEADERS, timeout=5
+            )
+            return self._pick_org_id(symbol, resp.json())
         except Exception:
             return None
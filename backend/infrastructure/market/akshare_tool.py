@@ -4,19 +4,44 @@ import akshare as ak
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from backend.infrastructure.config.loader import config
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Optional, List, Union, Callable, Tuple
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from backend.infrastructure.market.quote_cache import quote_cache, is_cacheable, has_values
+from backend.infrastructure.market import frames
+from backend.infrastructure.market.kline_store import kline_store
 
 logger = logging.getLogger(__name__)
 
+# Shared, bounded pool for concurrent quote legs (see AkShareTool._run_quote_legs)
+_quote_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="akshare-quote")
+
 class AkShareTool:
     """
     AkShare Tool
     Provides A-share market data, financial indicators, and China macro data.
     """
 
-    def __init__(self):
+    # Per-leg deadlines (seconds) for get_stock_quote in concurrent mode
+    QUOTE_LEG_TIMEOUTS = {"minute": 6.0, "daily": 4.0, "info": 3.0, "financial": 3.0}
+    # How long a leg waits on another caller's in-flight load of the same key
+    QUOTE_WAIT_TIMEOUT = max(QUOTE_LEG_TIMEOUTS.values())
+    # How long a leg may wait for a free _quote_pool thread before it is dropped
+    QUOTE_QUEUE_TIMEOUT = 2.0
+
+    # Output field -> upstream column for history / HSGT flow payloads
+    HISTORY_FIELDS = {
+        "open": "开盘", "close": "收盘", "high": "最高", "low": "最低",
+        "volume": "成交量", "turnover": "成交额", "pct_change": "涨跌幅",
+    }
+    HSGT_FLOW_FIELDS = {"value": "当日成交净买额", "buy_amount": "买入成交额", "sell_amount": "卖出成交额"}
+
+    def __init__(self, concurrent_quotes: bool = True):
+        # Fetch independent quote legs in parallel (False = legacy sequential order)
+        self.concurrent_quotes = concurrent_quotes
         self._sector_mapping = {
             "IT服务": "互联网服务",
             "互联网电商": "互联网服务",
@@ -606,7 +631,7 @@ class AkShareTool:
             if market == 'ETF':
                 # Try ETF first
                 try:
-                    return self._get_etf_quote(symbol)
+                    return dict(quote_cache.get_or_load("price", ("etf", symbol), lambda: self._get_etf_quote(symbol)))
                 except:
                     # Fallback to stock if ETF fails (maybe it's a LOF treated as A-share)
                     market = 'A'
@@ -625,11 +650,15 @@ class AkShareTool:
 
             elif market == 'HK':
                 # Use dedicated HK method
-                return self._get_hk_quote_detail(symbol)
+                return dict(quote_cache.get_or_load(
+                    "price", ("hk", symbol), lambda: self._get_hk_quote_detail(symbol), cache_if=is_cacheable
+                ))
 
             elif market == 'US':
                 # Use dedicated US method
-                return self._get_us_quote_detail(symbol)
+                return dict(quote_cache.get_or_load(
+                    "price", ("us", symbol), lambda: self._get_us_quote_detail(symbol), cache_if=is_cacheable
+                ))
                 
             # Removed index routing from get_quote as per user request
             # elif market in ['CN_INDEX', 'HK_INDEX', 'US_INDEX']:
@@ -648,23 +677,16 @@ class AkShareTool:
                     period: str = "daily",
                     start_date: Optional[str] = None,
                     end_date: Optional[str] = None,
-                    adjust: str = "qfq") -> List[Dict[str, Any]]:
+                    adjust: str = "qfq",
+                    orient: str = "records") -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
         """
         [New] 获取全市场历史行情 (Unified Historical K-Line)
+
+        orient="records" (default) returns a list of bars; orient="columns" returns
+        {"date": [...], "open": [...], ...} for chart consumers.
         """
+        convert = frames.to_columns if orient == "columns" else frames.to_records
         try:
-            market = self._detect_market_type(symbol)
-
-            # Map period to akshare params
-            # AkShare usually takes 'daily', 'weekly', 'monthly'
-            # For A-share: stock_zh_a_hist(period='daily'/'weekly'/'monthly')
-            # For HK: stock_hk_hist(period='daily'...)
-            # For US: stock_us_hist(period='daily'...)
-
-            ak_period = "daily"
-            if period in ["weekly", "week", "1w"]: ak_period = "weekly"
-            elif period in ["monthly", "month", "1mo"]: ak_period = "monthly"
-
             # Date handling
             if not end_date:
                 end_date = datetime.now().strftime("%Y%m%d")
@@ -672,54 +694,76 @@ class AkShareTool:
                 # Default 1 year if not provided
                 start_date = (datetime.now() - timedelta(days=365)).strftime("%Y%m%d")
 
-            df = pd.DataFrame()
+            df = self._fetch_history_frame(symbol, self._history_period(period), start_date, end_date, adjust)
 
-            if market == 'A' or market == 'ETF':
-                # ETF also uses stock_zh_a_hist often, or fund_etf_hist_em
-                if market == 'ETF':
-                    try:
-                        df = ak.fund_etf_hist_em(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
-                    except:
-                        # Fallback to stock interface
-                        df = ak.stock_zh_a_hist(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
-                else:
-                    df = ak.stock_zh_a_hist(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
+            # Standardize columns
+            # Common: 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 涨跌幅...
+            return convert(df, self.HISTORY_FIELDS, text={"date": "日期"})
 
-            elif market == 'HK':
-                # stock_hk_hist(symbol='00700', period='daily', start_date='...', end_date='...', adjust='qfq')
-                df = ak.stock_hk_hist(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
+        except Exception as e:
+            logger.error(f"get_history failed: {e}")
+            return convert(None, self.HISTORY_FIELDS, text={"date": "日期"})
+
+    def get_stored_history(self,
+                           symbol: str,
+                           period: str = "daily",
+                           start_date: Optional[str] = None,
+                           end_date: Optional[str] = None,
+                           adjust: str = "qfq",
+                           orient: str = "records") -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
+        """
+        Same payload as get_history(), served from the local K-line store.
+        Only bars the store does not hold yet are fetched from upstream.
+        """
+        ak_period = self._history_period(period)
 
-            elif market == 'US':
-                # Use stock_us_daily (Sina source) which handles symbols like 'AAPL' without prefix
+        def fetch(start: str, end: str) -> Dict[str, List[Any]]:
+            # Raises on upstream failure so the store does not record the range as covered
+            df = self._fetch_history_frame(symbol, ak_period, start, end, adjust)
+            return frames.to_columns(df, self.HISTORY_FIELDS, text={"date": "日期"})
+
+        try:
+            df = kline_store.get_history(symbol, fetch, ak_period, adjust, start_date, end_date)
+        except Exception as e:
+            logger.error(f"get_stored_history failed for {symbol}: {e}")
+            df = None
+
+        convert = frames.to_columns if orient == "columns" else frames.to_records
+        fields = {f: f for f in self.HISTORY_FIELDS}
+        return convert(df, fields, text={"date": "date"})
+
+    def _history_period(self, period: str) -> str:
+        # AkShare usually takes 'daily', 'weekly', 'monthly'
+        if period in ["weekly", "week", "1w"]: return "weekly"
+        if period in ["monthly", "month", "1mo"]: return "monthly"
+        return "daily"
+
+    def _fetch_history_frame(self, symbol: str, ak_period: str, start_date: str, end_date: str, adjust: str) -> pd.DataFrame:
+        """Raw upstream K-line frame (Chinese columns). Raises on upstream errors."""
+        market = self._detect_market_type(symbol)
+        # For A-share: stock_zh_a_hist(period='daily'/'weekly'/'monthly')
+        # For HK: stock_hk_hist(period='daily'...)
+        # For US: stock_us_hist(period='daily'...)
+
+        if market == 'A' or market == 'ETF':
+            # ETF also uses stock_zh_a_hist often, or fund_etf_hist_em
+            if market == 'ETF':
                 try:
-                    df = ak.stock_us_daily(symbol=symbol, adjust=adjust)
-                except Exception as e:
-                    logger.warning(f"stock_us_daily failed for {symbol}: {e}")
-                    df = pd.DataFrame()
+                    return ak.fund_etf_hist_em(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
+                except:
+                    # Fallback to stock interface
+                    return ak.stock_zh_a_hist(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
+            return ak.stock_zh_a_hist(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
 
-            if df is None or df.empty:
-                return []
+        elif market == 'HK':
+            # stock_hk_hist(symbol='00700', period='daily', start_date='...', end_date='...', adjust='qfq')
+            return ak.stock_hk_hist(symbol=symbol, period=ak_period, start_date=start_date, end_date=end_date, adjust=adjust)
 
-            # Standardize columns
-            # Common: 日期, 开盘, 收盘, 最高, 最低, 成交量, 成交额, 涨跌幅...
-            res = []
-            for _, row in df.iterrows():
-                item = {
-                    "date": str(row.get('日期', '')),
-                    "open": self._safe_get(row, '开盘'),
-                    "close": self._safe_get(row, '收盘'),
-                    "high": self._safe_get(row, '最高'),
-                    "low": self._safe_get(row, '最低'),
-                    "volume": self._safe_get(row, '成交量'),
-                    "turnover": self._safe_get(row, '成交额'),
-                    "pct_change": self._safe_get(row, '涨跌幅')
-                }
-                res.append(item)
-            return res
+        elif market == 'US':
+            # Use stock_us_daily (Sina source) which handles symbols like 'AAPL' without prefix
+            return ak.stock_us_daily(symbol=symbol, adjust=adjust)
 
-        except Exception as e:
-            logger.error(f"get_history failed: {e}")
-            return []
+        return pd.DataFrame()
 
     def get_fund_flow(self, target: str, flow_type: str = "stock") -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """
@@ -734,16 +778,9 @@ class AkShareTool:
                 # 原接口 stock_hsgt_north_net_flow_in_em 已失效
                 df = ak.stock_hsgt_hist_em(symbol="北向资金")
                 if df.empty: return []
-                
-                res = []
-                for _, row in df.iterrows():
-                    # stock_hsgt_hist_em returns '日期', '当日成交净买额', '买入成交额', '卖出成交额'
-                    res.append({
-                        "date": str(row['日期']),
-                        "value": self._safe_get(row, '当日成交净买额'),
-                        "buy_amount": self._safe_get(row, '买入成交额'),
-                        "sell_amount": self._safe_get(row, '卖出成交额')
-                    })
+
+                # stock_hsgt_hist_em returns '日期', '当日成交净买额', '买入成交额', '卖出成交额'
+                res = frames.to_records(df, self.HSGT_FLOW_FIELDS, text={"date": "日期"})
                 # Sort desc
                 res.sort(key=lambda x: x['date'], reverse=True)
                 return res
@@ -752,14 +789,7 @@ class AkShareTool:
                 # 南向资金: stock_hsgt_hist_em(symbol="南向资金")
                 df = ak.stock_hsgt_hist_em(symbol="南向资金")
                 if df.empty: return []
-                res = []
-                for _, row in df.iterrows():
-                    res.append({
-                        "date": str(row['日期']),
-                        "value": self._safe_get(row, '当日成交净买额'),
-                        "buy_amount": self._safe_get(row, '买入成交额'),
-                        "sell_amount": self._safe_get(row, '卖出成交额')
-                    })
+                res = frames.to_records(df, self.HSGT_FLOW_FIELDS, text={"date": "日期"})
                 # Sort desc
                 res.sort(key=lambda x: x['date'], reverse=True)
                 return res
@@ -1069,6 +1099,15 @@ class AkShareTool:
         """
         [Deprecated] Get real-time stock quote for A-shares using lightweight interfaces.
         Please use get_quote() instead.
+
+        The quote is assembled from four independent legs, each served through quote_cache:
+        - minute: latest 1-min bar (required, price namespace)
+        - daily: latest daily bar (price namespace)
+        - info: market cap (fundamentals namespace)
+        - financial: EPS/BPS inputs of PE/PB (fundamentals namespace)
+        In concurrent mode the legs are fetched together with per-leg timeouts; optional legs
+        that fail or time out degrade to a partial quote. Per-leg status and latency are
+        reported under "meta".
         """
         if not self._validate_symbol(symbol):
             return {"error": "Invalid A-share symbol"}
@@ -1076,131 +1115,269 @@ class AkShareTool:
         # Try ETF logic first for likely ETFs
         if self._is_likely_etf(symbol):
             try:
-                return self._get_etf_quote(symbol)
+                return dict(quote_cache.get_or_load(
+                    "price", ("etf", symbol), lambda: self._get_etf_quote(symbol), wait_timeout=self.QUOTE_WAIT_TIMEOUT
+                ))
             except Exception as e:
                 logger.warning(f"ETF quote failed for {symbol}, falling back to stock quote: {e}")
 
         try:
-            # 1. Market Data (Price, Volume, etc.)
-            # Use 1-min kline for realtime price to avoid full market scan
-            df_min = ak.stock_zh_a_hist_min_em(symbol=symbol, period="1", adjust="qfq")
-
-            if df_min is None or df_min.empty: # Check for None explicitly
-                raise ValueError("Market data unavailable (None or empty)")
-
-            latest_min = df_min.iloc[-1]
-            current_price = float(latest_min['收盘'])
-            timestamp = str(latest_min['时间'])
-
-            # Get Daily Data for Open/High/Low/PrevClose/TurnoverRate
-            # Fetch last few days to handle holidays or market opening
-            today_str = datetime.now().strftime("%Y%m%d")
-            start_date = (datetime.now() - timedelta(days=10)).strftime("%Y%m%d")
-
-            df_daily = ak.stock_zh_a_hist(symbol=symbol, period="daily", start_date=start_date, end_date=today_str, adjust="qfq")
-
-            # Init defaults
-            day_open = 0.0
-            day_high = 0.0
-            day_low = 0.0
-            prev_close = 0.0
-            volume = 0.0
-            turnover = 0.0
-            turnover_rate = 0.0
-            change_percent = 0.0
-            change_amount = 0.0
-
-            if df_daily is not None and not df_daily.empty:
-                latest_daily = df_daily.iloc[-1]
-                # Check date match to ensure daily data is for the same day as min data
-                min_date_part = timestamp.split(' ')[0]
-                daily_date_str = str(latest_daily['日期'])
-
-                if min_date_part == daily_date_str:
-                    day_open = float(latest_daily['开盘'])
-                    day_high = float(latest_daily['最高'])
-                    day_low = float(latest_daily['最低'])
-                    volume = float(latest_daily['成交量'])
-                    turnover = float(latest_daily['成交额'])
-                    turnover_rate = float(latest_daily['换手率'])
-                    change_percent = float(latest_daily['涨跌幅'])
-                    change_amount = float(latest_daily['涨跌额'])
-
-                    # Calculated prev_close
-                    # Note: stock_zh_a_hist close is today's close. prev_close = close - change_amount
-                    prev_close = float(latest_daily['收盘']) - change_amount
-                else:
-                    # Daily data likely lagging (e.g. before daily close update), use latest daily as previous day
-                    prev_close = float(latest_daily['收盘'])
-                    # For open/high/low of TODAY, we might need to rely on Min data aggregation if Daily is not up-to-date
-                    # But usually stock_zh_a_hist is updated reasonably fast.
-                    # If mismatch, it means today's daily record isn't there yet.
-                    # We can use min data for open/high/low/close approximation
-                    day_open = float(latest_min['开盘']) # This is min open, inaccurate for day open
-                    # Better fallback: use yesterday's close as prev_close
-                    pass
+            wait = self.QUOTE_WAIT_TIMEOUT
+            legs = {
+                "minute": lambda: quote_cache.get_or_load(
+                    "price", ("minute", symbol), lambda: self._fetch_minute_bar(symbol), wait_timeout=wait
+                ),
+                "daily": lambda: quote_cache.get_or_load(
+                    "price", ("daily", symbol), lambda: self._fetch_daily_bar(symbol), wait_timeout=wait
+                ),
+                "info": lambda: quote_cache.get_or_load(
+                    "fundamentals", ("info", symbol), lambda: self._fetch_market_cap(symbol),
+                    cache_if=has_values, wait_timeout=wait
+                ),
+                "financial": lambda: quote_cache.get_or_load(
+                    "fundamentals", ("financial", symbol), lambda: self._fetch_valuation_inputs(symbol),
+                    cache_if=has_values, wait_timeout=wait
+                ),
+            }
+            results, legs_meta = self._run_quote_legs(legs)
 
-            # 2. Valuation & Info (PE/PB/MarketCap)
-            pe = None
-            pb = None
-            market_cap = None
-            circulating_market_cap = None
+            # 1. Market Data (Price, Volume, etc.) -- the minute bar is mandatory
+            if "minute" not in results:
+                raise ValueError(f"Market data unavailable ({legs_meta['minute'].get('error', 'timeout')})")
 
-            # Market Cap
-            try:
-                df_info = ak.stock_individual_info_em(symbol=symbol)
-                if df_info is not None and not df_info.empty:
-                    info_map = dict(zip(df_info['item'], df_info['value']))
-                    market_cap = self._parse_float(info_map.get('总市值'))
-                    circulating_market_cap = self._parse_float(info_map.get('流通市值'))
-            except Exception as e:
-                logger.warning(f"Failed to fetch stock info for {symbol}: {e}")
+            quote = self._assemble_price(symbol, results["minute"], results.get("daily"))
 
-            # PE/PB Calculation
-            try:
-                df_fin = ak.stock_financial_abstract(symbol=symbol)
-                if df_fin is not None and not df_fin.empty:
-                    pe, pb = self._calculate_valuation(df_fin, current_price)
-            except (TypeError, AttributeError, ValueError):
-                # Common for indices or funds which don't have financial abstract
-                logger.debug(f"Valuation data unavailable for {symbol}")
-            except Exception as e:
-                logger.warning(f"Failed to calculate valuation for {symbol}: {e}")
+            # 2. Valuation & Info (PE/PB/MarketCap)
+            cap = results.get("info") or {}
+            valuation = results.get("financial") or {}
+            pe, pb = self._valuation_from_inputs(valuation.get("eps_ttm"), valuation.get("bps"), quote["current_price"])
 
+            missing = [name for name, m in legs_meta.items() if m["status"] != "ok"]
             return {
-                "symbol": symbol,
-                "current_price": current_price,
-                "open": day_open,
-                "high": day_high,
-                "low": day_low,
-                "prev_close": round(prev_close, 2),
-                "change_amount": round(change_amount, 2),
-                "change_percent": round(change_percent, 2),
-                "volume": volume,
-                "turnover": turnover,
-                "turnover_rate": turnover_rate,
+                **quote,
                 "pe": pe,
                 "pb": pb,
-                "market_cap": market_cap,
-                "circulating_market_cap": circulating_market_cap,
-                "timestamp": timestamp,
+                "market_cap": cap.get("market_cap"),
+                "circulating_market_cap": cap.get("circulating_market_cap"),
                 "market": "A-share",
-                "source": "akshare_combined"
+                "source": "akshare_combined",
+                "meta": {
+                    "mode": "concurrent" if self.concurrent_quotes else "sequential",
+                    "partial": bool(missing),
+                    "missing_legs": missing,
+                    "legs": legs_meta,
+                }
             }
         except Exception as e:
             # Fallback: if it wasn't identified as ETF but stock fetch failed, try ETF
             if not self._is_likely_etf(symbol):
                 try:
                     logger.info(f"Stock quote failed, retrying as ETF for {symbol}")
-                    return self._get_etf_quote(symbol)
+                    return dict(quote_cache.get_or_load(
+                        "price", ("etf", symbol), lambda: self._get_etf_quote(symbol), wait_timeout=self.QUOTE_WAIT_TIMEOUT
+                    ))
                 except Exception as etf_e:
                     logger.debug(f"Fallback ETF quote also failed: {etf_e}")
 
             logger.error(f"AkShare get_stock_quote failed for {symbol}: {e}")
             return {"error": str(e)}
 
+    def _run_quote_legs(self, legs: Dict[str, Callable[[], Any]]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """
+        Run independent quote legs and collect their results.
+
+        Concurrent mode submits every leg to the shared quote pool. Each leg's deadline
+        (QUOTE_LEG_TIMEOUTS) counts from when it starts running, so legs queued behind other
+        callers' legs are not timed out before they reach the upstream. A leg still queued
+        after QUOTE_QUEUE_TIMEOUT is cancelled and reported as a timeout without taking a
+        thread. A leg that times out while running keeps going in the background and still
+        populates quote_cache for the next caller. The daily and info legs pass their deadline
+        to AkShare as request timeout; the others are bounded by the pool size.
+        Sequential mode runs the legs inline, one after another.
+
+        Returns:
+            (results, meta): results only holds legs that succeeded; meta maps every leg to
+            {"status": "ok" | "error" | "timeout", "ms": float, "error": str (optional),
+            "queued": True (timed out before it started)}.
+        """
+        results: Dict[str, Any] = {}
+        meta: Dict[str, Dict[str, Any]] = {}
+
+        def timed(fn):
+            t0 = time.perf_counter()
+            value = fn()
+            return value, (time.perf_counter() - t0) * 1000
+
+        if not self.concurrent_quotes:
+            for name, fn in legs.items():
+                t0 = time.perf_counter()
+                try:
+                    results[name], ms = timed(fn)
+                    meta[name] = {"status": "ok", "ms": round(ms, 1)}
+                except Exception as e:
+                    meta[name] = {"status": "error", "ms": round((time.perf_counter() - t0) * 1000, 1), "error": str(e)}
+            return results, meta
+
+        started = {name: threading.Event() for name in legs}
+        began: Dict[str, float] = {}
+
+        def leg(name, fn):
+            began[name] = time.perf_counter()
+            started[name].set()
+            return timed(fn)
+
+        start = time.perf_counter()
+        futures = {name: _quote_pool.submit(leg, name, fn) for name, fn in legs.items()}
+        for name, future in futures.items():
+            timeout = self.QUOTE_LEG_TIMEOUTS.get(name, 5.0)
+            try:
+                # Wait for a pool thread first; the leg's own deadline starts once it runs
+                queue_wait = max(0.0, start + self.QUOTE_QUEUE_TIMEOUT - time.perf_counter())
+                if not started[name].wait(queue_wait) and future.cancel():
+                    meta[name] = {"status": "timeout", "ms": round((time.perf_counter() - start) * 1000, 1), "queued": True}
+                    logger.warning(f"Quote leg '{name}' dropped after {self.QUOTE_QUEUE_TIMEOUT}s in the pool queue")
+                    continue
+                # Not cancelled: the leg has just picked up a thread
+                started[name].wait()
+                remaining = max(0.0, began[name] + timeout - time.perf_counter())
+                results[name], ms = future.result(timeout=remaining)
+                meta[name] = {"status": "ok", "ms": round(ms, 1)}
+            except FutureTimeoutError:
+                meta[name] = {"status": "timeout", "ms": round((time.perf_counter() - start) * 1000, 1)}
+                logger.warning(f"Quote leg '{name}' timed out after {timeout}s")
+            except Exception as e:
+                meta[name] = {"status": "error", "ms": round((time.perf_counter() - start) * 1000, 1), "error": str(e)}
+                logger.warning(f"Quote leg '{name}' failed: {e}")
+        return results, meta
+
+    def _fetch_minute_bar(self, symbol: str) -> Dict[str, Any]:
+        """Latest 1-min bar (realtime price)."""
+        # Use 1-min kline for realtime price to avoid full market scan
+        df_min = ak.stock_zh_a_hist_min_em(symbol=symbol, period="1", adjust="qfq")
+
+        if df_min is None or df_min.empty: # Check for None explicitly
+            raise ValueError("Market data unavailable (None or empty)")
+
+        latest_min = df_min.iloc[-1]
+        return {
+            "close": float(latest_min['收盘']),
+            "open": float(latest_min['开盘']),
+            "timestamp": str(latest_min['时间']),
+        }
+
+    def _fetch_daily_bar(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest daily bar, for Open/High/Low/PrevClose/TurnoverRate. None if unavailable."""
+        # Fetch last few days to handle holidays or market opening
+        today_str = datetime.now().strftime("%Y%m%d")
+        start_date = (datetime.now() - timedelta(days=10)).strftime("%Y%m%d")
+
+        df_daily = ak.stock_zh_a_hist(
+            symbol=symbol, period="daily", start_date=start_date, end_date=today_str, adjust="qfq",
+            timeout=self.QUOTE_LEG_TIMEOUTS["daily"],
+        )
+        if df_daily is None or df_daily.empty:
+            return None
+
+        latest_daily = df_daily.iloc[-1]
+        return {
+            "date": str(latest_daily['日期']),
+            "open": float(latest_daily['开盘']),
+            "high": float(latest_daily['最高']),
+            "low": float(latest_daily['最低']),
+            "close": float(latest_daily['收盘']),
+            "volume": float(latest_daily['成交量']),
+            "turnover": float(latest_daily['成交额']),
+            "turnover_rate": float(latest_daily['换手率']),
+            "change_percent": float(latest_daily['涨跌幅']),
+            "change_amount": float(latest_daily['涨跌额']),
+        }
+
+    def _assemble_price(self, symbol: str, minute: Dict[str, Any], daily: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine the minute and daily bars into the price part of a quote."""
+        current_price = minute["close"]
+        timestamp = minute["timestamp"]
+
+        # Init defaults
+        day_open = 0.0
+        day_high = 0.0
+        day_low = 0.0
+        prev_close = 0.0
+        volume = 0.0
+        turnover = 0.0
+        turnover_rate = 0.0
+        change_percent = 0.0
+        change_amount = 0.0
+
+        if daily:
+            # Check date match to ensure daily data is for the same day as min data
+            min_date_part = timestamp.split(' ')[0]
+
+            if min_date_part == daily["date"]:
+                day_open = daily["open"]
+                day_high = daily["high"]
+                day_low = daily["low"]
+                volume = daily["volume"]
+                turnover = daily["turnover"]
+                turnover_rate = daily["turnover_rate"]
+                change_percent = daily["change_percent"]
+                change_amount = daily["change_amount"]
+
+                # Calculated prev_close
+                # Note: stock_zh_a_hist close is today's close. prev_close = close - change_amount
+                prev_close = daily["close"] - change_amount
+            else:
+                # Daily data likely lagging (e.g. before daily close update), use latest daily as previous day
+                prev_close = daily["close"]
+                # If mismatch, today's daily record isn't there yet.
+                # Use min data as an approximation of today's open
+                day_open = minute["open"] # This is min open, inaccurate for day open
+
+        return {
+            "symbol": symbol,
+            "current_price": current_price,
+            "open": day_open,
+            "high": day_high,
+            "low": day_low,
+            "prev_close": round(prev_close, 2),
+            "change_amount": round(change_amount, 2),
+            "change_percent": round(change_percent, 2),
+            "volume": volume,
+            "turnover": turnover,
+            "turnover_rate": turnover_rate,
+            "timestamp": timestamp,
+        }
+
+    def _fetch_market_cap(self, symbol: str) -> Dict[str, Any]:
+        """Total / circulating market cap from stock_individual_info_em."""
+        df_info = ak.stock_individual_info_em(symbol=symbol, timeout=self.QUOTE_LEG_TIMEOUTS["info"])
+        if df_info is None or df_info.empty:
+            return {"market_cap": None, "circulating_market_cap": None}
+        info_map = dict(zip(df_info['item'], df_info['value']))
+        return {
+            "market_cap": self._parse_float(info_map.get('总市值')),
+            "circulating_market_cap": self._parse_float(info_map.get('流通市值')),
+        }
+
+    def _fetch_valuation_inputs(self, symbol: str) -> Dict[str, Any]:
+        """EPS (TTM) / BPS inputs of PE/PB from stock_financial_abstract."""
+        try:
+            df_fin = ak.stock_financial_abstract(symbol=symbol)
+        except (TypeError, AttributeError, ValueError):
+            # Common for indices or funds which don't have financial abstract
+            logger.debug(f"Valuation data unavailable for {symbol}")
+            return {"eps_ttm": None, "bps": None}
+        if df_fin is None or df_fin.empty:
+            return {"eps_ttm": None, "bps": None}
+        eps_ttm, bps = self._extract_valuation_inputs(df_fin)
+        return {"eps_ttm": eps_ttm, "bps": bps}
+
     def _calculate_valuation(self, df_fin: pd.DataFrame, price: float) -> tuple:
         """Calculate PE (TTM) and PB based on financial abstract."""
+        eps_ttm, bps = self._extract_valuation_inputs(df_fin)
+        return self._valuation_from_inputs(eps_ttm, bps, price)
+
+    def _extract_valuation_inputs(self, df_fin: pd.DataFrame) -> tuple:
+        """Extract (EPS TTM, BPS) from the latest report in a financial abstract."""
         # df_fin columns: '指标', '20250930', '20250630', ...
         # Find latest report date
         date_cols = [c for c in df_fin.columns if c.isdigit()]
@@ -1221,9 +1398,7 @@ class AkShareTool:
         eps = get_val('基本每股收益')
         bps = get_val('每股净资产')
 
-        pe = None
-        pb = None
-
+        eps_ttm = None
         if eps and eps != 0:
             # Simple TTM estimation:
             # If Q3 (0930), EPS_TTM ~= EPS / 3 * 4
@@ -1236,13 +1411,19 @@ class AkShareTool:
             else: factor = 1.0
 
             eps_ttm = eps * factor
-            pe = round(price / eps_ttm, 2)
 
-        if bps and bps != 0:
-            pb = round(price / bps, 2)
+        return eps_ttm, bps
 
+    def _valuation_from_inputs(self, eps_ttm: Optional[float], bps: Optional[float], price: float) -> tuple:
+        """PE / PB for the given price."""
+        pe = round(price / eps_ttm, 2) if eps_ttm else None
+        pb = round(price / bps, 2) if bps else None
         return pe, pb
 
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit / miss / coalesced counters of the shared quote cache."""
+        return quote_cache.stats()
+
     def _parse_float(self, val):
         if pd.isna(val): return None
         try: return float(val)
@@ -1271,17 +1452,11 @@ class AkShareTool:
 
             if df.empty: return []
 
-            history = []
-            for _, row in df.iterrows():
-                history.append({
-                    'timestamp': row['日期'],
-                    'open': float(row['开盘']),
-                    'high': float(row['最高']),
-                    'low': float(row['最低']),
-                    'close': float(row['收盘']),
-                    'volume': float(row['成交量'])
-                })
-            return history
+            # Column-wise conversion; a bad cell raises here just like the per-row float() did
+            bars = df[['开盘', '最高', '最低', '收盘', '成交量']].astype(float)
+            bars.columns = ['open', 'high', 'low', 'close', 'volume']
+            bars.insert(0, 'timestamp', df['日期'])
+            return bars.to_dict("records")
         except Exception as e:
             logger.error(f"AkShare get_stock_history failed for {symbol}: {e}")
             return []
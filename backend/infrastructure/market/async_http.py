@@ -0,0 +1,102 @@
+"""
+Shared async HTTP client for the market data adapters.
+
+One ``httpx.AsyncClient`` per event loop (connections are bound to the loop
+that opened them) with keep-alive pooling, plus a per-host semaphore so a
+burst of requests cannot exceed what each upstream tolerates. The async
+adapter methods (``aget_*``) use this instead of their ``requests`` sessions,
+so routers can await them directly rather than hopping through the default
+thread pool.
+"""
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
+}
+
+# Max in-flight requests per host; upstreams not listed get DEFAULT_HOST_LIMIT
+HOST_LIMITS = {
+    "hq.sinajs.cn": 16,
+    "money.finance.sina.com.cn": 8,
+    "query1.finance.yahoo.com": 8,
+    "api.stlouisfed.org": 4,
+    "xueqiu.com": 2,
+    "www.cninfo.com.cn": 4,
+    "www.sec.gov": 4,  # SEC fair-access policy: <= 10 requests/s
+    "data.sec.gov": 4,
+}
+DEFAULT_HOST_LIMIT = 8
+
+
+class AsyncHttp:
+    def __init__(
+        self,
+        limits: Optional[httpx.Limits] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        host_limits: Optional[Dict[str, int]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.limits = limits or httpx.Limits(
+            max_connections=64, max_keepalive_connections=32, keepalive_expiry=30.0
+        )
+        self.timeout = timeout or httpx.Timeout(10.0, connect=3.0)
+        self.host_limits = HOST_LIMITS if host_limits is None else host_limits
+        self.transport = transport
+        # loop -> {"client": AsyncClient, "hosts": {host: Semaphore}}
+        self._state: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _loop_state(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        state = self._state.get(loop)
+        if state is None or state["client"].is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                transport=self.transport,
+            )
+            state = self._state[loop] = {"client": client, "hosts": {}}
+        return state
+
+    def _host_semaphore(self, state: Dict[str, Any], url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        semaphore = state["hosts"].get(host)
+        if semaphore is None:
+            semaphore = state["hosts"][host] = asyncio.Semaphore(
+                self.host_limits.get(host, DEFAULT_HOST_LIMIT)
+            )
+        return semaphore
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        state = self._loop_state()
+        async with self._host_semaphore(state, url):
+            return await state["client"].request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the current loop's client (call on application shutdown)."""
+        state = self._state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state["client"].aclose()
+
+
+# Process-wide instance shared by all adapters
+async_http = AsyncHttp()
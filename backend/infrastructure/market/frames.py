@@ -0,0 +1,66 @@
+"""
+Columnar DataFrame -> payload conversion for market data adapters.
+
+Upstream (AkShare) frames use Chinese column names and loosely typed cells.
+Instead of walking rows with `iterrows()` and coercing every cell, the helpers
+here rename and coerce each column once and emit records or column lists in bulk.
+"""
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+
+def select_columns(
+    df: pd.DataFrame,
+    numeric: Mapping[str, str],
+    text: Optional[Mapping[str, str]] = None,
+    default: float = 0.0,
+) -> pd.DataFrame:
+    """
+    Build an output frame with renamed, coerced columns.
+
+    Args:
+        df: Upstream frame.
+        numeric: {output_field: source_column}; values are coerced to float, with
+            missing columns / unparsable or NaN cells replaced by `default`
+            (same semantics as AkShareTool._safe_get).
+        text: {output_field: source_column}; values are converted with str(),
+            missing columns become "".
+        default: Fill value for numeric fields.
+
+    Output columns follow the order of `text` then `numeric`.
+    """
+    out: Dict[str, Any] = {}
+    for field, col in (text or {}).items():
+        out[field] = df[col].map(str) if col in df.columns else pd.Series("", index=df.index)
+    for field, col in numeric.items():
+        if col in df.columns:
+            out[field] = pd.to_numeric(df[col], errors="coerce").fillna(default).astype(float)
+        else:
+            out[field] = pd.Series(default, index=df.index, dtype=float)
+    return pd.DataFrame(out, index=df.index)
+
+
+def to_records(
+    df: pd.DataFrame,
+    numeric: Mapping[str, str],
+    text: Optional[Mapping[str, str]] = None,
+    default: float = 0.0,
+) -> List[Dict[str, Any]]:
+    """List-of-dicts payload (one dict per row) with native Python values."""
+    if df is None or df.empty:
+        return []
+    return select_columns(df, numeric, text, default).to_dict("records")
+
+
+def to_columns(
+    df: pd.DataFrame,
+    numeric: Mapping[str, str],
+    text: Optional[Mapping[str, str]] = None,
+    default: float = 0.0,
+) -> Dict[str, List[Any]]:
+    """Column-oriented payload, e.g. {"date": [...], "close": [...]} for chart endpoints."""
+    fields: Sequence[str] = list((text or {}).keys()) + list(numeric.keys())
+    if df is None or df.empty:
+        return {f: [] for f in fields}
+    return select_columns(df, numeric, text, default).to_dict("list")
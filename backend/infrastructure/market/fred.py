@@ -1,9 +1,12 @@
 
 import requests
+import httpx
 import logging
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
+from backend.infrastructure.market.async_http import async_http
+
 logger = logging.getLogger(__name__)
 
 class FredTool:
@@ -26,15 +29,9 @@ class FredTool:
 
     def __init__(self, api_key: str):
         self.api_key = api_key
+        self.session = requests.Session()
 
-    def get_data(self, series_id: str, observation_start: Optional[str] = None, observation_end: Optional[str] = None) -> List[Dict[str, Any]]:
-        """
-        Fetch observations for a specific series.
-        """
-        if not self.api_key:
-            return {"error": "FRED API key is not configured"}
-
-        url = f"{self.BASE_URL}/series/observations"
+    def _params(self, series_id: str, observation_start: Optional[str], observation_end: Optional[str]) -> Dict[str, Any]:
         params = {
             "series_id": series_id,
             "api_key": self.api_key,
@@ -45,31 +42,41 @@ class FredTool:
             params["observation_start"] = observation_start
         if observation_end:
             params["observation_end"] = observation_end
+        return params
+
+    @staticmethod
+    def _parse_observations(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        observations = data.get("observations", [])
+        results = []
+        for obs in observations:
+            val = obs.get("value")
+            # Handle "." which represents missing data in FRED
+            if val == ".":
+                val = None
+            else:
+                try:
+                    val = float(val)
+                except (ValueError, TypeError):
+                    val = None
+            
+            results.append({
+                "date": obs.get("date"),
+                "value": val
+            })
+        return results
 
+    def get_data(self, series_id: str, observation_start: Optional[str] = None, observation_end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch observations for a specific series.
+        """
+        if not self.api_key:
+            return {"error": "FRED API key is not configured"}
+
+        url = f"{self.BASE_URL}/series/observations"
         try:
-            response = requests.get(url, params=params, timeout=10)
-            print(f"DEBUG: FRED URL: {response.url}") # Debugging
+            response = self.session.get(url, params=self._params(series_id, observation_start, observation_end), timeout=10)
             response.raise_for_status()
-            data = response.json()
-            
-            observations = data.get("observations", [])
-            results = []
-            for obs in observations:
-                val = obs.get("value")
-                # Handle "." which represents missing data in FRED
-                if val == ".":
-                    val = None
-                else:
-                    try:
-                        val = float(val)
-                    except (ValueError, TypeError):
-                        val = None
-                
-                results.append({
-                    "date": obs.get("date"),
-                    "value": val
-                })
-            return results
+            return self._parse_observations(response.json())
 
         except requests.exceptions.RequestException as e:
             logger.error(f"FRED API Request Error: {e}")
@@ -78,11 +85,25 @@ class FredTool:
             logger.error(f"FRED Data Parse Error: {e}")
             return {"error": f"FRED Data Error: {str(e)}"}
 
-    def get_macro_history(self, indicator: str, period: str = "1y") -> Dict[str, Any]:
-        """
-        Get historical data for a named indicator (e.g., 'CPI', 'GDP').
-        Period format: '1y', '5y', 'max'.
-        """
+    async def aget_data(self, series_id: str, observation_start: Optional[str] = None, observation_end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Async variant of get_data on the shared pooled client."""
+        if not self.api_key:
+            return {"error": "FRED API key is not configured"}
+
+        url = f"{self.BASE_URL}/series/observations"
+        try:
+            response = await async_http.get(url, params=self._params(series_id, observation_start, observation_end))
+            response.raise_for_status()
+            return self._parse_observations(response.json())
+
+        except httpx.HTTPError as e:
+            logger.error(f"FRED API Request Error: {e}")
+            return {"error": f"FRED API Error: {str(e)}"}
+        except Exception as e:
+            logger.error(f"FRED Data Parse Error: {e}")
+            return {"error": f"FRED Data Error: {str(e)}"}
+
+    def _resolve(self, indicator: str, period: str):
         series_id = self.INDICATORS.get(indicator.upper())
         if not series_id:
             # Fallback: try using the indicator string directly as ID
@@ -100,9 +121,10 @@ class FredTool:
         elif period == "10y":
             start_date = (now - timedelta(days=365*10)).strftime("%Y-%m-%d")
         # 'max' implies no start_date param
+        return series_id, start_date
 
-        data = self.get_data(series_id, observation_start=start_date)
-        
+    @staticmethod
+    def _history_response(indicator: str, series_id: str, data) -> Dict[str, Any]:
         if isinstance(data, dict) and "error" in data:
              return data
 
@@ -113,3 +135,18 @@ class FredTool:
             "series_id": series_id,
             "data": data
         }
+
+    def get_macro_history(self, indicator: str, period: str = "1y") -> Dict[str, Any]:
+        """
+        Get historical data for a named indicator (e.g., 'CPI', 'GDP').
+        Period format: '1y', '5y', 'max'.
+        """
+        series_id, start_date = self._resolve(indicator, period)
+        data = self.get_data(series_id, observation_start=start_date)
+        return self._history_response(indicator, series_id, data)
+
+    async def aget_macro_history(self, indicator: str, period: str = "1y") -> Dict[str, Any]:
+        """Async variant of get_macro_history."""
+        series_id, start_date = self._resolve(indicator, period)
+        data = await self.aget_data(series_id, observation_start=start_date)
+        return self._history_response(indicator, series_id, data)
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from backend.infrastructure.config.loader import config
+
+logger = logging.getLogger(__name__)
+
+# Stored columns (same field names as AkShareTool.get_history)
+COLUMNS = ["date", "open", "close", "high", "low", "volume", "turnover", "pct_change"]
+
+# Fetcher: (start "YYYYMMDD", end "YYYYMMDD") -> frame-like (DataFrame / dict of columns / records)
+Fetcher = Callable[[str, str], Any]
+
+
+def _to_iso(d: str) -> str:
+    """YYYYMMDD / YYYY-MM-DD -> YYYY-MM-DD."""
+    d = str(d).replace("-", "")[:8]
+    return f"{d[:4]}-{d[4:6]}-{d[6:8]}"
+
+
+def _to_compact(d: str) -> str:
+    return d.replace("-", "")
+
+
+class KlineStore:
+    """
+    Local on-disk OHLCV store, one Parquet file per (symbol, period, adjust).
+
+    Range queries are served from disk; only what the file does not cover yet is
+    fetched from upstream:
+    - tail: from the second-to-last stored bar to the requested end (the last bar may
+      still be forming, e.g. today's or this week's), at most once per `tail_ttl`
+      for ranges that reach today;
+    - head: from the requested start to the first stored bar, once per new start.
+
+    For adjusted series (qfq/hfq) a dividend shifts the whole history. The re-fetched
+    overlap bar is compared with the stored one and, if it moved, the covered range
+    is downloaded again instead of appended.
+    """
+
+    def __init__(self, root: str = "data/kline", tail_ttl: float = 60.0, max_cached: int = 256):
+        self.root = root
+        self.tail_ttl = tail_ttl
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        # key -> (frame, meta); frames are never mutated in place
+        self._frames: "OrderedDict[Tuple[str, str, str], Tuple[pd.DataFrame, Dict[str, Any]]]" = OrderedDict()
+        self._tail_checked: Dict[Tuple[str, str, str], float] = {}
+        self._stats = {"hits": 0, "tail_fetches": 0, "head_fetches": 0, "full_fetches": 0,
+                       "rebased": 0, "fetch_errors": 0, "rows_fetched": 0}
+
+    # ------------------------------------------------------------------ public
+
+    def get_history(
+        self,
+        symbol: str,
+        fetch: Fetcher,
+        period: str = "daily",
+        adjust: str = "qfq",
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Bars of `symbol` within [start_date, end_date] (YYYYMMDD or YYYY-MM-DD),
+        sorted by date. Defaults to the last 365 days, like AkShareTool.get_history.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        end = _to_iso(end_date) if end_date else today
+        start = _to_iso(start_date) if start_date else (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+        key = (symbol, period, adjust or "none")
+
+        with self._key_lock(key):
+            df, meta = self._load(key)
+            df, meta, changed = self._sync(key, df, meta, fetch, start, end, today)
+            if changed:
+                self._save(key, df, meta)
+
+        mask = (df["date"] >= start) & (df["date"] <= end)
+        return df.loc[mask].reset_index(drop=True)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """Forget cached frames (files stay on disk)."""
+        with self._lock:
+            for key in [k for k in self._frames if symbol is None or k[0] == symbol]:
+                self._frames.pop(key, None)
+                self._tail_checked.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "cached_series": len(self._frames), "root": self.root}
+
+    # ------------------------------------------------------------------ sync
+
+    def _sync(self, key, df, meta, fetch, start, end, today):
+        covered_to = min(end, self._yesterday(today))
+
+        if df.empty:
+            fetched = self._fetch(fetch, start, end, "full_fetches")
+            if fetched is None or fetched.empty:
+                return df, meta, False
+            self._tail_checked[key] = time.monotonic()
+            return fetched, {"covered_from": start, "covered_to": covered_to}, True
+
+        changed = False
+
+        # Head: requested start precedes what was ever covered
+        if start < meta.get("covered_from", df["date"].iloc[0]):
+            first = df["date"].iloc[0]
+            head = self._fetch(fetch, start, first, "head_fetches")
+            if head is not None:
+                # An empty head (e.g. before listing) still counts as covered
+                df = self._merge(head[head["date"] < first], df)
+                meta["covered_from"] = start
+                changed = True
+
+        # Tail: requested end goes past completed coverage
+        if end > meta.get("covered_to", "") and self._tail_due(key, end, today):
+            anchor = df.iloc[max(len(df) - 2, 0)]
+            tail = self._fetch(fetch, anchor["date"], end, "tail_fetches")
+            self._tail_checked[key] = time.monotonic()
+            if tail is not None:
+                if self._rebased(anchor, tail, key[2]):
+                    self._stats["rebased"] += 1
+                    full = self._fetch(fetch, meta.get("covered_from", df["date"].iloc[0]), end, "full_fetches")
+                    if full is not None and not full.empty:
+                        df = full
+                elif not tail.empty:
+                    df = self._merge(df[df["date"] < anchor["date"]], tail)
+                meta["covered_to"] = max(meta.get("covered_to", ""), covered_to)
+                changed = True
+
+        if not changed:
+            self._stats["hits"] += 1
+        return df, meta, changed
+
+    def _tail_due(self, key, end: str, today: str) -> bool:
+        if end < today:
+            return True
+        checked = self._tail_checked.get(key)
+        return checked is None or time.monotonic() - checked > self.tail_ttl
+
+    @staticmethod
+    def _rebased(anchor: pd.Series, tail: pd.DataFrame, adjust: str) -> bool:
+        """True if an adjusted series' anchor bar changed upstream (ex-dividend rebase)."""
+        if adjust == "none":
+            return False
+        same = tail[tail["date"] == anchor["date"]]
+        if same.empty:
+            return False
+        old, new = float(anchor["close"]), float(same["close"].iloc[0])
+        return abs(old - new) > 1e-6 * max(abs(old), 1.0)
+
+    @staticmethod
+    def _yesterday(today: str) -> str:
+        # Only fully completed days count as covered; today's bar may still change
+        return (datetime.strptime(today, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    def _fetch(self, fetch: Fetcher, start: str, end: str, counter: str) -> Optional[pd.DataFrame]:
+        """Normalized bars in [start, end]; None if the upstream call failed."""
+        try:
+            raw = fetch(_to_compact(start), _to_compact(end))
+        except Exception as e:
+            self._stats["fetch_errors"] += 1
+            logger.warning(f"K-line fetch {start}..{end} failed: {e}")
+            return None
+        self._stats[counter] += 1
+        df = self._normalize(raw)
+        self._stats["rows_fetched"] += len(df)
+        return df
+
+    @classmethod
+    def _normalize(cls, raw: Any) -> pd.DataFrame:
+        df = raw if isinstance(raw, pd.DataFrame) else pd.DataFrame(raw)
+        if df.empty or "date" not in df.columns:
+            return cls._empty()
+        out = pd.DataFrame({"date": df["date"].map(_to_iso)})
+        for col in COLUMNS[1:]:
+            out[col] = pd.to_numeric(df[col], errors="coerce").astype(float) if col in df.columns else float("nan")
+        # Rows without a usable date cannot be keyed
+        out = out[out["date"].str.match(r"^\d{4}-\d{2}-\d{2}$")]
+        return out.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+
+    @staticmethod
+    def _merge(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+        df = pd.concat([a, b], ignore_index=True)
+        return df.drop_duplicates("date", keep="last").sort_values("date").reset_index(drop=True)
+
+    @staticmethod
+    def _empty() -> pd.DataFrame:
+        return pd.DataFrame({c: pd.Series(dtype=str if c == "date" else float) for c in COLUMNS})
+
+    # ------------------------------------------------------------------ storage
+
+    def _path(self, key) -> str:
+        symbol, period, adjust = key
+        safe = "".join(ch if ch.isalnum() or ch in "._-" else "_" for ch in symbol)
+        return os.path.join(self.root, period, adjust, f"{safe}.parquet")
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, key) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached is not None:
+                self._frames.move_to_end(key)
+                return cached[0], dict(cached[1])
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return self._empty(), {}
+        try:
+            table = pq.read_table(path)
+            raw_meta = (table.schema.metadata or {}).get(b"kline_store")
+            meta = json.loads(raw_meta) if raw_meta else {}
+            df = table.to_pandas()
+        except Exception as e:
+            logger.warning(f"Unreadable K-line file {path}, refetching: {e}")
+            return self._empty(), {}
+        self._remember(key, df, meta)
+        return df, dict(meta)
+
+    def _save(self, key, df: pd.DataFrame, meta: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(df[COLUMNS], preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b"kline_store": json.dumps(meta).encode()})
+        tmp = f"{path}.tmp"
+        try:
+            pq.write_table(table, tmp)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.error(f"Failed to persist K-lines to {path}: {e}")
+        self._remember(key, df, meta)
+
+    def _remember(self, key, df: pd.DataFrame, meta: Dict[str, Any]) -> None:
+        with self._lock:
+            self._frames[key] = (df, dict(meta))
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_cached:
+                self._frames.popitem(last=False)
+
+
+_settings = config.get("kline_store") or {}
+
+# Singleton shared by every history reader in the process
+kline_store = KlineStore(
+    root=_settings.get("path", os.path.join("data", "kline")),
+    tail_ttl=float(_settings.get("tail_ttl", 60.0)),
+)
@@ -0,0 +1,174 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from backend.infrastructure.config.loader import config
+
+logger = logging.getLogger(__name__)
+
+# Default TTL (seconds) per cache namespace.
+# - price: realtime legs (1-min kline + daily kline), refreshed often
+# - fundamentals: PE/PB inputs (EPS/BPS) and market cap, change at most daily
+DEFAULT_TTLS: Dict[str, float] = {
+    "price": 5.0,
+    "fundamentals": 6 * 3600.0,
+}
+
+
+class _Flight:
+    """An in-progress load that concurrent callers wait on."""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class QuoteCache:
+    """
+    Process-wide TTL cache with single-flight loading.
+
+    Entries are grouped by namespace, each namespace having its own TTL.
+    When several threads ask for the same missing key at once, only the first
+    one calls the loader; the others wait and receive the same result (or
+    exception). Hit / miss / coalesced counters are kept per namespace.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = 5000):
+        self._ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self._ttls.update(ttls)
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._store: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, Hashable], _Flight] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def ttl(self, namespace: str) -> float:
+        return self._ttls.get(namespace, DEFAULT_TTLS["price"])
+
+    def get_or_load(
+        self,
+        namespace: str,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        cache_if: Optional[Callable[[Any], bool]] = None,
+        wait_timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Return the cached value for (namespace, key), loading it at most once.
+
+        Args:
+            namespace: Cache namespace, selects the default TTL.
+            key: Hashable key within the namespace (e.g. symbol).
+            loader: Zero-arg callable producing the value on a miss.
+            ttl: Optional TTL override in seconds.
+            cache_if: Optional predicate; values failing it are returned but not stored
+                (e.g. error payloads).
+            wait_timeout: Max seconds to wait on another caller's in-flight load (None = no
+                limit). On expiry a TimeoutError is raised; the load itself keeps running.
+        """
+        cache_key = (namespace, key)
+        now = time.monotonic()
+
+        with self._lock:
+            stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "coalesced": 0, "wait_timeouts": 0})
+            entry = self._store.get(cache_key)
+            if entry is not None:
+                if entry[0] > now:
+                    stats["hits"] += 1
+                    self._store.move_to_end(cache_key)
+                    return entry[1]
+                del self._store[cache_key]
+
+            flight = self._inflight.get(cache_key)
+            leader = flight is None
+            if leader:
+                stats["misses"] += 1
+                flight = _Flight()
+                self._inflight[cache_key] = flight
+            else:
+                stats["coalesced"] += 1
+
+        if not leader:
+            if not flight.event.wait(wait_timeout):
+                with self._lock:
+                    stats["wait_timeouts"] += 1
+                raise TimeoutError(f"Timed out after {wait_timeout}s waiting for in-flight load of {namespace}:{key}")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            flight.value = value
+            if cache_if is None or cache_if(value):
+                expires = time.monotonic() + (ttl if ttl is not None else self.ttl(namespace))
+                with self._lock:
+                    self._store[cache_key] = (expires, value)
+                    self._store.move_to_end(cache_key)
+                    while len(self._store) > self._max_entries:
+                        self._store.popitem(last=False)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+            flight.event.set()
+
+    def invalidate(self, namespace: Optional[str] = None, key: Optional[Hashable] = None) -> None:
+        """Drop one key, one namespace, or everything."""
+        with self._lock:
+            if namespace is None:
+                self._store.clear()
+            elif key is not None:
+                self._store.pop((namespace, key), None)
+            else:
+                for k in [k for k in self._store if k[0] == namespace]:
+                    del self._store[k]
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-namespace hit / miss / coalesced counters and current sizes."""
+        with self._lock:
+            sizes: Dict[str, int] = {}
+            for ns, _ in self._store:
+                sizes[ns] = sizes.get(ns, 0) + 1
+            result = {}
+            for ns, counters in self._stats.items():
+                total = counters["hits"] + counters["misses"] + counters["coalesced"]
+                result[ns] = {
+                    **counters,
+                    "size": sizes.get(ns, 0),
+                    "ttl": self.ttl(ns),
+                    "hit_rate": round((counters["hits"] + counters["coalesced"]) / total, 4) if total else 0.0,
+                }
+            return result
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+def is_cacheable(value: Any) -> bool:
+    """Cache predicate: do not cache empty or error payloads."""
+    return bool(value) and not (isinstance(value, dict) and "error" in value)
+
+
+def has_values(value: Any) -> bool:
+    """Cache predicate for field dicts: also reject results whose fields are all None."""
+    if not is_cacheable(value):
+        return False
+    return not isinstance(value, dict) or any(v is not None for v in value.values())
+
+
+# Singleton shared by every AkShareTool instance in the process.
+# TTLs can be overridden in .config.yaml under `quote_cache: {price: 5, fundamentals: 21600}`.
+quote_cache = QuoteCache(ttls=config.get("quote_cache") or None)
@@ -6,6 +6,8 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 
+from backend.infrastructure.market.async_http import async_http
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -21,13 +23,14 @@ class SinaFinanceTool:
     SCRAPER_TIMEOUT = 10
     BASE_URL_HQ = "http://hq.sinajs.cn/"
     BASE_URL_NEWS = "https://vip.stock.finance.sina.com.cn"
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Referer': 'https://finance.sina.com.cn/'
+    }
 
     def __init__(self):
         self.session = requests.Session()
-        self.session.headers.update({
-             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-             'Referer': 'https://finance.sina.com.cn/'
-        })
+        self.session.headers.update(self.HEADERS)
         self.last_request_time = 0
 
     def _rate_limit(self):
@@ -65,73 +68,107 @@ class SinaFinanceTool:
             logger.error(f"Sina Finance get_stock_quote failed for {symbol}: {e}")
             return {"error": str(e)}
 
+    async def aget_stock_quote(self, symbol: str, market: str) -> Dict[str, Any]:
+        """Async variant of get_stock_quote on the shared pooled client."""
+        try:
+            sina_symbol = self._convert_to_sina_format(symbol, market)
+            url = f"{self.BASE_URL_HQ}?list={sina_symbol}"
+            response = await async_http.get(url, headers=self.HEADERS, timeout=self.TIMEOUT)
+            
+            if response.status_code != 200:
+                raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+            return self._parse_sina_response(response.text, symbol, market)
+
+        except Exception as e:
+            logger.error(f"Sina Finance get_stock_quote failed for {symbol}: {e}")
+            return {"error": str(e)}
+
+    HIST_URL = "https://money.finance.sina.com.cn/quotes_service/api/json_v2.php/CN_MarketData.getKLineData"
+
+    def _history_request(self, symbol: str, market: str, period: str, interval: str):
+        if market != "A-share":
+            logger.warning(f"Sina Finance historical data mainly supports A-share, {market} might not work.")
+            # We allow it to proceed but it might fail or return empty
+
+        days = self._parse_period(period)
+        scale = self._parse_interval(interval)
+        
+        sina_symbol = self._convert_to_sina_format(symbol, market)
+        
+        # Sina K-line API
+        params = {
+            'symbol': sina_symbol,
+            'scale': str(scale),
+            'ma': 'no',
+            'datalen': str(days * 2)
+        }
+        return days, params
+
     def get_historical_data(self, symbol: str, market: str, period: str = "30d", interval: str = "1d") -> List[Dict[str, Any]]:
         """
         Get historical data (candlesticks).
         Note: Mostly reliable for A-shares.
         """
-        if market != "A-share":
-            logger.warning(f"Sina Finance historical data mainly supports A-share, {market} might not work.")
-            # We allow it to proceed but it might fail or return empty
+        try:
+            days, params = self._history_request(symbol, market, period, interval)
+            response = self.session.get(self.HIST_URL, params=params, timeout=self.TIMEOUT)
+            response.raise_for_status()
+            return self._build_history(response.text, days)
 
+        except Exception as e:
+            logger.error(f"Sina Finance get_historical_data failed for {symbol}: {e}")
+            return []
+
+    async def aget_historical_data(self, symbol: str, market: str, period: str = "30d", interval: str = "1d") -> List[Dict[str, Any]]:
+        """Async variant of get_historical_data."""
         try:
-            days = self._parse_period(period)
-            scale = self._parse_interval(interval)
-            
-            sina_symbol = self._convert_to_sina_format(symbol, market)
-            
-            # Sina K-line API
-            hist_url = "https://money.finance.sina.com.cn/quotes_service/api/json_v2.php/CN_MarketData.getKLineData"
-            params = {
-                'symbol': sina_symbol,
-                'scale': str(scale),
-                'ma': 'no',
-                'datalen': str(days * 2)
-            }
-            
-            response = self.session.get(hist_url, params=params, timeout=self.TIMEOUT)
+            days, params = self._history_request(symbol, market, period, interval)
+            response = await async_http.get(self.HIST_URL, params=params, headers=self.HEADERS, timeout=self.TIMEOUT)
             response.raise_for_status()
-            
-            import json
-            try:
-                data = json.loads(response.text)
-            except json.JSONDecodeError:
-                data = self._parse_sina_kline_data(response.text)
-                
-            if not data or not isinstance(data, list):
-                return []
-            
-            historical_data = []
-            cutoff_date = datetime.now() - timedelta(days=days)
-            
-            for item in data:
-                 if isinstance(item, dict) and all(key in item for key in ['day', 'open', 'high', 'low', 'close', 'volume']):
-                    try:
-                        day_str = item['day']
-                        if ' ' in day_str and ':' in day_str:
-                             item_date = datetime.strptime(day_str, '%Y-%m-%d %H:%M:%S')
-                        else:
-                             item_date = datetime.strptime(day_str, '%Y-%m-%d')
-                        
-                        if item_date >= cutoff_date:
-                            historical_data.append({
-                                'timestamp': item_date.isoformat(),
-                                'open': float(item['open']),
-                                'high': float(item['high']),
-                                'low': float(item['low']),
-                                'close': float(item['close']),
-                                'volume': float(item['volume'])
-                            })
-                    except (ValueError, TypeError):
-                        continue
-            
-            historical_data.sort(key=lambda x: x['timestamp'])
-            return historical_data
+            return self._build_history(response.text, days)
 
         except Exception as e:
             logger.error(f"Sina Finance get_historical_data failed for {symbol}: {e}")
             return []
 
+    def _build_history(self, text: str, days: int) -> List[Dict[str, Any]]:
+        import json
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError:
+            data = self._parse_sina_kline_data(text)
+            
+        if not data or not isinstance(data, list):
+            return []
+        
+        historical_data = []
+        cutoff_date = datetime.now() - timedelta(days=days)
+        
+        for item in data:
+             if isinstance(item, dict) and all(key in item for key in ['day', 'open', 'high', 'low', 'close', 'volume']):
+                try:
+                    day_str = item['day']
+                    if ' ' in day_str and ':' in day_str:
+                         item_date = datetime.strptime(day_str, '%Y-%m-%d %H:%M:%S')
+                    else:
+                         item_date = datetime.strptime(day_str, '%Y-%m-%d')
+                    
+                    if item_date >= cutoff_date:
+                        historical_data.append({
+                            'timestamp': item_date.isoformat(),
+                            'open': float(item['open']),
+                            'high': float(item['high']),
+                            'low': float(item['low']),
+                            'close': float(item['close']),
+                            'volume': float(item['volume'])
+                        })
+                except (ValueError, TypeError):
+                    continue
+        
+        historical_data.sort(key=lambda x: x['timestamp'])
+        return historical_data
+
     # ========================== News Scraping ==========================
 
     def scrape_news(self, symbol: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -0,0 +1,293 @@
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import akshare as ak
+import numpy as np
+import pandas as pd
+
+from backend.infrastructure.config.loader import config
+
+logger = logging.getLogger(__name__)
+
+# Numeric fields kept per symbol (one float64 column each)
+FIELDS = [
+    "price", "open", "high", "low", "prev_close", "change_amount", "change_percent",
+    "volume", "turnover", "turnover_rate", "pe", "pb", "market_cap", "circulating_market_cap",
+]
+
+# Upstream column -> field, per spot table
+_STOCK_COLUMNS = {
+    "最新价": "price", "今开": "open", "最高": "high", "最低": "low", "昨收": "prev_close",
+    "涨跌额": "change_amount", "涨跌幅": "change_percent", "成交量": "volume", "成交额": "turnover",
+    "换手率": "turnover_rate", "市盈率-动态": "pe", "市净率": "pb",
+    "总市值": "market_cap", "流通市值": "circulating_market_cap",
+}
+_ETF_COLUMNS = {
+    "最新价": "price", "开盘价": "open", "最高价": "high", "最低价": "low", "昨收": "prev_close",
+    "涨跌额": "change_amount", "涨跌幅": "change_percent", "成交量": "volume", "成交额": "turnover",
+    "换手率": "turnover_rate", "总市值": "market_cap", "流通市值": "circulating_market_cap",
+}
+
+
+class SpotSnapshot:
+    """
+    Immutable, symbol-indexed columnar copy of a full-market spot table.
+    Lookups are a dict probe plus one array read per field.
+    """
+
+    def __init__(self, codes: List[str], names: List[str], markets: List[str],
+                 columns: Dict[str, np.ndarray], as_of: str):
+        # Bare codes can collide across tables (first table wins here);
+        # market_index resolves a code within one table
+        self.index: Dict[str, int] = {}
+        self.market_index: Dict[Tuple[str, str], int] = {}
+        for i, (market, code) in enumerate(zip(markets, codes)):
+            self.index.setdefault(code, i)
+            self.market_index.setdefault((market, code), i)
+        self.names = names
+        self.markets = markets
+        self.columns = columns
+        self.as_of = as_of
+        self.created_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    def get(self, symbol: str, market: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Quote dict in the same shape as AkShareTool.get_stock_quote, or None if absent/suspended.
+        With ``market`` ("A-share" / "CN-ETF") only that table's rows are considered.
+        """
+        i = self.index.get(symbol) if market is None else self.market_index.get((market, symbol))
+        if i is None:
+            return None
+        price = self.columns["price"][i]
+        if np.isnan(price):
+            # Suspended / not yet traded: let callers fall back to a per-symbol source
+            return None
+
+        def val(field):
+            v = self.columns[field][i]
+            return None if np.isnan(v) else float(v)
+
+        return {
+            "symbol": symbol,
+            "name": self.names[i],
+            "price": float(price),
+            "current_price": float(price),
+            "open": val("open") or 0.0,
+            "high": val("high") or 0.0,
+            "low": val("low") or 0.0,
+            "prev_close": val("prev_close") or 0.0,
+            "change_amount": val("change_amount") or 0.0,
+            "change_percent": val("change_percent") or 0.0,
+            "volume": val("volume") or 0.0,
+            "turnover": val("turnover") or 0.0,
+            "turnover_rate": val("turnover_rate") or 0.0,
+            "pe": val("pe"),
+            "pb": val("pb"),
+            "market_cap": val("market_cap"),
+            "circulating_market_cap": val("circulating_market_cap"),
+            "timestamp": self.as_of,
+            "market": self.markets[i],
+            "source": "akshare_spot_snapshot",
+        }
+
+
+class SpotSnapshotEngine:
+    """
+    Full-market A-share / ETF spot snapshot shared by all batch quote callers.
+
+    One pull of the spot tables (stock_zh_a_spot_em + fund_etf_spot_em) yields thousands of
+    quotes; they are stored as a SpotSnapshot and served by symbol. A snapshot older than
+    `max_age` is refreshed on access; concurrent callers that find it stale wait for a single
+    pull instead of issuing their own. `start()` additionally refreshes on a schedule during
+    CN trading hours so readers normally never wait.
+    """
+
+    def __init__(
+        self,
+        max_age: float = 15.0,
+        refresh_interval: float = 10.0,
+        stale_limit: float = 300.0,
+        loaders: Optional[Dict[str, Callable[[], pd.DataFrame]]] = None,
+    ):
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        # How long a stale snapshot may still be served when a refresh fails
+        self.stale_limit = stale_limit
+        self._loaders = loaders or {
+            "A-share": ak.stock_zh_a_spot_em,
+            "CN-ETF": ak.fund_etf_spot_em,
+        }
+        self._snapshot: Optional[SpotSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"pulls": 0, "pull_errors": 0, "hits": 0, "coalesced": 0, "stale_served": 0,
+                       "lookups": 0, "found": 0, "last_pull_ms": 0.0}
+
+    # ------------------------------------------------------------------ access
+
+    def get_snapshot(self, max_age: Optional[float] = None) -> Optional[SpotSnapshot]:
+        """Return a snapshot no older than max_age, pulling once if needed. None if unavailable."""
+        max_age = self.max_age if max_age is None else max_age
+        snap = self._snapshot
+        if snap is not None and snap.age() <= max_age:
+            self._stats["hits"] += 1
+            return snap
+
+        with self._refresh_lock:
+            # Another caller may have refreshed while we waited for the lock
+            snap = self._snapshot
+            if snap is not None and snap.age() <= max_age:
+                self._stats["coalesced"] += 1
+                return snap
+            try:
+                return self._pull()
+            except Exception as e:
+                self._stats["pull_errors"] += 1
+                if snap is not None and snap.age() <= self.stale_limit:
+                    self._stats["stale_served"] += 1
+                    logger.warning(f"Spot snapshot refresh failed, serving {snap.age():.0f}s old snapshot: {e}")
+                    return snap
+                logger.error(f"Spot snapshot refresh failed: {e}")
+                return None
+
+    def get_quotes(
+        self, symbols: Iterable[str], max_age: Optional[float] = None, market: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Batch quote lookup. Only symbols present (and trading) in the snapshot are returned;
+        callers should fall back to a per-symbol source for the rest. ``market`` restricts the
+        lookup to one spot table (e.g. "CN-ETF" for fund codes, which collide with stock codes).
+        """
+        symbols = list(symbols)
+        if not symbols:
+            return {}
+        snap = self.get_snapshot(max_age)
+        self._stats["lookups"] += len(symbols)
+        if snap is None:
+            return {}
+        result = {}
+        for symbol in symbols:
+            quote = snap.get(symbol, market)
+            if quote is not None:
+                result[symbol] = quote
+        self._stats["found"] += len(result)
+        return result
+
+    def get_quote(
+        self, symbol: str, max_age: Optional[float] = None, market: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        return self.get_quotes([symbol], max_age, market).get(symbol)
+
+    def refresh(self) -> Optional[SpotSnapshot]:
+        """Force a pull now (still single-flight with on-demand refreshes)."""
+        return self.get_snapshot(max_age=0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self._snapshot
+        return {
+            **self._stats,
+            "symbols": len(snap) if snap else 0,
+            "age_s": round(snap.age(), 1) if snap else None,
+            "as_of": snap.as_of if snap else None,
+            "scheduled": self._thread is not None and self._thread.is_alive(),
+        }
+
+    # ------------------------------------------------------------------ building
+
+    def _pull(self) -> SpotSnapshot:
+        t0 = time.perf_counter()
+        frames = []
+        errors = []
+        for market, loader in self._loaders.items():
+            try:
+                df = loader()
+                if df is not None and not df.empty:
+                    frames.append((market, df))
+            except Exception as e:
+                errors.append(f"{market}: {e}")
+                logger.warning(f"Spot table pull failed for {market}: {e}")
+        if not frames:
+            raise RuntimeError("; ".join(errors) or "empty spot tables")
+
+        snap = self._build(frames)
+        self._snapshot = snap
+        self._stats["pulls"] += 1
+        self._stats["last_pull_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        logger.info(f"Spot snapshot refreshed: {len(snap)} symbols in {self._stats['last_pull_ms']}ms")
+        return snap
+
+    @staticmethod
+    def _build(frames: List[tuple]) -> SpotSnapshot:
+        codes: List[str] = []
+        names: List[str] = []
+        markets: List[str] = []
+        parts: Dict[str, List[np.ndarray]] = {f: [] for f in FIELDS}
+
+        for market, df in frames:
+            mapping = _ETF_COLUMNS if market == "CN-ETF" else _STOCK_COLUMNS
+            n = len(df)
+            codes.extend(df["代码"].astype(str).tolist())
+            names.extend(df["名称"].astype(str).tolist() if "名称" in df.columns else [""] * n)
+            markets.extend([market] * n)
+            renamed = df.rename(columns=mapping)
+            for field in FIELDS:
+                if field in renamed.columns:
+                    parts[field].append(pd.to_numeric(renamed[field], errors="coerce").to_numpy(dtype=np.float64))
+                else:
+                    parts[field].append(np.full(n, np.nan))
+
+        columns = {f: np.concatenate(arrs) for f, arrs in parts.items()}
+        return SpotSnapshot(codes, names, markets, columns, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    # ------------------------------------------------------------------ schedule
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """Start the background refresher (idempotent). Refreshes only during CN trading hours."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        if interval is not None:
+            self.refresh_interval = interval
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="spot-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self._is_trading_time(datetime.now()):
+                self.get_snapshot(max_age=self.refresh_interval)
+            self._stop.wait(self.refresh_interval)
+
+    @staticmethod
+    def _is_trading_time(now: datetime) -> bool:
+        if now.weekday() >= 5:
+            return False
+        hm = now.hour * 100 + now.minute
+        return 915 <= hm <= 1135 or 1255 <= hm <= 1505
+
+
+_settings = config.get("spot_snapshot") or {}
+
+# Singleton shared by every batch quote caller in the process
+spot_snapshot_engine = SpotSnapshotEngine(
+    max_age=float(_settings.get("max_age", 15.0)),
+    refresh_interval=float(_settings.get("refresh_interval", 10.0)),
+)
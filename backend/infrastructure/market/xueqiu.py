@@ -7,6 +7,8 @@ import re
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from backend.infrastructure.market.async_http import async_http
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,6 +49,9 @@ class XueqiuTool:
             }
         )
         self._cookies_fetched = False
+        # Async path keeps its own cookies: the shared client's jar is process-wide
+        self._page_headers = {"Referer": f"{self.base_url}/"}
+        self._async_cookie_header: Optional[str] = None
 
     def _fetch_cookies(self):
         """Fetch initial cookies from Xueqiu home page and a stock page."""
@@ -61,44 +66,82 @@ class XueqiuTool:
         except Exception as e:
             logger.error(f"Failed to fetch Xueqiu cookies: {e}")
 
+    def _search_params(self, query: str, limit: int) -> Dict[str, Any]:
+        return {
+            "q": query,
+            "count": limit,
+            "page": 1,
+            "sort": "relevance",
+            "source": "all",
+        }
+
+    @staticmethod
+    def _parse_search_response(response) -> List[Dict[str, Any]]:
+        """Extract the post list from a search response (requests or httpx)."""
+        if response.status_code != 200:
+            logger.error(f"Xueqiu search failed with status {response.status_code}")
+            return []
+
+        content_type = response.headers.get("Content-Type", "")
+        if "application/json" not in content_type:
+            logger.error(
+                f"Xueqiu search returned non-JSON content: {content_type}. "
+                f"Possibly blocked by WAF. Snippet: {response.text[:200]}"
+            )
+            return []
+
+        try:
+            data = response.json()
+            return data.get("list", [])
+        except Exception as json_err:
+            logger.error(
+                f"Failed to parse Xueqiu search JSON: {json_err}. "
+                f"Snippet: {response.text[:200]}"
+            )
+            return []
+
     def search_discussions(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Search for discussions/posts on Xueqiu."""
         self._fetch_cookies()
         try:
-            params = {
-                "q": query,
-                "count": limit,
-                "page": 1,
-                "sort": "relevance",
-                "source": "all",
-            }
             # For JSON API, we should use appropriate Accept header
             headers = {"Accept": "application/json, text/plain, */*"}
             response = self.session.get(
-                self.search_url, params=params, timeout=10, headers=headers
+                self.search_url, params=self._search_params(query, limit), timeout=10, headers=headers
             )
+            return self._parse_search_response(response)
+        except Exception as e:
+            logger.error(f"Error searching Xueqiu: {e}")
+            return []
 
-            if response.status_code != 200:
-                logger.error(f"Xueqiu search failed with status {response.status_code}")
-                return []
-
-            content_type = response.headers.get("Content-Type", "")
-            if "application/json" not in content_type:
-                logger.error(
-                    f"Xueqiu search returned non-JSON content: {content_type}. "
-                    f"Possibly blocked by WAF. Snippet: {response.text[:200]}"
-                )
-                return []
-
+    async def _afetch_cookies(self) -> str:
+        """Async variant of _fetch_cookies; returns the Cookie header to send."""
+        if self._async_cookie_header is None:
+            cookies = {}
             try:
-                data = response.json()
-                return data.get("list", [])
-            except Exception as json_err:
-                logger.error(
-                    f"Failed to parse Xueqiu search JSON: {json_err}. "
-                    f"Snippet: {response.text[:200]}"
-                )
-                return []
+                for url in (self.base_url, f"{self.base_url}/S/SH600519"):
+                    response = await async_http.get(url, headers=self._page_headers, timeout=10)
+                    cookies.update(response.cookies.items())
+                self._async_cookie_header = "; ".join(f"{k}={v}" for k, v in cookies.items())
+                logger.info("Xueqiu cookies initialized (async).")
+            except Exception as e:
+                logger.error(f"Failed to fetch Xueqiu cookies: {e}")
+                return "; ".join(f"{k}={v}" for k, v in cookies.items())
+        return self._async_cookie_header
+
+    async def asearch_discussions(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Async variant of search_discussions, on the shared pooled client."""
+        cookie = await self._afetch_cookies()
+        try:
+            headers = {
+                **self._page_headers,
+                "Accept": "application/json, text/plain, */*",
+                "Cookie": cookie,
+            }
+            response = await async_http.get(
+                self.search_url, params=self._search_params(query, limit), timeout=10, headers=headers
+            )
+            return self._parse_search_response(response)
         except Exception as e:
             logger.error(f"Error searching Xueqiu: {e}")
             return []
@@ -196,9 +239,11 @@ class XueqiuTool:
         word_data = []
         summary_parts = []
 
-        for word, weight in keywords:
-            sentiment = "neutral"
-            if finbert_tool:
+        # Score every keyword's context snippets in one batched FinBERT pass
+        sentiments = ["neutral"] * len(keywords)
+        if finbert_tool:
+            groups = []
+            for word, _ in keywords:
                 # Find sentences with this word to get context-specific sentiment
                 context_sentences = []
                 for text in full_content_list:
@@ -208,16 +253,15 @@ class XueqiuTool:
                         start = max(0, idx - 50)
                         end = min(len(text), idx + 50)
                         context_sentences.append({"title": text[start:end]})
+                groups.append(context_sentences[:5])  # Sample up to 5 contexts
 
-                if context_sentences:
-                    analysis = finbert_tool.analyze(
-                        context_sentences[:5]
-                    )  # Sample up to 5 contexts
-                    if analysis.get("score", 50) > 60:
-                        sentiment = "positive"
-                    elif analysis.get("score", 50) < 40:
-                        sentiment = "negative"
+            for i, analysis in enumerate(finbert_tool.analyze_many(groups)):
+                if analysis.get("score", 50) > 60:
+                    sentiments[i] = "positive"
+                elif analysis.get("score", 50) < 40:
+                    sentiments[i] = "negative"
 
+        for (word, weight), sentiment in zip(keywords, sentiments):
             word_data.append(
                 {"text": word, "value": int(weight * 100), "sentiment": sentiment}
             )
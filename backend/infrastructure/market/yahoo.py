@@ -5,10 +5,12 @@ import requests
 import random
 import time
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List, Union
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from backend.infrastructure.market.async_http import async_http
+
 logger = logging.getLogger(__name__)
 
 class YahooFinanceTool:
@@ -216,6 +218,139 @@ class YahooFinanceTool:
             logger.error(f"Yahoo get_macro_history failed: {e}")
             return {"error": str(e)}
 
+    # ========================== Async (chart API) ==========================
+    # Same payloads as the yfinance-based methods above, fetched from Yahoo's chart
+    # endpoint on the shared pooled client so async callers don't need a thread.
+    # Bars are split/dividend adjusted like ticker.history()'s default auto_adjust=True.
+
+    CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+
+    async def _afetch_chart(self, symbol: str, period: str, interval: str = "1d") -> List[Dict[str, Any]]:
+        """Adjusted OHLCV bars for ``period`` (yfinance period syntax), oldest first."""
+        response = await async_http.get(
+            self.CHART_URL.format(symbol=symbol),
+            params={"range": period, "interval": interval, "includeAdjustedClose": "true"},
+        )
+        response.raise_for_status()
+        result = (response.json().get("chart", {}).get("result") or [None])[0]
+        if not result or not result.get("timestamp"):
+            return []
+        quote = result["indicators"]["quote"][0]
+        # Intraday ranges carry no adjclose; those bars stay unadjusted, as in yfinance
+        adjclose = ((result["indicators"].get("adjclose") or [{}])[0]).get("adjclose")
+        # Bars are stamped in UTC; shift to exchange-local dates like yfinance
+        offset = result.get("meta", {}).get("gmtoffset", 0)
+        bars = []
+        for i, ts in enumerate(result["timestamp"]):
+            close = quote["close"][i]
+            if close is None:
+                continue
+            # Same scaling as yfinance's auto_adjust: O/H/L by adjclose/close, close -> adjclose
+            ratio = adjclose[i] / close if adjclose and adjclose[i] is not None and close else 1.0
+            bars.append({
+                "date": datetime.fromtimestamp(ts + offset, tz=timezone.utc).replace(tzinfo=None),
+                "open": quote["open"][i] * ratio,
+                "high": quote["high"][i] * ratio,
+                "low": quote["low"][i] * ratio,
+                "close": close * ratio,
+                "volume": quote["volume"][i] or 0,
+            })
+        return bars
+
+    async def aget_stock_quote(self, symbol: str, market: str) -> Dict[str, Any]:
+        """Async variant of get_stock_quote."""
+        try:
+            bars = await self._afetch_chart(self._convert_symbol(symbol, market), "2d")
+            if not bars: return {"error": "Symbol not found"}
+
+            last = bars[-1]
+            current_price = last["close"]
+            prev_close = bars[-2]["close"] if len(bars) > 1 else current_price # Approx
+            volume = int(last["volume"])
+            volume_display = volume // 100 if market == "A-share" else volume
+
+            change_amount = current_price - prev_close
+            change_percent = (change_amount / prev_close * 100) if prev_close else 0.0
+
+            return {
+                "symbol": symbol,
+                "current_price": round(float(current_price), 2),
+                "open": round(float(last["open"]), 2),
+                "high": round(float(last["high"]), 2),
+                "low": round(float(last["low"]), 2),
+                "prev_close": round(float(prev_close), 2),
+                "change_amount": round(change_amount, 2),
+                "change_percent": round(change_percent, 2),
+                "volume": volume_display,
+                "turnover": round(float(current_price * volume_display), 2),
+                "timestamp": datetime.now().isoformat(),
+                "market": market,
+                "source": "yahoo"
+            }
+        except Exception as e:
+            logger.error(f"Yahoo aget_stock_quote failed for {symbol}: {e}")
+            return {"error": str(e)}
+
+    async def aget_historical_data(self, symbol: str, market: str, period: str = "30d", interval: str = "1d") -> List[Dict[str, Any]]:
+        """Async variant of get_historical_data."""
+        try:
+            bars = await self._afetch_chart(self._convert_symbol(symbol, market), period, interval)
+            return [
+                {
+                    'timestamp': bar["date"].strftime('%Y-%m-%d'),
+                    'open': round(float(bar["open"]), 2),
+                    'high': round(float(bar["high"]), 2),
+                    'low': round(float(bar["low"]), 2),
+                    'close': round(float(bar["close"]), 2),
+                    'volume': int(bar["volume"]) // 100 if market == "A-share" else int(bar["volume"])
+                }
+                for bar in bars
+            ]
+        except Exception as e:
+            logger.error(f"Yahoo aget_historical_data failed: {e}")
+            return []
+
+    async def aget_macro_data(self, indicator: str) -> Dict[str, Any]:
+        """Async variant of get_macro_data."""
+        try:
+             symbol = self.MACRO_SYMBOLS.get(indicator.upper(), indicator)
+             bars = await self._afetch_chart(symbol, "1d")
+             if not bars: return {"error": "No data"}
+
+             latest = bars[-1]
+             return {
+                 "indicator": indicator,
+                 "symbol": symbol,
+                 "value": float(latest["close"]),
+                 "change": float(latest["close"] - latest["open"]),
+                 "date": latest["date"].strftime('%Y-%m-%d')
+             }
+        except Exception as e:
+            logger.error(f"Yahoo aget_macro_data failed: {e}")
+            return {"error": str(e)}
+
+    async def aget_macro_history(self, indicator: str, period: str = "1y") -> Dict[str, Any]:
+        """Async variant of get_macro_history."""
+        try:
+             symbol = self.MACRO_SYMBOLS.get(indicator.upper(), indicator)
+             bars = await self._afetch_chart(symbol, period)
+             if not bars: return {"error": "No data"}
+
+             data = [
+                 {
+                     "date": bar["date"].strftime('%Y-%m-%d'),
+                     "value": float(bar["close"]),
+                     "open": float(bar["open"]),
+                     "high": float(bar["high"]),
+                     "low": float(bar["low"])
+                 }
+                 for bar in bars
+             ]
+             return {"indicator": indicator, "symbol": symbol, "data": data}
+        except Exception as e:
+            logger.error(f"Yahoo aget_macro_history failed: {e}")
+            return {"error": str(e)}
+
     # ========================== Helpers ==========================
 
     def _convert_symbol(self, symbol: str, market: str) -> str:
@@ -0,0 +1,68 @@
+"""
+Throughput benchmark: FinBERT sentiment scoring, one forward pass per text vs
+the shared batched engine (length-bucketed batches, optional int8).
+
+Usage: python -m backend.tests.bench_finbert [texts] [--int8]
+"""
+import random
+import sys
+import time
+
+from backend.infrastructure.analysis.finbert_engine import FinBERTEngine
+
+SUBJECTS = ["Apple", "Tesla", "Kweichow Moutai", "the central bank", "chip makers", "oil prices"]
+EVENTS = [
+    "beats quarterly earnings expectations",
+    "cuts full-year guidance amid weak demand",
+    "announces a share buyback program",
+    "faces a regulatory probe over accounting practices",
+    "reports flat revenue as margins hold steady",
+    "raises dividend after record cash flow, analysts upgrade the stock to buy",
+]
+
+
+def make_texts(n: int):
+    rng = random.Random(0)
+    texts = []
+    for i in range(n):
+        text = f"{rng.choice(SUBJECTS)} {rng.choice(EVENTS)}"
+        # Mix headline-only and headline + summary lengths, all unique
+        if rng.random() < 0.5:
+            text += ". " + " ".join(rng.choice(EVENTS) for _ in range(rng.randint(1, 6)))
+        texts.append(f"{text} (#{i})")
+    return texts
+
+
+def bench(label: str, fn, n: int) -> float:
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<26} {elapsed:8.2f} s  {n / elapsed:10.1f} texts/s")
+    return elapsed
+
+
+def main(n: int = 256, int8: bool = False):
+    texts = make_texts(n)
+
+    single = FinBERTEngine(batch_size=1, cache_size=0)
+    if not single.load():
+        print("FinBERT model unavailable (torch/transformers not installed?)")
+        return
+    batched = FinBERTEngine(batch_size=32, cache_size=0)
+    batched.load()
+
+    print(f"{n} texts")
+    base = bench("per-text forward pass", lambda: [single.score([t]) for t in texts], n)
+    fast = bench("batched, length-bucketed", lambda: batched.score(texts), n)
+    print(f"speedup: x{base / fast:.1f}")
+
+    if int8:
+        quantized = FinBERTEngine(batch_size=32, cache_size=0, quantize=True)
+        quantized.load()
+        q = bench("batched + int8", lambda: quantized.score(texts), n)
+        print(f"speedup: x{base / q:.1f}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(int(args[0]) if args else 256, int8="--int8" in sys.argv)
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark: history DataFrame -> payload conversion, iterrows vs columnar.
+
+Usage: python -m backend.tests.bench_history_conversion [rows]
+"""
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backend.infrastructure.market import frames
+from backend.infrastructure.market.akshare_tool import AkShareTool
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    start = date(2000, 1, 1)
+    rng = np.random.default_rng(0)
+    close = 10 + rng.standard_normal(rows).cumsum() * 0.1
+    return pd.DataFrame({
+        "日期": [start + timedelta(days=i) for i in range(rows)],
+        "开盘": close - 0.05,
+        "收盘": close,
+        "最高": close + 0.1,
+        "最低": close - 0.1,
+        "成交量": rng.integers(1_000, 100_000, rows),
+        "成交额": rng.random(rows) * 1e8,
+        "涨跌幅": rng.standard_normal(rows),
+    })
+
+
+def iterrows_records(tool: AkShareTool, df: pd.DataFrame):
+    res = []
+    for _, row in df.iterrows():
+        res.append({
+            "date": str(row.get('日期', '')),
+            "open": tool._safe_get(row, '开盘'),
+            "close": tool._safe_get(row, '收盘'),
+            "high": tool._safe_get(row, '最高'),
+            "low": tool._safe_get(row, '最低'),
+            "volume": tool._safe_get(row, '成交量'),
+            "turnover": tool._safe_get(row, '成交额'),
+            "pct_change": tool._safe_get(row, '涨跌幅'),
+        })
+    return res
+
+
+def bench(label: str, fn, rows: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<22} {best * 1000:9.1f} ms  {rows / best:14,.0f} rows/s")
+    return best
+
+
+def main(rows: int = 20_000):
+    tool = AkShareTool()
+    df = make_frame(rows)
+    text = {"date": "日期"}
+    print(f"{rows} rows (~{rows // 250} years of daily bars)")
+    base = bench("iterrows + _safe_get", lambda: iterrows_records(tool, df), rows)
+    rec = bench("columnar records", lambda: frames.to_records(df, AkShareTool.HISTORY_FIELDS, text), rows)
+    col = bench("columnar columns", lambda: frames.to_columns(df, AkShareTool.HISTORY_FIELDS, text), rows)
+    print(f"speedup: records x{base / rec:.1f}, columns x{base / col:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,124 @@
+import asyncio
+
+import httpx
+
+from backend.infrastructure.market import fred as fred_module
+from backend.infrastructure.market import yahoo as yahoo_module
+from backend.infrastructure.market.async_http import AsyncHttp
+from backend.infrastructure.market.fred import FredTool
+from backend.infrastructure.market.yahoo import YahooFinanceTool
+
+
+def test_requests_per_host_are_capped():
+    in_flight = {"a.test": 0, "b.test": 0}
+    peak = {"a.test": 0, "b.test": 0}
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, json={})
+
+    http = AsyncHttp(host_limits={"a.test": 2}, transport=httpx.MockTransport(handler))
+
+    async def main():
+        try:
+            await asyncio.gather(
+                *(http.get(f"http://a.test/{i}") for i in range(10)),
+                *(http.get(f"http://b.test/{i}") for i in range(10)),
+            )
+        finally:
+            await http.aclose()
+
+    asyncio.run(main())
+
+    assert peak["a.test"] == 2
+    assert peak["b.test"] > 2  # default limit applies to unlisted hosts
+
+
+def test_fred_async_history_parses_observations(monkeypatch):
+    def handler(request):
+        assert request.url.params["series_id"] == "UNRATE"
+        return httpx.Response(200, json={"observations": [
+            {"date": "2024-01-01", "value": "3.7"},
+            {"date": "2024-02-01", "value": "."},
+            {"date": "2024-03-01", "value": "3.9"},
+        ]})
+
+    http = AsyncHttp(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(fred_module, "async_http", http)
+
+    async def main():
+        try:
+            return await FredTool(api_key="k").aget_macro_history("UNEMPLOYMENT", "1y")
+        finally:
+            await http.aclose()
+
+    result = asyncio.run(main())
+
+    # "." marks a missing observation
+    assert [row["value"] for row in result["data"]] == [3.7, None, 3.9]
+
+
+def test_yahoo_async_quote_from_chart(monkeypatch):
+    def handler(request):
+        assert request.url.path == "/v8/finance/chart/AAPL"
+        return httpx.Response(200, json={"chart": {"result": [{
+            "meta": {"gmtoffset": -14400},
+            "timestamp": [1717000000, 1717086400],
+            "indicators": {"quote": [{
+                "open": [190.0, 191.0], "high": [192.0, 193.0], "low": [189.0, 190.0],
+                "close": [191.0, 192.5], "volume": [1000, 2000],
+            }]},
+        }]}})
+
+    http = AsyncHttp(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(yahoo_module, "async_http", http)
+
+    async def main():
+        try:
+            return await YahooFinanceTool().aget_stock_quote("AAPL", "US")
+        finally:
+            await http.aclose()
+
+    quote = asyncio.run(main())
+
+    assert quote["current_price"] == 192.5
+    assert quote["prev_close"] == 191.0
+    assert quote["volume"] == 2000
+    assert quote["source"] == "yahoo"
+
+
+def test_yahoo_async_history_is_split_adjusted(monkeypatch):
+    def handler(request):
+        assert request.url.params["includeAdjustedClose"] == "true"
+        # 4:1 split between the two bars: the raw chart OHLC jumps, adjclose does not
+        return httpx.Response(200, json={"chart": {"result": [{
+            "meta": {"gmtoffset": 0},
+            "timestamp": [1717000000, 1717086400],
+            "indicators": {
+                "quote": [{
+                    "open": [396.0, 99.0], "high": [404.0, 101.0], "low": [392.0, 98.0],
+                    "close": [400.0, 100.0], "volume": [1000, 4000],
+                }],
+                "adjclose": [{"adjclose": [100.0, 100.0]}],
+            },
+        }]}})
+
+    http = AsyncHttp(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(yahoo_module, "async_http", http)
+
+    async def main():
+        try:
+            return await YahooFinanceTool().aget_historical_data("AAPL", "US", "5d")
+        finally:
+            await http.aclose()
+
+    history = asyncio.run(main())
+
+    assert [(bar["open"], bar["high"], bar["low"], bar["close"]) for bar in history] == [
+        (99.0, 101.0, 98.0, 100.0),
+        (99.0, 101.0, 98.0, 100.0),
+    ]
@@ -0,0 +1,152 @@
+import time
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from backend.domain.services import batch_indicators
+from backend.domain.services.technical_analysis import TechnicalAnalysisTool
+
+
+def _panel(n_sym=40, n_bars=150, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 20 + rng.standard_normal((n_sym, n_bars)).cumsum(axis=1) * 0.5
+    close = np.abs(close) + 1
+    high = close + np.abs(rng.standard_normal((n_sym, n_bars)))
+    low = close - np.abs(rng.standard_normal((n_sym, n_bars))) * 0.5
+    volume = rng.integers(1_000, 100_000, (n_sym, n_bars)).astype(float)
+    return close, high, low, volume
+
+
+def _candles(close, high, low, volume):
+    ok = ~np.isnan(close)
+    return [
+        {"date": f"D{j}", "open": c, "high": h, "low": l, "close": c, "volume": v}
+        for j, (c, h, l, v) in enumerate(zip(close[ok], high[ok], low[ok], volume[ok]))
+    ]
+
+
+@pytest.fixture
+def tool():
+    return TechnicalAnalysisTool()
+
+
+def test_snapshot_matches_per_symbol_calculation(tool):
+    close, high, low, volume = _panel()
+    # Ragged histories: left-pad some rows
+    close[5, :90] = high[5, :90] = low[5, :90] = volume[5, :90] = np.nan
+    close[7, :140] = high[7, :140] = low[7, :140] = volume[7, :140] = np.nan
+
+    frame = tool.calculate_batch_indicators(close, high, low, volume, symbols=[f"S{i}" for i in range(40)])
+    assert list(frame.columns) == batch_indicators.SNAPSHOT_COLUMNS
+    assert frame.loc["S5", "bars"] == 60 and frame.loc["S7", "bars"] == 10
+
+    for i in range(40):
+        candles = _candles(close[i], high[i], low[i], volume[i])
+        ctx = tool.calculate_advanced_indicators(candles)
+        history = tool.calculate_indicators_history(candles)
+        row = frame.loc[f"S{i}"]
+        tech = ctx["technical_indicators"]
+
+        def r(v, nd=2):
+            return round(0 if v != v else v, nd)
+
+        assert r(row["ma5"]) == tech["trend"]["ma_system"]["ma5"]
+        assert r(row["ma60"]) == tech["trend"]["ma_system"]["ma60"]
+        assert r(row["ema26"]) == tech["trend"]["ema_system"]["ema26"]
+        assert row["ma_status"] == tech["trend"]["status"]
+        assert r(row["rsi14"]) == tech["momentum"]["rsi_14"]
+        assert r(row["macd_dif"], 3) == tech["momentum"]["macd"]["dif"]
+        assert r(row["macd_dea"], 3) == tech["momentum"]["macd"]["dea"]
+        assert row["macd_signal"] == tech["momentum"]["macd"]["cross_signal"]
+        assert r(row["boll_upper"]) == tech["volatility"]["boll"]["upper"]
+        assert row["boll_position"] == tech["volatility"]["boll"]["position"]
+        assert r(row["atr14"]) == tech["volatility"]["atr_14"]
+        assert row["obv_slope"] == tech["volume_analysis"]["obv_slope"]
+        assert r(row["vol_ratio"]) == tech["volume_analysis"]["current_vol_vs_ma5"]
+        if len(history) >= 30:
+            assert row["kdj_k"] == pytest.approx(history[-1]["kdj_k"], rel=1e-9)
+            assert row["kdj_j"] == pytest.approx(history[-1]["kdj_j"], rel=1e-9)
+
+
+def test_stack_bars_right_aligns():
+    symbols, arrays = batch_indicators.stack_bars({
+        "A": {"close": [1.0, 2.0, 3.0], "volume": [10, 20, 30]},
+        "B": {"close": [5.0]},
+        "C": {"close": []},
+    }, bars=2)
+    assert symbols == ["A", "B"]
+    np.testing.assert_array_equal(arrays["close"], [[2.0, 3.0], [np.nan, 5.0]])
+    assert np.isnan(arrays["high"]).all()
+
+
+def test_hundreds_of_symbols_in_one_pass(tool):
+    close, high, low, volume = _panel(n_sym=500, n_bars=250)
+    t0 = time.perf_counter()
+    frame = tool.calculate_batch_indicators(close, high, low, volume)
+    elapsed = time.perf_counter() - t0
+    assert len(frame) == 500
+    assert frame["tech_score"].between(0, 100).all()
+    assert elapsed < 2.0
+
+
+def test_sector_details_technical_sort():
+    from backend.app.services.market_service import MarketService
+
+    service = MarketService.__new__(MarketService)
+    service.tools = MagicMock()
+    service.tools.akshare.get_sector_components.return_value = [
+        {"symbol": "000001", "amount": 3}, {"symbol": "000002", "amount": 2}, {"symbol": "000003", "amount": 1},
+    ]
+    service.tools.get_batch_technical_context.return_value = {
+        "000001": {"tech_score": 20.0}, "000002": {"tech_score": 80.0},
+    }
+    result = service.get_sector_details("银行", sort_by="technical", limit=3)
+    assert [s["symbol"] for s in result["stocks"]] == ["000002", "000001", "000003"]
+    assert result["stocks"][2]["technical"] is None
+
+
+def test_sector_details_technical_sort_is_capped():
+    from backend.app.services.market_service import MarketService
+
+    service = MarketService.__new__(MarketService)
+    service.tools = MagicMock()
+    service.tools.akshare.get_sector_components.return_value = [
+        {"symbol": f"{i:06d}", "amount": i} for i in range(200)
+    ]
+    service.tools.get_batch_technical_context.return_value = {}
+    service.get_sector_details("银行", sort_by="technical", limit=5)
+
+    # Only the top constituents by turnover are scored
+    symbols = service.tools.get_batch_technical_context.call_args[0][0]
+    assert len(symbols) == MarketService.TECHNICAL_SORT_CANDIDATES
+    assert symbols[0] == "000199"
+
+
+def _td_loop(close, i):
+    """Reference: the original backwards loop (at most 9 bars) ending at bar i."""
+    counts = []
+    for op in (np.less, np.greater):
+        n = 0
+        for j in range(i, i - 9, -1):
+            if j < 4 or not op(close[j], close[j - 4]):
+                break
+            n += 1
+        counts.append(n)
+    return counts
+
+
+def test_td_setup_counts_match_loop(tool):
+    close, high, low, volume = _panel(n_sym=3, n_bars=200)
+    close[1, 50:80] = close[1, 50]  # flat stretch: neither setup counts
+    buy, sell = batch_indicators.td_setup_counts(close)
+    for i in range(3):
+        for t in range(200):
+            assert [buy[i, t], sell[i, t]] == _td_loop(close[i], t)
+
+    candles = _candles(close[0], high[0], low[0], volume[0])
+    td = tool.calculate_td_sequential(candles)
+    assert td["count"] == (buy[0, -1] or sell[0, -1])
+    history = tool.calculate_indicators_history(candles)
+    assert [r["td_buy_count"] for r in history] == list(buy[0])
+    assert [r["td_sell_count"] for r in history] == list(sell[0])
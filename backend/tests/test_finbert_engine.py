@@ -0,0 +1,59 @@
+from backend.infrastructure.analysis.finbert import FinBERTTool
+from backend.infrastructure.analysis.finbert_engine import FinBERTEngine
+
+
+def _fake_engine(monkeypatch):
+    engine = FinBERTEngine(cache_size=2)
+    inferred = []
+
+    def fake_infer(texts):
+        inferred.append(list(texts))
+        return [{"positive": 0.9, "negative": 0.05, "neutral": 0.05} if "up" in t
+                else {"positive": 0.05, "negative": 0.9, "neutral": 0.05} for t in texts]
+
+    monkeypatch.setattr(engine, "load", lambda: True)
+    monkeypatch.setattr(engine, "_infer", fake_infer)
+    return engine, inferred
+
+
+def test_score_dedupes_and_caches(monkeypatch):
+    engine, inferred = _fake_engine(monkeypatch)
+
+    scores = engine.score(["up", "down", "up"])
+    assert [s["positive"] for s in scores] == [0.9, 0.05, 0.9]
+    assert inferred == [["up", "down"]]
+
+    engine.score(["down", "up again"])
+    assert inferred[-1] == ["up again"]
+    assert engine.stats()["cache_hits"] == 1
+    assert engine.stats()["cached"] == 2
+
+
+def test_analyze_many_scores_all_groups_in_one_call(monkeypatch):
+    engine, inferred = _fake_engine(monkeypatch)
+    tool = FinBERTTool()
+    tool._engine = engine
+
+    results = tool.analyze_many([
+        [{"title": "stocks up"}, {"title": "futures up"}],
+        [],
+        [{"title": "earnings down"}],
+    ])
+
+    assert len(inferred) == 1
+    assert [r["rating"] for r in results] == ["Bullish", "Neutral", "Bearish"]
+    assert results[1]["method"] == "none"
+
+
+def test_sentiment_skill_scores_through_the_shared_engine(monkeypatch):
+    import backend.infrastructure.analysis.finbert_engine as engine_module
+    from skills.sentiment_analysis_tool.services.sentiment import SentimentService
+
+    engine, inferred = _fake_engine(monkeypatch)
+    monkeypatch.setattr(engine_module, "finbert_engine", engine)
+
+    result = SentimentService().analyze([{"title": "stocks up"}, {"title": "earnings down"}, {"title": "bonds up"}])
+
+    assert inferred == [["stocks up", "earnings down", "bonds up"]]
+    assert result["method"] == "finbert"
+    assert result["score"] == 64  # (mean positive 0.617 - mean negative 0.333 + 1) * 50
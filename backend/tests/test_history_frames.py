@@ -0,0 +1,118 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from backend.infrastructure.market import frames
+from backend.infrastructure.market.akshare_tool import AkShareTool
+from backend.infrastructure.market.kline_store import kline_store
+from backend.app.agents.personal_finance.performance_service import fetch_market_history_batch
+
+
+def _hist_df(n=5):
+    start = date(2024, 1, 1)
+    df = pd.DataFrame({
+        "日期": [start + timedelta(days=i) for i in range(n)],
+        "开盘": np.linspace(10, 11, n),
+        "收盘": np.linspace(10.5, 11.5, n),
+        "最高": np.linspace(11, 12, n),
+        "最低": np.linspace(9, 10, n),
+        "成交量": np.arange(n) * 100,
+        "成交额": np.arange(n) * 1000.0,
+    })
+    # Loosely typed upstream cells: NaN and placeholder strings
+    df["涨跌幅"] = pd.Series([1.5, np.nan, "-", "2.5", 0.0][:n], dtype=object)
+    return df
+
+
+def _legacy_records(tool, df):
+    res = []
+    for _, row in df.iterrows():
+        res.append({
+            "date": str(row.get('日期', '')),
+            "open": tool._safe_get(row, '开盘'),
+            "close": tool._safe_get(row, '收盘'),
+            "high": tool._safe_get(row, '最高'),
+            "low": tool._safe_get(row, '最低'),
+            "volume": tool._safe_get(row, '成交量'),
+            "turnover": tool._safe_get(row, '成交额'),
+            "pct_change": tool._safe_get(row, '涨跌幅'),
+        })
+    return res
+
+
+def test_to_records_matches_row_by_row_conversion():
+    tool = AkShareTool()
+    df = _hist_df()
+    fields = dict(AkShareTool.HISTORY_FIELDS, missing="不存在")
+
+    records = frames.to_records(df, fields, text={"date": "日期"})
+    legacy = _legacy_records(tool, df)
+
+    assert [{k: v for k, v in r.items() if k != "missing"} for r in records] == legacy
+    assert all(r["missing"] == 0.0 for r in records)
+    assert type(records[0]["open"]) is float
+    assert records[2]["pct_change"] == 0.0 and records[3]["pct_change"] == 2.5
+
+
+def test_get_history_orients():
+    tool = AkShareTool()
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist.return_value = _hist_df()
+        records = tool.get_history("600036", start_date="20240101", end_date="20240105")
+        columns = tool.get_history("600036", start_date="20240101", end_date="20240105", orient="columns")
+
+    assert len(records) == 5
+    assert records[0]["date"] == "2024-01-01"
+    assert columns["date"] == [r["date"] for r in records]
+    assert columns["close"] == [r["close"] for r in records]
+
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist.side_effect = RuntimeError("down")
+        assert tool.get_history("600036") == []
+        assert tool.get_history("600036", orient="columns")["close"] == []
+
+
+def test_north_flow_sorted_desc():
+    tool = AkShareTool()
+    df = pd.DataFrame({
+        "日期": [date(2024, 1, 1), date(2024, 1, 3), date(2024, 1, 2)],
+        "当日成交净买额": [1.0, np.nan, 3.0],
+        "买入成交额": [10.0, 20.0, 30.0],
+        "卖出成交额": [9.0, 21.0, 27.0],
+    })
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_hsgt_hist_em.return_value = df
+        flow = tool.get_fund_flow("", flow_type="north")
+
+    assert [f["date"] for f in flow] == ["2024-01-03", "2024-01-02", "2024-01-01"]
+    assert flow[0] == {"date": "2024-01-03", "value": 0.0, "buy_amount": 20.0, "sell_amount": 21.0}
+
+
+def test_get_stock_history_records():
+    tool = AkShareTool()
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist.return_value = _hist_df(3)
+        history = tool.get_stock_history("600036", period="3d")
+
+    assert history[0] == {"timestamp": date(2024, 1, 1), "open": 10.0, "high": 11.0,
+                          "low": 9.0, "close": 10.5, "volume": 0.0}
+
+
+def test_fetch_market_history_batch_filters_dates(tmp_path, monkeypatch):
+    monkeypatch.setattr(kline_store, "root", str(tmp_path))
+    kline_store.invalidate()
+    index_df = pd.DataFrame({"date": ["2024-01-01", "2024-01-02", "2024-01-03"], "close": [3000, 3010, 3020]})
+    with patch("backend.app.agents.personal_finance.performance_service.ak") as mock_ak, \
+         patch("backend.infrastructure.market.akshare_tool.ak") as mock_tool_ak:
+        mock_ak.stock_zh_index_daily_em.return_value = index_df
+        mock_tool_ak.stock_zh_a_hist.return_value = _hist_df(2)
+        result = asyncio.run(fetch_market_history_batch(
+            ["2024-01-02", "2024-01-03"], ["000001.SS", "600036"]))
+
+    assert result["2024-01-02"] == {"000001.SS": 3010.0, "600036": 11.5}
+    # 600036 has no bar on 01-03: carried forward
+    assert result["2024-01-03"] == {"000001.SS": 3020.0, "600036": 11.5}
+    kline_store.invalidate()
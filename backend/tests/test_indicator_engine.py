@@ -0,0 +1,135 @@
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from backend.domain.services.indicator_engine import (
+    IndicatorEngine, HISTORY_COLUMNS, KDJ_COLUMNS, TOLERANCE,
+)
+from backend.domain.services.technical_analysis import TechnicalAnalysisTool
+
+
+def _candles(n=300, seed=7, flat_from=None):
+    rng = np.random.default_rng(seed)
+    close = 50 + rng.standard_normal(n).cumsum()
+    if flat_from is not None:
+        close[flat_from:] = close[flat_from]
+    start = date(2023, 1, 2)
+    return [
+        {
+            "date": (start + timedelta(days=i)).isoformat(),
+            "open": float(c - 0.2),
+            "high": float(c + abs(rng.standard_normal()) * (0 if flat_from is not None and i >= flat_from else 1)),
+            "low": float(c - abs(rng.standard_normal()) * (0 if flat_from is not None and i >= flat_from else 1)),
+            "close": float(c),
+            "volume": float(rng.integers(1_000, 50_000)),
+        }
+        for i, c in enumerate(close)
+    ]
+
+
+def assert_rows_match(actual, expected, columns):
+    assert len(actual) == len(expected)
+    for i, (a, e) in enumerate(zip(actual, expected)):
+        for col in columns:
+            av, ev = a[col], e[col]
+            if ev is None or (isinstance(ev, float) and math.isnan(ev)):
+                assert av is None or (isinstance(av, float) and math.isnan(av)), (i, col, av, ev)
+            else:
+                assert av is not None and abs(av - ev) <= TOLERANCE * max(1.0, abs(ev)), (i, col, av, ev)
+
+
+@pytest.fixture
+def tool():
+    return TechnicalAnalysisTool()
+
+
+@pytest.mark.parametrize("flat_from", [None, 200])
+def test_history_matches_batch(tool, flat_from):
+    candles = _candles(flat_from=flat_from)
+    batch = tool.calculate_indicators_history(candles)
+    incremental = tool.calculate_indicators_history(candles, symbol=f"T{flat_from}")
+    assert_rows_match(incremental, batch, HISTORY_COLUMNS + KDJ_COLUMNS)
+    assert incremental[-1]["date"] == candles[-1]["date"]
+
+
+def test_appends_only_process_new_bars(tool):
+    engine = IndicatorEngine()
+    candles = _candles()
+    engine.indicators("600036", candles[:200])
+    for n in range(201, 301):
+        rows = engine.indicators("600036", candles[:n])
+
+    stats = engine.stats()
+    assert stats["rebuilds"] == 1
+    assert stats["appended_bars"] == 100
+
+    batch = tool.calculate_indicators_history(candles)
+    assert_rows_match(rows, batch, HISTORY_COLUMNS + KDJ_COLUMNS)
+
+    engine.indicators("600036", candles)
+    assert engine.stats()["hits"] == 1
+
+
+def test_revised_last_bar_is_replayed(tool):
+    engine = IndicatorEngine()
+    candles = _candles()
+    engine.indicators("600036", candles)
+
+    revised = [dict(c) for c in candles]
+    revised[-1]["close"] += 1.5
+    revised[-1]["high"] += 1.5
+    rows = engine.indicators("600036", revised)
+
+    assert engine.stats()["replayed_bars"] == 1
+    assert engine.stats()["rebuilds"] == 1
+    assert_rows_match(rows, tool.calculate_indicators_history(revised), HISTORY_COLUMNS + KDJ_COLUMNS)
+
+
+def test_returned_rows_are_detached_from_cached_series():
+    engine = IndicatorEngine()
+    candles = _candles()
+    before = engine.indicators("600036", candles)
+    tail = engine.indicators("600036", candles, tail=5)
+    assert len(tail) == 5
+    assert tail[-1]["ma5"] == before[-1]["ma5"]
+
+    # Revising the last bar must not reach into rows a caller already holds
+    revised = [dict(c) for c in candles]
+    revised[-1]["close"] += 1.5
+    revised[-1]["high"] += 1.5
+    engine.indicators("600036", revised)
+    assert len(before) == len(candles)
+    assert before[-1]["ma5"] == tail[-1]["ma5"]
+
+    # ...and callers mutating their copy must not corrupt the cached state
+    before[-1]["ma5"] = -1.0
+    before.clear()
+    assert engine.indicators("600036", revised, tail=1)[0]["ma5"] != -1.0
+    assert engine.stats()["rebuilds"] == 1
+
+
+def test_rebased_history_rebuilds():
+    engine = IndicatorEngine()
+    candles = _candles()
+    engine.indicators("600036", candles[:250])
+    rebased = [{**c, "close": c["close"] * 0.98} for c in candles]
+    engine.indicators("600036", rebased)
+    assert engine.stats()["rebuilds"] == 2
+
+
+def test_advanced_indicators_match_batch(tool):
+    candles = _candles()
+    batch = tool.calculate_advanced_indicators(candles)
+    incremental = tool.calculate_advanced_indicators(candles, symbol="ADV")
+    assert incremental == batch
+    assert tool.calculate_indicators(candles, symbol="ADV") == tool.calculate_indicators(candles)
+
+
+def test_non_finite_input_falls_back_to_batch(tool):
+    candles = _candles(60)
+    candles[10]["close"] = float("nan")
+    rows = tool.calculate_indicators_history(candles, symbol="NAN")
+    assert len(rows) == 60
+    assert rows[10]["close"] is None
@@ -0,0 +1,123 @@
+from datetime import date, datetime, timedelta
+
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from backend.infrastructure.market.akshare_tool import AkShareTool
+from backend.infrastructure.market.kline_store import KlineStore
+
+
+def _bars(start: date, end: date, bump: float = 0.0):
+    # Prices depend on the date only, so overlapping fetches agree unless bumped
+    days = pd.bdate_range(start, end)
+    base = [(d - pd.Timestamp("2024-01-02")).days * 0.1 for d in days]
+    return {
+        "date": [d.strftime("%Y-%m-%d") for d in days],
+        "open": [10.0 + b + bump for b in base],
+        "close": [10.5 + b + bump for b in base],
+        "high": [11.0 + b for b in base],
+        "low": [9.0 + b for b in base],
+        "volume": [100.0] * len(days),
+        "turnover": [1000.0] * len(days),
+        "pct_change": [0.1] * len(days),
+    }
+
+
+class FakeUpstream:
+    def __init__(self, bump: float = 0.0, fail: bool = False):
+        self.calls = []
+        self.bump = bump
+        self.fail = fail
+
+    def __call__(self, start: str, end: str):
+        self.calls.append((start, end))
+        if self.fail:
+            raise ConnectionError("down")
+        return _bars(datetime.strptime(start, "%Y%m%d"), datetime.strptime(end, "%Y%m%d"), self.bump)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return KlineStore(root=str(tmp_path))
+
+
+def test_historical_range_fetched_once_and_persisted(store, tmp_path):
+    up = FakeUpstream()
+    df = store.get_history("600036", up, start_date="20240102", end_date="20240131")
+    assert len(df) == 22
+    assert up.calls == [("20240102", "20240131")]
+
+    # Sub-range is served from memory, then from disk by a fresh store instance
+    assert len(store.get_history("600036", up, start_date="20240110", end_date="20240119")) == 8
+    fresh = KlineStore(root=str(tmp_path))
+    df2 = fresh.get_history("600036", up, start_date="20240102", end_date="20240131")
+    pd.testing.assert_frame_equal(df, df2)
+    assert len(up.calls) == 1
+
+
+def test_only_missing_tail_and_head_are_fetched(store):
+    up = FakeUpstream()
+    store.get_history("600036", up, start_date="20240102", end_date="20240131")
+
+    df = store.get_history("600036", up, start_date="20240102", end_date="20240215")
+    # Tail re-fetch starts at the second-to-last stored bar (2024-01-30)
+    assert up.calls[-1] == ("20240130", "20240215")
+    assert df["date"].iloc[-1] == "2024-02-15"
+    assert df["date"].is_unique
+
+    df = store.get_history("600036", up, start_date="20231215", end_date="20240215")
+    assert up.calls[-1] == ("20231215", "20240102")
+    assert df["date"].iloc[0] == "2023-12-15"
+    assert len(up.calls) == 3
+    assert store.stats()["tail_fetches"] == 1 and store.stats()["head_fetches"] == 1
+
+
+def test_today_tail_rate_limited(store):
+    up = FakeUpstream()
+    start = (datetime.now() - timedelta(days=20)).strftime("%Y%m%d")
+    store.get_history("600036", up, start_date=start)
+    store.get_history("600036", up, start_date=start)
+    assert len(up.calls) == 1
+
+    store.tail_ttl = 0.0
+    store.get_history("600036", up, start_date=start)
+    assert len(up.calls) == 2
+
+
+def test_rebased_adjusted_series_refetched(store):
+    store.get_history("600036", FakeUpstream(), start_date="20240102", end_date="20240131")
+
+    # Ex-dividend: upstream qfq prices of the overlap bar moved
+    shifted = FakeUpstream(bump=-0.3)
+    df = store.get_history("600036", shifted, start_date="20240102", end_date="20240215")
+    assert shifted.calls == [("20240130", "20240215"), ("20240102", "20240215")]
+    assert df["close"].iloc[0] == pytest.approx(10.2)
+    assert store.stats()["rebased"] == 1
+
+
+def test_upstream_failure_does_not_mark_coverage(store):
+    store.get_history("600036", FakeUpstream(), start_date="20240102", end_date="20240131")
+    down = FakeUpstream(fail=True)
+    df = store.get_history("600036", down, start_date="20231201", end_date="20240131")
+    assert df["date"].iloc[0] == "2024-01-02"
+
+    up = FakeUpstream()
+    df = store.get_history("600036", up, start_date="20231201", end_date="20240131")
+    assert up.calls == [("20231201", "20240102")]
+    assert df["date"].iloc[0] == "2023-12-01"
+
+
+def test_us_history_outage_is_not_recorded_as_empty(store):
+    tool = AkShareTool()
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak, \
+         patch("backend.infrastructure.market.akshare_tool.kline_store", store):
+        mock_ak.stock_us_daily.side_effect = ConnectionError("down")
+        with pytest.raises(ConnectionError):
+            tool._fetch_history_frame("AAPL", "daily", "20240102", "20240131", "qfq")
+
+        # The failed range stays uncovered, so the next request retries upstream
+        assert tool.get_stored_history("AAPL", start_date="20240102", end_date="20240131") == []
+        assert tool.get_stored_history("AAPL", start_date="20240102", end_date="20240131") == []
+        assert mock_ak.stock_us_daily.call_count == 3
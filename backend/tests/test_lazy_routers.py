@@ -0,0 +1,57 @@
+import types
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from backend.entrypoints.api.startup import ROUTERS, LazyRouterMiddleware, LazyRouters
+
+
+def _fake_router_module(prefix):
+    router = APIRouter(prefix=prefix)
+
+    @router.get("/ping")
+    def ping():
+        return {"router": prefix}
+
+    return types.SimpleNamespace(router=router)
+
+
+def test_router_is_imported_on_first_matching_request(monkeypatch):
+    app = FastAPI()
+    routers = LazyRouters(app, [("market", ["/api/market"]), ("agent_market", ["/api/agent/market"])])
+    imported = []
+    modules = {"market": _fake_router_module("/api/market"),
+               "agent_market": _fake_router_module("/api/agent/market")}
+
+    def fake_import(name):
+        imported.append(name)
+        return modules[name]
+
+    monkeypatch.setattr(routers, "_import", fake_import)
+    app.add_middleware(LazyRouterMiddleware, routers=routers)
+    client = TestClient(app)
+
+    assert imported == []
+    assert client.get("/api/market/ping").json() == {"router": "/api/market"}
+    assert client.get("/api/market/ping").status_code == 200
+    assert imported == ["market"]
+
+    assert client.get("/api/marketing").status_code == 404
+    assert imported == ["market"]
+
+    client.get("/openapi.json")
+    assert imported == ["market", "agent_market"]
+
+
+def test_every_router_route_maps_to_its_module():
+    # Only the router modules are imported: the server module's import-time setup
+    # (logging, environment, create_db_and_tables) stays out of the test run
+    routers = LazyRouters(FastAPI(), ROUTERS)
+    unmapped = []
+    for module_name, _ in ROUTERS:
+        module = routers._import(module_name)
+        for route in module.router.routes:
+            if module_name not in routers.pending(route.path):
+                unmapped.append((module_name, route.path))
+
+    assert unmapped == []
@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+from backend.app.agents.personal_finance.market_context import MarketContextService
+
+
+class FakeAkShare:
+    """Stands in for AkShareTool; every call sleeps to expose serial fetching."""
+
+    def __init__(self, delay=0.05, slow=None):
+        self.delay = delay
+        self.slow = slow or {}
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name, value):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        time.sleep(self.slow.get(name, self.delay))
+        return value
+
+    def get_market_turnover(self, market, start_date):
+        return self._call("turnover", [{"date": "d1", "turnover": 1.2e12}, {"date": "d0", "turnover": 1.0e12}])
+
+    def get_fund_flow(self, target, flow_type):
+        return self._call(f"flow_{flow_type}", [{"value": 1.5}])
+
+    def get_indices_quote(self, market):
+        items = {
+            "CN": [{"symbol": "399001", "name": "深证成指"}, {"symbol": "000001", "name": "上证指数"}, {"symbol": "999999"}],
+            "HK": [{"symbol": "HSI", "name": "恒生指数"}],
+            "US": [{"symbol": ".DJI", "name": "道琼斯"}],
+        }[market]
+        return self._call(f"indices_{market}", items)
+
+    def get_indices_history(self, market, days):
+        return self._call(f"history_{market}", {market: [{"date": "d1", "close": 1.0, "change_pct": 0.1}]})
+
+    def get_board_info(self, board_type, info_type):
+        return self._call(f"board_{board_type}", [{"name": f"{board_type}{i}"} for i in range(8)])
+
+    def get_macro(self, indicator):
+        return self._call(f"macro_{indicator}", {"value": 1})
+
+    def get_economic_calendar(self, date):
+        return self._call("calendar", [{"event": f"e{i}", "importance": i} for i in range(8)])
+
+    def get_headline_news(self, limit):
+        return self._call("news", [{"title": "headline"}])
+
+
+def test_sections_are_fetched_concurrently():
+    tool = FakeAkShare(delay=0.2)
+    service = MarketContextService(tool=tool)
+
+    started = time.perf_counter()
+    context = asyncio.run(service.get_context(as_markdown=True))
+    elapsed = time.perf_counter() - started
+
+    # 20 upstream calls of 0.2s each would take 4s serially
+    assert elapsed < 2.0
+    assert [i["symbol"] for i in context["indices"]["A_Share"]] == ["000001", "399001"]
+    assert len(context["sectors"]) == 5
+    assert len(context["calendar"]) == 12
+    assert context["calendar"][0]["importance"] == 7
+    assert set(context["macro"]) == {"GDP", "CPI", "LPR", "PPI"}
+    assert context["errors"] == []
+    assert "## 指数概览" in context["markdown"]
+
+
+def test_slow_section_times_out_without_blocking_the_rest():
+    tool = FakeAkShare(delay=0.0, slow={"news": 1.0})
+    service = MarketContextService(tool=tool, timeouts={"news": 0.1})
+
+    context = asyncio.run(service.get_context())
+
+    assert context["news"] == []
+    assert context["errors"] == ["News error: timed out after 0.1s"]
+    assert context["indices"]["HK"][0]["symbol"] == "HSI"
+
+
+def test_concurrent_callers_share_one_snapshot():
+    tool = FakeAkShare(delay=0.05)
+    service = MarketContextService(tool=tool)
+
+    async def main():
+        return await asyncio.gather(*(service.get_context(as_markdown=True) for _ in range(5)))
+
+    results = asyncio.run(main())
+    again = asyncio.run(service.get_context(as_markdown=True))
+
+    assert tool.calls["news"] == 1
+    assert tool.calls["macro_GDP"] == 1
+    assert len({r["markdown"] for r in results + [again]}) == 1
+
+
+def test_expired_snapshot_reuses_fresh_sections():
+    tool = FakeAkShare(delay=0.0)
+    service = MarketContextService(tool=tool, ttls={"indices": 0.0}, snapshot_ttl=0.0)
+
+    asyncio.run(service.get_context())
+    asyncio.run(service.get_context())
+
+    assert tool.calls["indices_CN"] == 2  # expired section refetched
+    assert tool.calls["macro_CPI"] == 1  # still fresh, served from cache
+
+
+def test_section_timeout_starts_when_the_loader_runs(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from backend.app.agents.personal_finance import market_context
+
+    # Two workers for 18 sections of 0.05s each: most sections wait in the queue for
+    # longer than their 0.1s timeout, but none runs for longer than that
+    monkeypatch.setattr(market_context, "_section_pool", ThreadPoolExecutor(max_workers=2))
+    tool = FakeAkShare(delay=0.05)
+    namespaces = ["turnover", "fund_flow", "indices", "indices_history", "boards", "macro", "calendar", "news"]
+    service = MarketContextService(tool=tool, timeouts={namespace: 0.1 for namespace in namespaces})
+
+    started = time.perf_counter()
+    context = asyncio.run(service.get_context())
+
+    assert context["errors"] == []
+    assert time.perf_counter() - started >= 0.4
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import httpx
+
+from backend.infrastructure.adk.core import memory_client
+from backend.infrastructure.adk.core.memory_client import ContextCache, MemoryClient
+
+
+def _run_with_transport(handler, coro_factory):
+    async def main():
+        loop = asyncio.get_running_loop()
+        memory_client._async_clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            return await coro_factory()
+        finally:
+            await memory_client.aclose_clients()
+
+    return asyncio.run(main())
+
+
+def test_turn_is_saved_in_one_batch_request():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"status": "success", "memory_ids": ["a", "b"], "stored_in": []})
+
+    client = MemoryClient(agent_id="test_agent", user_id="u1")
+    saved = _run_with_transport(handler, lambda: client.aadd_memories([
+        {"content": "hi", "role": "user"},
+        {"content": "hello", "role": "agent", "metadata": {"source": "test"}},
+    ]))
+
+    assert saved
+    assert len(requests) == 1
+    assert requests[0].url.path == "/api/v1/memory/add_batch"
+    body = json.loads(requests[0].content)
+    assert [item["metadata"]["role"] for item in body["items"]] == ["user", "agent"]
+    assert body["items"][1]["metadata"]["source"] == "test"
+
+
+def test_context_is_cached_until_new_memory_is_added(monkeypatch):
+    monkeypatch.setattr(memory_client, "context_cache", ContextCache(ttl=60))
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path.endswith("/context"):
+            return httpx.Response(200, json={"status": "success", "context": {"core_principles": "p"}})
+        return httpx.Response(200, json={"status": "success"})
+
+    client = MemoryClient(agent_id="test_agent", user_id="u1")
+
+    async def scenario():
+        first = await client.aget_context("query")
+        second = await client.aget_context("query")
+        await client.aadd_memory("new fact")
+        third = await client.aget_context("query")
+        return first, second, third
+
+    first, second, third = _run_with_transport(handler, scenario)
+
+    assert first == second == third == {"core_principles": "p"}
+    assert calls.count("/api/v1/memory/context") == 2
+
+
+def test_context_cache_expires():
+    cache = ContextCache(ttl=0.0)
+    key = ContextCache.key("u", "a", "q")
+    cache.set(key, {"x": 1})
+    assert cache.get(key) is None
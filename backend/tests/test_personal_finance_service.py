@@ -30,3 +30,32 @@ async def test_update_prices_mock_logic():
         assert "000001" in result.prices
         assert result.prices["000001"].price == 1.5
         assert "Unknown" not in result.prices
+
+
+@pytest.mark.asyncio
+async def test_cn_fund_codes_are_not_priced_as_stocks():
+    snapshot_calls = []
+
+    def get_quotes(symbols, max_age=None, market=None):
+        snapshot_calls.append((list(symbols), market))
+        rows = {
+            None: {"000001": {"current_price": 11.1, "change_percent": 0.9, "market": "A-share"}},
+            "CN-ETF": {"510300": {"current_price": 3.9, "change_percent": 1.0, "market": "CN-ETF"}},
+        }[market]
+        return {s: rows[s] for s in symbols if s in rows}
+
+    with patch("backend.app.services.personal_finance_service.spot_snapshot_engine") as engine, \
+         patch("backend.app.services.personal_finance_service.ak_tool") as ak_tool:
+        engine.get_quotes.side_effect = get_quotes
+        ak_tool.get_fund_nav.return_value = {"current_price": 1.5, "change_percent": 0.1}
+
+        result = await update_prices([
+            AssetItem(symbol="000001", type="Fund", market="CN", quantity=100),
+            AssetItem(symbol="510300", type="Fund", market="CN", quantity=100),
+        ])
+
+    # Open-end fund 000001 goes to the NAV path, not to the 平安银行 stock row
+    assert result.prices["000001"].price == 1.5
+    assert result.prices["510300"].price == 3.9
+    ak_tool.get_fund_nav.assert_called_once_with(symbol="000001")
+    assert (["000001", "510300"], "CN-ETF") in snapshot_calls
@@ -0,0 +1,264 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from backend.infrastructure.market.quote_cache import QuoteCache, has_values, is_cacheable, quote_cache
+from backend.infrastructure.market.akshare_tool import AkShareTool
+
+
+def test_ttl_hit_and_expiry():
+    cache = QuoteCache(ttls={"price": 0.05})
+    calls = []
+    loader = lambda: calls.append(1) or {"price": 1.0}
+
+    assert cache.get_or_load("price", "600036", loader) == {"price": 1.0}
+    assert cache.get_or_load("price", "600036", loader) == {"price": 1.0}
+    assert len(calls) == 1
+
+    time.sleep(0.06)
+    cache.get_or_load("price", "600036", loader)
+    assert len(calls) == 2
+
+    stats = cache.stats()["price"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_single_flight_coalesces_concurrent_loads():
+    cache = QuoteCache()
+    calls = []
+    release = threading.Event()
+
+    def slow_loader():
+        calls.append(1)
+        release.wait(1)
+        return {"price": 10.0}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("price", "000001", slow_loader)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"price": 10.0}] * 8
+    stats = cache.stats()["price"]
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 7
+
+
+def test_errors_are_not_cached():
+    cache = QuoteCache()
+    assert not is_cacheable({"error": "boom"})
+    assert not is_cacheable({})
+
+    cache.get_or_load("price", "AAPL", lambda: {"error": "boom"}, cache_if=is_cacheable)
+    assert cache.stats()["price"]["size"] == 0
+
+    with pytest.raises(ValueError):
+        cache.get_or_load("price", "AAPL", lambda: (_ for _ in ()).throw(ValueError("down")))
+    assert cache.stats()["price"]["size"] == 0
+
+
+def _min_df():
+    return pd.DataFrame([{"时间": "2024-01-02 15:00:00", "开盘": 10.0, "收盘": 10.5}])
+
+
+def _daily_df():
+    return pd.DataFrame([{
+        "日期": "2024-01-02", "开盘": 10.0, "最高": 10.8, "最低": 9.9, "收盘": 10.5,
+        "成交量": 1000.0, "成交额": 10500.0, "换手率": 1.2, "涨跌幅": 5.0, "涨跌额": 0.5,
+    }])
+
+
+def _info_df():
+    return pd.DataFrame({"item": ["总市值", "流通市值"], "value": [1e10, 8e9]})
+
+
+def _fin_df():
+    return pd.DataFrame({"指标": ["基本每股收益", "每股净资产"], "20231231": [1.0, 5.0]})
+
+
+def test_get_stock_quote_reuses_fundamentals_leg():
+    quote_cache.invalidate()
+    tool = AkShareTool()
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist_min_em.return_value = _min_df()
+        mock_ak.stock_zh_a_hist.return_value = _daily_df()
+        mock_ak.stock_individual_info_em.return_value = _info_df()
+        mock_ak.stock_financial_abstract.return_value = _fin_df()
+
+        first = tool.get_stock_quote("600036")
+        quote_cache.invalidate("price")
+        second = tool.get_stock_quote("600036")
+
+    assert first["current_price"] == 10.5
+    assert first["prev_close"] == 10.0
+    assert first["pe"] == 10.5
+    assert first["pb"] == 2.1
+    assert first["market_cap"] == 1e10
+    assert {k: v for k, v in second.items() if k != "meta"} == {k: v for k, v in first.items() if k != "meta"}
+    # Price leg refetched, fundamentals served from cache
+    assert mock_ak.stock_zh_a_hist_min_em.call_count == 2
+    assert mock_ak.stock_individual_info_em.call_count == 1
+    assert mock_ak.stock_financial_abstract.call_count == 1
+    quote_cache.invalidate()
+
+
+def test_empty_fundamentals_are_not_cached():
+    assert not has_values({"market_cap": None, "circulating_market_cap": None})
+    assert has_values({"eps_ttm": 1.0, "bps": None})
+
+    quote_cache.invalidate()
+    tool = AkShareTool()
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist_min_em.return_value = _min_df()
+        mock_ak.stock_zh_a_hist.return_value = _daily_df()
+        mock_ak.stock_individual_info_em.return_value = pd.DataFrame()
+        mock_ak.stock_financial_abstract.return_value = pd.DataFrame()
+
+        first = tool.get_stock_quote("600036")
+        mock_ak.stock_individual_info_em.return_value = _info_df()
+        mock_ak.stock_financial_abstract.return_value = _fin_df()
+        second = tool.get_stock_quote("600036")
+
+    assert first["market_cap"] is None
+    # The blank fundamentals were not cached, so the next quote refetches them
+    assert second["market_cap"] == 1e10
+    assert second["pe"] == 10.5
+    quote_cache.invalidate()
+
+
+def test_get_stock_quote_concurrent_legs_degrade_on_timeout():
+    quote_cache.invalidate()
+    tool = AkShareTool()
+    tool.QUOTE_LEG_TIMEOUTS = {"minute": 1.0, "daily": 1.0, "info": 0.05, "financial": 1.0}
+
+    def slow_info(symbol, timeout=None):
+        time.sleep(0.3)
+        return _info_df()
+
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist_min_em.return_value = _min_df()
+        mock_ak.stock_zh_a_hist.return_value = _daily_df()
+        mock_ak.stock_individual_info_em.side_effect = slow_info
+        mock_ak.stock_financial_abstract.return_value = _fin_df()
+
+        quote = tool.get_stock_quote("600036")
+        time.sleep(0.35)  # let the timed-out leg finish while ak is still patched
+
+    assert quote["current_price"] == 10.5
+    assert quote["pe"] == 10.5
+    assert quote["market_cap"] is None
+    assert quote["meta"]["partial"] is True
+    assert quote["meta"]["missing_legs"] == ["info"]
+    assert quote["meta"]["legs"]["info"]["status"] == "timeout"
+    assert set(quote["meta"]["legs"]) == {"minute", "daily", "info", "financial"}
+    # The timed-out leg still completed in the background and warmed the cache
+    assert quote_cache.stats()["fundamentals"]["size"] == 2
+    quote_cache.invalidate()
+
+
+def test_get_stock_quote_sequential_mode():
+    quote_cache.invalidate()
+    tool = AkShareTool(concurrent_quotes=False)
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist_min_em.return_value = _min_df()
+        mock_ak.stock_zh_a_hist.return_value = _daily_df()
+        mock_ak.stock_individual_info_em.side_effect = RuntimeError("down")
+        mock_ak.stock_financial_abstract.return_value = _fin_df()
+
+        quote = tool.get_stock_quote("600036")
+
+    assert quote["meta"]["mode"] == "sequential"
+    assert quote["meta"]["legs"]["info"]["status"] == "error"
+    assert quote["pb"] == 2.1
+    quote_cache.invalidate()
+
+
+def test_single_flight_followers_give_up_after_wait_timeout():
+    cache = QuoteCache()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: cache.get_or_load("price", "000001", lambda: release.wait(2) and {"price": 1.0}))
+    leader.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        cache.get_or_load("price", "000001", lambda: {"price": 2.0}, wait_timeout=0.05)
+    assert time.monotonic() - started < 1.0
+    assert cache.stats()["price"]["wait_timeouts"] == 1
+
+    release.set()
+    leader.join()
+    assert cache.get_or_load("price", "000001", lambda: {"price": 3.0}) == {"price": 1.0}
+
+
+def test_quote_legs_pass_their_deadline_to_akshare():
+    import requests
+
+    quote_cache.invalidate()
+    tool = AkShareTool()
+    tool.QUOTE_LEG_TIMEOUTS = {"minute": 1.5, "daily": 0.7, "info": 0.5, "financial": 1.0}
+    original_request = requests.Session.request
+    with patch("backend.infrastructure.market.akshare_tool.ak") as mock_ak:
+        mock_ak.stock_zh_a_hist_min_em.return_value = _min_df()
+        mock_ak.stock_zh_a_hist.return_value = _daily_df()
+        mock_ak.stock_individual_info_em.return_value = _info_df()
+        mock_ak.stock_financial_abstract.return_value = _fin_df()
+
+        quote = tool.get_stock_quote("600036")
+
+    assert quote["meta"]["partial"] is False
+    assert mock_ak.stock_zh_a_hist.call_args.kwargs["timeout"] == 0.7
+    assert mock_ak.stock_individual_info_em.call_args.kwargs["timeout"] == 0.5
+    # Running legs leaves the process-wide requests session alone
+    assert requests.Session.request is original_request
+    quote_cache.invalidate()
+
+
+def test_leg_deadline_starts_when_the_leg_runs():
+    from concurrent.futures import ThreadPoolExecutor
+    from backend.infrastructure.market import akshare_tool
+
+    tool = AkShareTool()
+    tool.QUOTE_LEG_TIMEOUTS = {"first": 0.2, "second": 0.2}
+    # One pool thread: "second" queues behind "first" for ~0.15s, then needs 0.1s itself
+    with patch.object(akshare_tool, "_quote_pool", ThreadPoolExecutor(max_workers=1)):
+        results, meta = tool._run_quote_legs({
+            "first": lambda: time.sleep(0.15) or 1,
+            "second": lambda: time.sleep(0.1) or 2,
+        })
+
+    assert results == {"first": 1, "second": 2}
+
+
+def test_legs_still_queued_after_the_queue_timeout_are_dropped():
+    from concurrent.futures import ThreadPoolExecutor
+    from backend.infrastructure.market import akshare_tool
+
+    tool = AkShareTool()
+    tool.QUOTE_QUEUE_TIMEOUT = 0.05
+    tool.QUOTE_LEG_TIMEOUTS = {"busy": 0.05, "queued": 1.0}
+    ran = []
+    with patch.object(akshare_tool, "_quote_pool", ThreadPoolExecutor(max_workers=1)):
+        results, meta = tool._run_quote_legs({
+            "busy": lambda: time.sleep(0.2) or 1,
+            "queued": lambda: ran.append(1) or 2,
+        })
+        time.sleep(0.25)
+
+    assert results == {}
+    assert meta["busy"]["status"] == "timeout" and "queued" not in meta["busy"]
+    assert meta["queued"]["status"] == "timeout" and meta["queued"]["queued"] is True
+    # Cancelled before it started: it never takes a pool thread
+    assert ran == []
@@ -0,0 +1,22 @@
+from unittest.mock import patch
+
+from backend.app import registry
+from backend.app.registry import Tools
+
+
+def test_tools_is_shared_and_sub_tools_are_lazy():
+    tools = Tools()
+    assert Tools() is tools
+
+    with patch.object(registry, "DuckDuckGoTool") as factory:
+        tools.__dict__.pop("ddg", None)
+        first = tools.ddg
+        assert tools.ddg is first
+        assert factory.call_count == 1
+    tools.__dict__.pop("ddg", None)
+
+
+def test_explicit_keys_create_separate_instance():
+    tools = Tools(tavily_api_key="test-key")
+    assert tools is not Tools()
+    assert tools._api_key("tavily") == "test-key"
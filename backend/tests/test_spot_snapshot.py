@@ -0,0 +1,113 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.infrastructure.market.spot_snapshot import SpotSnapshotEngine
+
+
+def _stock_spot():
+    return pd.DataFrame({
+        "代码": ["600036", "000001", "600000"],
+        "名称": ["招商银行", "平安银行", "浦发银行"],
+        "最新价": [35.2, 11.1, np.nan],
+        "今开": [35.0, 11.0, np.nan],
+        "最高": [35.5, 11.3, np.nan],
+        "最低": [34.9, 10.9, np.nan],
+        "昨收": [34.8, 11.0, 8.0],
+        "涨跌额": [0.4, 0.1, np.nan],
+        "涨跌幅": [1.15, 0.91, np.nan],
+        "成交量": [1000, 2000, 0],
+        "成交额": [35200.0, 22200.0, 0.0],
+        "换手率": [0.5, 0.8, 0.0],
+        "市盈率-动态": [6.5, "-", 5.0],
+        "市净率": [0.9, 0.6, 0.5],
+        "总市值": [8.8e11, 2.1e11, 2.3e11],
+        "流通市值": [7.2e11, 2.1e11, 2.3e11],
+    })
+
+
+def _etf_spot():
+    return pd.DataFrame({
+        "代码": ["510300"],
+        "名称": ["沪深300ETF"],
+        "最新价": [3.9],
+        "开盘价": [3.88],
+        "最高价": [3.92],
+        "最低价": [3.87],
+        "昨收": [3.86],
+        "涨跌幅": [1.04],
+    })
+
+
+def test_batch_lookup_shapes_quotes():
+    engine = SpotSnapshotEngine(loaders={"A-share": _stock_spot, "CN-ETF": _etf_spot})
+    quotes = engine.get_quotes(["600036", "000001", "600000", "510300", "999999"])
+
+    # Suspended (NaN price) and unknown symbols are left to per-symbol fallbacks
+    assert set(quotes) == {"600036", "000001", "510300"}
+
+    q = quotes["600036"]
+    assert q["current_price"] == q["price"] == 35.2
+    assert q["prev_close"] == 34.8
+    assert q["market"] == "A-share"
+    assert q["pe"] == 6.5
+    assert quotes["000001"]["pe"] is None  # "-" coerced to NaN -> None
+
+    etf = quotes["510300"]
+    assert etf["market"] == "CN-ETF"
+    assert etf["open"] == 3.88
+    assert etf["pb"] is None
+
+
+def test_fund_lookup_only_matches_etf_rows():
+    def etf_spot():
+        df = _etf_spot()
+        return pd.concat([df, df.assign(代码="600036", 名称="某ETF", 最新价=1.23)], ignore_index=True)
+
+    engine = SpotSnapshotEngine(loaders={"A-share": _stock_spot, "CN-ETF": etf_spot})
+
+    # 000001 is a stock (平安银行) in the snapshot, never an ETF
+    assert engine.get_quotes(["000001", "510300"], market="CN-ETF").keys() == {"510300"}
+    assert engine.get_quote("600036", market="CN-ETF")["current_price"] == 1.23
+    assert engine.get_quote("600036")["market"] == "A-share"
+
+
+def test_pulls_are_deduplicated_across_callers():
+    calls = []
+
+    def slow_spot():
+        calls.append(1)
+        time.sleep(0.1)
+        return _stock_spot()
+
+    engine = SpotSnapshotEngine(max_age=60, loaders={"A-share": slow_spot})
+    threads = [threading.Thread(target=engine.get_quotes, args=(["600036"],)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    engine.get_quote("000001")
+    assert len(calls) == 1
+    stats = engine.stats()
+    assert stats["pulls"] == 1
+    assert stats["symbols"] == 3
+
+
+def test_stale_snapshot_served_when_refresh_fails():
+    state = {"fail": False}
+
+    def flaky_spot():
+        if state["fail"]:
+            raise ConnectionError("upstream down")
+        return _stock_spot()
+
+    engine = SpotSnapshotEngine(max_age=0.0, stale_limit=60, loaders={"A-share": flaky_spot})
+    assert "600036" in engine.get_quotes(["600036"])
+
+    state["fail"] = True
+    assert engine.get_quote("600036")["current_price"] == 35.2
+    assert engine.stats()["stale_served"] == 1
@@ -21,5 +21,7 @@ export interface StockData {
     kdj_k?: number;
     kdj_d?: number;
     kdj_j?: number;
+    td_buy_count?: number;
+    td_sell_count?: number;
     [key: string]: number | string | undefined | null | object;
 }
@@ -5,6 +5,8 @@ from datetime import datetime
 from .schemas import (
     AddMemoryRequest,
     AddMemoryResponse,
+    AddMemoryBatchRequest,
+    AddMemoryBatchResponse,
     RetrieveMemoryRequest,
     RetrieveMemoryResponse,
     GetContextRequest,
@@ -60,6 +62,25 @@ async def add_memory(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/memory/add_batch", response_model=AddMemoryBatchResponse)
+async def add_memory_batch(request: AddMemoryBatchRequest):
+    """批量添加记忆 (按顺序写入 Working Memory，一次请求完成一轮对话的保存)"""
+    try:
+        logger.info(
+            f"💾 Adding {len(request.items)} memories for user: {request.user_id}, agent: {request.agent_id}"
+        )
+        result = await asyncio.to_thread(
+            manager.add_memories,
+            user_id=request.user_id,
+            agent_id=request.agent_id,
+            items=[item.model_dump() for item in request.items],
+        )
+        return AddMemoryBatchResponse(**result)
+    except Exception as e:
+        logger.error(f"Error adding memory batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/memory/context", response_model=GetContextResponse)
 async def get_context(request: GetContextRequest):
     """获取完整上下文"""
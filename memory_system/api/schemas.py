@@ -84,6 +84,21 @@ class AddMemoryRequest(BaseModel):
         }
 
 
+class MemoryBatchItem(BaseModel):
+    """批量添加中的单条记忆"""
+
+    content: Any = Field(..., description="记忆内容")
+    metadata: Optional[Dict] = Field(default_factory=dict, description="元数据")
+
+
+class AddMemoryBatchRequest(BaseModel):
+    """批量添加记忆请求 (一轮对话的多条消息一次提交)"""
+
+    user_id: str = Field(..., description="User ID")
+    agent_id: str = Field(..., description="Agent ID")
+    items: List[MemoryBatchItem] = Field(..., min_length=1, description="按时间顺序排列的记忆")
+
+
 class RetrieveMemoryRequest(BaseModel):
     """检索记忆请求"""
 
@@ -166,6 +181,15 @@ class AddMemoryResponse(BaseModel):
     message: Optional[str] = None
 
 
+class AddMemoryBatchResponse(BaseModel):
+    """批量添加记忆响应"""
+
+    status: Literal["success", "error"]
+    memory_ids: List[str]
+    stored_in: List[str] = Field(..., description="存储位置列表")
+    message: Optional[str] = None
+
+
 class MemoryItem(BaseModel):
     """记忆项"""
 
@@ -255,6 +279,12 @@ class MemoryStats(BaseModel):
     working_memory: Dict = Field(..., description="近期记忆统计")
     episodic_memory: Dict = Field(..., description="中期记忆统计")
     semantic_memory: Dict = Field(..., description="长期记忆统计")
+    embedding_cache: Optional[Dict] = Field(None, description="Embedding 缓存与微批统计")
+    token_cache: Optional[Dict] = Field(None, description="Token 计数缓存统计")
+    vector_store: Optional[Dict] = Field(None, description="ChromaDB 客户端与集合句柄统计")
+    instances: Optional[Dict] = Field(None, description="常驻记忆实例与淘汰统计")
+    gc: Optional[Dict] = Field(None, description="GC 回收统计 (向量数与字节数)")
+    tasks: Optional[Dict] = Field(None, description="后台任务队列深度、状态与各阶段耗时")
 
 
 class GetStatsResponse(BaseModel):
@@ -2,8 +2,10 @@ import uvicorn
 import time
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .routes import router
+import asyncio
+from .routes import router, manager
 from config import settings
+from storage.vector_store import chroma_registry
 from utils.logger import logger
 
 def create_app() -> FastAPI:
@@ -48,10 +50,15 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def startup_event():
         logger.info("Memory System starting up...")
+        # 启动后台 Worker，供批量压缩 / 会话结算使用
+        manager._ensure_worker_started()
         
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Memory System shutting down...")
+        await asyncio.to_thread(manager.flush_compression_buffers)
+        await asyncio.to_thread(manager.flush_instances)
+        chroma_registry.close()
         
     return app
 
@@ -24,19 +24,45 @@ class Settings(BaseSettings):
     # === 存储配置 ===
     CHROMA_PERSIST_DIR: Path | None = None
     SQLITE_DB_PATH: str | None = None
+    CHROMA_COLLECTION_IDLE_SECONDS: int = 1800  # 集合句柄空闲多久后释放
+    CHROMA_MAX_OPEN_COLLECTIONS: int = 256
+    GRAPH_FLUSH_INTERVAL: float = 2.0  # 图谱边日志的防抖落盘间隔 (秒)
+    GRAPH_COMPACT_OPS: int = 500  # 边日志累计多少条后合成新快照
     
     # === 记忆参数 ===
+    # 常驻内存的 user:agent 记忆实例上限与空闲淘汰时间 (秒)
+    MEMORY_INSTANCE_CAPACITY: int = 256
+    MEMORY_INSTANCE_IDLE_TTL: int = 3600
+    # 后台结算 Worker 数 (不同用户并行，同一用户串行) 与任务状态保留条数
+    MEMORY_WORKER_CONCURRENCY: int = 4
+    TASK_STATE_MAX_ENTRIES: int = 1000
     # 近期记忆
     WORKING_MEMORY_MAX_ITEMS: int = 50
     WORKING_MEMORY_MAX_TOKENS: int = 80000
+    WORKING_MEMORY_JOURNAL_COMPACT_OPS: int = 200  # 日志累计多少条操作后写快照
     
     # 中期记忆
     EPISODIC_COMPRESSION_THRESHOLD: int = 50000
+    # 被挤出的近期记忆先进入缓冲区，达到任一阈值后批量提取
+    COMPRESSION_BUFFER_MAX_ITEMS: int = 10
+    COMPRESSION_BUFFER_MAX_TOKENS: int = 4000
     TIME_DECAY_RATE: float = 0.1
+    # GC: 集合超过软上限时淘汰 "重要度 × 时间衰减" 最低的记忆，降到 软上限 × 目标比例
+    GC_SOFT_LIMIT: int = 1000
+    GC_TARGET_RATIO: float = 0.9
+    GC_DELETE_BATCH: int = 256
+    GC_INTERVAL_SECONDS: int = 600
+    # 冲突检测：只查看最近 N 天的见解，单次查询最多读取的条数，每个标的只比较最近的 N 条，提示中最多列出的观点变化次数
+    CONFLICT_HORIZON_DAYS: int = 90
+    CONFLICT_SCAN_LIMIT: int = 500
+    CONFLICT_HISTORY_PER_SYMBOL: int = 20
+    CONFLICT_ALERT_MAX_CHANGES: int = 5
     
     # 长期记忆
     CORE_PRINCIPLES_LIMIT: int = 10
     CLUSTERING_K: int = 10
+    CLUSTER_RESUMMARIZE_CHANGE: float = 0.3  # 簇成员变化 (1 - Jaccard) 超过该比例才重新总结
+    CLUSTER_SUMMARY_WORKERS: int = 4  # 并发总结簇的 LLM 调用数
     
     # === 模型配置 ===
     OPENAI_API_KEY: str = Field(default="")
@@ -46,6 +72,10 @@ class Settings(BaseSettings):
     EMBEDDING_PROVIDER: str = Field(default="huggingface", description="openai or huggingface")
     HF_EMBEDDING_MODEL: str = "BAAI/bge-large-zh"
     EMBEDDING_MODEL: str = "BAAI/bge-large-zh" # SiliconFlow 常用模型
+    EMBEDDING_CACHE_SIZE: int = 4096  # 内存 LRU 条数 (按内容哈希)
+    EMBEDDING_DISK_CACHE: bool = False  # 是否把向量持久化到 DATA_DIR/embedding_cache.db
+    EMBEDDING_MAX_BATCH: int = 64  # 微批队列单批上限
+    EMBEDDING_BATCH_WINDOW_MS: float = 5.0  # 微批等待窗口
     
     LLM_MODEL: str = "gpt-4o"
     
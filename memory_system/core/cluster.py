@@ -1,6 +1,10 @@
-from typing import List, Dict, Any
-from sklearn.cluster import KMeans
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+from sklearn.cluster import MiniBatchKMeans
 import numpy as np
+from config import settings
 from llm.client import LLMClient
 from storage.vector_store import VectorStore
 from utils.logger import logger
@@ -10,78 +14,205 @@ class ConceptCluster:
     """
     概念聚类器
     分析中期记忆，通过聚类提取长期原则 (Core Principles)
+
+    聚类状态 (质心、每簇样本数、记忆 -> 簇 的归属、上次总结时的成员) 持久化在
+    cluster_{user_id}_{agent_id}.json 中：
+    - 首次运行 (或记忆量翻倍、大部分已分配的记忆被删除后) 用 MiniBatchKMeans 全量拟合
+    - 之后只取新增记忆的向量，分配到最近质心并增量更新质心
+    - 只有成员变化超过 CLUSTER_RESUMMARIZE_CHANGE 的簇才重新调用 LLM 总结，且并发执行
     """
-    
+
     def __init__(self, user_id: str, agent_id: str):
         self.user_id = user_id
         self.agent_id = agent_id
         self.llm_client = LLMClient.get_instance()
         # 复用已有的向量存储读取数据
         self.vector_store = VectorStore(collection_name=f"episodic_{user_id}_{agent_id}")
-        
+        self.state_path = self._state_path(user_id, agent_id)
+
+    @staticmethod
+    def _state_path(user_id: str, agent_id: str):
+        return settings.DATA_DIR / f"cluster_{user_id}_{agent_id}.json"
+
+    @staticmethod
+    def clear_state(user_id: str, agent_id: str) -> None:
+        """删除聚类状态 (清空记忆时调用)，下次聚类重新全量拟合"""
+        try:
+            ConceptCluster._state_path(user_id, agent_id).unlink(missing_ok=True)
+        except Exception as e:
+            logger.error(f"Failed to remove cluster state: {e}")
+
     def cluster_and_abstract(self, k: int = 5) -> List[str]:
         """
         执行聚类并抽象出原则
-        
+
         Args:
             k: 聚类簇数
-            
+
         Returns:
-            List[str]: 提取出的核心原则列表
+            List[str]: 本次新生成 (簇成员有明显变化) 的核心原则列表
         """
         try:
-            # 1. 获取所有记忆及其嵌入
-            # Chroma get() method (需要 vector store 暴露更底层接口或在此直接使用 collection)
-            # 这里直接使用 collection 访问
-            result = self.vector_store.collection.get(include=["embeddings", "documents"])
-            
-            embeddings = result.get("embeddings")
-            documents = result.get("documents")
-            
-            # 强化空值检查，处理 numpy 数组的情况
-            has_embeddings = embeddings is not None and len(embeddings) > 0
-            
-            if not has_embeddings or len(embeddings) < k:
-                count = len(embeddings) if embeddings is not None else 0
-                logger.info(f"Not enough memories to cluster (Count: {count}, K: {k})")
+            # 1. 只取 id，找出自上次聚类以来新增 / 被删除的记忆
+            ids = self.vector_store.collection.get(include=[])["ids"]
+            if len(ids) < k:
+                logger.info(f"Not enough memories to cluster (Count: {len(ids)}, K: {k})")
                 return []
-                
-            # 2. 执行 K-Means 聚类
-            X = np.array(embeddings)
-            kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-            kmeans.fit(X)
-            labels = kmeans.labels_
-            
-            # 3. 对每个簇生成总结
-            new_principles = []
-            for i in range(k):
-                # 获取该簇的文档
-                cluster_docs = [doc for j, doc in enumerate(documents) if labels[j] == i]
-                
-                if not cluster_docs:
-                    continue
-                    
-                # 只有当簇足够大时才总结 (可选)
-                if len(cluster_docs) < 3: 
+
+            state = self._load_state()
+            if self._needs_full_fit(state, ids, k):
+                state = self._full_fit(ids, k, previous=state)
+                if state is None:
+                    return []
+            else:
+                self._update(state, ids)
+
+            # 2. 变化检测：只总结新簇或成员变化明显的簇
+            members: Dict[int, List[str]] = {}
+            for doc_id, label in state["assignments"].items():
+                members.setdefault(label, []).append(doc_id)
+
+            threshold = settings.CLUSTER_RESUMMARIZE_CHANGE
+            changed = []
+            for label, cluster_ids in sorted(members.items()):
+                # 只有当簇足够大时才总结
+                if len(cluster_ids) < 3:
                     continue
-                    
-                summary = self._summarize_cluster(cluster_docs)
-                if summary:
-                    new_principles.append(summary)
-                    
-            logger.info(f"Generated {len(new_principles)} new principles from clustering")
+                previous = set(state["summarized"].get(str(label), []))
+                current = set(cluster_ids)
+                similarity = len(previous & current) / len(previous | current)
+                if similarity <= 1 - threshold:
+                    changed.append(label)
+
+            # 3. 并发总结变化的簇
+            new_principles = []
+            if changed:
+                docs = {
+                    label: self.vector_store.collection.get(
+                        ids=members[label][:10], include=["documents"]
+                    )["documents"]
+                    for label in changed
+                }
+                workers = max(1, min(settings.CLUSTER_SUMMARY_WORKERS, len(changed)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    summaries = list(pool.map(lambda label: self._summarize_cluster(docs[label]), changed))
+                for label, summary in zip(changed, summaries):
+                    if summary:
+                        new_principles.append(summary)
+                        state["summarized"][str(label)] = members[label]
+
+            self._save_state(state)
+            logger.info(
+                f"Generated {len(new_principles)} new principles from clustering "
+                f"({len(changed)}/{len(members)} clusters changed)"
+            )
             return new_principles
-            
+
         except Exception as e:
             logger.error(f"Clustering failed: {e}")
             return []
 
+    @staticmethod
+    def _needs_full_fit(state: Optional[Dict[str, Any]], ids: List[str], k: int) -> bool:
+        if state is None or state["k"] != k or len(ids) >= 2 * state["fitted_count"]:
+            return True
+        # 大部分已分配的记忆已被删除 (清空 / GC)：旧质心不再代表现有数据
+        current = set(ids)
+        surviving = sum(1 for doc_id in state["assignments"] if doc_id in current)
+        return surviving * 2 < len(state["assignments"])
+
+    def _full_fit(self, ids: List[str], k: int, previous: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """全量拟合 (首次运行、K 变化或记忆量翻倍时)"""
+        result = self.vector_store.collection.get(include=["embeddings"])
+        embeddings = result.get("embeddings")
+        # 强化空值检查，处理 numpy 数组的情况
+        if embeddings is None or len(embeddings) < k:
+            return None
+
+        X = np.asarray(embeddings, dtype=float)
+        kmeans = MiniBatchKMeans(n_clusters=k, random_state=42, n_init=3, batch_size=256)
+        labels = kmeans.fit_predict(X)
+        logger.info(f"Full clustering fit on {len(X)} memories (K: {k})")
+
+        state = {
+            "k": k,
+            "centroids": kmeans.cluster_centers_.tolist(),
+            "counts": np.bincount(labels, minlength=k).tolist(),
+            "assignments": {doc_id: int(label) for doc_id, label in zip(result["ids"], labels)},
+            "summarized": {},
+            "fitted_count": len(X),
+        }
+        if previous is not None:
+            # 簇编号在重新拟合后会变化：把旧的已总结成员集合匹配到重合度最高的新簇
+            state["summarized"] = self._remap_summaries(previous["summarized"], state["assignments"])
+        return state
+
+    def _update(self, state: Dict[str, Any], ids: List[str]) -> None:
+        """把新增记忆分配到最近质心，并增量更新质心 (累计均值)"""
+        current = set(ids)
+        assignments = state["assignments"]
+        for doc_id in [d for d in assignments if d not in current]:
+            del assignments[doc_id]
+
+        new_ids = [doc_id for doc_id in ids if doc_id not in assignments]
+        if not new_ids:
+            return
+        result = self.vector_store.collection.get(ids=new_ids, include=["embeddings"])
+        X = np.asarray(result["embeddings"], dtype=float)
+        centroids = np.asarray(state["centroids"], dtype=float)
+        counts = np.asarray(state["counts"], dtype=float)
+
+        distances = ((X[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        added = np.bincount(labels, minlength=len(centroids)).astype(float)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, X)
+        grown = added > 0
+        centroids[grown] = (centroids[grown] * counts[grown, None] + sums[grown]) / (counts[grown] + added[grown])[:, None]
+
+        state["centroids"] = centroids.tolist()
+        state["counts"] = (counts + added).astype(int).tolist()
+        assignments.update({doc_id: int(label) for doc_id, label in zip(result["ids"], labels)})
+        logger.info(f"Incremental clustering: assigned {len(new_ids)} new memories")
+
+    @staticmethod
+    def _remap_summaries(summarized: Dict[str, List[str]], assignments: Dict[str, int]) -> Dict[str, List[str]]:
+        members: Dict[int, set] = {}
+        for doc_id, label in assignments.items():
+            members.setdefault(label, set()).add(doc_id)
+        remapped = {}
+        for old_members in summarized.values():
+            old = set(old_members)
+            best = max(members, key=lambda label: len(old & members[label]), default=None)
+            if best is not None and old & members[best] and str(best) not in remapped:
+                remapped[str(best)] = old_members
+        return remapped
+
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        if not self.state_path.exists():
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load cluster state: {e}")
+            return None
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.error(f"Failed to save cluster state: {e}")
+
     def _summarize_cluster(self, docs: List[str]) -> str:
         """总结聚类簇生成原则"""
         # 限制文档数量以适应上下文
-        sample_docs = docs[:10] 
+        sample_docs = docs[:10]
         text_block = "\n- ".join(sample_docs)
-        
+
         system_prompt = """Analyze the following related memory events.
 Abstract a single, high-level core principle or rule of thumb that explains these events.
 The output must be a concise statement (one sentence).
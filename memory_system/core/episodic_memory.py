@@ -1,12 +1,32 @@
 from typing import List, Dict, Optional, Any
 from datetime import datetime
+import re
 import uuid
+import numpy as np
 from config import settings
 from storage.vector_store import VectorStore
 from storage.graph_store import GraphStore
+from storage.memory_index import get_memory_index
 from utils.logger import logger
 from utils.embeddings import embedding_service
 
+# 集合 metadata 标记：升级前的投资见解已回填数值时间戳 ts
+TS_BACKFILLED_KEY = "insight_ts_backfilled"
+
+
+def _days_since(timestamps: List[Optional[str]]) -> np.ndarray:
+    """ISO 时间戳距今的整天数，无法解析的为 NaN"""
+    now = datetime.now()
+    days = np.full(len(timestamps), np.nan)
+    for i, ts in enumerate(timestamps):
+        if not ts:
+            continue
+        try:
+            days[i] = (now - datetime.fromisoformat(ts)).days
+        except Exception as e:
+            logger.error(f"Error parsing timestamp for decay: {e}")
+    return days
+
 
 class EpisodicMemory:
     """中期记忆管理器 (Episodic Memory)"""
@@ -33,7 +53,8 @@ class EpisodicMemory:
         添加事件记忆
         """
         memory_id = str(uuid.uuid4())
-        timestamp = datetime.now().isoformat()
+        now = datetime.now()
+        timestamp = now.isoformat()
 
         # 1. 存入向量库 (用于语义检索)
         # 将结构化内容转换为文本描述用于嵌入
@@ -44,6 +65,8 @@ class EpisodicMemory:
             "agent_id": self.agent_id,
             "event_type": event_type,
             "timestamp": timestamp,
+            # 数值时间戳，供按时间窗口做 metadata 过滤 (Chroma 的 $gte 只支持数值)
+            "ts": now.timestamp(),
             "importance": importance,
             "type": "episodic",
             **(metadata_extra or {})
@@ -52,6 +75,13 @@ class EpisodicMemory:
         self.vector_store.add(
             documents=[text_content], metadatas=[metadata], ids=[memory_id]
         )
+        # 登记到 GC 侧索引
+        memory_index = get_memory_index()
+        if memory_index is not None:
+            memory_index.record(
+                self.vector_store.collection_name,
+                [(memory_id, timestamp, importance, len(text_content.encode("utf-8")))],
+            )
 
         # 2. 存入图数据库 (用于关系检索)
         if entities or relations:
@@ -99,8 +129,7 @@ class EpisodicMemory:
             return []
 
         # 1. 提取查询中的潜在实体 (简单正则提取大写字母单词)
-        import re
-        potential_entities = re.findall(r'\b[A-Z]{2,}\b', query)
+        potential_entities = list(dict.fromkeys(re.findall(r'\b[A-Z]{2,}\b', query)))
         
         # 2. 图扩展：获取相关实体并增强查询
         enhanced_query = query
@@ -110,60 +139,46 @@ class EpisodicMemory:
                 enhanced_query += " Related to: " + ", ".join(expanded_entities)
                 logger.info(f"Enhanced query with graph entities: {expanded_entities}")
 
-        # 3. 向量检索
+        # 3. 向量检索 (每次 retrieve 只做这一次 embedding + ANN 查询)
         results = self.vector_store.query(
             query_text=enhanced_query, n_results=top_k * 3  # 获取更多候选用于时间衰减重排
         )
 
-        # 格式化检索结果并应用时间衰减
+        # 格式化检索结果并应用时间衰减 (在候选集上向量化计算)
         memories = []
-        now = datetime.now()
-
         if results["ids"] and len(results["ids"]) > 0 and len(results["ids"][0]) > 0:
-            for i, doc_id in enumerate(results["ids"][0]):
-                doc = results["documents"][0][i]
-                meta = results["metadatas"][0][i]
-                distance = results["distances"][0][i]
-
-                # 基础语义分数 (1 - distance)
-                semantic_score = 1.0 - distance
-
-                # 时间衰减计算
-                timestamp_str = meta.get("timestamp")
-                decay_factor = 1.0
-
-                if timestamp_str:
-                    try:
-                        ts = datetime.fromisoformat(timestamp_str)
-                        days_passed = (now - ts).days
-                        # 使用 log 衰减: 1 / (1 + log(1 + days))
-                        import math
-
-                        decay_factor = 1.0 / (1.0 + math.log(1 + max(0, days_passed)))
-                    except Exception as e:
-                        logger.error(f"Error parsing timestamp for decay: {e}")
-
-                final_score = semantic_score * decay_factor
+            ids = results["ids"][0]
+            metas = results["metadatas"][0]
+            semantic_scores = 1.0 - np.asarray(results["distances"][0], dtype=float)
+            # 使用 log 衰减: 1 / (1 + log(1 + days))，无时间戳时不衰减
+            days = _days_since([meta.get("timestamp") for meta in metas])
+            decay_factors = np.where(np.isnan(days), 1.0, 1.0 / (1.0 + np.log1p(np.maximum(0, days))))
+            final_scores = semantic_scores * decay_factors
 
+            for i, doc_id in enumerate(ids):
                 memories.append(
                     {
                         "id": doc_id,
-                        "content": doc,
-                        "metadata": meta,
-                        "semantic_score": semantic_score,
-                        "decay_factor": decay_factor,
-                        "score": final_score,
-                        "timestamp": meta.get("timestamp"),
+                        "content": results["documents"][0][i],
+                        "metadata": metas[i],
+                        "semantic_score": float(semantic_scores[i]),
+                        "decay_factor": float(decay_factors[i]),
+                        "score": float(final_scores[i]),
+                        "timestamp": metas[i].get("timestamp"),
                     }
                 )
 
-        # 4. 冲突检测 (如果 query 涉及特定 symbol)
+        # 4. 冲突检测 (如果 query 涉及特定 symbol)：按元数据过滤，不需要 embedding
+        all_conflicts = self._find_conflicts(potential_entities)
         for symbol in potential_entities:
-            conflicts = self.detect_conflicts(symbol)
+            conflicts = all_conflicts.get(symbol)
             if conflicts:
-                # 将冲突信息作为特殊记忆项注入，提醒 Agent 反思
+                # 将冲突信息作为特殊记忆项注入，提醒 Agent 反思 (只列出最近几次变化)
+                shown = conflicts[-settings.CONFLICT_ALERT_MAX_CHANGES:]
+                omitted = len(conflicts) - len(shown)
                 conflict_text = f"[Memory Reflection] Detected viewpoint changes for {symbol}: " + \
-                                " -> ".join([f"{c['prev']['viewpoint']} ({c['prev']['timestamp'][:10]})" for c in conflicts])
+                                (f"({omitted} earlier changes omitted) " if omitted else "") + \
+                                " -> ".join([f"{str(c['prev']['viewpoint'])[:40]} ({c['prev']['timestamp'][:10]})" for c in shown])
                 memories.append({
                     "id": f"conflict_{symbol}",
                     "content": conflict_text,
@@ -174,43 +189,121 @@ class EpisodicMemory:
 
         # 按最终分数重排
         memories.sort(key=lambda x: x["score"], reverse=True)
-        return memories[:top_k]
+        selected = memories[:top_k]
+        # 被检索命中的记忆刷新最近访问时间，降低被 GC 淘汰的优先级
+        memory_index = get_memory_index()
+        if memory_index is not None:
+            memory_index.touch(
+                self.vector_store.collection_name,
+                [m["id"] for m in selected if m.get("metadata", {}).get("type") != "conflict_alert"],
+            )
+        return selected
 
     def detect_conflicts(self, symbol: str) -> List[Dict]:
         """检测特定标的的观点冲突"""
-        # 检索该标的的所有投资见解
-        results = self.vector_store.query(
-            query_text=f"InvestmentInsight symbol {symbol}",
-            n_results=10
-        )
-        
-        insights = []
-        if results["metadatas"] and len(results["metadatas"][0]) > 0:
-            for i, meta in enumerate(results["metadatas"][0]):
-                if meta.get("event_type") == "InvestmentInsight" and meta.get("symbol") == symbol:
-                    insights.append({
-                        "viewpoint": meta.get("viewpoint"),
-                        "timestamp": meta.get("timestamp"),
-                    })
-        
-        # 按时间排序
-        insights.sort(key=lambda x: x["timestamp"])
-        
-        conflicts = []
-        for i in range(1, len(insights)):
-            if insights[i]["viewpoint"] != insights[i-1]["viewpoint"]:
-                conflicts.append({
-                    "prev": insights[i-1],
-                    "curr": insights[i]
-                })
-        
+        return self._find_conflicts([symbol]).get(symbol, [])
+
+    def _backfill_insight_ts(self) -> None:
+        """升级前写入的投资见解没有 ts，无法参与时间窗口过滤：按 timestamp 回填，
+        完成后在集合 metadata 上记一个标记，之后重建的实例不再全量扫描"""
+        collection = self.vector_store.collection
+        collection_meta = getattr(collection, "metadata", None) or {}
+        if collection_meta.get(TS_BACKFILLED_KEY):
+            return
+        try:
+            result = collection.get(where={"event_type": "InvestmentInsight"}, include=["metadatas"])
+        except Exception as e:
+            logger.error(f"Insight ts backfill lookup failed: {e}")
+            return
+
+        ids, metadatas = [], []
+        for memory_id, meta in zip(result.get("ids") or [], result.get("metadatas") or []):
+            if not meta or "ts" in meta or not meta.get("timestamp"):
+                continue
+            try:
+                ts = datetime.fromisoformat(meta["timestamp"]).timestamp()
+            except (TypeError, ValueError):
+                continue
+            ids.append(memory_id)
+            metadatas.append({**meta, "ts": ts})
+        try:
+            if ids:
+                collection.update(ids=ids, metadatas=metadatas)
+                logger.info(f"Backfilled ts for {len(ids)} insights in {self.vector_store.collection_name}")
+            collection.modify(metadata={**collection_meta, TS_BACKFILLED_KEY: True})
+        except Exception as e:
+            logger.error(f"Insight ts backfill failed: {e}")
+
+    def _find_conflicts(self, symbols: List[str]) -> Dict[str, List[Dict]]:
+        """
+        批量检测观点冲突：按 metadata 过滤取出每个标的最近 CONFLICT_HORIZON_DAYS 天内的投资见解
+        (不需要 embedding)。Chroma 的 get 按写入顺序返回 (最旧的在前)，所以先只取窗口内的 id，
+        再读最新的 CONFLICT_SCAN_LIMIT 条，避免一个活跃标的挤掉其他标的、也避免只比较到旧见解；
+        每个标的只保留最近的 CONFLICT_HISTORY_PER_SYMBOL 条，再按 (symbol, timestamp) 排序，
+        找出相邻观点发生变化的位置
+        """
+        if not symbols:
+            return {}
+        self._backfill_insight_ts()
+        horizon_start = datetime.now().timestamp() - settings.CONFLICT_HORIZON_DAYS * 86400
+
+        by_symbol: Dict[str, List[Dict]] = {}
+        for symbol in dict.fromkeys(symbols):
+            where = {"$and": [
+                {"event_type": "InvestmentInsight"},
+                {"symbol": symbol},
+                {"ts": {"$gte": horizon_start}},
+            ]}
+            try:
+                in_window = self.vector_store.collection.get(where=where, include=[])["ids"] or []
+                if not in_window:
+                    continue
+                results = self.vector_store.collection.get(
+                    ids=in_window[-settings.CONFLICT_SCAN_LIMIT:],
+                    include=["metadatas"],
+                )
+            except Exception as e:
+                logger.error(f"Conflict lookup failed for {symbol}: {e}")
+                continue
+            history = [m for m in results.get("metadatas") or [] if m and m.get("timestamp")]
+            if history:
+                by_symbol[str(symbol)] = history
+
+        metas = []
+        for history in by_symbol.values():
+            history.sort(key=lambda m: str(m.get("timestamp")))
+            metas.extend(history[-settings.CONFLICT_HISTORY_PER_SYMBOL:])
+        if len(metas) < 2:
+            return {}
+
+        sym = np.array([str(m.get("symbol")) for m in metas])
+        ts = np.array([str(m.get("timestamp")) for m in metas])
+        viewpoint = np.array([str(m.get("viewpoint")) for m in metas])
+        order = np.lexsort((ts, sym))
+        sym, ts, viewpoint = sym[order], ts[order], viewpoint[order]
+        changed = (sym[1:] == sym[:-1]) & (viewpoint[1:] != viewpoint[:-1])
+
+        conflicts: Dict[str, List[Dict]] = {}
+        for i in np.flatnonzero(changed):
+            prev_meta, curr_meta = metas[order[i]], metas[order[i + 1]]
+            conflicts.setdefault(str(sym[i]), []).append({
+                "prev": {"viewpoint": prev_meta.get("viewpoint"), "timestamp": prev_meta.get("timestamp")},
+                "curr": {"viewpoint": curr_meta.get("viewpoint"), "timestamp": curr_meta.get("timestamp")},
+            })
         return conflicts
 
+    def flush(self) -> None:
+        """落盘关系图谱 (向量库由 ChromaDB 自行持久化)"""
+        self.graph_store.flush()
+
     def clear(self) -> None:
         """清空所有中期记忆"""
         try:
             self.vector_store.clear()
             self.graph_store.clear()
+            memory_index = get_memory_index()
+            if memory_index is not None:
+                memory_index.drop(self.vector_store.collection_name)
             logger.info(f"Cleared EpisodicMemory for {self.user_id}:{self.agent_id}")
         except Exception as e:
             logger.error(f"Failed to clear EpisodicMemory: {e}")
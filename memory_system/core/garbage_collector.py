@@ -0,0 +1,133 @@
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from config import settings
+from storage.memory_index import get_memory_index
+from storage.vector_store import VectorStore, chroma_registry
+from utils.logger import logger
+
+
+class MemoryGarbageCollector:
+    """
+    中期记忆 GC
+    基于侧索引按 "重要度 × 时间衰减" 淘汰分数最低的记忆，分批删除，由后台定时调度
+    """
+
+    def __init__(self, index=None, client=None, store_factory=None):
+        self._index = index
+        # 未显式注入时使用进程级 ChromaDB 客户端 / VectorStore
+        self._client = client
+        self._store_factory = store_factory or VectorStore
+        self._lock = threading.Lock()
+        self.last_run: Dict[str, Any] = {}
+        self.totals = {"runs": 0, "vectors_reclaimed": 0, "bytes_reclaimed": 0}
+
+    @property
+    def index(self):
+        # 未显式注入时使用进程级侧索引 (首次使用时打开)
+        return self._index if self._index is not None else get_memory_index()
+
+    def ensure_indexed(self, store: VectorStore) -> None:
+        """向量库中有侧索引未登记的记忆时 (升级前的数据)，回填一次"""
+        if self.index is None or store.count() <= self.index.count(store.collection_name):
+            return
+        result = store.collection.get(include=["metadatas", "documents"])
+        if not result["ids"]:
+            return
+        self.index.record(store.collection_name, [
+            (memory_id, (meta or {}).get("timestamp"), (meta or {}).get("importance", 0.5), len((doc or "").encode("utf-8")))
+            for memory_id, meta, doc in zip(result["ids"], result["metadatas"], result["documents"])
+        ], replace=False)
+        logger.info(f"Backfilled memory index for {store.collection_name} ({len(result['ids'])} items)")
+
+    def collect(self, store: VectorStore, soft_limit: Optional[int] = None) -> Dict[str, Any]:
+        """超过软上限时，淘汰分数最低的记忆直到降到 soft_limit * GC_TARGET_RATIO"""
+        if self.index is None:
+            return {"status": "skipped", "reason": "index unavailable"}
+
+        soft_limit = soft_limit or settings.GC_SOFT_LIMIT
+        with self._lock:
+            self.ensure_indexed(store)
+            collection = store.collection_name
+            count = self.index.count(collection)
+            if count <= soft_limit:
+                return {"status": "skipped", "collection": collection, "count": count}
+
+            started = time.monotonic()
+            victims = self.index.lowest(collection, count - int(soft_limit * settings.GC_TARGET_RATIO))
+            ids = [memory_id for memory_id, _ in victims]
+            vector_bytes = self._vector_bytes(store, ids[:1])
+
+            deleted: List[str] = []
+            batch = settings.GC_DELETE_BATCH
+            for i in range(0, len(ids), batch):
+                chunk = ids[i:i + batch]
+                try:
+                    store.delete(ids=chunk)
+                except Exception as e:
+                    logger.error(f"GC batch delete failed for {collection}: {e}")
+                    break
+                self.index.remove(collection, chunk)
+                deleted.extend(chunk)
+
+            sizes = dict(victims)
+            reclaimed = sum(sizes[memory_id] for memory_id in deleted) + vector_bytes * len(deleted)
+            report = {
+                "status": "collected",
+                "collection": collection,
+                "count_before": count,
+                "vectors_reclaimed": len(deleted),
+                "bytes_reclaimed": reclaimed,
+                "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+                "timestamp": datetime.now().isoformat(),
+            }
+            self.last_run = report
+            self.totals["runs"] += 1
+            self.totals["vectors_reclaimed"] += len(deleted)
+            self.totals["bytes_reclaimed"] += reclaimed
+            logger.info(f"GC reclaimed {len(deleted)} vectors (~{reclaimed} bytes) from {collection}")
+            return report
+
+    def collect_all(self) -> List[Dict[str, Any]]:
+        """
+        定时任务：检查所有中期记忆集合
+        集合列表取自 ChromaDB 而不是侧索引，升级前的集合 (尚未登记到侧索引) 也会被回填并淘汰；
+        是否超过软上限按向量库的实际条数判断
+        """
+        if self.index is None:
+            return []
+        reports = []
+        for collection in self._episodic_collections():
+            try:
+                store = self._store_factory(collection_name=collection)
+                if store.count() > settings.GC_SOFT_LIMIT:
+                    reports.append(self.collect(store))
+            except Exception as e:
+                logger.error(f"Scheduled GC failed for {collection}: {e}")
+        return reports
+
+    def _episodic_collections(self) -> List[str]:
+        """ChromaDB 中所有 episodic_* 集合"""
+        client = self._client if self._client is not None else chroma_registry.client()
+        # chromadb < 0.6 返回 Collection 对象，>= 0.6 只返回名称
+        names = {getattr(c, "name", c) for c in client.list_collections()}
+        return sorted(name for name in names if name.startswith("episodic_"))
+
+    @staticmethod
+    def _vector_bytes(store: VectorStore, sample_ids: List[str]) -> int:
+        """单条向量占用的字节数 (float32)"""
+        if not sample_ids:
+            return 0
+        try:
+            embeddings = store.collection.get(ids=sample_ids, include=["embeddings"])["embeddings"]
+            return len(embeddings[0]) * 4 if embeddings is not None and len(embeddings) else 0
+        except Exception:
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.totals, "last_run": self.last_run}
+
+
+# 单例
+memory_gc = MemoryGarbageCollector()
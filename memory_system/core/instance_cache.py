@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Tuple, TypeVar
+from utils.logger import logger
+
+T = TypeVar("T")
+
+
+class InstanceCache(Generic[T]):
+    """
+    按 user_id:agent_id 缓存记忆实例的 LRU
+    超过容量或空闲超过 TTL 的实例会先 flush() 落盘再释放，下次访问时重新从磁盘加载
+    通过 lease() 持有的实例处于固定 (pinned) 状态，释放前不会被淘汰
+    """
+
+    def __init__(self, name: str, factory: Callable[[str, str], T], capacity: int = 256, idle_ttl: float = 3600):
+        self.name = name
+        self.factory = factory
+        self.capacity = max(1, capacity)
+        self.idle_ttl = idle_ttl
+        # key -> [instance, last_used, pins]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        # 正在加载或正在淘汰落盘的 key -> 完成事件，同一 key 的其他访问者等待其结束
+        self._busy: Dict[str, threading.Event] = {}
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "loads": 0, "evicted_capacity": 0, "evicted_idle": 0}
+        self._last_sweep = time.monotonic()
+
+    def get(self, user_id: str, agent_id: str) -> T:
+        """获取实例但不固定，调用方不应长时间持有 (长时间使用请用 lease)"""
+        return self._acquire(user_id, agent_id, pin=False)
+
+    @contextmanager
+    def lease(self, user_id: str, agent_id: str) -> Iterator[T]:
+        """在 with 块内固定实例，期间不会被容量或空闲淘汰"""
+        key = f"{user_id}:{agent_id}"
+        instance = self._acquire(user_id, agent_id, pin=True)
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry[1] = time.monotonic()
+                    entry[2] -= 1
+
+    def _acquire(self, user_id: str, agent_id: str, pin: bool) -> T:
+        key = f"{user_id}:{agent_id}"
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry[1] = now
+                    if pin:
+                        entry[2] += 1
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    sweep_due = now - self._last_sweep >= 60
+                    if sweep_due:
+                        self._last_sweep = now
+                else:
+                    busy = self._busy.get(key)
+                    if busy is None:
+                        busy = self._busy[key] = threading.Event()
+                        break
+
+            if entry is not None:
+                # 命中路径上每分钟顺带清理一次空闲实例
+                if sweep_due:
+                    self.sweep()
+                return entry[0]
+            # 同一 key 正在加载或落盘：等待完成后重新查找
+            busy.wait()
+
+        # 在全局锁之外加载，慢速磁盘加载不会阻塞其他用户的查找
+        try:
+            instance = self.factory(user_id, agent_id)
+        except BaseException:
+            with self._lock:
+                self._busy.pop(key, None)
+            busy.set()
+            raise
+
+        with self._lock:
+            now = time.monotonic()
+            self._entries[key] = [instance, now, 1 if pin else 0]
+            self._stats["loads"] += 1
+            self._busy.pop(key, None)
+            evicted = self._evict(now, keep=key)
+        busy.set()
+        self._flush_evicted(evicted)
+        return instance
+
+    def _evict(self, now: float, keep: Optional[str] = None) -> List[Tuple[str, Any, threading.Event]]:
+        """
+        按 LRU 顺序 (最久未使用的在前) 挑选需要淘汰的实例，跳过被固定的实例
+        须在持有锁时调用；被选中的 key 登记为 busy，由 _flush_evicted 在锁外落盘
+        """
+        evicted = []
+        for key, (_, last_used, pins) in list(self._entries.items()):
+            if key == keep or pins > 0:
+                continue
+            if len(self._entries) > self.capacity:
+                reason = "evicted_capacity"
+            elif self.idle_ttl and now - last_used > self.idle_ttl:
+                reason = "evicted_idle"
+            else:
+                # 之后的实例更新，既不超容量也不会空闲超时
+                break
+            instance = self._entries.pop(key)[0]
+            self._stats[reason] += 1
+            done = self._busy[key] = threading.Event()
+            evicted.append((key, instance, done))
+        return evicted
+
+    def _flush_evicted(self, evicted: List[Tuple[str, Any, threading.Event]]) -> None:
+        for key, instance, done in evicted:
+            try:
+                self._flush(key, instance)
+            finally:
+                with self._lock:
+                    self._busy.pop(key, None)
+                done.set()
+
+    def _flush(self, key: str, instance: Any) -> None:
+        flush = getattr(instance, "flush", None)
+        if flush is None:
+            return
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"Failed to flush {self.name} instance {key} on eviction: {e}")
+
+    def sweep(self) -> None:
+        """释放空闲超时的实例"""
+        with self._lock:
+            evicted = self._evict(time.monotonic())
+        self._flush_evicted(evicted)
+
+    def flush_all(self) -> None:
+        with self._lock:
+            for key, (instance, _, _) in self._entries.items():
+                self._flush(key, instance)
+
+    def keys(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._entries.keys()))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pinned = sum(1 for entry in self._entries.values() if entry[2] > 0)
+            return {**self._stats, "resident": len(self._entries), "pinned": pinned, "capacity": self.capacity}
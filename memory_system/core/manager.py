@@ -1,5 +1,8 @@
 import asyncio
+import threading
+import time
 import uuid
+from collections import deque
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from .working_memory import WorkingMemory
@@ -8,9 +11,14 @@ from .semantic_memory import SemanticMemory
 from .compressor import compressor
 from .extractor import extractor
 from .cluster import ConceptCluster
+from .instance_cache import InstanceCache
+from .garbage_collector import memory_gc
+from .task_store import TaskStateStore
 from config import settings
 from utils.logger import logger
 from utils.tokenizer import tokenizer
+from utils.embeddings import embedding_service
+from storage.vector_store import chroma_registry
 
 
 class MemoryManager:
@@ -22,15 +30,29 @@ class MemoryManager:
     _instances: Dict[str, "MemoryManager"] = {}
 
     def __init__(self):
-        # 按 user_id:agent_id 存储记忆实例
-        self.working_memories: Dict[str, WorkingMemory] = {}
-        self.episodic_memories: Dict[str, EpisodicMemory] = {}
-        self.semantic_memories: Dict[str, SemanticMemory] = {}
+        # 按 user_id:agent_id 缓存记忆实例 (LRU + 空闲 TTL，淘汰时落盘，下次访问重新加载)
+        capacity = settings.MEMORY_INSTANCE_CAPACITY
+        idle_ttl = settings.MEMORY_INSTANCE_IDLE_TTL
+        self.working_memories: InstanceCache[WorkingMemory] = InstanceCache("working", WorkingMemory, capacity, idle_ttl)
+        self.episodic_memories: InstanceCache[EpisodicMemory] = InstanceCache("episodic", EpisodicMemory, capacity, idle_ttl)
+        self.semantic_memories: InstanceCache[SemanticMemory] = InstanceCache("semantic", SemanticMemory, capacity, idle_ttl)
         
         # 异步任务队列与状态追踪
         self.task_queue = asyncio.Queue()
-        self.task_states: Dict[str, Dict] = {}
-        self._worker_task = None
+        self.task_states = TaskStateStore(settings.TASK_STATE_MAX_ENTRIES)
+        self._workers: List[asyncio.Task] = []
+        # 每个 user_id:agent_id 同时只有一个任务在执行，其余在私有队列中等待
+        self._active_keys: set = set()
+        self._pending_by_key: Dict[str, deque] = {}
+        # 保护上面两个结构：Worker 在事件循环中修改，get_stats 可能从其他线程读取
+        self._pool_lock = threading.Lock()
+        self._gc_task = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 被挤出、等待批量提取的条目由 WorkingMemory.pending_compression 持久化；
+        # 这里只记录已投递给 Worker、尚未确认的条目 id (按 user_id:agent_id)，避免重复投递
+        self._compressing: Dict[str, set] = {}
+        self._buffer_lock = threading.Lock()
         
         logger.info("MemoryManager initialized")
 
@@ -41,101 +63,127 @@ class MemoryManager:
         return cls._instances["default"]
 
     def _ensure_worker_started(self):
-        """确保后台 Worker 已启动"""
-        if self._worker_task is None or self._worker_task.done():
+        """确保后台 Worker 池已启动"""
+        if not self._workers or all(w.done() for w in self._workers):
             try:
                 loop = asyncio.get_running_loop()
-                self._worker_task = loop.create_task(self._background_worker())
-                logger.info("Background Memory Worker started")
+                self._loop = loop
+                self._workers = [
+                    loop.create_task(self._background_worker(i))
+                    for i in range(max(1, settings.MEMORY_WORKER_CONCURRENCY))
+                ]
+                logger.info(f"Background Memory Workers started (Concurrency: {len(self._workers)})")
+                if self._gc_task is None or self._gc_task.done():
+                    self._gc_task = loop.create_task(self._gc_scheduler())
             except RuntimeError:
                 logger.warning("No running event loop found, worker not started")
 
-    async def _background_worker(self):
-        """后台任务处理器"""
-        logger.info("Memory Worker loop started")
+    async def _background_worker(self, worker_id: int = 0):
+        """
+        后台任务处理器 (Worker 池成员)
+        同一 user_id:agent_id 的任务串行执行：该 key 已有任务在处理时，新任务排到它的私有队列，
+        由正在处理它的 Worker 依次执行；不同用户的任务在多个 Worker 间并行
+        """
+        logger.info(f"Memory Worker {worker_id} loop started")
         while True:
             task = await self.task_queue.get()
-            task_id = task.get("task_id")
             try:
-                task_type = task.get("type")
-                user_id = task.get("user_id")
-                agent_id = task.get("agent_id")
-                
-                self.task_states[task_id] = {
-                    "status": "processing",
-                    "start_time": datetime.now().isoformat()
-                }
-                
-                if task_type == "finalize":
-                    await self._process_finalize_task(user_id, agent_id)
-                
-                self.task_states[task_id]["status"] = "completed"
-                self.task_states[task_id]["end_time"] = datetime.now().isoformat()
-                logger.info(f"Task {task_id} ({task_type}) completed")
-                
-            except Exception as e:
-                logger.error(f"Error in background task {task_id}: {e}")
-                self.task_states[task_id] = {
-                    "status": "failed",
-                    "error": str(e),
-                    "end_time": datetime.now().isoformat()
-                }
+                key = f"{task.get('user_id')}:{task.get('agent_id')}"
+                with self._pool_lock:
+                    if key in self._active_keys:
+                        self._pending_by_key.setdefault(key, deque()).append(task)
+                        continue
+                    self._active_keys.add(key)
+
+                try:
+                    while task is not None:
+                        await self._run_task(task)
+                        with self._pool_lock:
+                            pending = self._pending_by_key.get(key)
+                            task = pending.popleft() if pending else None
+                            if pending is not None and not pending:
+                                del self._pending_by_key[key]
+                finally:
+                    with self._pool_lock:
+                        self._active_keys.discard(key)
             finally:
                 self.task_queue.task_done()
 
+    async def _run_task(self, task: Dict[str, Any]):
+        task_id = task.get("task_id")
+        task_type = task.get("type")
+        user_id = task.get("user_id")
+        agent_id = task.get("agent_id")
+        try:
+            self.task_states.update(task_id, status="processing", start_time=datetime.now().isoformat())
+
+            if task_type == "finalize":
+                await self._process_finalize_task(user_id, agent_id)
+            elif task_type == "compress":
+                await self._timed_stage("compress", self._handle_compression, user_id, agent_id, task["items"])
+
+            self.task_states.update(task_id, status="completed", end_time=datetime.now().isoformat())
+            logger.info(f"Task {task_id} ({task_type}) completed")
+
+        except Exception as e:
+            logger.error(f"Error in background task {task_id}: {e}")
+            self.task_states.update(task_id, status="failed", error=str(e), end_time=datetime.now().isoformat())
+
+    async def _timed_stage(self, stage: str, func, *args):
+        """在线程池中执行一个阶段并记录耗时"""
+        started = time.monotonic()
+        try:
+            return await asyncio.to_thread(func, *args)
+        finally:
+            self.task_states.record_stage(stage, (time.monotonic() - started) * 1000)
+
     async def _process_finalize_task(self, user_id: str, agent_id: str):
         """实际执行结算逻辑的私有方法"""
-        wm = self._get_working_memory(user_id, agent_id)
-        
-        # 仅获取尚未结算的新增语料
-        new_items = wm.get_unfinalized_details()
-        if not new_items:
-            logger.info(f"No new items to finalize for {user_id}")
-            return
+        # 整个结算期间固定 Working Memory，避免在阶段之间被 LRU 淘汰后重新加载出第二个实例
+        with self.working_memories.lease(user_id, agent_id) as wm:
+            # 仅获取尚未结算的新增语料 (含缓冲区中尚未提取的被挤出条目)
+            new_items = self._drain_compression_buffer(user_id, agent_id, wm) + wm.get_unfinalized_details()
+            if not new_items:
+                logger.info(f"No new items to finalize for {user_id}")
+                return
 
-        # 使用 asyncio.to_thread 将同步阻塞的 LLM/DB 操作移出主事件循环，防止阻塞其他用户请求
-        # 1. 触发压缩与提取流水线 (MTM 转化) - 基于新增内容
-        await asyncio.to_thread(self._handle_compression, user_id, agent_id, new_items)
+            # 使用 asyncio.to_thread 将同步阻塞的 LLM/DB 操作移出主事件循环，防止阻塞其他用户请求
+            # 1. 压缩与提取 (MTM 转化) 和用户画像更新 (LTM 转化) 互不依赖，并发执行
+            await asyncio.gather(
+                self._timed_stage("compress", self._handle_compression, user_id, agent_id, new_items),
+                self._timed_stage("persona", self._handle_persona_update, user_id, agent_id, new_items),
+            )
 
-        # 2. 触发用户画像更新 (LTM 转化) - 基于新增内容
-        await asyncio.to_thread(self._handle_persona_update, user_id, agent_id, new_items)
+            # 2. 触发长期原则聚类 (LTM 转化)，依赖第 1 步新写入的中期记忆
+            await self._timed_stage("cluster", self.run_clustering, user_id, agent_id)
 
-        # 3. 触发长期原则聚类 (LTM 转化)
-        await asyncio.to_thread(self.run_clustering, user_id, agent_id)
+            # 3. 标记为已结算 (GC 由 _gc_scheduler 定时执行)
+            wm.mark_finalized()
 
-        # 4. 执行垃圾回收 (GC)
-        await asyncio.to_thread(self.perform_garbage_collection, user_id, agent_id)
+            # 4. 清理陈旧记忆，但保留最近 5 轮作为热启动上下文 (Cross-session continuity)
+            wm.clear(keep_last_n=5)
 
-        # 5. 标记为已结算
-        wm.mark_finalized()
-        
-        # 6. 清理陈旧记忆，但保留最近 5 轮作为热启动上下文 (Cross-session continuity)
-        wm.clear(keep_last_n=5)
-
-    def perform_garbage_collection(self, user_id: str, agent_id: str):
+    def perform_garbage_collection(self, user_id: str, agent_id: str) -> Dict[str, Any]:
         """
         执行记忆清理 (GC)
-        移除低重要度且陈旧的中期记忆，保持系统轻量
+        按 "重要度 × 时间衰减" 淘汰分数最低的中期记忆，保持系统轻量
+        (常规情况下由 _gc_scheduler 定时对所有集合执行)
         """
         try:
-            em = self._get_episodic_memory(user_id, agent_id)
-            count = em.vector_store.count()
-            
-            # 设定软上限，超过则触发清理
-            SOFT_LIMIT = 1000
-            if count > SOFT_LIMIT:
-                logger.info(f"Memory GC triggered for {user_id}:{agent_id} (Count: {count})")
-                # 简单策略：按索引顺序（通常是时间顺序）删除最旧的 10%
-                to_delete_count = int(count * 0.1)
-                results = em.vector_store.collection.get(
-                    limit=to_delete_count,
-                    include=["metadatas"]
-                )
-                if results["ids"]:
-                    em.vector_store.delete(ids=results["ids"])
-                    logger.info(f"GC deleted {len(results['ids'])} old episodic memories")
+            with self.episodic_memories.lease(user_id, agent_id) as em:
+                return memory_gc.collect(em.vector_store)
         except Exception as e:
             logger.error(f"Memory GC failed: {e}")
+            return {"status": "error", "message": str(e)}
+
+    async def _gc_scheduler(self):
+        """定时 GC，不再在每次 finalize 中执行"""
+        while True:
+            await asyncio.sleep(settings.GC_INTERVAL_SECONDS)
+            try:
+                await asyncio.to_thread(memory_gc.collect_all)
+            except Exception as e:
+                logger.error(f"Scheduled memory GC failed: {e}")
 
     def finalize_session(self, user_id: str, agent_id: str) -> Dict[str, Any]:
         """
@@ -157,10 +205,7 @@ class MemoryManager:
             # 将任务放入队列 (同步方法中使用 put_nowait)
             self.task_queue.put_nowait(task)
             
-            self.task_states[task_id] = {
-                "status": "queued",
-                "created_at": task["created_at"]
-            }
+            self.task_states.update(task_id, status="queued", created_at=task["created_at"])
             
             logger.info(f"🏁 Finalize session queued for user {user_id}. Task ID: {task_id}")
             
@@ -175,34 +220,48 @@ class MemoryManager:
 
     def add_memory(self, user_id: str, agent_id: str, content: Any, role: str = "user", memory_type: str = "conversation", metadata: Dict = None) -> Dict:
         """添加新记忆到 Working Memory"""
-        wm = self._get_working_memory(user_id, agent_id)
-        
-        # 绑定压缩回调 (如果还没绑定)
-        if not wm.compression_callback:
-            wm.set_compression_callback(lambda items: self._handle_compression(user_id, agent_id, items))
-            
-        memory_id = str(uuid.uuid4())
-        memory_item = {
-            "id": memory_id,
-            "content": content,
-            "role": role,
-            "metadata": metadata or {}
-        }
-        wm.add(memory_item)
-        
-        return {
-            "status": "success", 
-            "memory_id": memory_id,
-            "stored_in": ["working_memory"],
-            "tokens": wm.total_tokens()
-        }
+        with self.working_memories.lease(user_id, agent_id) as wm:
+            # 绑定压缩回调 (如果还没绑定)：只写入缓冲区，提取由后台 Worker 批量完成
+            if not wm.compression_callback:
+                wm.set_compression_callback(lambda items, wm=wm: self._buffer_compression(user_id, agent_id, wm))
+
+            memory_id = str(uuid.uuid4())
+            memory_item = {
+                "id": memory_id,
+                "content": content,
+                "role": role,
+                "metadata": metadata or {}
+            }
+            wm.add(memory_item)
+
+            return {
+                "status": "success", 
+                "memory_id": memory_id,
+                "stored_in": ["working_memory"],
+                "tokens": wm.total_tokens()
+            }
+
+    def add_memories(self, user_id: str, agent_id: str, items: List[Dict]) -> Dict:
+        """按顺序批量添加记忆，items 中每项包含 content 与 metadata (role 取自 metadata)"""
+        memory_ids = []
+        for item in items:
+            metadata = item.get("metadata") or {}
+            result = self.add_memory(
+                user_id, agent_id, item["content"],
+                role=metadata.get("role", "user"), metadata=metadata,
+            )
+            memory_ids.append(result["memory_id"])
+        return {"status": "success", "memory_ids": memory_ids, "stored_in": ["working_memory"]}
 
     def get_context(self, user_id: str, agent_id: str, query: str, session_id: str = None, limit: int = 20, max_tokens: int = 5000) -> Dict:
         """获取三层记忆复合上下文，包含 Token 预算控制"""
-        wm = self._get_working_memory(user_id, agent_id)
-        em = self._get_episodic_memory(user_id, agent_id)
-        sm = self._get_semantic_memory(user_id, agent_id)
-        
+        with self.working_memories.lease(user_id, agent_id) as wm, \
+                self.episodic_memories.lease(user_id, agent_id) as em, \
+                self.semantic_memories.lease(user_id, agent_id) as sm:
+            return self._build_context(wm, em, sm, query, limit, max_tokens)
+
+    def _build_context(self, wm: WorkingMemory, em: EpisodicMemory, sm: SemanticMemory,
+                       query: str, limit: int, max_tokens: int) -> Dict:
         budget = settings.TOKEN_BUDGET
         
         # 1. STM - 近期对话 (Working Memory)
@@ -213,12 +272,15 @@ class MemoryManager:
         
         # 从后往前遍历，直到 token 超限
         for item in reversed(full_items):
-            content_str = f"{item.get('role', '')}: {str(item.get('content', ''))}"
-            t_count = tokenizer.count_tokens(content_str)
+            # 复用 WorkingMemory.add 时已计算的 Token 数
+            t_count = item.get("tokens")
+            if t_count is None:
+                t_count = tokenizer.count_tokens_cached(f"{item.get('role', '')}: {str(item.get('content', ''))}")
             if working_tokens + t_count > max_tokens:
                 break
-            working_items.insert(0, item)
+            working_items.append(item)
             working_tokens += t_count
+        working_items.reverse()
         
         # 2. MTM - 相关见解 (Episodic Memory)
         # 使用 limit 参数限制条数
@@ -226,7 +288,7 @@ class MemoryManager:
         episodic_items = []
         episodic_tokens = 0
         for m in episodic_results:
-            item_tokens = tokenizer.count_tokens(m["content"])
+            item_tokens = tokenizer.count_tokens_cached(m["content"])
             if episodic_tokens + item_tokens > budget.get("episodic_memory", 20000):
                 break
             episodic_items.append({
@@ -238,18 +300,18 @@ class MemoryManager:
             
         # 3. LTM - 画像、原则与经验 (Semantic Memory)
         core_principles = sm.get_core_principles()
-        principles_tokens = tokenizer.count_tokens(core_principles)
+        principles_tokens = tokenizer.count_tokens_cached(core_principles)
         
         user_persona_data = sm.user_persona
         persona_summary = sm.get_persona_summary()
-        persona_tokens = tokenizer.count_tokens(persona_summary)
+        persona_tokens = tokenizer.count_tokens_cached(persona_summary)
         
         # 语义检索相关经验 (Semantic Results)
         semantic_results = sm.retrieve_relevant_experiences(query, top_k=5)
         semantic_items = []
         semantic_tokens = 0
         for m in semantic_results:
-            item_tokens = tokenizer.count_tokens(m["content"])
+            item_tokens = tokenizer.count_tokens_cached(m["content"])
             if semantic_tokens + item_tokens > budget.get("semantic_memory", 500):
                 break
             semantic_items.append(f"- {m['content']}")
@@ -278,7 +340,7 @@ class MemoryManager:
 
     def get_task_status(self, task_id: str) -> Dict[str, Any]:
         """获取异步任务执行状态"""
-        return self.task_states.get(task_id, {"status": "not_found"})
+        return self.task_states.get(task_id) or {"status": "not_found"}
 
     def get_all_identities(self) -> Dict[str, List[str]]:
         """获取系统中存在的所有 User 和 Agent 列表 (通过扫描数据文件)"""
@@ -292,10 +354,10 @@ class MemoryManager:
         data_dir = settings.DATA_DIR
         if os.path.exists(data_dir):
             for filename in os.listdir(data_dir):
-                if filename.startswith("working_") and filename.endswith(".json"):
-                    # working_{user_id}_{agent_id}.json
-                    # 去掉前缀 working_ (8 chars) 和后缀 .json (5 chars)
-                    content_part = filename[8:-5]
+                if filename.startswith("working_") and filename.endswith((".json", ".journal")):
+                    # working_{user_id}_{agent_id}.json / .journal (尚未生成快照时只有日志)
+                    # 去掉前缀 working_ (8 chars) 和扩展名
+                    content_part = filename[8:].rsplit(".", 1)[0]
                     
                     # 尝试匹配已知 Agent
                     known_agents = ["research_agent", "chairman", "market", "macro", "sentiment", "web_search", "receptionist", "researcher"]
@@ -338,75 +400,155 @@ class MemoryManager:
 
     def get_stats(self, user_id: str, agent_id: str) -> Dict:
         """获取统计信息"""
-        wm = self._get_working_memory(user_id, agent_id)
-        sm = self._get_semantic_memory(user_id, agent_id)
+        with self.working_memories.lease(user_id, agent_id) as wm:
+            working_stats = {
+                "count": len(wm.items),
+                "tokens": wm.total_tokens(),
+                "pending_compression": len(wm.get_pending_compression()),
+            }
+        with self.semantic_memories.lease(user_id, agent_id) as sm:
+            principle_count = len(sm.core_principles)
+        pending_tasks, active_users = self._pool_snapshot()
 
         return {
-            "working_memory": {"count": len(wm.items), "tokens": wm.total_tokens()},
+            "working_memory": working_stats,
             "episodic_memory": {"count": "dynamic"},
-            "semantic_memory": {"core_principles": len(sm.core_principles)},
+            "semantic_memory": {"core_principles": principle_count},
+            "embedding_cache": embedding_service.stats(),
+            "token_cache": tokenizer.stats(),
+            "vector_store": chroma_registry.stats(),
+            "gc": memory_gc.stats(),
+            "tasks": {
+                **self.task_states.stats(),
+                "queue_depth": self.task_queue.qsize() + pending_tasks,
+                "workers": len(self._workers),
+                "active_users": active_users,
+            },
+            "instances": {
+                cache.name: cache.stats()
+                for cache in (self.working_memories, self.episodic_memories, self.semantic_memories)
+            },
         }
 
-    def _get_working_memory(self, user_id: str, agent_id: str) -> WorkingMemory:
-        key = f"{user_id}:{agent_id}"
-        if key not in self.working_memories:
-            self.working_memories[key] = WorkingMemory(user_id, agent_id)
-        return self.working_memories[key]
+    def _pool_snapshot(self):
+        """(排队在私有队列中的任务数, 正在处理的 key 数)，在锁内读取"""
+        with self._pool_lock:
+            return sum(len(q) for q in self._pending_by_key.values()), len(self._active_keys)
+
+    def flush_instances(self):
+        """将所有常驻记忆实例落盘 (服务关闭时调用)"""
+        for cache in (self.working_memories, self.episodic_memories, self.semantic_memories):
+            cache.flush_all()
 
-    def _get_episodic_memory(self, user_id: str, agent_id: str) -> EpisodicMemory:
+    def _buffer_compression(self, user_id: str, agent_id: str, wm: WorkingMemory):
+        """被挤出的条目达到 Token/条数阈值后，整批交给后台 Worker 提取"""
         key = f"{user_id}:{agent_id}"
-        if key not in self.episodic_memories:
-            self.episodic_memories[key] = EpisodicMemory(user_id, agent_id)
-        return self.episodic_memories[key]
+        with self._buffer_lock:
+            compressing = self._compressing.setdefault(key, set())
+            buffer = [item for item in wm.get_pending_compression() if item.get("id") not in compressing]
+            buffered_tokens = sum(item.get("tokens", 0) for item in buffer)
+            if not buffer or (len(buffer) < settings.COMPRESSION_BUFFER_MAX_ITEMS
+                              and buffered_tokens < settings.COMPRESSION_BUFFER_MAX_TOKENS):
+                return
+            compressing.update(item.get("id") for item in buffer)
 
-    def _get_semantic_memory(self, user_id: str, agent_id: str) -> SemanticMemory:
+        self._submit_compression(user_id, agent_id, buffer)
+
+    def _drain_compression_buffer(self, user_id: str, agent_id: str, wm: WorkingMemory) -> List[Dict]:
+        """取出所有尚未投递的待提取条目 (标记为处理中，由 _handle_compression 确认)"""
         key = f"{user_id}:{agent_id}"
-        if key not in self.semantic_memories:
-            self.semantic_memories[key] = SemanticMemory(user_id, agent_id)
-        return self.semantic_memories[key]
+        with self._buffer_lock:
+            compressing = self._compressing.setdefault(key, set())
+            items = [item for item in wm.get_pending_compression() if item.get("id") not in compressing]
+            compressing.update(item.get("id") for item in items)
+            return items
+
+    def _submit_compression(self, user_id: str, agent_id: str, items: List[Dict]):
+        """将一批条目作为 compress 任务投递到后台队列"""
+        task_id = str(uuid.uuid4())
+        task = {
+            "task_id": task_id,
+            "type": "compress",
+            "user_id": user_id,
+            "agent_id": agent_id,
+            "items": items,
+            "created_at": datetime.now().isoformat()
+        }
+        loop = self._loop
+        if loop is not None and loop.is_running() and any(not w.done() for w in self._workers):
+            self.task_states.update(task_id, status="queued", created_at=task["created_at"])
+            # add_memory 运行在线程池中，需要线程安全地投递到事件循环
+            loop.call_soon_threadsafe(self.task_queue.put_nowait, task)
+            logger.info(f"Queued batched compression of {len(items)} items for {user_id}:{agent_id}")
+            return
+
+        # 没有运行中的 Worker (脚本 / 测试环境)：同步执行
+        self._handle_compression(user_id, agent_id, items)
+
+    def flush_compression_buffers(self):
+        """同步提取常驻实例中所有待提取的条目 (服务关闭时调用)"""
+        for key in self.working_memories.keys():
+            user_id, agent_id = key.split(":", 1)
+            try:
+                with self.working_memories.lease(user_id, agent_id) as wm:
+                    items = self._drain_compression_buffer(user_id, agent_id, wm)
+                if items:
+                    self._handle_compression(user_id, agent_id, items)
+            except Exception as e:
+                logger.error(f"Failed to flush compression buffer for {key}: {e}")
 
     def _handle_compression(self, user_id: str, agent_id: str, items: List[Dict]):
-        """处理记忆压缩与中期记忆提取"""
-        em = self._get_episodic_memory(user_id, agent_id)
-        
-        # 提取投资见解
-        full_text = "\n".join([f"{item['role']}: {item['content']}" for item in items])
-        insight = extractor.extract_investment_insight(full_text)
-        
-        if insight and insight.get("symbol"):
-            # 将关键维度存入 metadata 以便后续分析
-            metadata = {
-                "symbol": insight["symbol"],
-                "viewpoint": insight.get("viewpoint"),
-                "confidence": insight.get("confidence", 0.5)
-            }
-            em.add_event(
-                event_type="InvestmentInsight",
-                content=insight,
-                entities=[insight["symbol"]],
-                importance=insight.get("confidence", 0.5),
-                metadata_extra=metadata # 假设 add_event 支持这个
-            )
-            logger.info(f"Extracted investment insight for {insight['symbol']} ({insight.get('viewpoint')})")
-
-        # 提取通用事件
-        event = extractor.extract(full_text)
-        if event:
-            em.add_event(
-                event_type=event.get("event_type", "General"),
-                content=event,
-                entities=event.get("entities", []),
-                importance=0.4
-            )
+        """处理记忆压缩与中期记忆提取，成功后从 Working Memory 的待提取列表中确认这些条目"""
+        ids = [item.get("id") for item in items]
+        try:
+            self._extract_insights(user_id, agent_id, items)
+            with self.working_memories.lease(user_id, agent_id) as wm:
+                wm.mark_compressed(ids)
+        finally:
+            # 失败的条目仍留在待提取列表中，由下一批或 finalize 重试
+            with self._buffer_lock:
+                self._compressing.get(f"{user_id}:{agent_id}", set()).difference_update(ids)
+
+    def _extract_insights(self, user_id: str, agent_id: str, items: List[Dict]):
+        with self.episodic_memories.lease(user_id, agent_id) as em:
+            # 提取投资见解
+            full_text = "\n".join([f"{item['role']}: {item['content']}" for item in items])
+            insight = extractor.extract_investment_insight(full_text)
+
+            if insight and insight.get("symbol"):
+                # 将关键维度存入 metadata 以便后续分析
+                metadata = {
+                    "symbol": insight["symbol"],
+                    "viewpoint": insight.get("viewpoint"),
+                    "confidence": insight.get("confidence", 0.5)
+                }
+                em.add_event(
+                    event_type="InvestmentInsight",
+                    content=insight,
+                    entities=[insight["symbol"]],
+                    importance=insight.get("confidence", 0.5),
+                    metadata_extra=metadata # 假设 add_event 支持这个
+                )
+                logger.info(f"Extracted investment insight for {insight['symbol']} ({insight.get('viewpoint')})")
+
+            # 提取通用事件
+            event = extractor.extract(full_text)
+            if event:
+                em.add_event(
+                    event_type=event.get("event_type", "General"),
+                    content=event,
+                    entities=event.get("entities", []),
+                    importance=0.4
+                )
 
     def _handle_persona_update(self, user_id: str, agent_id: str, items: List[Dict]):
         """从对话中提取并更新用户画像"""
-        sm = self._get_semantic_memory(user_id, agent_id)
         conversation_text = "\n".join([f"{item['role']}: {item['content']}" for item in items])
         
         new_traits = extractor.extract_user_persona(conversation_text)
         if new_traits:
-            sm.update_persona(new_traits)
+            with self.semantic_memories.lease(user_id, agent_id) as sm:
+                sm.update_persona(new_traits)
 
     def run_clustering(self, user_id: str, agent_id: str):
         """运行聚类算法提取长期原则"""
@@ -414,24 +556,30 @@ class MemoryManager:
         principles = clusterer.cluster_and_abstract()
         
         if principles:
-            sm = self._get_semantic_memory(user_id, agent_id)
-            for p in principles:
-                sm.add_core_principle(p)
+            with self.semantic_memories.lease(user_id, agent_id) as sm:
+                for p in principles:
+                    sm.add_core_principle(p)
 
     def clear_memory(self, user_id: str, agent_id: str) -> Dict[str, Any]:
         """清空指定用户和Agent的所有记忆"""
         try:
             # 1. 清空短期记忆
-            wm = self._get_working_memory(user_id, agent_id)
-            wm.clear(keep_last_n=0)
+            with self.working_memories.lease(user_id, agent_id) as wm:
+                wm.clear(keep_last_n=0)
+                # 丢弃尚未提取的被挤出条目
+                wm.mark_compressed([item.get("id") for item in self._drain_compression_buffer(user_id, agent_id, wm)])
+                with self._buffer_lock:
+                    self._compressing.pop(f"{user_id}:{agent_id}", None)
             
             # 2. 清空中期记忆
-            em = self._get_episodic_memory(user_id, agent_id)
-            em.clear()
+            with self.episodic_memories.lease(user_id, agent_id) as em:
+                em.clear()
             
             # 3. 清空长期记忆
-            sm = self._get_semantic_memory(user_id, agent_id)
-            sm.clear()
+            with self.semantic_memories.lease(user_id, agent_id) as sm:
+                sm.clear()
+            # 聚类状态指向已删除的记忆，一并清除
+            ConceptCluster.clear_state(user_id, agent_id)
             
             logger.info(f"Memory cleared for {user_id}:{agent_id}")
             return {"status": "success", "message": "All memory cleared"}
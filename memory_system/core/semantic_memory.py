@@ -49,6 +49,10 @@ class SemanticMemory:
         except Exception as e:
             logger.error(f"Failed to save semantic memory: {e}")
 
+    def flush(self) -> None:
+        """落盘画像与原则 (实例被淘汰或服务关闭时调用)"""
+        self._save_to_disk()
+
     def _load_from_disk(self) -> None:
         """从磁盘加载画像与原则"""
         if not self.file_path.exists():
@@ -0,0 +1,57 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class TaskStateStore:
+    """
+    有界的后台任务状态存储
+    按写入顺序保留最近 max_entries 个任务的状态，并累计各阶段耗时
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, max_entries)
+        self._states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._counts = {"queued": 0, "completed": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def update(self, task_id: str, **fields: Any) -> None:
+        """合并更新任务状态；新任务超出容量时丢弃最早的记录"""
+        with self._lock:
+            state = self._states.get(task_id)
+            if state is None:
+                state = self._states[task_id] = {}
+                while len(self._states) > self.max_entries:
+                    self._states.popitem(last=False)
+            state.update(fields)
+            status = fields.get("status")
+            if status in self._counts:
+                self._counts[status] += 1
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._states.get(task_id)
+            return dict(state) if state is not None else None
+
+    def record_stage(self, stage: str, elapsed_ms: float) -> None:
+        with self._lock:
+            s = self._stages.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            s["count"] += 1
+            s["total_ms"] += elapsed_ms
+            s["max_ms"] = max(s["max_ms"], elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counts,
+                "tracked": len(self._states),
+                "stages": {
+                    name: {
+                        "count": s["count"],
+                        "avg_ms": round(s["total_ms"] / s["count"], 1) if s["count"] else 0.0,
+                        "max_ms": round(s["max_ms"], 1),
+                    }
+                    for name, s in self._stages.items()
+                },
+            }
@@ -2,6 +2,9 @@ from collections import deque
 from typing import List, Dict, Optional, Any, Deque
 from datetime import datetime
 import json
+import os
+import threading
+import uuid
 from config import settings
 from utils.logger import logger
 from utils.tokenizer import tokenizer
@@ -14,9 +17,18 @@ class WorkingMemory:
         self.user_id = user_id
         self.agent_id = agent_id
         self.file_path = settings.DATA_DIR / f"working_{user_id}_{agent_id}.json"
+        self.journal_path = settings.DATA_DIR / f"working_{user_id}_{agent_id}.journal"
+        # 保护 items 与日志：变更和对应的日志追加在同一个锁内完成，保证日志顺序与内存一致
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._journal_ops = 0
         
         # 不使用 deque 的 maxlen，改为手动管理以支持回调
         self.items: Deque[Dict] = deque()
+        # 运行中的 Token 总数，随增删同步维护
+        self._total_tokens = 0
+        # 被挤出但尚未提取 (压缩) 的条目，随快照与日志持久化，崩溃后重新加载仍会被提取
+        self.pending_compression: List[Dict] = []
         self.max_items = settings.WORKING_MEMORY_MAX_ITEMS
         self.max_tokens = settings.WORKING_MEMORY_MAX_TOKENS
         # 回调函数，用于触发压缩
@@ -25,25 +37,106 @@ class WorkingMemory:
         # 加载持久化数据
         self._load_from_disk()
 
-    def _save_to_disk(self) -> None:
-        """持久化短期记忆到磁盘"""
+    # === 持久化：快照 (working_*.json) + 追加写日志 (working_*.journal) ===
+    # 每次变更只向日志追加一行并 fsync；日志累计 WORKING_MEMORY_JOURNAL_COMPACT_OPS
+    # 条后写入新快照并清空日志。加载时先读快照，再重放 seq 更大的日志条目。
+    # 被挤出的未结算条目进入 pending_compression，直到 mark_compressed 记录一条 compressed 日志。
+
+    def _append_journal(self, entry: Dict[str, Any]) -> None:
+        """追加一条操作日志 (add / finalize / clear / compressed)，调用方须持有 _lock"""
+        self._seq += 1
+        entry["seq"] = self._seq
         try:
-            with open(self.file_path, "w", encoding="utf-8") as f:
-                json.dump(list(self.items), f, ensure_ascii=False, indent=2)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_ops += 1
         except Exception as e:
-            logger.error(f"Failed to save working memory: {e}")
+            logger.error(f"Failed to append working memory journal: {e}")
+            return
+        if self._journal_ops >= settings.WORKING_MEMORY_JOURNAL_COMPACT_OPS:
+            self._save_to_disk()
+
+    def _save_to_disk(self) -> None:
+        """写入完整快照 (原子替换) 并清空日志"""
+        with self._lock:
+            tmp_path = self.file_path.with_suffix(".json.tmp")
+            try:
+                # 在锁内取快照再序列化，避免其他线程同时修改 deque
+                snapshot = {"seq": self._seq, "items": list(self.items), "pending": self.pending_compression}
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.file_path)
+                # 快照已包含日志中的全部操作
+                open(self.journal_path, "w").close()
+                self._journal_ops = 0
+            except Exception as e:
+                logger.error(f"Failed to save working memory: {e}")
 
     def _load_from_disk(self) -> None:
-        """从磁盘加载短期记忆"""
-        if not self.file_path.exists():
-            return
-        try:
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.items = deque(data)
-            logger.info(f"Loaded {len(self.items)} items for WorkingMemory {self.user_id}")
-        except Exception as e:
-            logger.error(f"Failed to load working memory: {e}")
+        """从磁盘加载短期记忆：快照 + 日志重放"""
+        snapshot_seq = 0
+        if self.file_path.exists():
+            try:
+                with open(self.file_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                # 兼容旧格式：快照直接是条目列表
+                if isinstance(data, list):
+                    self.items = deque(data)
+                else:
+                    self.items = deque(data.get("items", []))
+                    self.pending_compression = list(data.get("pending", []))
+                    snapshot_seq = data.get("seq", 0)
+            except Exception as e:
+                logger.error(f"Failed to load working memory: {e}")
+        self._seq = snapshot_seq
+
+        replayed = 0
+        torn = False
+        if self.journal_path.exists():
+            try:
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            # 写入中途崩溃留下的残缺行，之后的内容不可信
+                            torn = True
+                            break
+                        if entry.get("seq", 0) <= snapshot_seq:
+                            continue
+                        self._apply(entry)
+                        self._seq = entry["seq"]
+                        replayed += 1
+            except Exception as e:
+                logger.error(f"Failed to replay working memory journal: {e}")
+
+        self._total_tokens = sum(item.get("tokens", 0) for item in self.items)
+        if replayed or torn:
+            self._save_to_disk()
+        if self.items:
+            logger.info(f"Loaded {len(self.items)} items for WorkingMemory {self.user_id} (replayed {replayed} journal ops)")
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        """重放一条日志"""
+        op = entry.get("op")
+        if op == "add":
+            for _ in range(min(entry.get("evict", 0), len(self.items))):
+                self._hold_for_compression(self._popleft())
+            self._push(entry["item"])
+        elif op == "finalize":
+            self._mark_all_finalized()
+        elif op == "clear":
+            self._truncate(entry.get("keep", 0))
+        elif op == "compressed":
+            self._drop_pending(entry.get("ids", []))
+
+    def flush(self) -> None:
+        """写入快照并清空日志 (实例被淘汰或服务关闭时调用)"""
+        self._save_to_disk()
 
     def set_compression_callback(self, callback):
         self.compression_callback = callback
@@ -67,7 +160,8 @@ class WorkingMemory:
 
         # 构造内部存储结构
         internal_item = {
-            "id": memory_item.get("id"),
+            # 未结算条目按 id 确认压缩，没有 id 时补一个
+            "id": memory_item.get("id") or str(uuid.uuid4()),
             "timestamp": memory_item.get("timestamp") or datetime.now().isoformat(),
             "role": memory_item.get("role", "user"),
             "content": content,
@@ -82,49 +176,89 @@ class WorkingMemory:
             "finalized": False, # 新增：标记是否已被结算
         }
 
-        # 1. 检查 Token 限制并压缩
-        self._ensure_token_limit(new_item_tokens=tokens)
+        evicted: List[Dict] = []
+        # 挤出、写入与日志追加是一个原子步骤 (add 会从多个线程并发调用)
+        with self._lock:
+            # 1. 检查 Token 限制并压缩
+            self._ensure_token_limit(new_item_tokens=tokens, evicted=evicted)
 
-        # 2. 检查条目数限制并压缩
-        self._ensure_item_limit()
+            # 2. 检查条目数限制并压缩
+            self._ensure_item_limit(evicted=evicted)
 
-        self.items.append(internal_item)
-        self._save_to_disk()
+            for item in evicted:
+                self._hold_for_compression(item)
+            self._push(internal_item)
+            self._append_journal({"op": "add", "evict": len(evicted), "item": internal_item})
+
+        # 本次挤出的所有条目一次性交给压缩回调 (条目已记入 pending_compression)
+        if evicted and self.compression_callback:
+            self.compression_callback(evicted)
         logger.debug(
             f"Added item to WorkingMemory (User: {self.user_id}, Agent: {self.agent_id}, Tokens: {tokens})"
         )
 
-    def _ensure_item_limit(self) -> None:
+    def _ensure_item_limit(self, evicted: Optional[List[Dict]] = None) -> None:
         """确保不超过条目数限制"""
         while len(self.items) >= self.max_items:
-            removed = self.items.popleft()
+            removed = self._popleft()
             logger.debug(f"Pruned WorkingMemory item (Count limit).")
-            if self.compression_callback:
-                self.compression_callback([removed])
+            if evicted is not None:
+                evicted.append(removed)
 
-    def _ensure_token_limit(self, new_item_tokens: int) -> None:
+    def _ensure_token_limit(self, new_item_tokens: int, evicted: Optional[List[Dict]] = None) -> None:
         """确保添加新项后不超过 Token 限制"""
-        current_tokens = self.total_tokens()
         # 注意: 此时新项还未加入，所以是 current + new > max
-        while self.items and (current_tokens + new_item_tokens > self.max_tokens):
-            removed = self.items.popleft()
-            current_tokens -= removed["tokens"]
+        while self.items and (self._total_tokens + new_item_tokens > self.max_tokens):
+            removed = self._popleft()
             logger.debug(
                 f"Pruned WorkingMemory item (Token limit). Freed: {removed['tokens']} tokens"
             )
 
-            # 触发压缩逻辑
-            if self.compression_callback:
-                self.compression_callback([removed])
+            # 收集被挤出的条目，由 add() 统一触发压缩
+            if evicted is not None:
+                evicted.append(removed)
 
     def total_tokens(self) -> int:
-        """计算当前总 Token 数"""
-        return sum(item["tokens"] for item in self.items)
+        """当前总 Token 数 (O(1)，由 _push / _popleft 维护)"""
+        return self._total_tokens
+
+    def _hold_for_compression(self, item: Dict) -> None:
+        # 已结算的条目在 finalize 时提取过，不再重复处理
+        if not item.get("finalized", False):
+            self.pending_compression.append(item)
+
+    def get_pending_compression(self) -> List[Dict]:
+        """被挤出、尚未提取的条目"""
+        with self._lock:
+            return list(self.pending_compression)
+
+    def mark_compressed(self, ids: List[str]) -> None:
+        """从待提取列表中移除已提取 (或被丢弃) 的条目并记录日志"""
+        with self._lock:
+            pending_ids = {item.get("id") for item in self.pending_compression}
+            ids = [i for i in ids if i in pending_ids]
+            if not ids:
+                return
+            self._drop_pending(ids)
+            self._append_journal({"op": "compressed", "ids": ids})
+
+    def _drop_pending(self, ids: List[str]) -> None:
+        done = set(ids)
+        self.pending_compression = [item for item in self.pending_compression if item.get("id") not in done]
+
+    def _push(self, item: Dict) -> None:
+        self.items.append(item)
+        self._total_tokens += item.get("tokens", 0)
+
+    def _popleft(self) -> Dict:
+        item = self.items.popleft()
+        self._total_tokens -= item.get("tokens", 0)
+        return item
 
     def get_context(self) -> str:
         """获取格式化的上下文文本"""
         context = []
-        for item in self.items:
+        for item in self.get_details():
             role = item["role"]
             content = item["content"]
             if isinstance(content, dict):
@@ -134,17 +268,23 @@ class WorkingMemory:
 
     def get_details(self) -> List[Dict]:
         """获取所有记忆详情"""
-        return list(self.items)
+        with self._lock:
+            return list(self.items)
 
     def get_unfinalized_details(self) -> List[Dict]:
         """获取尚未结算的记忆详情"""
-        return [item for item in self.items if not item.get("finalized", False)]
+        with self._lock:
+            return [item for item in self.items if not item.get("finalized", False)]
 
     def mark_finalized(self) -> None:
         """将当前所有项标记为已结算"""
+        with self._lock:
+            self._mark_all_finalized()
+            self._append_journal({"op": "finalize"})
+
+    def _mark_all_finalized(self) -> None:
         for item in self.items:
             item["finalized"] = True
-        self._save_to_disk()
 
     def clear(self, keep_last_n: int = 0) -> None:
         """
@@ -153,12 +293,16 @@ class WorkingMemory:
         Args:
             keep_last_n: 保留最近的 N 条记录（热启动上下文）
         """
+        with self._lock:
+            self._truncate(keep_last_n)
+            self._append_journal({"op": "clear", "keep": keep_last_n})
+        logger.info(f"Cleared WorkingMemory (Kept last {keep_last_n} items)")
+
+    def _truncate(self, keep_last_n: int) -> None:
         if keep_last_n <= 0:
             self.items.clear()
+            self._total_tokens = 0
         else:
             # 只保留最后 N 条
             while len(self.items) > keep_last_n:
-                self.items.popleft()
-        
-        self._save_to_disk()
-        logger.info(f"Cleared WorkingMemory (Kept last {keep_last_n} items)")
+                self._popleft()
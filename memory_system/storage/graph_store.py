@@ -2,85 +2,224 @@ import networkx as nx
 import json
 import os
 import threading
+import time
+import atexit
 from typing import List, Dict, Any, Tuple
 from pathlib import Path
 from config import settings
 from utils.logger import logger
 
+class _GraphFlusher:
+    """
+    后台防抖落盘线程：GraphStore 只在内存中记录待写操作，
+    由本线程每 GRAPH_FLUSH_INTERVAL 秒统一追加到边日志
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+        atexit.register(self.flush_all)
+
+    def mark_dirty(self, store: "GraphStore") -> None:
+        with self._lock:
+            self._dirty.add(store)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="graph-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush_all()
+
+    def flush_all(self) -> None:
+        with self._lock:
+            stores, self._dirty = self._dirty, set()
+        for store in stores:
+            store.flush()
+
+
 class GraphStore:
-    """图存储包装类 (NetworkX)，增加线程安全锁"""
+    """
+    图存储包装类 (NetworkX)，增加线程安全锁
+
+    持久化：快照 (graph_*.json, node_link 格式) + 追加写边日志 (graph_*.log)
+    - add_event 只在锁内修改图并记录待写操作，不做任何 I/O
+    - 后台线程防抖地把待写操作追加到日志；日志超过 GRAPH_COMPACT_OPS 条时，
+      由 "旧快照 + 日志" 在磁盘侧合成新快照，不持有图锁
+    """
     
     def __init__(self, graph_file: str = "knowledge_graph.json"):
         """
         初始化图存储
         """
         self.file_path = settings.DATA_DIR / graph_file
+        self.log_path = self.file_path.with_suffix(".log")
         self.graph = nx.MultiDiGraph()
         self.lock = threading.Lock()
+        # 文件写入锁，与图锁分离，读请求不会被落盘阻塞
+        self._io_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self._seq = 0
+        self._log_ops = 0
         self._load()
         logger.info(f"GraphStore initialized (Nodes: {self.graph.number_of_nodes()})")
 
-    def _load(self) -> None:
-        """从文件加载图数据"""
-        if self.file_path.exists():
-            with self.lock:
+    @staticmethod
+    def _read_snapshot(path: Path) -> Tuple[nx.MultiDiGraph, int]:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # Explicitly specify edges key to suppress warning and ensure compatibility
+        graph = nx.node_link_graph(data, edges="edges")
+        return graph, graph.graph.pop("log_seq", 0)
+
+    @staticmethod
+    def _replay(graph: nx.MultiDiGraph, path: Path, after_seq: int) -> Tuple[int, int]:
+        """
+        把日志中 seq > after_seq 的操作应用到 graph
+        返回 (最后的 seq, 最后一条完整记录结束处的字节偏移)
+        """
+        last_seq = after_seq
+        valid_end = 0
+        if not path.exists():
+            return last_seq, valid_end
+        with open(path, "rb") as f:
+            for line in f:
                 try:
-                    with open(self.file_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        # Explicitly specify edges key to suppress warning and ensure compatibility
-                        self.graph = nx.node_link_graph(data, edges="edges")
-                    logger.debug(f"Loaded graph from {self.file_path}")
-                except Exception as e:
-                    logger.error(f"Failed to load graph: {e}")
-                    # 出错时使用空图
-                    self.graph = nx.MultiDiGraph()
+                    if not line.endswith(b"\n"):
+                        raise ValueError("missing newline")
+                    op = json.loads(line)
+                except ValueError:
+                    # 写入中途崩溃留下的残缺行
+                    logger.warning(f"Ignoring torn record in {path}")
+                    break
+                valid_end += len(line)
+                if op["seq"] <= after_seq:
+                    continue
+                GraphStore._apply(graph, op)
+                last_seq = op["seq"]
+        return last_seq, valid_end
 
-    def _save(self) -> None:
-        """保存图数据到文件"""
-        with self.lock:
+    @staticmethod
+    def _apply(graph: nx.MultiDiGraph, op: Dict[str, Any]) -> None:
+        for entity in op.get("nodes", []):
+            if not graph.has_node(entity):
+                graph.add_node(entity, type="entity")
+        for subject, obj, attrs in op.get("edges", []):
+            if not graph.has_node(subject):
+                graph.add_node(subject, type="entity")
+            if not graph.has_node(obj):
+                graph.add_node(obj, type="entity")
+            graph.add_edge(subject, obj, **attrs)
+
+    def _load(self) -> None:
+        """从快照加载图数据并重放边日志"""
+        snapshot_seq = 0
+        if self.file_path.exists():
             try:
-                # Explicitly specify edges key
-                data = nx.node_link_data(self.graph, edges="edges")
-                with open(self.file_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                logger.debug(f"Saved graph to {self.file_path}")
+                self.graph, snapshot_seq = self._read_snapshot(self.file_path)
+                logger.debug(f"Loaded graph from {self.file_path}")
             except Exception as e:
-                logger.error(f"Failed to save graph: {e}")
+                logger.error(f"Failed to load graph: {e}")
+                # 出错时使用空图
+                self.graph = nx.MultiDiGraph()
+        try:
+            self._seq, valid_end = self._replay(self.graph, self.log_path, snapshot_seq)
+            self._log_ops = self._seq - snapshot_seq
+            # 截掉残缺的尾行，否则之后追加的记录会接在残缺行后面，重放时一并丢失
+            if self.log_path.exists() and self.log_path.stat().st_size > valid_end:
+                with open(self.log_path, "r+b") as f:
+                    f.truncate(valid_end)
+                    f.flush()
+                    os.fsync(f.fileno())
+                logger.warning(f"Truncated torn tail of {self.log_path}")
+        except Exception as e:
+            logger.error(f"Failed to replay graph log: {e}")
+            self._seq = snapshot_seq
 
     def add_event(self, event_id: str, entities: List[str], relations: List[Tuple[str, str, str]], timestamp: str, weight: float = 1.0) -> None:
         """
-        添加事件到图谱
+        添加事件到图谱 (落盘由后台线程防抖完成)
         """
         try:
+            op = {
+                "nodes": list(entities),
+                "edges": [
+                    [subject, obj, {
+                        "relation": predicate,
+                        "event_id": event_id,
+                        "timestamp": str(timestamp),
+                        "weight": weight,
+                    }]
+                    for subject, predicate, obj in relations
+                ],
+            }
             with self.lock:
-                # 添加实体节点
-                for entity in entities:
-                    if not self.graph.has_node(entity):
-                        self.graph.add_node(entity, type="entity")
-                
-                # 添加关系边
-                for subject, predicate, obj in relations:
-                    # 确保节点存在
-                    if not self.graph.has_node(subject):
-                        self.graph.add_node(subject, type="entity")
-                    if not self.graph.has_node(obj):
-                        self.graph.add_node(obj, type="entity")
-                        
-                    # 添加边
-                    self.graph.add_edge(
-                        subject, obj,
-                        relation=predicate,
-                        event_id=event_id,
-                        timestamp=str(timestamp),
-                        weight=weight
-                    )
-            
-            # 保存到磁盘
-            self._save()
+                self._apply(self.graph, op)
+                self._seq += 1
+                op["seq"] = self._seq
+                self._pending.append(op)
+            _flusher.mark_dirty(self)
         except Exception as e:
             logger.error(f"Failed to add event to graph: {e}")
             raise
 
+    def flush(self) -> None:
+        """把待写操作追加到边日志 (fsync)，必要时触发压缩"""
+        with self._io_lock:
+            with self.lock:
+                pending, self._pending = self._pending, []
+            if pending:
+                try:
+                    with open(self.log_path, "a", encoding="utf-8") as f:
+                        for op in pending:
+                            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+                        f.flush()
+                        os.fsync(f.fileno())
+                    self._log_ops += len(pending)
+                    logger.debug(f"Appended {len(pending)} graph ops to {self.log_path}")
+                except Exception as e:
+                    logger.error(f"Failed to append graph log: {e}")
+                    # 放回队列，下次重试
+                    with self.lock:
+                        self._pending = pending + self._pending
+                    _flusher.mark_dirty(self)
+                    return
+            if self._log_ops >= settings.GRAPH_COMPACT_OPS:
+                self._compact()
+
+    def _compact(self) -> None:
+        """由磁盘上的 "快照 + 日志" 合成新快照并清空日志 (调用方持有 _io_lock)"""
+        try:
+            if self.file_path.exists():
+                graph, seq = self._read_snapshot(self.file_path)
+            else:
+                graph, seq = nx.MultiDiGraph(), 0
+            seq, _ = self._replay(graph, self.log_path, seq)
+            self._write_snapshot(graph, seq)
+            open(self.log_path, "w").close()
+            self._log_ops = 0
+            logger.debug(f"Compacted graph log into {self.file_path}")
+        except Exception as e:
+            logger.error(f"Failed to compact graph: {e}")
+
+    def _write_snapshot(self, graph: nx.MultiDiGraph, seq: int) -> None:
+        # Explicitly specify edges key
+        data = nx.node_link_data(graph, edges="edges")
+        data["graph"] = {**data.get("graph", {}), "log_seq": seq}
+        tmp_path = self.file_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+
+    def _save(self) -> None:
+        """同步落盘 (兼容旧调用)"""
+        self.flush()
+
     def get_related_entities(self, entities: List[str], max_depth: int = 1) -> List[str]:
         """
         获取相关实体（扩展邻居）
@@ -130,10 +269,18 @@ class GraphStore:
     def clear(self) -> None:
         """清空图数据"""
         try:
-            with self.lock:
-                self.graph.clear()
-                self._save()
+            with self._io_lock:
+                with self.lock:
+                    self.graph.clear()
+                    self._pending = []
+                    seq = self._seq
+                self._write_snapshot(nx.MultiDiGraph(), seq)
+                open(self.log_path, "w").close()
+                self._log_ops = 0
             logger.info(f"Cleared graph store: {self.file_path}")
         except Exception as e:
             logger.error(f"Failed to clear graph: {e}")
             raise
+
+
+_flusher = _GraphFlusher(settings.GRAPH_FLUSH_INTERVAL)
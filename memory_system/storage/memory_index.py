@@ -0,0 +1,136 @@
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from config import settings
+from utils.logger import logger
+
+
+class MemoryIndex:
+    """
+    记忆侧索引 (SQLite)：每条向量记忆一行 (collection, id, 时间戳, 重要度, 最近访问, 字节数)
+
+    GC 评分 importance * exp(-λ * 距最近使用的天数) 的排序与 "当前时间" 无关，
+    等价于按 priority = ln(importance) + λ * 最近使用时间(天) 排序。priority 在写入 / 访问时
+    计算并建立索引，因此取分数最低的 k 条是 O(k log n) 的索引扫描，无需全表评分。
+    """
+
+    def __init__(self, db_path: str, decay_rate: float = 0.1):
+        self.decay_rate = decay_rate
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS memory_index (
+                collection TEXT NOT NULL,
+                id TEXT NOT NULL,
+                created REAL NOT NULL,
+                importance REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL,
+                priority REAL NOT NULL,
+                PRIMARY KEY (collection, id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_memory_priority ON memory_index (collection, priority);
+            """
+        )
+        self._db.commit()
+
+    def _priority(self, importance: float, last_access: float) -> float:
+        return math.log(max(importance, 1e-6)) + self.decay_rate * last_access / 86400.0
+
+    @staticmethod
+    def _epoch(timestamp: Optional[str]) -> float:
+        if timestamp:
+            try:
+                return datetime.fromisoformat(timestamp).timestamp()
+            except (TypeError, ValueError):
+                pass
+        return time.time()
+
+    def record(self, collection: str, entries: Iterable[Tuple[str, Optional[str], float, int]], replace: bool = True) -> None:
+        """登记记忆: (id, ISO 时间戳, 重要度, 字节数)；replace=False 时不覆盖已有行"""
+        rows = []
+        for memory_id, timestamp, importance, size in entries:
+            created = self._epoch(timestamp)
+            importance = float(importance if importance is not None else 0.5)
+            rows.append((collection, memory_id, created, importance, created, int(size),
+                         self._priority(importance, created)))
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                f"INSERT OR {'REPLACE' if replace else 'IGNORE'} INTO memory_index VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._db.commit()
+
+    def touch(self, collection: str, ids: List[str]) -> None:
+        """记录一次访问 (检索命中)，刷新 priority"""
+        if not ids:
+            return
+        now = time.time()
+        with self._lock:
+            # 只替换 priority 中的时间项 (UPDATE 右侧使用旧的 last_access)
+            self._db.executemany(
+                "UPDATE memory_index SET priority = priority + ? * (? - last_access) / 86400.0, "
+                "last_access = ? WHERE collection = ? AND id = ?",
+                [(self.decay_rate, now, now, collection, memory_id) for memory_id in ids],
+            )
+            self._db.commit()
+
+    def count(self, collection: str) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM memory_index WHERE collection = ?", (collection,)
+            ).fetchone()[0]
+
+    def collections(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute(
+                "SELECT collection, COUNT(*) FROM memory_index GROUP BY collection"
+            ).fetchall())
+
+    def lowest(self, collection: str, k: int) -> List[Tuple[str, int]]:
+        """分数最低的 k 条 (id, 字节数)，走 (collection, priority) 索引"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, size FROM memory_index WHERE collection = ? ORDER BY priority LIMIT ?",
+                (collection, k),
+            ).fetchall()
+
+    def remove(self, collection: str, ids: List[str]) -> None:
+        with self._lock:
+            self._db.executemany(
+                "DELETE FROM memory_index WHERE collection = ? AND id = ?",
+                [(collection, memory_id) for memory_id in ids],
+            )
+            self._db.commit()
+
+    def drop(self, collection: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM memory_index WHERE collection = ?", (collection,))
+            self._db.commit()
+
+
+def _create_index() -> Optional[MemoryIndex]:
+    try:
+        return MemoryIndex(str(settings.DATA_DIR / "memory_index.db"), decay_rate=settings.TIME_DECAY_RATE)
+    except Exception as e:
+        logger.error(f"Failed to open memory index: {e}")
+        return None
+
+
+_memory_index: Optional[MemoryIndex] = None
+_memory_index_lock = threading.Lock()
+
+
+def get_memory_index() -> Optional[MemoryIndex]:
+    """进程级单例，首次使用时才在 DATA_DIR 下打开 (导入模块不产生文件)"""
+    global _memory_index
+    if _memory_index is None:
+        with _memory_index_lock:
+            if _memory_index is None:
+                _memory_index = _create_index()
+    return _memory_index
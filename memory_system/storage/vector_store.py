@@ -1,11 +1,122 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple
+import threading
+import time
 import traceback
 from config import settings
 from utils.logger import logger
 from utils.embeddings import embedding_service
 
+class ChromaRegistry:
+    """
+    进程级 ChromaDB 客户端池与集合句柄缓存
+    同一持久化目录只创建一个 PersistentClient；集合句柄按 LRU 缓存，
+    超过空闲时间 (CHROMA_COLLECTION_IDLE_SECONDS) 或数量上限的句柄会被释放。
+    某个目录的句柄全部释放后，其客户端也会被关闭，下次访问时重新打开
+    """
+
+    def __init__(self, idle_seconds: float = 1800, max_collections: int = 256):
+        self.idle_seconds = idle_seconds
+        self.max_collections = max_collections
+        self._clients: Dict[str, Any] = {}
+        # (path, name) -> [collection, last_used]
+        self._collections: "OrderedDict[Tuple[str, str], list]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._last_sweep = time.monotonic()
+        self._stats = {"hits": 0, "misses": 0, "evicted": 0, "clients_closed": 0}
+
+    def client(self, path: Optional[str] = None):
+        path = str(path or settings.CHROMA_PERSIST_DIR)
+        with self._lock:
+            client = self._clients.get(path)
+            if client is None:
+                client = chromadb.PersistentClient(
+                    path=path,
+                    settings=ChromaSettings(allow_reset=True, anonymized_telemetry=False)
+                )
+                self._clients[path] = client
+                logger.info(f"ChromaDB client opened (Path: {path})")
+            return client
+
+    def collection(self, name: str, path: Optional[str] = None):
+        """获取集合句柄 (热点集合 O(1) 命中)"""
+        key = (str(path or settings.CHROMA_PERSIST_DIR), name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._collections.get(key)
+            if entry is not None:
+                entry[1] = now
+                self._collections.move_to_end(key)
+                self._stats["hits"] += 1
+                collection = entry[0]
+            else:
+                self._stats["misses"] += 1
+                # 不传递 metadata，避免 ChromaDB 配置序列化问题
+                collection = self.client(key[0]).get_or_create_collection(name=name)
+                self._collections[key] = [collection, now]
+                while len(self._collections) > self.max_collections:
+                    self._collections.popitem(last=False)
+                    self._stats["evicted"] += 1
+            # 命中与未命中路径上都每分钟顺带清理一次空闲句柄，热点集合稳定时也会释放空闲句柄
+            if now - self._last_sweep >= 60:
+                self._sweep(now)
+            return collection
+
+    def replace(self, name: str, collection, path: Optional[str] = None) -> None:
+        """集合被删除重建后更新缓存的句柄"""
+        key = (str(path or settings.CHROMA_PERSIST_DIR), name)
+        with self._lock:
+            self._collections[key] = [collection, time.monotonic()]
+            self._collections.move_to_end(key)
+
+    def sweep(self) -> None:
+        """释放空闲超时的集合句柄，并关闭不再有打开句柄的客户端"""
+        with self._lock:
+            self._sweep(time.monotonic())
+
+    def _sweep(self, now: float) -> None:
+        self._last_sweep = now
+        # LRU 顺序保证最旧的在前
+        while self._collections:
+            key, (_, last_used) = next(iter(self._collections.items()))
+            if now - last_used <= self.idle_seconds:
+                break
+            self._collections.popitem(last=False)
+            self._stats["evicted"] += 1
+        in_use = {path for path, _ in self._collections}
+        for path in [path for path in self._clients if path not in in_use]:
+            self._close_client(path)
+
+    def _close_client(self, path: str) -> None:
+        client = self._clients.pop(path)
+        try:
+            # PersistentClient 没有公开的 close()：停止其 System 并移出 chromadb 的进程级缓存，
+            # 否则同一路径再次打开时会拿到已停止的实例
+            system = getattr(client, "_system", None)
+            if system is not None:
+                system.stop()
+            cache = getattr(type(client), "_identifier_to_system", None)
+            if cache is not None:
+                cache.pop(getattr(client, "_identifier", path), None)
+            self._stats["clients_closed"] += 1
+            logger.info(f"ChromaDB client closed (Path: {path})")
+        except Exception as e:
+            logger.warning(f"Failed to close ChromaDB client for {path}: {e}")
+
+    def close(self) -> None:
+        """释放所有句柄并关闭所有客户端 (服务关闭时调用)"""
+        with self._lock:
+            self._collections.clear()
+            for path in list(self._clients):
+                self._close_client(path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "clients": len(self._clients), "open_collections": len(self._collections)}
+
+
 class VectorStore:
     """向量存储包装类 (ChromaDB)"""
     
@@ -16,22 +127,25 @@ class VectorStore:
         Args:
             collection_name: 集合名称
         """
+        self.collection_name = collection_name
         try:
-            self.client = chromadb.PersistentClient(
-                path=str(settings.CHROMA_PERSIST_DIR),
-                settings=ChromaSettings(allow_reset=True, anonymized_telemetry=False)
-            )
-            
-            # 不传递 metadata，避免 ChromaDB 配置序列化问题
-            self.collection = self.client.get_or_create_collection(
-                name=collection_name
-            )
-            logger.info(f"VectorStore initialized (Collection: {collection_name})")
+            chroma_registry.collection(collection_name)
+            logger.debug(f"VectorStore initialized (Collection: {collection_name})")
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}")
             logger.error(f"Full traceback:\n{traceback.format_exc()}")
             raise
 
+    @property
+    def client(self):
+        """共享的客户端 (被关闭后按需重新打开)"""
+        return chroma_registry.client()
+
+    @property
+    def collection(self):
+        """共享的集合句柄 (被空闲回收后按需重新打开)"""
+        return chroma_registry.collection(self.collection_name)
+
     def add(
         self,
         documents: List[str],
@@ -118,10 +232,17 @@ class VectorStore:
     def clear(self) -> None:
         """清空集合中的所有数据"""
         try:
-            name = self.collection.name
+            name = self.collection_name
             self.client.delete_collection(name)
-            self.collection = self.client.create_collection(name=name)
+            chroma_registry.replace(name, self.client.create_collection(name=name))
             logger.info(f"Cleared vector store collection: {name}")
         except Exception as e:
             logger.error(f"Failed to clear vector store: {e}")
             raise
+
+
+# 进程级单例
+chroma_registry = ChromaRegistry(
+    idle_seconds=settings.CHROMA_COLLECTION_IDLE_SECONDS,
+    max_collections=settings.CHROMA_MAX_OPEN_COLLECTIONS,
+)
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# 导入 config / utils.logger 时就会创建 DATA_DIR 与日志目录，先指向临时目录，避免写入服务的 data/
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="memory_system_tests_"))
+
+# memory_system 使用扁平导入 (from config import settings)，测试需把服务根目录加入路径
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "DATA_DIR", tmp_path)
+    return tmp_path
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+import storage.vector_store as vector_store
+from storage.vector_store import ChromaRegistry
+
+
+class FakeSystem:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeClient:
+    _identifier_to_system = {}
+    opened = []
+
+    def __init__(self, path, settings=None):
+        self._identifier = path
+        self._system = FakeSystem()
+        self.created = {}
+        FakeClient._identifier_to_system[path] = self._system
+        FakeClient.opened.append(self)
+
+    def get_or_create_collection(self, name):
+        return self.created.setdefault(name, object())
+
+    def delete_collection(self, name):
+        self.created.pop(name, None)
+
+    def create_collection(self, name):
+        self.created[name] = object()
+        return self.created[name]
+
+
+@pytest.fixture(autouse=True)
+def fake_chroma(monkeypatch):
+    FakeClient._identifier_to_system = {}
+    FakeClient.opened = []
+    monkeypatch.setattr(vector_store.chromadb, "PersistentClient", FakeClient)
+
+
+def test_lru_capacity_evicts_least_recently_used_handle():
+    registry = ChromaRegistry(max_collections=2)
+    first = registry.collection("a", path="p")
+    registry.collection("b", path="p")
+    registry.collection("a", path="p")  # a becomes most recently used
+    registry.collection("c", path="p")
+
+    assert set(name for _, name in registry._collections) == {"a", "c"}
+    assert registry.collection("a", path="p") is first
+    assert registry.stats()["evicted"] == 1
+    assert registry.stats()["hits"] == 2
+
+
+def test_idle_sweep_releases_handles_and_closes_unused_clients():
+    registry = ChromaRegistry(idle_seconds=0.01)
+    registry.collection("a", path="p")
+    client = registry.client("p")
+    time.sleep(0.02)
+
+    registry.sweep()
+
+    assert registry.stats()["open_collections"] == 0
+    assert client._system.stopped
+    assert "p" not in FakeClient._identifier_to_system
+    # 下次访问重新打开客户端
+    assert registry.client("p") is not client
+    assert registry.stats()["clients_closed"] == 1
+
+
+def test_hit_path_also_sweeps_idle_handles():
+    registry = ChromaRegistry(idle_seconds=0.01)
+    registry.collection("idle", path="p")
+    registry.collection("hot", path="p")
+    time.sleep(0.02)
+    registry.collection("hot", path="p")
+    # 上次清理已超过一分钟：只有命中，没有未命中，也会清理
+    registry._last_sweep -= 61
+    registry.collection("hot", path="p")
+
+    assert [name for _, name in registry._collections] == ["hot"]
+    assert registry.stats()["misses"] == 2
+
+
+def test_clear_swaps_the_cached_handle(monkeypatch):
+    registry = ChromaRegistry()
+    monkeypatch.setattr(vector_store, "chroma_registry", registry)
+    store = vector_store.VectorStore("episodic_u_a")
+    old = store.collection
+
+    store.clear()
+
+    assert store.collection is not old
+    assert store.collection is registry.client().created["episodic_u_a"]
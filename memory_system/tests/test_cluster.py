@@ -0,0 +1,146 @@
+import json
+
+import numpy as np
+import pytest
+
+from config import settings
+from core.cluster import ConceptCluster
+
+
+class FakeCollection:
+    def __init__(self, embeddings):
+        # id -> (embedding, document)
+        self.rows = {doc_id: (vector, f"doc {doc_id}") for doc_id, vector in embeddings.items()}
+
+    def get(self, ids=None, include=None):
+        ids = list(self.rows) if ids is None else [doc_id for doc_id in ids if doc_id in self.rows]
+        result = {"ids": ids}
+        if include and "embeddings" in include:
+            result["embeddings"] = [self.rows[doc_id][0] for doc_id in ids]
+        if include and "documents" in include:
+            result["documents"] = [self.rows[doc_id][1] for doc_id in ids]
+        return result
+
+
+class FakeVectorStore:
+    def __init__(self, embeddings):
+        self.collection = FakeCollection(embeddings)
+
+
+def _clusterer(embeddings, summaries=None):
+    clusterer = ConceptCluster.__new__(ConceptCluster)
+    clusterer.user_id, clusterer.agent_id = "u1", "a1"
+    clusterer.vector_store = FakeVectorStore(embeddings)
+    clusterer.state_path = ConceptCluster._state_path("u1", "a1")
+    clusterer.summarized = []
+
+    def summarize(docs):
+        clusterer.summarized.append(sorted(docs))
+        return f"Principle: {len(docs)} docs"
+
+    clusterer._summarize_cluster = summarize
+    return clusterer
+
+
+def _state(assignments, centroids, counts, summarized=None, fitted_count=None):
+    return {
+        "k": len(centroids),
+        "centroids": centroids,
+        "counts": counts,
+        "assignments": assignments,
+        "summarized": summarized or {},
+        "fitted_count": fitted_count if fitted_count is not None else len(assignments),
+    }
+
+
+def test_update_assigns_new_memories_and_keeps_running_mean_centroids():
+    clusterer = _clusterer({
+        "a": [0.0, 0.0], "b": [0.0, 0.0], "c": [10.0, 10.0],
+        "n1": [1.0, 1.0], "n2": [11.0, 11.0], "n3": [12.0, 12.0],
+    })
+    state = _state({"a": 0, "b": 0, "c": 1, "gone": 1}, [[0.0, 0.0], [10.0, 10.0]], [2, 1])
+
+    clusterer._update(state, ["a", "b", "c", "n1", "n2", "n3"])
+
+    assert state["assignments"] == {"a": 0, "b": 0, "c": 1, "n1": 0, "n2": 1, "n3": 1}
+    # 累计均值: (0 * 2 + 1) / 3 与 (10 * 1 + 11 + 12) / 3
+    assert np.allclose(state["centroids"], [[1 / 3, 1 / 3], [11.0, 11.0]])
+    assert state["counts"] == [3, 3]
+
+
+def test_remap_summaries_follows_members_to_new_labels():
+    summarized = {"0": ["a", "b", "c"], "1": ["x", "y"], "2": ["gone"]}
+    assignments = {"a": 1, "b": 1, "c": 0, "x": 0, "y": 0}
+
+    remapped = ConceptCluster._remap_summaries(summarized, assignments)
+
+    # 旧簇 0 的成员大多落在新簇 1，旧簇 1 落在新簇 0；成员全部消失的旧簇被丢弃
+    assert remapped == {"1": ["a", "b", "c"], "0": ["x", "y"]}
+
+
+def test_only_clusters_with_changed_members_are_resummarized(monkeypatch):
+    monkeypatch.setattr(settings, "CLUSTER_RESUMMARIZE_CHANGE", 0.3)
+    embeddings = {f"s{i}": [0.0, 0.0] for i in range(4)}
+    embeddings.update({f"m{i}": [10.0, 10.0] for i in range(4)})
+    embeddings["m4"] = [10.0, 10.0]
+    embeddings["m5"] = [10.0, 10.0]
+    clusterer = _clusterer(embeddings)
+    state = _state(
+        {**{f"s{i}": 0 for i in range(4)}, **{f"m{i}": 1 for i in range(4)}},
+        [[0.0, 0.0], [10.0, 10.0]], [4, 4],
+        summarized={"0": [f"s{i}" for i in range(4)], "1": [f"m{i}" for i in range(4)]},
+    )
+    clusterer._save_state(state)
+
+    principles = clusterer.cluster_and_abstract(k=2)
+
+    # 簇 0 未变化；簇 1 增加两条 (Jaccard 4/6 <= 0.7)，只重新总结它
+    assert principles == ["Principle: 6 docs"]
+    assert clusterer.summarized == [sorted(f"doc m{i}" for i in range(6))]
+    saved = json.loads(clusterer.state_path.read_text())
+    assert sorted(saved["summarized"]["1"]) == [f"m{i}" for i in range(6)]
+    assert saved["summarized"]["0"] == [f"s{i}" for i in range(4)]
+
+
+@pytest.mark.parametrize("ids, refit", [
+    ([f"d{i}" for i in range(6)] + ["n0", "n1", "n2"], False),
+    ([f"d{i}" for i in range(6)] + [f"n{i}" for i in range(6)], True),  # 记忆量翻倍
+    (["d0", "d1"] + [f"n{i}" for i in range(4)], True),  # 大部分已分配的记忆被删除
+])
+def test_full_fit_when_collection_doubles_or_is_mostly_replaced(ids, refit):
+    state = _state({f"d{i}": i % 2 for i in range(6)}, [[0.0], [1.0]], [3, 3])
+    assert ConceptCluster._needs_full_fit(state, ids, k=2) is refit
+    assert ConceptCluster._needs_full_fit(state, ids, k=3) is True
+
+
+def test_clear_state_removes_the_state_file():
+    clusterer = _clusterer({})
+    clusterer._save_state(_state({"a": 0}, [[0.0]], [1]))
+    assert clusterer.state_path.exists()
+
+    ConceptCluster.clear_state("u1", "a1")
+
+    assert not clusterer.state_path.exists()
+    ConceptCluster.clear_state("u1", "a1")
+
+
+def test_clear_memory_drops_cluster_state(monkeypatch):
+    from core.manager import MemoryManager
+
+    class Clearable:
+        def clear(self):
+            pass
+
+        def flush(self):
+            pass
+
+    manager = MemoryManager()
+    monkeypatch.setattr(manager.episodic_memories, "factory", lambda user_id, agent_id: Clearable())
+    monkeypatch.setattr(manager.semantic_memories, "factory", lambda user_id, agent_id: Clearable())
+    clusterer = _clusterer({})
+    clusterer._save_state(_state({"a": 0}, [[0.0]], [1]))
+
+    assert manager.clear_memory("u1", "a1")["status"] == "success"
+
+    # 否则清空后的新记忆会被分配到已删除数据的旧质心上
+    assert not clusterer.state_path.exists()
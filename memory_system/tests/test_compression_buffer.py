@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from config import settings
+from core.manager import MemoryManager
+from core.working_memory import WorkingMemory
+
+
+@pytest.fixture(autouse=True)
+def small_limits(monkeypatch):
+    monkeypatch.setattr(settings, "WORKING_MEMORY_MAX_ITEMS", 3)
+    monkeypatch.setattr(settings, "WORKING_MEMORY_MAX_TOKENS", 100000)
+    monkeypatch.setattr(settings, "COMPRESSION_BUFFER_MAX_ITEMS", 3)
+    monkeypatch.setattr(settings, "COMPRESSION_BUFFER_MAX_TOKENS", 100000)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = MemoryManager()
+    batches = []
+    monkeypatch.setattr(manager, "_extract_insights", lambda user_id, agent_id, items: batches.append(
+        [item["content"] for item in items]))
+    monkeypatch.setattr(manager, "_handle_persona_update", lambda *args: None)
+    monkeypatch.setattr(manager, "run_clustering", lambda *args: None)
+    manager.batches = batches
+    return manager
+
+
+def _add(manager, *contents):
+    for content in contents:
+        manager.add_memory("u1", "a1", content)
+
+
+def _pending(manager):
+    with manager.working_memories.lease("u1", "a1") as wm:
+        return [item["content"] for item in wm.get_pending_compression()]
+
+
+def test_evicted_items_wait_for_the_count_threshold(manager):
+    # 容量 3：第 4、5 条各挤出一条，未达到 3 条的阈值
+    _add(manager, "m0", "m1", "m2", "m3", "m4")
+    assert manager.batches == []
+    assert _pending(manager) == ["m0", "m1"]
+
+    # 没有运行中的 Worker：达到阈值时同步提取整批，并从待提取列表中确认
+    _add(manager, "m5")
+    assert manager.batches == [["m0", "m1", "m2"]]
+    assert _pending(manager) == []
+    assert manager._compressing["u1:a1"] == set()
+
+
+def test_token_threshold_flushes_a_smaller_batch(manager, monkeypatch):
+    monkeypatch.setattr(settings, "COMPRESSION_BUFFER_MAX_TOKENS", 1)
+    _add(manager, "m0", "m1", "m2", "m3")
+    assert manager.batches == [["m0"]]
+
+
+def test_pending_items_survive_a_restart_and_are_drained_by_finalize(manager, monkeypatch):
+    _add(manager, "m0", "m1", "m2", "m3", "m4")
+    assert manager.batches == []
+
+    # 模拟进程崩溃：新的 MemoryManager 从 WorkingMemory 的快照 + 日志恢复
+    restarted = MemoryManager()
+    batches = []
+    monkeypatch.setattr(restarted, "_extract_insights", lambda user_id, agent_id, items: batches.append(
+        [item["content"] for item in items]))
+    monkeypatch.setattr(restarted, "_handle_persona_update", lambda *args: None)
+    monkeypatch.setattr(restarted, "run_clustering", lambda *args: None)
+    assert _pending(restarted) == ["m0", "m1"]
+
+    asyncio.run(restarted._process_finalize_task("u1", "a1"))
+
+    assert batches == [["m0", "m1", "m2", "m3", "m4"]]
+    assert _pending(restarted) == []
+    assert WorkingMemory("u1", "a1").pending_compression == []
+
+
+def test_failed_extraction_keeps_items_pending(manager, monkeypatch):
+    def fail(user_id, agent_id, items):
+        raise RuntimeError("llm down")
+
+    monkeypatch.setattr(manager, "_extract_insights", fail)
+    with pytest.raises(RuntimeError):
+        _add(manager, "m0", "m1", "m2", "m3", "m4", "m5")
+
+    assert _pending(manager) == ["m0", "m1", "m2"]
+    assert manager._compressing["u1:a1"] == set()
+
+
+def test_queued_batch_is_not_submitted_twice(manager):
+    async def scenario():
+        manager._ensure_worker_started()
+        await asyncio.to_thread(_add, manager, "m0", "m1", "m2", "m3", "m4", "m5", "m6")
+        # 投递后、Worker 确认前再次挤出的条目不会把同一批重新投递
+        await asyncio.sleep(0.05)
+        await manager.task_queue.join()
+
+    asyncio.run(scenario())
+
+    assert manager.batches == [["m0", "m1", "m2"]]
+    assert _pending(manager) == ["m3"]
+
+
+def test_clear_memory_discards_pending_items(manager, monkeypatch):
+    monkeypatch.setattr(manager.episodic_memories, "factory", lambda user_id, agent_id: _Clearable())
+    monkeypatch.setattr(manager.semantic_memories, "factory", lambda user_id, agent_id: _Clearable())
+    _add(manager, "m0", "m1", "m2", "m3")
+
+    assert manager.clear_memory("u1", "a1")["status"] == "success"
+
+    assert _pending(manager) == []
+    assert WorkingMemory("u1", "a1").pending_compression == []
+
+
+class _Clearable:
+    def clear(self):
+        pass
+
+    def flush(self):
+        pass
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+from config import settings
+from core.episodic_memory import EpisodicMemory
+
+
+def _matches(meta, where):
+    for clause in where.get("$and", [where]):
+        (field, cond), = clause.items()
+        value = meta.get(field)
+        if isinstance(cond, dict):
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$gte" in cond and (value is None or value < cond["$gte"]):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeCollection:
+    """按写入顺序返回，先过滤再截断 limit (与 Chroma 的 get 一致)"""
+
+    def __init__(self, metadatas):
+        self.rows = {f"id{i}": meta for i, meta in enumerate(metadatas)}
+        self.metadata = None
+        self.calls = []
+
+    def get(self, ids=None, where=None, include=None, limit=None):
+        self.calls.append({"ids": ids, "where": where, "include": include, "limit": limit})
+        rows = [
+            (memory_id, m) for memory_id, m in self.rows.items()
+            if (ids is None or memory_id in ids) and (where is None or _matches(m, where))
+        ][:limit]
+        return {
+            "ids": [memory_id for memory_id, _ in rows],
+            "metadatas": [m for _, m in rows] if "metadatas" in (include or []) else None,
+        }
+
+    def update(self, ids, metadatas):
+        for memory_id, meta in zip(ids, metadatas):
+            self.rows[memory_id] = meta
+
+    def modify(self, metadata=None):
+        self.metadata = metadata
+
+
+class FakeVectorStore:
+    def __init__(self, metadatas):
+        self.collection = FakeCollection(metadatas)
+
+
+def _memory(metadatas):
+    memory = EpisodicMemory.__new__(EpisodicMemory)
+    memory.vector_store = FakeVectorStore(metadatas)
+    memory.vector_store.collection_name = "episodic_u_a"
+    return memory
+
+
+def _insights(symbol, count, days_ago):
+    """从 days_ago 天前开始每天一条、观点交替变化的见解，按写入顺序 (最旧的在前)"""
+    start = datetime.now() - timedelta(days=days_ago)
+    rows = []
+    for i in range(count):
+        when = start + timedelta(days=i)
+        rows.append({
+            "event_type": "InvestmentInsight",
+            "symbol": symbol,
+            "viewpoint": "bullish" if i % 2 else "bearish",
+            "timestamp": when.isoformat(),
+            "ts": when.timestamp(),
+        })
+    return rows
+
+
+def test_conflicts_compare_latest_insights_beyond_scan_limit(monkeypatch):
+    monkeypatch.setattr(settings, "CONFLICT_SCAN_LIMIT", 50)
+    monkeypatch.setattr(settings, "CONFLICT_HORIZON_DAYS", 30)
+    monkeypatch.setattr(settings, "CONFLICT_HISTORY_PER_SYMBOL", 5)
+    # 400 条超出时间窗口的旧见解先写入，远超扫描上限
+    recent = _insights("AAPL", 20, days_ago=20)
+    memory = _memory(_insights("AAPL", 400, days_ago=1000) + recent + _insights("TSLA", 3, days_ago=5))
+
+    conflicts = memory._find_conflicts(["AAPL", "TSLA"])
+
+    # 只比较最近的 5 条 AAPL 见解
+    assert len(conflicts["AAPL"]) == 4
+    assert conflicts["AAPL"][0]["prev"]["timestamp"] == recent[-5]["timestamp"]
+    assert conflicts["AAPL"][-1]["curr"]["timestamp"] == recent[-1]["timestamp"]
+    assert len(conflicts["TSLA"]) == 2
+
+
+def test_conflict_lookup_is_bounded_per_symbol(monkeypatch):
+    monkeypatch.setattr(settings, "CONFLICT_SCAN_LIMIT", 10)
+    monkeypatch.setattr(settings, "CONFLICT_HISTORY_PER_SYMBOL", 5)
+    # 一个活跃标的在时间窗口内的见解远多于扫描上限，不能挤掉其他标的
+    aapl = _insights("AAPL", 40, days_ago=40)
+    memory = _memory(aapl + _insights("TSLA", 3, days_ago=2))
+
+    conflicts = memory._find_conflicts(["AAPL", "TSLA"])
+
+    calls = memory.vector_store.collection.calls
+    scans = [call for call in calls if "$and" in (call["where"] or {})]
+    assert [call["where"]["$and"][1] for call in scans] == [{"symbol": "AAPL"}, {"symbol": "TSLA"}]
+    assert all(call["include"] == [] for call in scans)
+    reads = [call for call in calls if call["ids"] is not None]
+    assert [len(call["ids"]) for call in reads] == [10, 3]
+    assert len(conflicts["TSLA"]) == 2
+    # 读的是窗口内最新的一页，而不是最旧的一页
+    assert len(conflicts["AAPL"]) == 4
+    assert conflicts["AAPL"][-1]["curr"]["timestamp"] == aapl[-1]["timestamp"]
+
+
+def test_insights_without_ts_are_backfilled(monkeypatch):
+    monkeypatch.setattr(settings, "CONFLICT_HORIZON_DAYS", 30)
+    legacy = _insights("AAPL", 3, days_ago=10)
+    for meta in legacy:
+        del meta["ts"]
+    memory = _memory(legacy)
+
+    conflicts = memory._find_conflicts(["AAPL"])
+
+    assert len(conflicts["AAPL"]) == 2
+    rows = memory.vector_store.collection.rows.values()
+    assert all(m["ts"] == datetime.fromisoformat(m["timestamp"]).timestamp() for m in rows)
+
+    # 回填完成记在集合 metadata 上，重建的实例不再全量扫描
+    collection = memory.vector_store.collection
+    assert collection.metadata == {"insight_ts_backfilled": True}
+    collection.calls.clear()
+    rebuilt = _memory([])
+    rebuilt.vector_store.collection = collection
+    rebuilt._find_conflicts(["AAPL"])
+    assert {"event_type": "InvestmentInsight"} not in [call["where"] for call in collection.calls]
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.embeddings import EmbeddingBatcher
+
+
+def test_concurrent_requests_share_one_encode():
+    calls = []
+
+    def encode(texts):
+        calls.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+    batcher = EmbeddingBatcher(encode, max_batch=64, window=0.05)
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda t: batcher.submit([t, "dup"]), [f"text{i}" for i in range(8)]))
+
+    assert results[0] == [[5.0], [3.0]]
+    # 8 callers x 2 texts were merged into a few encoder calls, "dup" deduplicated per batch
+    assert len(calls) < 8
+    assert sum(len(c) for c in calls) < 16
+
+
+def test_failed_batch_fails_callers_without_stalling_worker():
+    fail = threading.Event()
+    fail.set()
+
+    def encode(texts):
+        if fail.is_set():
+            raise ConnectionError("down")
+        return [[1.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(encode, window=0.0)
+    started = time.monotonic()
+    with pytest.raises(ConnectionError):
+        batcher.submit(["a"])
+    assert time.monotonic() - started < 1.0  # no retry back-off inside the worker
+
+    fail.clear()
+    assert batcher.submit(["b"]) == [[1.0]]
+
+
+def test_short_encoder_result_fails_batch_and_worker_survives():
+    short = threading.Event()
+    short.set()
+
+    def encode(texts):
+        # the model dropping a vector must not leave callers waiting forever
+        return [[1.0] for _ in texts[1:]] if short.is_set() else [[1.0] for _ in texts]
+
+    batcher = EmbeddingBatcher(encode, window=0.0)
+    with pytest.raises(ValueError):
+        batcher.submit(["a"])
+
+    short.clear()
+    assert batcher.submit(["b"]) == [[1.0]]
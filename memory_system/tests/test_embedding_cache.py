@@ -0,0 +1,28 @@
+from utils.embeddings import EmbeddingCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = EmbeddingCache(max_items=2)
+    cache.put_many({"a": [1.0], "b": [2.0]})
+    assert cache.get("a") == [1.0]  # "a" 变为最近使用
+    cache.put_many({"c": [3.0]})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [1.0]
+    assert cache.get("c") == [3.0]
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "embedding_cache.db")
+    key = EmbeddingCache.key("model", "hello")
+    EmbeddingCache(disk_path=path).put_many({key: [0.5, 0.25]})
+
+    reopened = EmbeddingCache(disk_path=path)
+    assert reopened.get(key) == [0.5, 0.25]
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_key_depends_on_model_and_text():
+    assert EmbeddingCache.key("m1", "t") == EmbeddingCache.key("m1", "t")
+    assert EmbeddingCache.key("m1", "t") != EmbeddingCache.key("m2", "t")
+    assert EmbeddingCache.key("m1", "t") != EmbeddingCache.key("m1", "u")
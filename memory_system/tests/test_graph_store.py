@@ -0,0 +1,84 @@
+import json
+
+from config import settings
+from storage.graph_store import GraphStore
+
+
+def _add(store, i):
+    store.add_event(f"e{i}", ["AAPL", f"T{i}"], [("AAPL", "mentions", f"T{i}")], f"2024-01-{i + 1:02d}")
+
+
+def test_reload_replays_edge_log():
+    store = GraphStore("graph_u_a.json")
+    for i in range(3):
+        _add(store, i)
+    store.flush()
+
+    assert not store.file_path.exists()
+    reloaded = GraphStore("graph_u_a.json")
+    assert reloaded.get_stats() == {"nodes": 4, "edges": 3}
+    assert sorted(reloaded.get_related_entities(["AAPL"])) == ["AAPL", "T0", "T1", "T2"]
+
+
+def test_compaction_folds_log_into_snapshot(monkeypatch):
+    monkeypatch.setattr(settings, "GRAPH_COMPACT_OPS", 3)
+    store = GraphStore("graph_u_a.json")
+    for i in range(4):
+        _add(store, i)
+    store.flush()
+
+    assert store.log_path.read_text() == ""
+    snapshot = json.loads(store.file_path.read_text())
+    assert snapshot["graph"]["log_seq"] == 4
+
+    # 压缩后继续追加，seq 接着快照往后编号
+    _add(store, 4)
+    store.flush()
+    assert [json.loads(line)["seq"] for line in store.log_path.read_text().splitlines()] == [5]
+    assert GraphStore("graph_u_a.json").get_stats() == {"nodes": 6, "edges": 5}
+
+
+def test_ops_already_in_snapshot_are_not_replayed_twice(monkeypatch):
+    store = GraphStore("graph_u_a.json")
+    for i in range(2):
+        _add(store, i)
+    store.flush()
+    log = store.log_path.read_text()
+
+    # 模拟写完快照、尚未清空日志时崩溃：日志中的操作已包含在快照里
+    monkeypatch.setattr(settings, "GRAPH_COMPACT_OPS", 1)
+    store.flush()
+    store.log_path.write_text(log)
+
+    assert GraphStore("graph_u_a.json").get_stats() == {"nodes": 3, "edges": 2}
+
+
+def test_torn_log_tail_is_ignored():
+    store = GraphStore("graph_u_a.json")
+    _add(store, 0)
+    store.flush()
+    with open(store.log_path, "a", encoding="utf-8") as f:
+        f.write('{"nodes": ["AAPL"], "edg')
+
+    reloaded = GraphStore("graph_u_a.json")
+    assert reloaded.get_stats() == {"nodes": 2, "edges": 1}
+    assert reloaded._seq == 1
+
+    # 重新加载时截掉残缺行，之后追加的操作在下次加载时仍能重放
+    _add(reloaded, 1)
+    reloaded.flush()
+    assert [json.loads(line)["seq"] for line in reloaded.log_path.read_text().splitlines()] == [1, 2]
+    assert GraphStore("graph_u_a.json").get_stats() == {"nodes": 3, "edges": 2}
+
+
+def test_record_without_newline_is_treated_as_torn():
+    store = GraphStore("graph_u_a.json")
+    _add(store, 0)
+    store.flush()
+    with open(store.log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"seq": 2, "nodes": ["MSFT"], "edges": []}))
+
+    reloaded = GraphStore("graph_u_a.json")
+    _add(reloaded, 1)
+    reloaded.flush()
+    assert GraphStore("graph_u_a.json").get_stats() == {"nodes": 3, "edges": 2}
@@ -0,0 +1,118 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.instance_cache import InstanceCache
+
+
+class Instance:
+    def __init__(self, user_id, agent_id):
+        self.key = f"{user_id}:{agent_id}"
+        self.flushed = 0
+
+    def flush(self):
+        self.flushed += 1
+
+
+def test_capacity_eviction_flushes_least_recently_used():
+    cache = InstanceCache("test", Instance, capacity=2, idle_ttl=0)
+    first = cache.get("u1", "a")
+    cache.get("u2", "a")
+    cache.get("u1", "a")  # u1 becomes most recently used
+    cache.get("u3", "a")
+
+    assert "u2:a" not in cache
+    assert "u1:a" in cache and "u3:a" in cache
+    assert first.flushed == 0
+    assert cache.stats()["evicted_capacity"] == 1
+
+
+def test_idle_sweep_flushes_and_reloads_from_factory():
+    cache = InstanceCache("test", Instance, capacity=8, idle_ttl=0.01)
+    old = cache.get("u1", "a")
+    time.sleep(0.02)
+    cache.sweep()
+
+    assert "u1:a" not in cache
+    assert old.flushed == 1
+    assert cache.get("u1", "a") is not old
+
+
+def test_leased_instance_is_not_evicted():
+    cache = InstanceCache("test", Instance, capacity=1, idle_ttl=0)
+
+    with cache.lease("u1", "a") as held:
+        cache.get("u2", "a")
+        cache.get("u3", "a")
+        # u1 is pinned: capacity eviction skips it and drops the unpinned entries instead
+        assert "u1:a" in cache
+        assert held.flushed == 0
+        assert cache.get("u1", "a") is held
+
+    cache.get("u4", "a")
+    assert "u1:a" not in cache
+    assert held.flushed == 1
+
+
+def test_idle_sweep_skips_pinned_instances():
+    cache = InstanceCache("test", Instance, capacity=8, idle_ttl=0.01)
+    with cache.lease("u1", "a") as held:
+        time.sleep(0.02)
+        cache.sweep()
+        assert "u1:a" in cache
+    time.sleep(0.02)
+    cache.sweep()
+    assert "u1:a" not in cache
+    assert held.flushed == 1
+
+
+def test_concurrent_gets_load_once():
+    loads = []
+
+    def factory(user_id, agent_id):
+        loads.append(user_id)
+        time.sleep(0.05)
+        return Instance(user_id, agent_id)
+
+    cache = InstanceCache("test", factory)
+    with ThreadPoolExecutor(8) as pool:
+        instances = list(pool.map(lambda _: cache.get("u1", "a"), range(8)))
+
+    assert loads == ["u1"]
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_slow_load_does_not_block_other_keys():
+    release = threading.Event()
+
+    def factory(user_id, agent_id):
+        if user_id == "slow":
+            release.wait(5)
+        return Instance(user_id, agent_id)
+
+    cache = InstanceCache("test", factory)
+    with ThreadPoolExecutor(1) as pool:
+        slow = pool.submit(cache.get, "slow", "a")
+        started = time.monotonic()
+        assert cache.get("fast", "a").key == "fast:a"
+        assert time.monotonic() - started < 1.0
+        release.set()
+        assert slow.result(5).key == "slow:a"
+
+
+def test_failed_load_releases_waiters():
+    attempts = []
+
+    def factory(user_id, agent_id):
+        attempts.append(user_id)
+        if len(attempts) == 1:
+            raise OSError("disk")
+        return Instance(user_id, agent_id)
+
+    cache = InstanceCache("test", factory)
+    try:
+        cache.get("u1", "a")
+    except OSError:
+        pass
+    assert cache.get("u1", "a").key == "u1:a"
+    assert len(attempts) == 2
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+from core.manager import MemoryManager
+
+
+def test_tasks_for_same_key_run_serially_in_order(monkeypatch):
+    manager = MemoryManager()
+    events = []
+
+    async def run_task(task):
+        events.append(("start", task["user_id"], task["n"]))
+        await asyncio.sleep(0.01)
+        events.append(("end", task["user_id"], task["n"]))
+
+    monkeypatch.setattr(manager, "_run_task", run_task)
+
+    async def scenario():
+        workers = [asyncio.create_task(manager._background_worker(i)) for i in range(3)]
+        for n in range(3):
+            manager.task_queue.put_nowait({"user_id": "u1", "agent_id": "a", "n": n})
+        manager.task_queue.put_nowait({"user_id": "u2", "agent_id": "a", "n": 0})
+        await manager.task_queue.join()
+        while manager._active_keys:
+            await asyncio.sleep(0.01)
+        for worker in workers:
+            worker.cancel()
+
+    asyncio.run(scenario())
+
+    u1 = [(kind, n) for kind, user, n in events if user == "u1"]
+    assert u1 == [("start", 0), ("end", 0), ("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+    # 其他用户的任务不等待 u1 的队列
+    assert events.index(("start", "u2", 0)) < events.index(("end", "u1", 0))
+    assert not manager._pending_by_key
+
+
+def test_pool_stats_can_be_read_while_workers_run(monkeypatch):
+    manager = MemoryManager()
+    errors = []
+    done = threading.Event()
+
+    async def run_task(task):
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(manager, "_run_task", run_task)
+
+    def reader():
+        while not done.is_set():
+            try:
+                manager._pool_snapshot()
+            except RuntimeError as e:
+                errors.append(e)
+
+    async def scenario():
+        workers = [asyncio.create_task(manager._background_worker(i)) for i in range(4)]
+        for n in range(2000):
+            manager.task_queue.put_nowait({"user_id": f"u{n % 50}", "agent_id": "a", "n": n})
+        await manager.task_queue.join()
+        while manager._active_keys:
+            await asyncio.sleep(0.01)
+        for worker in workers:
+            worker.cancel()
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        asyncio.run(scenario())
+    finally:
+        done.set()
+        thread.join()
+
+    assert errors == []
+    assert manager._pool_snapshot() == (0, 0)
@@ -0,0 +1,218 @@
+import math
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from config import settings
+from core.garbage_collector import MemoryGarbageCollector
+from storage.memory_index import MemoryIndex
+
+DAY = 86400.0
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MemoryIndex(str(tmp_path / "memory_index.db"), decay_rate=0.1)
+
+
+def _iso(days_ago: float) -> str:
+    return (datetime.now() - timedelta(days=days_ago)).isoformat()
+
+
+def _scores(index: MemoryIndex, collection: str):
+    """按 GC 的定义直接计算 importance * exp(-λ * 距最近使用的天数)"""
+    now = time.time()
+    rows = index._db.execute(
+        "SELECT id, importance, last_access FROM memory_index WHERE collection = ?", (collection,)
+    ).fetchall()
+    return {
+        memory_id: importance * math.exp(-index.decay_rate * (now - last_access) / DAY)
+        for memory_id, importance, last_access in rows
+    }
+
+
+def test_lowest_follows_decayed_importance(index):
+    index.record("c", [
+        ("old_important", _iso(30), 0.9, 10),
+        ("new_trivial", _iso(0), 0.1, 20),
+        ("mid", _iso(10), 0.5, 30),
+        ("recent_important", _iso(1), 0.9, 40),
+    ])
+
+    scores = _scores(index, "c")
+    assert [memory_id for memory_id, _ in index.lowest("c", 4)] == sorted(scores, key=scores.get)
+    # 0.9 * e^-3 ≈ 0.045 < 0.1：30 天未使用的高重要度记忆先于新的低重要度记忆被淘汰
+    assert index.lowest("c", 2) == [("old_important", 10), ("new_trivial", 20)]
+
+
+def test_touch_keeps_order_equal_to_decayed_score(index):
+    index.record("c", [(f"m{i}", _iso(i * 7), 0.2 + 0.1 * (i % 5), 1) for i in range(12)])
+
+    index.touch("c", ["m11", "m3"])
+    index.touch("c", ["m7"])
+
+    scores = _scores(index, "c")
+    assert [memory_id for memory_id, _ in index.lowest("c", 12)] == sorted(scores, key=scores.get)
+    # 最旧的 m11 被访问后不再是最先淘汰的候选
+    assert "m11" not in [memory_id for memory_id, _ in index.lowest("c", 3)]
+
+
+def test_lowest_is_scoped_to_collection(index):
+    index.record("a", [("a1", _iso(100), 0.1, 1)])
+    index.record("b", [("b1", _iso(0), 0.9, 1)])
+    assert index.lowest("b", 5) == [("b1", 1)]
+    assert index.collections() == {"a": 1, "b": 1}
+
+
+class FakeCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, ids=None, include=None):
+        if ids is not None:
+            return {"embeddings": [[0.0] * 8 for _ in ids]}
+        ids = list(self.store.rows)
+        return {
+            "ids": ids,
+            "metadatas": [self.store.rows[i][0] for i in ids],
+            "documents": [self.store.rows[i][1] for i in ids],
+        }
+
+
+class FakeStore:
+    def __init__(self, name, rows, fail_on_batch=None):
+        self.collection_name = name
+        self.rows = rows
+        self.collection = FakeCollection(self)
+        self.fail_on_batch = fail_on_batch
+        self.batches = []
+
+    def count(self):
+        return len(self.rows)
+
+    def delete(self, ids):
+        self.batches.append(list(ids))
+        if len(self.batches) == self.fail_on_batch:
+            raise ConnectionError("chroma down")
+        for memory_id in ids:
+            self.rows.pop(memory_id, None)
+
+
+def _rows(count):
+    return {
+        f"m{i:03d}": ({"timestamp": _iso(count - i), "importance": 0.5}, "x" * (i + 1))
+        for i in range(count)
+    }
+
+
+def test_backfill_registers_unindexed_memories_without_overwriting(index):
+    store = FakeStore("c", _rows(5))
+    index.record("c", [("m004", _iso(0), 0.9, 99)])
+    index.touch("c", ["m004"])
+    before = index._db.execute("SELECT importance, size FROM memory_index WHERE id = 'm004'").fetchone()
+
+    MemoryGarbageCollector(index).ensure_indexed(store)
+
+    assert index.count("c") == 5
+    # 已登记的行 (含访问记录) 不被回填覆盖
+    assert index._db.execute("SELECT importance, size FROM memory_index WHERE id = 'm004'").fetchone() == before
+    assert dict(index.lowest("c", 5))["m000"] == 1
+
+
+def test_backfill_skipped_when_index_is_complete(index):
+    store = FakeStore("c", _rows(2))
+    index.record("c", [("m000", None, 0.5, 1), ("m001", None, 0.5, 2)])
+    store.collection = None  # 不应再读取向量库
+    MemoryGarbageCollector(index).ensure_indexed(store)
+
+
+def test_collect_accounts_only_for_deleted_batches(index, monkeypatch):
+    monkeypatch.setattr(settings, "GC_TARGET_RATIO", 0.5)
+    monkeypatch.setattr(settings, "GC_DELETE_BATCH", 3)
+    store = FakeStore("c", _rows(20), fail_on_batch=3)
+    gc = MemoryGarbageCollector(index)
+
+    report = gc.collect(store, soft_limit=10)
+
+    # 需要淘汰 20 - 5 = 15 条，第 3 批失败：只有前两批 6 条被删除
+    assert [len(batch) for batch in store.batches] == [3, 3, 3]
+    deleted = store.batches[0] + store.batches[1]
+    assert report["vectors_reclaimed"] == 6
+    assert report["bytes_reclaimed"] == sum(int(memory_id[1:]) + 1 for memory_id in deleted) + 6 * 8 * 4
+    assert index.count("c") == 14
+    assert not set(deleted) & {memory_id for memory_id, _ in index.lowest("c", 20)}
+    # 失败批次仍留在索引中，下次 GC 会再次选中
+    assert {memory_id for memory_id, _ in index.lowest("c", 3)} == set(store.batches[2])
+    assert gc.totals == {"runs": 1, "vectors_reclaimed": 6, "bytes_reclaimed": report["bytes_reclaimed"]}
+
+
+def test_collect_evicts_lowest_scores_first(index, monkeypatch):
+    monkeypatch.setattr(settings, "GC_TARGET_RATIO", 0.5)
+    store = FakeStore("c", _rows(20))
+    gc = MemoryGarbageCollector(index)
+    gc.ensure_indexed(store)
+    index.touch("c", ["m000"])
+
+    report = gc.collect(store, soft_limit=10)
+
+    assert report["vectors_reclaimed"] == 15
+    # 最旧的条目被淘汰，刚被访问的 m000 保留
+    assert "m000" in store.rows
+    assert set(store.rows) == {"m000", "m016", "m017", "m018", "m019"}
+
+
+def test_process_index_opens_lazily_under_data_dir(data_dir, monkeypatch):
+    import storage.memory_index as module
+
+    monkeypatch.setattr(module, "_memory_index", None)
+    assert not (data_dir / "memory_index.db").exists()
+    assert module.get_memory_index() is module.get_memory_index()
+    assert (data_dir / "memory_index.db").exists()
+
+
+class FakeClient:
+    def __init__(self, names):
+        self.names = names
+
+    def list_collections(self):
+        return list(self.names)
+
+
+def test_collect_all_trims_collections_only_known_to_chroma(index, monkeypatch):
+    monkeypatch.setattr(settings, "GC_SOFT_LIMIT", 10)
+    monkeypatch.setattr(settings, "GC_TARGET_RATIO", 0.5)
+    stores = {
+        "episodic_u1_a": FakeStore("episodic_u1_a", _rows(20)),
+        "episodic_u2_a": FakeStore("episodic_u2_a", _rows(4)),
+        "semantic_u1_a": FakeStore("semantic_u1_a", _rows(20)),
+    }
+    # 升级前的集合：侧索引中完全没有登记
+    assert index.collections() == {}
+    gc = MemoryGarbageCollector(
+        index, client=FakeClient(stores), store_factory=lambda collection_name: stores[collection_name]
+    )
+
+    reports = gc.collect_all()
+
+    assert [r["collection"] for r in reports] == ["episodic_u1_a"]
+    assert reports[0]["vectors_reclaimed"] == 15
+    assert len(stores["episodic_u1_a"].rows) == 5
+    assert index.count("episodic_u1_a") == 5
+    # 未超过软上限 / 非中期记忆的集合不受影响
+    assert len(stores["episodic_u2_a"].rows) == 4
+    assert len(stores["semantic_u1_a"].rows) == 20
+
+
+def test_collect_all_backfills_when_index_lags_store(index, monkeypatch):
+    monkeypatch.setattr(settings, "GC_SOFT_LIMIT", 10)
+    monkeypatch.setattr(settings, "GC_TARGET_RATIO", 0.5)
+    store = FakeStore("episodic_u1_a", _rows(20))
+    # 侧索引只登记了新写入的几条，按索引计数不会超过软上限
+    index.record("episodic_u1_a", [("m019", _iso(0), 0.5, 20), ("m018", _iso(1), 0.5, 19)])
+    gc = MemoryGarbageCollector(index, client=FakeClient([store.collection_name]), store_factory=lambda collection_name: store)
+
+    reports = gc.collect_all()
+
+    assert reports and reports[0]["count_before"] == 20
+    assert set(store.rows) == {"m015", "m016", "m017", "m018", "m019"}
@@ -0,0 +1,81 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from config import settings
+from core.working_memory import WorkingMemory
+
+
+@pytest.fixture(autouse=True)
+def journal_settings(monkeypatch):
+    monkeypatch.setattr(settings, "WORKING_MEMORY_JOURNAL_COMPACT_OPS", 1000)
+
+
+def _journal_ops(wm):
+    with open(wm.journal_path, encoding="utf-8") as f:
+        return [json.loads(line)["op"] for line in f]
+
+
+def test_replay_restores_adds_finalize_and_clear():
+    wm = WorkingMemory("u1", "a1")
+    for i in range(5):
+        wm.add({"content": f"message {i}"})
+    wm.mark_finalized()
+    wm.clear(keep_last_n=2)
+    wm.add({"content": "after clear"})
+
+    # Every mutation is a journal line; no snapshot was written
+    assert _journal_ops(wm) == ["add"] * 5 + ["finalize", "clear", "add"]
+    assert not wm.file_path.exists()
+
+    restored = WorkingMemory("u1", "a1")
+    assert [i["content"] for i in restored.items] == ["message 3", "message 4", "after clear"]
+    assert [i["finalized"] for i in restored.items] == [True, True, False]
+    assert restored.total_tokens() == wm.total_tokens()
+    assert restored._seq == wm._seq
+
+
+def test_torn_tail_is_dropped_and_compacted():
+    wm = WorkingMemory("u1", "a1")
+    wm.add({"content": "kept"})
+    with open(wm.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "add", "item": {"content": "tor')
+
+    restored = WorkingMemory("u1", "a1")
+    assert [i["content"] for i in restored.items] == ["kept"]
+    # Re-compacted: snapshot holds the state, journal is empty
+    assert restored.journal_path.read_text() == ""
+    assert json.loads(restored.file_path.read_text())["seq"] == 1
+
+
+def test_entries_already_in_snapshot_are_not_replayed_twice(monkeypatch):
+    monkeypatch.setattr(settings, "WORKING_MEMORY_JOURNAL_COMPACT_OPS", 3)
+    wm = WorkingMemory("u1", "a1")
+    for i in range(4):
+        wm.add({"content": f"m{i}"})
+
+    # Ops 1-3 were compacted into the snapshot, op 4 is in the journal
+    assert json.loads(wm.file_path.read_text())["seq"] == 3
+    assert len(_journal_ops(wm)) == 1
+
+    restored = WorkingMemory("u1", "a1")
+    assert [i["content"] for i in restored.items] == ["m0", "m1", "m2", "m3"]
+
+
+def test_concurrent_adds_replay_to_the_same_state(monkeypatch):
+    monkeypatch.setattr(settings, "WORKING_MEMORY_MAX_ITEMS", 7)
+    wm = WorkingMemory("u", "a")
+
+    def writer(n):
+        for i in range(40):
+            wm.add({"content": f"w{n}-{i}", "role": "user"})
+            if i % 10 == 0:
+                wm.flush()
+
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(writer, range(4)))
+
+    restored = WorkingMemory("u", "a")
+    assert [i["content"] for i in restored.items] == [i["content"] for i in wm.items]
+    assert restored.total_tokens() == wm.total_tokens()
@@ -1,19 +1,186 @@
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Any
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
 import openai
 import random
 from tenacity import retry, stop_after_attempt, wait_exponential
 from config import settings
 from utils.logger import logger
 
+
+class EmbeddingCache:
+    """
+    按内容哈希缓存向量
+    内存 LRU + 可选的磁盘存储 (SQLite)，重启后仍可命中
+    """
+
+    def __init__(self, max_items: int = 4096, disk_path: Optional[str] = None):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+        if disk_path:
+            try:
+                self._db = sqlite3.connect(disk_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+                )
+                self._db.commit()
+            except Exception as e:
+                logger.warning(f"Embedding 磁盘缓存不可用 ({disk_path}): {e}")
+                self._db = None
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is not None:
+                self._items.move_to_end(key)
+                self._stats["hits"] += 1
+                return vector
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    vector = array("d", row[0]).tolist()
+                    self._remember(key, vector)
+                    self._stats["disk_hits"] += 1
+                    return vector
+
+            self._stats["misses"] += 1
+            return None
+
+    def put_many(self, entries: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in entries.items():
+                self._remember(key, vector)
+            if self._db is not None and entries:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        [(k, array("d", v).tobytes()) for k, v in entries.items()],
+                    )
+                    self._db.commit()
+                except Exception as e:
+                    logger.warning(f"写入 Embedding 磁盘缓存失败: {e}")
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._items[key] = vector
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._items),
+                "max_items": self.max_items,
+                "disk": self._db is not None,
+                "hit_rate": round((self._stats["hits"] + self._stats["disk_hits"]) / lookups, 4) if lookups else 0.0,
+            }
+
+
+class EmbeddingBatcher:
+    """
+    微批队列：把并发的 embed_query / embed_documents 请求合并为一次 encoder 调用
+    第一个请求到达后最多等待 window 秒收集更多请求，单批不超过 max_batch 条
+    """
+
+    def __init__(self, encode: Callable[[List[str]], List[List[float]]], max_batch: int = 64, window: float = 0.005):
+        self.encode = encode
+        self.max_batch = max(1, max_batch)
+        self.window = max(0.0, window)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "batched_texts": 0, "max_batch_seen": 0}
+
+    def submit(self, texts: List[str]) -> List[List[float]]:
+        """提交文本并阻塞等待对应的向量"""
+        self._ensure_worker()
+        futures = []
+        for text in texts:
+            future: Future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return [f.result() for f in futures]
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(pending) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    pending.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._flush(pending)
+            except BaseException as e:
+                # worker 不能退出：否则所有等待中和后续的调用方都会永久阻塞
+                logger.error(f"Embedding 微批处理失败: {e}")
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _flush(self, pending: List[tuple]) -> None:
+        # 同一批次内相同文本只编码一次
+        unique = list(dict.fromkeys(text for text, _ in pending))
+        # encoder 不在此处重试 (重试由调用方负责)，失败的批次不会阻塞队列
+        encoded = self.encode(unique)
+        if len(encoded) != len(unique):
+            raise ValueError(f"encoder 返回 {len(encoded)} 个向量，期望 {len(unique)} 个")
+        vectors = dict(zip(unique, encoded))
+
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["batched_texts"] += len(unique)
+            self._stats["max_batch_seen"] = max(self._stats["max_batch_seen"], len(unique))
+        for text, future in pending:
+            if not future.done():
+                future.set_result(vectors[text])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            batches = self._stats["batches"]
+            return {
+                **self._stats,
+                "avg_batch_size": round(self._stats["batched_texts"] / batches, 2) if batches else 0.0,
+                "queued": self._queue.qsize(),
+            }
+
+
 class EmbeddingService:
     """向量嵌入服务"""
-    
+
 
     def __init__(self):
         self.provider = settings.EMBEDDING_PROVIDER
         self.is_mock = False
         self.model_name = settings.HF_EMBEDDING_MODEL if self.provider == "huggingface" else settings.EMBEDDING_MODEL
-        
+
         try:
             logger.info(f"⏳ 正在启动 Embedding 服务 (Provider: {self.provider}, Model: {self.model_name})...")
             if self.provider == "huggingface":
@@ -35,62 +202,97 @@ class EmbeddingService:
             logger.warning(f"❌ 初始化 Embedding 客户端失败: {e}。将使用 Mock 服务。")
             self.is_mock = True
 
+        disk_path = str(settings.DATA_DIR / "embedding_cache.db") if settings.EMBEDDING_DISK_CACHE else None
+        self.cache = EmbeddingCache(max_items=settings.EMBEDDING_CACHE_SIZE, disk_path=disk_path)
+        self.batcher = EmbeddingBatcher(
+            self._encode,
+            max_batch=settings.EMBEDDING_MAX_BATCH,
+            window=settings.EMBEDDING_BATCH_WINDOW_MS / 1000.0,
+        )
+
+    def _mock_vector(self) -> List[float]:
+        dims = 384 if self.provider == "huggingface" else 1536
+        return [random.random() for _ in range(dims)]
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """一次 encoder / API 调用 (由微批队列驱动，不在 worker 线程内重试)"""
+        if self.provider == "huggingface":
+            return self.client.encode(texts).tolist()
+        response = self.client.embeddings.create(
+            input=texts,
+            model=self.model_name
+        )
+        return [data.embedding for data in response.data]
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """先查缓存，未命中的文本合并进微批队列"""
+        keys = [EmbeddingCache.key(self.model_name, t) for t in texts]
+        vectors: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                missing[key] = text
+
+        if missing:
+            fresh = dict(zip(missing, self._submit(list(missing.values()))))
+            self.cache.put_many(fresh)
+            vectors.update(fresh)
+        return [vectors[k] for k in keys]
+
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _submit(self, texts: List[str]) -> List[List[float]]:
+        """
+        经微批队列编码；失败时在调用方线程重试并重新入队，
+        退避等待只影响本次调用，不会卡住共享的 batcher worker
+        """
+        return self.batcher.submit(texts)
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
         批量生成文档嵌入
         """
         if self.is_mock:
-            dims = 384 if self.provider == "huggingface" else 1536
-            return [[random.random() for _ in range(dims)] for _ in texts]
+            return [self._mock_vector() for _ in texts]
 
         try:
             # 移除空字符串
             valid_texts = [t for t in texts if t.strip()]
             if not valid_texts:
                 return []
-                
-            if self.provider == "huggingface":
-                embeddings = self.client.encode(valid_texts)
-                return embeddings.tolist()
-            else:
-                response = self.client.embeddings.create(
-                    input=valid_texts,
-                    model=self.model_name
-                )
-                return [data.embedding for data in response.data]
+            return self._embed(valid_texts)
         except Exception as e:
             logger.error(f"Failed to generate embeddings: {e}")
-            if self.is_mock: 
-                 dims = 384 if self.provider == "huggingface" else 1536
-                 return [[random.random() for _ in range(dims)] for _ in texts]
             raise
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     def embed_query(self, text: str) -> List[float]:
         """
         生成查询嵌入
         """
         if self.is_mock:
-            dims = 384 if self.provider == "huggingface" else 1536
-            return [random.random() for _ in range(dims)]
+            return self._mock_vector()
 
         try:
             if not text.strip():
                 return []
-            
-            if self.provider == "huggingface":
-                embedding = self.client.encode(text)
-                return embedding.tolist()
-            else:
-                response = self.client.embeddings.create(
-                    input=text,
-                    model=self.model_name
-                )
-                return response.data[0].embedding
+            return self._embed([text])[0]
         except Exception as e:
             logger.error(f"Failed to generate query embedding: {e}")
             raise
 
+    def stats(self) -> Dict[str, Any]:
+        """缓存与微批统计"""
+        return {
+            "provider": self.provider,
+            "model": self.model_name,
+            "mock": self.is_mock,
+            "cache": self.cache.stats(),
+            "batching": self.batcher.stats(),
+        }
+
 # 单例实例
 embedding_service = EmbeddingService()
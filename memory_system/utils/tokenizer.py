@@ -1,10 +1,21 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
 import tiktoken
 from .logger import logger
 
 class Tokenizer:
     """Token计数工具"""
     
-    def __init__(self, model_name: str = "gpt-4o"):
+    def __init__(self, model_name: str = "gpt-4o", cache_size: int = 8192):
+        # 按内容哈希缓存 Token 数 (检索结果、原则、画像等文本会被反复计数)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
         try:
             self.encoder = tiktoken.encoding_for_model(model_name)
         except Exception:
@@ -23,5 +34,29 @@ class Tokenizer:
             # 这是一个非常粗略的估计
             return len(text)
 
+    def count_tokens_cached(self, text: str) -> int:
+        """计算文本Token数 (带 LRU 缓存)"""
+        if not text:
+            return 0
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            count = self._cache.get(key)
+            if count is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return count
+            self._misses += 1
+
+        count = self.count_tokens(text)
+        with self._lock:
+            self._cache[key] = count
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "size": len(self._cache)}
+
 # 单例
 tokenizer = Tokenizer()
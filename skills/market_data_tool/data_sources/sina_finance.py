@@ -269,6 +269,58 @@ class SinaFinanceDataSource(BaseDataSource):
             self.logger.error(f"新浪财经获取 {symbol} 数据失败: {str(e)}")
             raise DataSourceError(self.name, e)
 
+    def get_quotes_bulk(self, symbols: List[str], market: str = "A-share") -> Dict[str, Dict[str, Any]]:
+        """
+        一次请求批量获取多只股票行情（list=代码1,代码2,...）
+
+        Args:
+            symbols: 股票代码列表
+            market: 市场类型
+
+        Returns:
+            {股票代码: 行情数据}，解析失败或无数据的代码不在结果中，由调用方逐只兜底
+        """
+        if market not in ["A-share", "US", "HK"] or not symbols:
+            return {}
+
+        sina_to_symbol = {}
+        for symbol in symbols:
+            try:
+                sina_to_symbol[self._convert_to_sina_format(symbol, market)] = symbol
+            except Exception as e:
+                self.logger.warning(f"跳过无法转换的代码 {symbol}: {e}")
+
+        results = {}
+        # 新浪单次 list 参数过长会被截断，按批请求
+        sina_symbols = list(sina_to_symbol)
+        for i in range(0, len(sina_symbols), 200):
+            batch = sina_symbols[i:i + 200]
+            try:
+                response = self.session.get(f"{self.base_url}?list={','.join(batch)}", timeout=self.timeout, headers={
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                    'Referer': 'https://finance.sina.com.cn/'
+                })
+                if response.status_code != 200:
+                    self.logger.warning(f"新浪财经批量请求失败: HTTP {response.status_code}")
+                    continue
+            except requests.exceptions.RequestException as e:
+                self.logger.warning(f"新浪财经批量请求失败: {e}")
+                continue
+
+            # 每行一条: var hq_str_sh600036="...";
+            for line in response.text.splitlines():
+                match = re.match(r'\s*var hq_str_(\w+)=', line)
+                if not match or match.group(1) not in sina_to_symbol:
+                    continue
+                symbol = sina_to_symbol[match.group(1)]
+                try:
+                    results[symbol] = self._parse_sina_response(line, symbol)
+                except Exception as e:
+                    self.logger.debug(f"批量解析 {symbol} 失败: {e}")
+
+        self.logger.info(f"新浪财经批量获取 {len(results)}/{len(symbols)} 只股票行情")
+        return results
+
     def _convert_to_sina_format(self, symbol: str, market: str = "A-share") -> str:
         """
         将股票代码转换为新浪微博格式
@@ -194,8 +194,19 @@ class AShareService:
                 valid_symbols = valid_symbols[:Config.BATCH_MAX_SYMBOLS]
                 logger.warning(f"批量查询数量超过限制，只处理前{len(valid_symbols)}只股票")
 
+            # 一次请求拉取全部代码，未命中的再逐只走主备数据源
+            bulk = {}
+            if rate_limiter.check_and_consume(self.market_type):
+                try:
+                    bulk = self.primary_source.get_quotes_bulk(valid_symbols, self.market_type)
+                except Exception as e:
+                    logger.warning(f"批量行情请求失败，逐只查询: {e}")
+
             results = []
             for symbol in valid_symbols:
+                if symbol in bulk:
+                    results.append(self._process_data(bulk[symbol], start_time, "sina"))
+                    continue
                 try:
                     # 批量查询使用较低的限流额度
                     if not rate_limiter.check_and_consume(self.market_type, 0.5):
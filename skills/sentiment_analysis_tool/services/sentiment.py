@@ -7,69 +7,21 @@ class SentimentService:
     """Service to analyze market sentiment from news using FinBERT"""
 
     def __init__(self):
-        self._model = None
-        self._tokenizer = None
-        self._model_loaded = False
+        self._engine = None
         self._use_finbert = True
-        
+
     def _load_model(self):
-        """Lazy load FinBERT model on first use"""
-        if self._model_loaded:
-            return
-            
+        """Lazy load the shared FinBERT engine on first use"""
+        # The engine module only needs the stdlib at import time; the agent service
+        # runs with the repository root on sys.path, so backend is importable there
         try:
-            logger.info("Loading FinBERT model...")
-            from transformers import AutoTokenizer, AutoModelForSequenceClassification
-            import torch
-            
-            # Load FinBERT model and tokenizer
-            model_name = "ProsusAI/finbert"
-            self._tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self._model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            self._model.eval()
-            
-            self._model_loaded = True
-            logger.info("FinBERT model loaded successfully")
-            
-        except Exception as e:
-            logger.error(f"Failed to load FinBERT model: {e}")
+            from backend.infrastructure.analysis.finbert_engine import finbert_engine
+            self._engine = finbert_engine
+            self._use_finbert = finbert_engine.load()
+        except ImportError as e:
+            logger.error(f"FinBERT engine unavailable: {e}")
             logger.warning("Falling back to heuristic sentiment analysis")
             self._use_finbert = False
-            self._model_loaded = True  # Mark as loaded to avoid retry
-
-    def _analyze_text_finbert(self, text: str) -> Dict[str, float]:
-        """Analyze sentiment of a single text using FinBERT"""
-        try:
-            import torch
-            
-            # Tokenize and prepare input
-            inputs = self._tokenizer(
-                text, 
-                return_tensors="pt", 
-                truncation=True, 
-                max_length=512,
-                padding=True
-            )
-            
-            # Get predictions
-            with torch.no_grad():
-                outputs = self._model(**inputs)
-                probs = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            logger.info(f"FinBERT analysis input: {text}")
-            logger.info(f"FinBERT analysis result: {probs}")
-            # FinBERT output: [positive, negative, neutral]
-            sentiment_scores = {
-                "positive": float(probs[0][0]),
-                "negative": float(probs[0][1]),
-                "neutral": float(probs[0][2])
-            }
-            
-            return sentiment_scores
-            
-        except Exception as e:
-            logger.error(f"FinBERT analysis failed: {e}")
-            # Return neutral scores on error
-            return {"positive": 0.33, "negative": 0.33, "neutral": 0.34}
 
     def _analyze_heuristic(self, news_items: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Fallback heuristic analysis (original implementation)"""
@@ -136,7 +88,7 @@ class SentimentService:
         self._load_model()
         
         # Use FinBERT if available, otherwise fallback to heuristic
-        if self._use_finbert and self._model is not None:
+        if self._use_finbert:
             return self._analyze_with_finbert(news_items)
         else:
             result = self._analyze_heuristic(news_items)
@@ -158,6 +110,7 @@ class SentimentService:
         
         key_drivers = []
         
+        texts = []
         for item in news_items:
             # Prepare text for analysis
             title = item['title']
@@ -166,18 +119,13 @@ class SentimentService:
             # If summary is same as title or empty, just use title
             # Otherwise combine title and summary
             if summary and summary != title:
-                text = f"{title}. {summary}"
+                texts.append(f"{title}. {summary}")
             else:
                 # Use only title for analysis
-                text = title
-            
-            # Log what we're analyzing (for debugging)
-            if len(text) < 50:
-                logger.debug(f"Analyzing short text: {text}")
-            
-            # Analyze with FinBERT
-            scores = self._analyze_text_finbert(text)
-            
+                texts.append(title)
+        
+        # Analyze all texts with FinBERT in one batched call
+        for item, scores in zip(news_items, self._engine.score(texts)):
             total_positive += scores['positive']
             total_negative += scores['negative']
             total_neutral += scores['neutral']